@@ -16,12 +16,29 @@ Autor: Luis
 Fecha: Enero 2026
 """
 
+import contextlib
+import io
+import json
+import os
+import time
+import zlib
+
 import requests
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import almacen_dataset
+from almacen_dataset import DIRECTORIO_PARQUET, SITIO_DEFECTO, guardar_parquet
+from ventanas_rodantes import VENTANAS, calcular_ventanas
+
+try:
+    # Opcional: compila la recurrencia del balance hidrico
+    from numba import njit
+except ImportError:
+    njit = None
+
 # =============================================================================
 # CONFIGURACION
 # =============================================================================
@@ -31,10 +48,30 @@ LATITUD = -2.690425
 LONGITUD = -78.935117
 TIMEZONE = "America/Guayaquil"
 
+# Con --sitios: procesos que generan sitios a la vez (None: uno por nucleo)
+PROCESOS_SITIOS = None
+
 # Directorio de salida
 OUTPUT_DIR = Path(__file__).parent / "dataset"
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# Descarga del historico (ver descargar_datos_historicos)
+ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+VARIABLES_HORARIAS = ["temperature_2m", "relative_humidity_2m", "precipitation"]
+MESES_POR_BLOQUE = 3
+DESCARGAS_PARALELAS = 4
+REINTENTOS = 5
+BACKOFF_S = 0.5  # espera antes del reintento n: BACKOFF_S * 2**(n-1)
+
+# Bloques ya descargados, para no volver a pedirlos
+CACHE_DIR = OUTPUT_DIR / "cache_open_meteo"
+
+ARCHIVO_DATASET = OUTPUT_DIR / "datos_historicos_jerusalen.csv"
+
+# Filas guardadas que necesita la actualizacion incremental para continuar
+# las ventanas (la mas larga menos la hora nueva)
+HORAS_CONTEXTO = max(horas for _, horas, _ in VENTANAS.values()) - 1
+
 # =============================================================================
 # PARAMETROS AGRONOMICOS (basados en FAO)
 # =============================================================================
@@ -47,13 +84,17 @@ PARAMETROS_RIEGO = {
     "HUMEDAD_OPTIMA_MIN": 40,  # Limite inferior optimo
     "HUMEDAD_OPTIMA_MAX": 70,  # Limite superior optimo
     "HUMEDAD_EXCESO": 80,  # No regar - riesgo de encharcamiento
+    "HUMEDAD_MODERADA": 50,  # Regar solo con calor extremo
     # Umbrales de precipitacion (mm)
+    "LLUVIA_ACTUAL_MIN": 0.5,  # Si llueve mas que esto en la hora, no regar
     "LLUVIA_RECIENTE_MIN": 5,  # Si llovio esto en ultimas horas, no regar
     "PROB_LLUVIA_ESPERAR": 70,  # Si prob > 70%, esperar
+    "PROB_LLUVIA_PREVENTIVO": 50,  # Riego preventivo solo si prob < 50%
     # Umbrales de temperatura (C)
     # Basado en FAO - ETo aumenta con temperatura
     "TEMP_ALTA": 28,  # Aumenta evapotranspiracion
     "TEMP_BAJA": 12,  # Reduce evapotranspiracion
+    "TEMP_EXTREMA": 30,  # Calor extremo - regar aunque el suelo este moderado
     # Horas optimas de riego (evitar evaporacion)
     "HORA_RIEGO_INICIO": 5,  # 5 AM
     "HORA_RIEGO_FIN": 9,  # 9 AM
@@ -63,36 +104,324 @@ PARAMETROS_RIEGO = {
 }
 
 
-def descargar_datos_historicos(fecha_inicio: str, fecha_fin: str) -> dict:
+def _en_horario_riego(c: dict, p: dict) -> np.ndarray:
+    """Mascara de filas dentro de la ventana optima de riego."""
+    return (c["hora"] >= p["HORA_RIEGO_INICIO"]) & (c["hora"] <= p["HORA_RIEGO_FIN"])
+
+
+# Reglas de decision en orden de prioridad: gana la primera que se cumple.
+# Cada regla: (id, descripcion, condicion(columnas, parametros), etiqueta)
+REGLAS_RIEGO = [
+    # Basado en punto de marchitez (wilting point)
+    (
+        1,
+        "Suelo critico - REGAR URGENTE",
+        lambda c, p: c["humedad_suelo"] < p["HUMEDAD_CRITICA"],
+        1,
+    ),
+    (
+        2,
+        "Suelo muy humedo o encharcado - NO REGAR",
+        lambda c, p: c["humedad_suelo"] >= p["HUMEDAD_EXCESO"],
+        0,
+    ),
+    (
+        3,
+        "Esta lloviendo o llovio recientemente - NO REGAR",
+        lambda c, p: (
+            (c["precipitacion"] > p["LLUVIA_ACTUAL_MIN"])
+            | (c["precip_24h"] > p["LLUVIA_RECIENTE_MIN"])
+        ),
+        0,
+    ),
+    (
+        4,
+        "Alta probabilidad de lluvia - ESPERAR",
+        lambda c, p: c["prob_lluvia"] > p["PROB_LLUVIA_ESPERAR"],
+        0,
+    ),
+    (
+        5,
+        "Suelo seco + calor + hora optima - REGAR",
+        lambda c, p: (
+            (c["humedad_suelo"] < p["HUMEDAD_BAJA"])
+            & (c["temperatura"] > p["TEMP_ALTA"])
+            & _en_horario_riego(c, p)
+        ),
+        1,
+    ),
+    (
+        6,
+        "Suelo seco + hora optima de manana - REGAR preventivo",
+        lambda c, p: (
+            (c["humedad_suelo"] < p["HUMEDAD_OPTIMA_MIN"])
+            & _en_horario_riego(c, p)
+            & (c["prob_lluvia"] < p["PROB_LLUVIA_PREVENTIVO"])
+        ),
+        1,
+    ),
+    (
+        7,
+        "Suelo moderado pero calor extremo - REGAR",
+        lambda c, p: (
+            (c["humedad_suelo"] < p["HUMEDAD_MODERADA"])
+            & (c["temperatura"] > p["TEMP_EXTREMA"])
+        ),
+        1,
+    ),
+    (
+        8,
+        "Humedad en rango optimo - NO REGAR",
+        lambda c, p: (
+            (c["humedad_suelo"] >= p["HUMEDAD_OPTIMA_MIN"])
+            & (c["humedad_suelo"] <= p["HUMEDAD_OPTIMA_MAX"])
+        ),
+        0,
+    ),
+]
+
+# Regla aplicada cuando ninguna se cumple: NO REGAR
+REGLA_DEFECTO = 0
+
+# Parametros del balance hidrico de simular_humedad_suelo. Con --sitios
+# cada sitio puede cambiar algunos (ver sitios.py)
+PARAMETROS_SUELO = {
+    "CAPACIDAD_CAMPO": 70.0,  # % - maximo que retiene el suelo
+    "PUNTO_MARCHITEZ": 12.0,  # % - minimo antes de estres severo
+    "HUMEDAD_INICIAL": 40.0,  # % - valor inicial mas bajo
+    # Tasas (por hora)
+    "TASA_INFILTRACION": 6.0,  # % por mm de lluvia (reducido)
+    "TASA_DRENAJE": 0.8,  # % por hora si esta sobre capacidad campo
+}
+
+
+def descargar_datos_historicos(
+    fecha_inicio: str,
+    fecha_fin: str,
+    url: str = ARCHIVE_URL,
+    latitud: float = LATITUD,
+    longitud: float = LONGITUD,
+    usar_cache: bool = True,
+    zona_horaria: str = TIMEZONE,
+    nombre: str = "Jerusalen, Ecuador",
+) -> dict:
     """
     Descarga datos historicos de Open-Meteo Historical Weather API.
 
+    El rango se divide en bloques de MESES_POR_BLOQUE meses calendario que
+    se descargan en paralelo con una sesion HTTP compartida, con reintentos
+    y espera exponencial. Cada bloque descargado se guarda en CACHE_DIR: al
+    volver a ejecutar solo se piden los dias que faltan. Los bloques se unen
+    en orden de fecha, sin importar en que orden terminen.
+
     Args:
         fecha_inicio: Fecha inicio en formato YYYY-MM-DD
         fecha_fin: Fecha fin en formato YYYY-MM-DD
+        url: Endpoint de la API (o de un servidor de prueba compatible)
+        latitud: Latitud del sitio
+        longitud: Longitud del sitio
+        usar_cache: Leer y escribir los bloques en CACHE_DIR
+        zona_horaria: Zona horaria de las horas de la respuesta
+        nombre: Nombre del sitio (solo para los mensajes)
 
     Returns:
         dict con datos de la API
     """
-    url = "https://archive-api.open-meteo.com/v1/archive"
-
-    params = {
-        "latitude": LATITUD,
-        "longitude": LONGITUD,
-        "start_date": fecha_inicio,
-        "end_date": fecha_fin,
-        "hourly": [
-            "temperature_2m",
-            "relative_humidity_2m",
-            "precipitation",
-        ],
-        "timezone": TIMEZONE,
-    }
+    from concurrent.futures import ThreadPoolExecutor
+
+    inicio = datetime.strptime(fecha_inicio, "%Y-%m-%d").date()
+    fin = datetime.strptime(fecha_fin, "%Y-%m-%d").date()
+    bloques = _dividir_en_bloques(inicio, fin)
+    # La zona horaria cambia las horas de la respuesta y las variables sus
+    # columnas: las dos van en la clave del cache, para no servir bloques
+    # guardados con otras horas o sin alguna variable
+    variables = zlib.crc32(",".join(VARIABLES_HORARIAS).encode())
+    clave = f"{latitud}_{longitud}_{zona_horaria.replace('/', '-')}_{variables:08x}"
+    cache_dir = CACHE_DIR / clave if usar_cache else None
 
     print(f"Descargando datos desde {fecha_inicio} hasta {fecha_fin}...")
-    print(f"Ubicacion: Jerusalen, Ecuador ({LATITUD}, {LONGITUD})")
+    print(f"Ubicacion: {nombre} ({latitud}, {longitud})")
+    print(f"Bloques de {MESES_POR_BLOQUE} meses: {len(bloques)}")
+
+    sesion = _crear_sesion()
+    solicitudes = []
+
+    def descargar(bloque):
+        return _descargar_bloque(
+            sesion,
+            url,
+            (latitud, longitud, zona_horaria),
+            *bloque,
+            cache_dir,
+            solicitudes,
+        )
+
+    with ThreadPoolExecutor(max_workers=DESCARGAS_PARALELAS) as pool:
+        respuestas = list(pool.map(descargar, bloques))
+    sesion.close()
+
+    print(f"Solicitudes a la API: {len(solicitudes)}")
+
+    hourly = _unir_horarios([r["hourly"] for r in respuestas], inicio, fin)
+    return {**respuestas[0], "hourly": hourly}
+
+
+def _dividir_en_bloques(inicio, fin) -> list:
+    """
+    Divide [inicio, fin] en bloques alineados a MESES_POR_BLOQUE meses.
+
+    Los limites no dependen de inicio ni fin, asi que dos ejecuciones con
+    rangos distintos comparten los bloques (y el cache) que tienen en comun.
+
+    Returns:
+        lista de (inicio del bloque, desde, hasta): la primera fecha del
+        bloque alineado y el tramo de ese bloque que cae dentro del rango
+    """
+    bloques = []
+    mes = (inicio.year * 12 + inicio.month - 1) // MESES_POR_BLOQUE * MESES_POR_BLOQUE
+    while True:
+        inicio_bloque = datetime(mes // 12, mes % 12 + 1, 1).date()
+        if inicio_bloque > fin:
+            return bloques
+        mes += MESES_POR_BLOQUE
+        fin_bloque = datetime(mes // 12, mes % 12 + 1, 1).date() - timedelta(days=1)
+        bloques.append(
+            (inicio_bloque, max(inicio, inicio_bloque), min(fin, fin_bloque))
+        )
+
+
+def _crear_sesion():
+    """Sesion con conexiones reutilizables y reintentos con espera exponencial."""
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    reintentos = Retry(
+        total=REINTENTOS,
+        backoff_factor=BACKOFF_S,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=["GET"],
+    )
+    adaptador = HTTPAdapter(
+        pool_connections=DESCARGAS_PARALELAS,
+        pool_maxsize=DESCARGAS_PARALELAS,
+        max_retries=reintentos,
+    )
+    sesion = requests.Session()
+    sesion.mount("http://", adaptador)
+    sesion.mount("https://", adaptador)
+    return sesion
+
+
+def _descargar_bloque(
+    sesion, url, ubicacion, inicio_bloque, desde, hasta, cache_dir, solicitudes
+) -> dict:
+    """
+    Retorna la respuesta de la API para un bloque, cubriendo [desde, hasta].
+
+    Si el cache ya tiene parte del bloque solo se piden los dias de antes o
+    de despues que faltan, y el bloque ampliado se vuelve a guardar.
+    `ubicacion` es (latitud, longitud, zona horaria).
+
+    Los dias finales con horas que Open-Meteo aun no publico (llegan en
+    null) no se guardan como cubiertos: la siguiente ejecucion los vuelve
+    a pedir.
+    """
+    archivo = cache_dir / f"bloque_{inicio_bloque}.json" if cache_dir else None
+    guardado = None
+    if archivo is not None and archivo.exists():
+        with open(archivo) as f:
+            guardado = json.load(f)
+
+    if guardado is None:
+        respuesta = _pedir_rango(sesion, url, ubicacion, desde, hasta)
+        solicitudes.append((desde, hasta))
+        cubierto = (desde, hasta)
+    else:
+        respuesta = guardado["respuesta"]
+        cubierto_desde = datetime.strptime(guardado["desde"], "%Y-%m-%d").date()
+        cubierto_hasta = datetime.strptime(guardado["hasta"], "%Y-%m-%d").date()
+        partes = [respuesta["hourly"]]
+
+        if desde < cubierto_desde:
+            hasta_antes = cubierto_desde - timedelta(days=1)
+            antes = _pedir_rango(sesion, url, ubicacion, desde, hasta_antes)
+            solicitudes.append((desde, hasta_antes))
+            partes.insert(0, antes["hourly"])
+        if hasta > cubierto_hasta:
+            desde_despues = cubierto_hasta + timedelta(days=1)
+            despues = _pedir_rango(sesion, url, ubicacion, desde_despues, hasta)
+            solicitudes.append((desde_despues, hasta))
+            partes.append(despues["hourly"])
+
+        if len(partes) == 1:
+            return respuesta
+        cubierto = (min(desde, cubierto_desde), max(hasta, cubierto_hasta))
+        respuesta = {**respuesta, "hourly": _unir_horarios(partes, *cubierto)}
+
+    if archivo is not None:
+        _guardar_bloque(archivo, respuesta, *cubierto)
+
+    return respuesta
+
+
+def _guardar_bloque(archivo: Path, respuesta: dict, desde, hasta):
+    """Guarda en el cache la respuesta de un bloque que cubre [desde, hasta]."""
+    # Horas aun no publicadas al final: se guarda solo hasta el ultimo dia
+    # completo, y si no hay ninguno no se guarda nada
+    completo_hasta = _ultimo_dia_completo(respuesta["hourly"])
+    if completo_hasta is None or completo_hasta < desde:
+        return
+    if completo_hasta < hasta:
+        hasta = completo_hasta
+        respuesta = {
+            **respuesta,
+            "hourly": _unir_horarios([respuesta["hourly"]], desde, hasta),
+        }
+
+    archivo.parent.mkdir(parents=True, exist_ok=True)
+    temporal = archivo.with_suffix(".tmp")
+    with open(temporal, "w") as f:
+        json.dump({"desde": str(desde), "hasta": str(hasta), "respuesta": respuesta}, f)
+    # Reemplazo atomico: un corte a mitad de escritura no deja un
+    # bloque incompleto en el cache
+    os.replace(temporal, archivo)
+
+
+def _ultimo_dia_completo(hourly: dict):
+    """
+    Ultimo dia hasta el que no quedan horas nulas al final de `hourly`.
 
-    response = requests.get(url, params=params, timeout=60)
+    Returns:
+        date (el dia anterior al de la ultima hora completa si ese dia
+        quedo a medias), o None si ninguna hora tiene todos los valores
+    """
+    tiempos = hourly["time"]
+    columnas = [hourly[v] for v in VARIABLES_HORARIAS]
+    ultima = len(tiempos) - 1
+    while ultima >= 0 and any(c[ultima] is None for c in columnas):
+        ultima -= 1
+    if ultima < 0:
+        return None
+
+    dia = datetime.strptime(tiempos[ultima][:10], "%Y-%m-%d").date()
+    # Si la hora siguiente es del mismo dia, ese dia quedo a medias
+    if ultima + 1 < len(tiempos) and tiempos[ultima + 1][:10] == tiempos[ultima][:10]:
+        dia -= timedelta(days=1)
+    return dia
+
+
+def _pedir_rango(sesion, url, ubicacion, desde, hasta) -> dict:
+    """Una solicitud a la API para los dias [desde, hasta]."""
+    latitud, longitud, zona_horaria = ubicacion
+    params = {
+        "latitude": latitud,
+        "longitude": longitud,
+        "start_date": str(desde),
+        "end_date": str(hasta),
+        "hourly": VARIABLES_HORARIAS,
+        "timezone": zona_horaria,
+    }
+    response = sesion.get(url, params=params, timeout=60)
 
     if response.status_code != 200:
         raise Exception(f"Error en API: {response.status_code} - {response.text}")
@@ -100,12 +429,40 @@ def descargar_datos_historicos(fecha_inicio: str, fecha_fin: str) -> dict:
     return response.json()
 
 
-def procesar_datos(data: dict) -> pd.DataFrame:
+def _unir_horarios(partes: list, desde, hasta) -> dict:
+    """
+    Concatena bloques "hourly" en orden y recorta a los dias [desde, hasta].
+
+    Verifica que las horas queden estrictamente crecientes (sin huecos por
+    bloques desordenados ni horas duplicadas entre bloques).
+    """
+    unido = {
+        clave: [v for parte in partes for v in parte[clave]] for clave in partes[0]
+    }
+    desde, hasta = str(desde), str(hasta)
+    conservar = [i for i, t in enumerate(unido["time"]) if desde <= t[:10] <= hasta]
+    unido = {clave: [valores[i] for i in conservar] for clave, valores in unido.items()}
+
+    tiempos = unido["time"]
+    if any(a >= b for a, b in zip(tiempos, tiempos[1:])):
+        raise ValueError("Las horas descargadas no quedaron en orden estricto")
+    return unido
+
+
+def procesar_datos(
+    data: dict, anterior: pd.DataFrame = None, suelo: dict = None, rng=None
+) -> pd.DataFrame:
     """
     Convierte la respuesta de la API a DataFrame con features adicionales.
 
     Args:
         data: Respuesta JSON de Open-Meteo
+        anterior: Ultimas filas ya guardadas del dataset (ver
+            actualizar_dataset). Si se pasa, solo se procesan las horas
+            posteriores, y las ventanas y la simulacion de humedad continuan
+            desde esas filas en lugar de empezar de cero.
+        suelo: Parametros de suelo del sitio (ver simular_humedad_suelo)
+        rng: Generador del ruido de la simulacion (ver simular_humedad_suelo)
 
     Returns:
         DataFrame con datos procesados
@@ -120,6 +477,9 @@ def procesar_datos(data: dict) -> pd.DataFrame:
             "precipitacion": hourly["precipitation"],
         }
     )
+    if anterior is not None:
+        df = df[df["timestamp"] > anterior["timestamp"].iloc[-1]]
+        df = df.reset_index(drop=True)
 
     # Features temporales
     df["hora"] = df["timestamp"].dt.hour
@@ -127,25 +487,41 @@ def procesar_datos(data: dict) -> pd.DataFrame:
     df["dia_semana"] = df["timestamp"].dt.dayofweek
     df["dia_del_anio"] = df["timestamp"].dt.dayofyear
 
+    # Las ventanas de las filas nuevas incluyen las horas ya guardadas
+    base, n_anterior, humedad_anterior = df, 0, None
+    if anterior is not None:
+        columnas = ["temperatura", "humedad_ambiente", "precipitacion", "mes"]
+        base = pd.concat([anterior[columnas], df[columnas]], ignore_index=True)
+        n_anterior = len(anterior)
+        humedad_anterior = float(anterior["humedad_suelo"].iloc[-1])
+
+    # Features de ventana (precip_24h, temp_promedio_6h): misma definicion
+    # que usa el servicio en vivo, ver ventanas_rodantes.py
+    ventanas = calcular_ventanas(base, ["precip_24h", "temp_promedio_6h"])
+
     # Precipitacion acumulada ultimas 24 horas
-    df["precip_24h"] = df["precipitacion"].rolling(window=24, min_periods=1).sum()
+    df["precip_24h"] = ventanas["precip_24h"][n_anterior:]
 
     # Calcular probabilidad de lluvia simulada basada en patrones
     # (En produccion vendria de la API de pronostico)
-    df["prob_lluvia"] = calcular_prob_lluvia_simulada(df)
+    df["prob_lluvia"] = calcular_prob_lluvia_simulada(base).to_numpy()[n_anterior:]
 
     # Temperatura promedio ultimas 6 horas
-    df["temp_promedio_6h"] = df["temperatura"].rolling(window=6, min_periods=1).mean()
+    df["temp_promedio_6h"] = ventanas["temp_promedio_6h"][n_anterior:]
 
     # SIMULAR humedad del suelo
     # Open-Meteo no provee soil_moisture para esta ubicacion
     # Usamos un modelo fisico simplificado basado en balance hidrico
-    df["humedad_suelo"] = simular_humedad_suelo(df)
+    df["humedad_suelo"] = simular_humedad_suelo(
+        df, rng=rng, humedad_anterior=humedad_anterior, suelo=suelo
+    )
 
     return df
 
 
-def simular_humedad_suelo(df: pd.DataFrame) -> pd.Series:
+def simular_humedad_suelo(
+    df: pd.DataFrame, rng=None, humedad_anterior: float = None, suelo: dict = None
+) -> pd.Series:
     """
     Simula la humedad del suelo usando un modelo de balance hidrico simplificado.
 
@@ -162,73 +538,166 @@ def simular_humedad_suelo(df: pd.DataFrame) -> pd.Series:
     NOTA: Se ajustan parametros para generar un dataset balanceado
     que represente escenarios realistas de pastizales que SI necesitan riego.
 
+    Todo lo que no depende de la hora anterior (ganancia por lluvia,
+    evapotranspiracion y ruido) se calcula de una vez como arrays de NumPy;
+    solo la recurrencia con limites se integra hora a hora en
+    `_integrar_balance_hidrico` (compilada con numba si esta instalado).
+
+    Args:
+        df: DataFrame con precipitacion, temperatura, humedad_ambiente, hora y mes
+        rng: Generador del ruido. None usa np.random global (reproduce
+            exactamente la serie historica tras np.random.seed); tambien acepta
+            una semilla entera, un np.random.Generator o un np.random.RandomState
+        humedad_anterior: Humedad de la hora previa a df. Si se pasa, la
+            simulacion continua desde ella (la primera fila tambien se
+            integra) en lugar de empezar en HUMEDAD_INICIAL.
+        suelo: Parametros del sitio que reemplazan a los de PARAMETROS_SUELO
+            (ej. {"CAPACIDAD_CAMPO": 60.0}); None usa PARAMETROS_SUELO.
+
     Returns:
         Serie con humedad del suelo simulada (0-100%)
     """
     n = len(df)
     humedad = np.zeros(n)
 
+    if n == 0:
+        return pd.Series(humedad, index=df.index)
+
     # Parametros del modelo - AJUSTADOS para mayor variabilidad
-    CAPACIDAD_CAMPO = 70.0  # % - maximo que retiene el suelo
-    PUNTO_MARCHITEZ = 12.0  # % - minimo antes de estres severo
-    HUMEDAD_INICIAL = 40.0  # % - valor inicial mas bajo
+    p = PARAMETROS_SUELO if suelo is None else {**PARAMETROS_SUELO, **suelo}
+    CAPACIDAD_CAMPO = p["CAPACIDAD_CAMPO"]
+    PUNTO_MARCHITEZ = p["PUNTO_MARCHITEZ"]
+    HUMEDAD_INICIAL = p["HUMEDAD_INICIAL"]
+    TASA_INFILTRACION = p["TASA_INFILTRACION"]
+    TASA_DRENAJE = p["TASA_DRENAJE"]
+
+    precip = df["precipitacion"].to_numpy(dtype=float)
+    temp = df["temperatura"].to_numpy(dtype=float)
+    hum_amb = df["humedad_ambiente"].to_numpy(dtype=float)
+    hora = df["hora"].to_numpy()
+    mes = df["mes"].to_numpy()
+
+    # 1. Ganancia por precipitacion
+    ganancia = precip * TASA_INFILTRACION
+
+    # 2. Perdida por evapotranspiracion (AUMENTADA)
+    # Mayor evaporacion con: alta temp, baja humedad ambiente, horas de sol
+    # (np.where en lugar de np.maximum para tratar NaN igual que max() de Python)
+    es_dia = (hora >= 6) & (hora <= 18)
+    factor_solar = np.where(es_dia, 2.0, 0.4)  # Aumentado
+    factor_temp = (temp - 8) / 15  # Mas sensible a temperatura
+    factor_temp = np.where(factor_temp > 0, factor_temp, 0.0)
+    factor_humedad = (100 - hum_amb) / 80  # Siempre algo de evaporacion
+    factor_humedad = np.where(factor_humedad > 0.2, factor_humedad, 0.2)
+
+    # Factor estacional - meses secos en Ecuador (jun-sep) pierden mas agua
+    es_estacion_seca = np.isin(mes, [6, 7, 8, 9])
+    factor_estacional = np.where(es_estacion_seca, 1.8, 1.0)
+
+    perdida_eto = 0.6 * factor_solar * factor_temp * factor_humedad * factor_estacional
+
+    if humedad_anterior is None:
+        humedad[0] = HUMEDAD_INICIAL
+    else:
+        # Fila virtual con el estado guardado: la recurrencia parte de ella
+        humedad = np.concatenate([[humedad_anterior], humedad])
+        ganancia = np.concatenate([[0.0], ganancia])
+        perdida_eto = np.concatenate([[0.0], perdida_eto])
+
+    # 7. Ruido para simular variabilidad natural (una muestra por hora simulada)
+    if rng is None:
+        ruido = np.random.normal(0, 2.5, size=len(humedad) - 1)
+    else:
+        if isinstance(rng, (int, np.integer)):
+            rng = np.random.default_rng(rng)
+        ruido = rng.normal(0, 2.5, size=len(humedad) - 1)
+
+    # 3-6. Drenaje, consumo de plantas y limites fisicos (recurrencia)
+    humedad = _integrar_balance_hidrico(
+        humedad,
+        ganancia,
+        perdida_eto,
+        ruido,
+        CAPACIDAD_CAMPO,
+        TASA_DRENAJE,
+        PUNTO_MARCHITEZ * 0.6,
+        CAPACIDAD_CAMPO * 1.1,
+    )
+    if humedad_anterior is not None:
+        humedad = humedad[1:]
 
-    # Tasas (por hora) - AUMENTAMOS evapotranspiracion
-    TASA_INFILTRACION = 6.0  # % por mm de lluvia (reducido)
-    TASA_DRENAJE = 0.8  # % por hora si esta sobre capacidad campo
+    return pd.Series(humedad, index=df.index)
 
-    humedad[0] = HUMEDAD_INICIAL
 
-    for i in range(1, n):
+def _integrar_balance_hidrico_py(
+    humedad,
+    ganancia,
+    perdida_eto,
+    ruido,
+    capacidad_campo,
+    tasa_drenaje,
+    limite_inferior,
+    limite_superior,
+):
+    """
+    Integra la recurrencia del balance hidrico hora a hora.
+
+    Los limites se aplican con comparaciones explicitas que reproducen la
+    semantica de min()/max() de Python (incluido el tratamiento de NaN),
+    de modo que la version compilada y la de Python puro dan el mismo
+    resultado bit a bit que el bucle original.
+    """
+    # Perdida base por consumo de plantas (pastos consumen agua), % por hora
+    perdida_plantas = 0.15
+
+    for i in range(1, len(humedad)):
         h_anterior = humedad[i - 1]
-        precip = df["precipitacion"].iloc[i]
-        temp = df["temperatura"].iloc[i]
-        hum_amb = df["humedad_ambiente"].iloc[i]
-        hora = df["hora"].iloc[i]
-        mes = df["mes"].iloc[i]
-
-        # 1. Ganancia por precipitacion
-        ganancia = precip * TASA_INFILTRACION
-
-        # 2. Perdida por evapotranspiracion (AUMENTADA)
-        # Mayor evaporacion con: alta temp, baja humedad ambiente, horas de sol
-        es_dia = 6 <= hora <= 18
-        factor_solar = 2.0 if es_dia else 0.4  # Aumentado
-        factor_temp = max(0, (temp - 8) / 15)  # Mas sensible a temperatura
-        factor_humedad = max(0.2, (100 - hum_amb) / 80)  # Siempre algo de evaporacion
-
-        # Factor estacional - meses secos en Ecuador (jun-sep) pierden mas agua
-        es_estacion_seca = mes in [6, 7, 8, 9]
-        factor_estacional = 1.8 if es_estacion_seca else 1.0
-
-        perdida_eto = (
-            0.6 * factor_solar * factor_temp * factor_humedad * factor_estacional
-        )
 
-        # 3. Drenaje si esta sobre capacidad de campo
-        if h_anterior > CAPACIDAD_CAMPO:
-            perdida_drenaje = TASA_DRENAJE
-        else:
-            perdida_drenaje = 0
+        h_nueva = h_anterior + ganancia[i] - perdida_eto[i]
 
-        # 4. Perdida base por consumo de plantas (pastos consumen agua)
-        perdida_plantas = 0.15  # % por hora
+        # Drenaje si esta sobre capacidad de campo
+        if h_anterior > capacidad_campo:
+            h_nueva = h_nueva - tasa_drenaje
 
-        # 5. Calcular nueva humedad
-        h_nueva = (
-            h_anterior + ganancia - perdida_eto - perdida_drenaje - perdida_plantas
-        )
+        h_nueva = h_nueva - perdida_plantas
 
-        # 6. Limitar a rango fisico
-        h_nueva = max(PUNTO_MARCHITEZ * 0.6, min(CAPACIDAD_CAMPO * 1.1, h_nueva))
+        # Limitar a rango fisico: max(inferior, min(superior, h))
+        h_nueva = h_nueva if h_nueva < limite_superior else limite_superior
+        h_nueva = h_nueva if h_nueva > limite_inferior else limite_inferior
 
-        # 7. Agregar ruido para simular variabilidad natural (aumentado)
-        ruido = np.random.normal(0, 2.5)
-        h_nueva = max(8, min(80, h_nueva + ruido))
+        # Ruido y limite del sensor: max(8, min(80, h + ruido))
+        h_nueva = h_nueva + ruido[i - 1]
+        h_nueva = h_nueva if h_nueva < 80.0 else 80.0
+        h_nueva = h_nueva if h_nueva > 8.0 else 8.0
 
         humedad[i] = h_nueva
 
-    return pd.Series(humedad, index=df.index)
+    return humedad
+
+
+def _integrar_balance_hidrico(humedad, ganancia, perdida_eto, ruido, *limites):
+    """Ejecuta la recurrencia compilada si hay numba, o sobre listas de Python."""
+    if _integrar_balance_hidrico_nb is not None:
+        return _integrar_balance_hidrico_nb(
+            humedad, ganancia, perdida_eto, ruido, *limites
+        )
+
+    # Sin numba: iterar sobre floats de Python es mucho mas rapido que
+    # indexar arrays de NumPy elemento a elemento
+    resultado = _integrar_balance_hidrico_py(
+        humedad.tolist(),
+        ganancia.tolist(),
+        perdida_eto.tolist(),
+        ruido.tolist(),
+        *limites,
+    )
+    return np.array(resultado, dtype=float)
+
+
+if njit is not None:
+    _integrar_balance_hidrico_nb = njit(cache=True)(_integrar_balance_hidrico_py)
+else:
+    _integrar_balance_hidrico_nb = None
 
 
 def calcular_prob_lluvia_simulada(df: pd.DataFrame) -> pd.Series:
@@ -246,7 +715,8 @@ def calcular_prob_lluvia_simulada(df: pd.DataFrame) -> pd.Series:
     prob = (df["humedad_ambiente"] - 50).clip(0, 50)  # 0-50 base
 
     # 2. Precipitacion reciente aumenta probabilidad
-    prob += (df["precipitacion"].rolling(window=6, min_periods=1).sum() * 5).clip(0, 30)
+    precip_6h = pd.Series(calcular_ventanas(df, ["precip_6h"])["precip_6h"], df.index)
+    prob += (precip_6h * 5).clip(0, 30)
 
     # 3. Patron estacional (meses lluviosos en Ecuador: feb-may, oct-nov)
     meses_lluviosos = df["mes"].isin([2, 3, 4, 5, 10, 11])
@@ -258,6 +728,48 @@ def calcular_prob_lluvia_simulada(df: pd.DataFrame) -> pd.Series:
     return prob
 
 
+def evaluar_reglas_riego(df: pd.DataFrame, parametros: dict = None) -> tuple:
+    """
+    Evalua REGLAS_RIEGO sobre todas las filas a la vez con mascaras booleanas.
+
+    Args:
+        df: DataFrame con humedad_suelo, temperatura, precipitacion,
+            precip_24h, prob_lluvia y hora
+        parametros: Umbrales a usar (por defecto PARAMETROS_RIEGO)
+
+    Returns:
+        etiquetas: array con 1 (REGAR) o 0 (NO_REGAR) por fila
+        reglas: array int8 con el id de la regla que decidio
+            (REGLA_DEFECTO si ninguna se cumplio)
+    """
+    p = PARAMETROS_RIEGO if parametros is None else parametros
+
+    columnas = {
+        col: df[col].to_numpy()
+        for col in [
+            "humedad_suelo",
+            "temperatura",
+            "precipitacion",
+            "precip_24h",
+            "prob_lluvia",
+            "hora",
+        ]
+    }
+
+    # np.select toma, por fila, la primera condicion verdadera
+    condiciones = [condicion(columnas, p) for _, _, condicion, _ in REGLAS_RIEGO]
+    etiquetas = np.select(
+        condiciones, [etiqueta for _, _, _, etiqueta in REGLAS_RIEGO], default=0
+    )
+    reglas = np.select(
+        condiciones,
+        [regla_id for regla_id, _, _, _ in REGLAS_RIEGO],
+        default=REGLA_DEFECTO,
+    ).astype(np.int8)
+
+    return etiquetas, reglas
+
+
 def generar_etiquetas(df: pd.DataFrame) -> pd.DataFrame:
     """
     Genera etiquetas (REGAR=1, NO_REGAR=0) basadas en criterios agronomicos.
@@ -267,68 +779,316 @@ def generar_etiquetas(df: pd.DataFrame) -> pd.DataFrame:
     - Factor de agotamiento (p) para pastos: 0.55-0.60
     - Practicas de riego para pastizales en sierra andina
 
+    Las reglas estan definidas en REGLAS_RIEGO y se evaluan vectorizadas.
+
     Args:
         df: DataFrame con datos de sensores y clima
 
     Returns:
-        DataFrame con columna 'regar' agregada
-    """
-    p = PARAMETROS_RIEGO
-
-    def decidir_riego(row) -> int:
-        humedad = row["humedad_suelo"]
-        temp = row["temperatura"]
-        precip = row["precipitacion"]
-        precip_24h = row["precip_24h"]
-        prob_lluvia = row["prob_lluvia"]
-        hora = row["hora"]
-
-        # REGLA 1: Suelo critico - REGAR URGENTE
-        # Basado en punto de marchitez (wilting point)
-        if humedad < p["HUMEDAD_CRITICA"]:
-            return 1
-
-        # REGLA 2: Suelo muy humedo o encharcado - NO REGAR
-        if humedad >= p["HUMEDAD_EXCESO"]:
-            return 0
-
-        # REGLA 3: Esta lloviendo o llovio recientemente - NO REGAR
-        if precip > 0.5 or precip_24h > p["LLUVIA_RECIENTE_MIN"]:
-            return 0
-
-        # REGLA 4: Alta probabilidad de lluvia - ESPERAR
-        if prob_lluvia > p["PROB_LLUVIA_ESPERAR"]:
-            return 0
-
-        # REGLA 5: Suelo seco + calor + hora optima - REGAR
-        if (
-            humedad < p["HUMEDAD_BAJA"]
-            and temp > p["TEMP_ALTA"]
-            and p["HORA_RIEGO_INICIO"] <= hora <= p["HORA_RIEGO_FIN"]
-        ):
-            return 1
-
-        # REGLA 6: Suelo seco + hora optima de manana - REGAR preventivo
-        if (
-            humedad < p["HUMEDAD_OPTIMA_MIN"]
-            and p["HORA_RIEGO_INICIO"] <= hora <= p["HORA_RIEGO_FIN"]
-            and prob_lluvia < 50
-        ):
-            return 1
-
-        # REGLA 7: Suelo moderado pero calor extremo - REGAR
-        if humedad < 50 and temp > 30:
-            return 1
-
-        # REGLA 8: Humedad en rango optimo - NO REGAR
-        if p["HUMEDAD_OPTIMA_MIN"] <= humedad <= p["HUMEDAD_OPTIMA_MAX"]:
-            return 0
-
-        # DEFAULT: NO REGAR
-        return 0
-
-    df["regar"] = df.apply(decidir_riego, axis=1)
+        DataFrame con la columna 'regar' agregada. La regla que decidio cada
+        registro no se guarda en el dataset; mostrar_estadisticas la vuelve
+        a calcular con evaluar_reglas_riego
+    """
+    df["regar"], _ = evaluar_reglas_riego(df)
+
+    return df
+
+
+@contextlib.contextmanager
+def medir_fase(tiempos: dict, fase: str):
+    """Suma a tiempos[fase] los segundos del bloque (si tiempos no es None)."""
+    inicio = time.perf_counter()
+    yield
+    if tiempos is not None:
+        tiempos[fase] = tiempos.get(fase, 0.0) + time.perf_counter() - inicio
+
+
+def semilla_sitio(site_id: str) -> int:
+    """Semilla del ruido de la simulacion de un sitio: la misma en cada proceso."""
+    return zlib.crc32(site_id.encode())
+
+
+def generar_dataset(
+    fecha_inicio: str,
+    fecha_fin: str,
+    url: str = ARCHIVE_URL,
+    usar_cache: bool = True,
+    sitio: dict = None,
+    tiempos: dict = None,
+) -> pd.DataFrame:
+    """
+    Descarga, procesa y etiqueta el historico completo desde HUMEDAD_INICIAL.
+
+    Args:
+        sitio: sitio de sitios.cargar_sitios (coordenadas, zona horaria y
+            suelo); su ruido sale de semilla_sitio. None: Jerusalen con
+            PARAMETROS_SUELO y el ruido de np.random global
+        tiempos: dict donde sumar los segundos de cada fase
+
+    Returns:
+        DataFrame listo para guardar (sin filas con NaN)
+    """
+    ubicacion, suelo, rng = {}, None, None
+    if sitio is not None:
+        ubicacion = {
+            "latitud": sitio["latitud"],
+            "longitud": sitio["longitud"],
+            "zona_horaria": sitio["timezone"] or TIMEZONE,
+            "nombre": sitio["nombre"],
+        }
+        suelo = sitio["suelo"]
+        rng = np.random.default_rng(semilla_sitio(sitio["site_id"]))
+
+    with medir_fase(tiempos, "descarga"):
+        data = descargar_datos_historicos(
+            fecha_inicio, fecha_fin, url=url, usar_cache=usar_cache, **ubicacion
+        )
+    print(f"Datos descargados correctamente")
+
+    with medir_fase(tiempos, "proceso"):
+        df = procesar_datos(data, suelo=suelo, rng=rng)
+    print(f"Datos procesados: {len(df)} registros horarios")
+
+    with medir_fase(tiempos, "etiquetas"):
+        df = generar_etiquetas(df)
+    print(f"Etiquetas generadas con criterios FAO")
+
+    df_clean = df.dropna()
+    print(f"Registros validos despues de limpieza: {len(df_clean)}")
+    return df_clean
+
+
+def generar_sitio(
+    sitio: dict,
+    fecha_inicio: str,
+    fecha_fin: str,
+    url: str,
+    usar_cache: bool,
+    directorio,
+) -> dict:
+    """
+    Genera el historico de un sitio y lo guarda en su particion del almacen.
+
+    Es la tarea de cada proceso en generar_multisitio: el DataFrame se
+    escribe aqui y al proceso principal solo vuelve el resumen.
+
+    Returns:
+        dict con site_id, filas, fraccion REGAR, segundos por fase y pid
+    """
+    tiempos = {}
+    # Los mensajes de cada sitio se mezclarian entre procesos
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = generar_dataset(
+            fecha_inicio, fecha_fin, url, usar_cache, sitio=sitio, tiempos=tiempos
+        )
+        with medir_fase(tiempos, "guardado"):
+            guardar_parquet(df, directorio, sitio=sitio["site_id"])
+    return {
+        "site_id": sitio["site_id"],
+        "filas": len(df),
+        "regar": float(df["regar"].mean()) if len(df) else 0.0,
+        **tiempos,
+        "pid": os.getpid(),
+    }
+
+
+def generar_multisitio(
+    sitios: list,
+    fecha_inicio: str,
+    fecha_fin: str,
+    url: str = ARCHIVE_URL,
+    usar_cache: bool = True,
+    directorio: Path = DIRECTORIO_PARQUET,
+    procesos: int = PROCESOS_SITIOS,
+) -> pd.DataFrame:
+    """
+    Genera el historico de varios sitios en un pool de procesos.
+
+    Cada sitio (descarga, proceso, simulacion, etiquetas y guardado) es una
+    tarea independiente: la simulacion y las etiquetas, que son CPU, se
+    reparten entre los nucleos. Cada sitio se guarda en su particion
+    site_id=... del almacen Parquet (los demas sitios no se tocan) y se
+    informa al terminar, con el tiempo de cada fase.
+
+    SITIO_DEFECTO se omite: su particion es la copia del CSV (--parquet),
+    a la que --incremental agrega filas simuladas desde el estado del CSV.
+    Regenerarla aqui, con la semilla de semilla_sitio, la dejaria con otra
+    serie que la del CSV.
+
+    Args:
+        sitios: lista de sitios.cargar_sitios
+        directorio: raiz del almacen Parquet
+        procesos: procesos del pool (None: uno por nucleo)
+
+    Returns:
+        DataFrame con el resumen de generar_sitio de cada sitio
+
+    Raises:
+        RuntimeError: si fallo algun sitio (los demas quedan guardados)
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    if almacen_dataset.pa is None:
+        raise ImportError(
+            "El dataset de varios sitios requiere pyarrow: uv sync --extra parquet"
+        )
+
+    if any(sitio["site_id"] == SITIO_DEFECTO for sitio in sitios):
+        print(
+            f"Sitio '{SITIO_DEFECTO}' omitido: su particion se genera desde el "
+            "CSV (01_descargar_datos.py --parquet)"
+        )
+        sitios = [sitio for sitio in sitios if sitio["site_id"] != SITIO_DEFECTO]
+    if not sitios:
+        return pd.DataFrame()
+
+    procesos = min(procesos or os.cpu_count(), len(sitios))
+    print(f"Sitios: {len(sitios)}, procesos: {procesos}")
+    print(f"Destino: {directorio}\n")
+
+    inicio = time.perf_counter()
+    resultados, errores = [], {}
+    with ProcessPoolExecutor(procesos) as pool:
+        futuros = {
+            pool.submit(
+                generar_sitio,
+                sitio,
+                fecha_inicio,
+                fecha_fin,
+                url,
+                usar_cache,
+                directorio,
+            ): sitio["site_id"]
+            for sitio in sitios
+        }
+        for k, futuro in enumerate(as_completed(futuros), 1):
+            site_id = futuros[futuro]
+            try:
+                r = futuro.result()
+            except Exception as e:
+                errores[site_id] = e
+                print(f"  [{k:>3}/{len(sitios)}] {site_id:<16} ERROR: {e}")
+                continue
+            resultados.append(r)
+            print(
+                f"  [{k:>3}/{len(sitios)}] {site_id:<16} {r['filas']:>8,} filas  "
+                f"REGAR {r['regar']:5.1%}  descarga {r['descarga']:5.1f} s  "
+                f"proceso {r['proceso']:5.2f} s  etiquetas {r['etiquetas']:5.2f} s  "
+                f"guardado {r['guardado']:5.2f} s"
+            )
+    total = time.perf_counter() - inicio
+
+    resumen = pd.DataFrame(resultados)
+    if len(resumen):
+        fases = ["descarga", "proceso", "etiquetas", "guardado"]
+        suma = resumen[fases].sum()
+        print(
+            f"\n{len(resumen)} sitios, {resumen['filas'].sum():,} filas en {total:.1f} s"
+        )
+        print(
+            "Suma por fase: "
+            + ", ".join(f"{fase} {suma[fase]:.1f} s" for fase in fases)
+            + f" ({suma.sum() / total:.1f}x el tiempo total)"
+        )
+    if errores:
+        raise RuntimeError(f"Fallaron {len(errores)} sitio(s): {sorted(errores)}")
+    return resumen
+
+
+def leer_ultimas_filas(archivo: Path, n: int) -> pd.DataFrame:
+    """
+    Lee el encabezado y las ultimas n filas de un CSV sin leerlo completo.
+
+    Args:
+        archivo: CSV con encabezado y una fila por linea
+        n: filas a leer desde el final
+
+    Returns:
+        DataFrame con las columnas del archivo, timestamp como fecha
+    """
+    with open(archivo, "rb") as f:
+        encabezado = f.readline()
+        inicio_datos = f.tell()
+        f.seek(0, os.SEEK_END)
+        posicion = f.tell()
+
+        # Retroceder por bloques hasta tener n lineas completas
+        cola = b""
+        while posicion > inicio_datos and cola.count(b"\n") <= n:
+            leer = min(64 * 1024, posicion - inicio_datos)
+            posicion -= leer
+            f.seek(posicion)
+            cola = f.read(leer) + cola
+
+    lineas = cola.splitlines()
+    if posicion > inicio_datos:
+        lineas = lineas[1:]  # la primera puede estar cortada
+    texto = encabezado + b"\n".join(lineas[-n:]) + b"\n"
+    return pd.read_csv(io.BytesIO(texto), parse_dates=["timestamp"])
+
+
+def actualizar_dataset(
+    archivo: Path = ARCHIVO_DATASET,
+    fecha_fin: str = None,
+    url: str = ARCHIVE_URL,
+    usar_cache: bool = True,
+) -> pd.DataFrame:
+    """
+    Agrega al dataset solo las horas posteriores a su ultima fila.
+
+    Continua la simulacion de humedad del suelo y las ventanas desde las
+    ultimas filas guardadas, asi que el trabajo es proporcional a las horas
+    nuevas y no al historico. Las filas se agregan al final del archivo con
+    sus mismas columnas.
+
+    Una hora sin datos (Open-Meteo publica con unos dias de retraso) corta
+    la actualizacion ahi: la simulacion no puede saltarla y la siguiente
+    actualizacion continua desde la ultima hora completa.
 
+    Args:
+        archivo: CSV generado por una ejecucion completa
+        fecha_fin: ultimo dia a descargar (YYYY-MM-DD)
+        url: endpoint del archivo historico
+        usar_cache: usar los bloques ya descargados (ver CACHE_DIR)
+
+    Returns:
+        DataFrame con las filas agregadas
+    """
+    anterior = leer_ultimas_filas(archivo, HORAS_CONTEXTO)
+    ultima = anterior["timestamp"].iloc[-1]
+    siguiente = ultima + timedelta(hours=1)
+    print(f"Ultima hora guardada: {ultima}")
+
+    if fecha_fin is None or siguiente.strftime("%Y-%m-%d") > fecha_fin:
+        print("Dataset al dia, nada que descargar")
+        return anterior.iloc[:0]
+
+    data = descargar_datos_historicos(
+        siguiente.strftime("%Y-%m-%d"), fecha_fin, url=url, usar_cache=usar_cache
+    )
+    df = procesar_datos(data, anterior=anterior)
+
+    incompletas = df[["temperatura", "humedad_ambiente", "precipitacion"]].isna()
+    incompletas = incompletas.any(axis=1).to_numpy()
+    if incompletas.any():
+        corte = int(incompletas.argmax())
+        print(f"Horas sin datos desde {df['timestamp'].iloc[corte]}, se omiten")
+        df = df.iloc[:corte]
+    if len(df) == 0:
+        print("Sin horas nuevas completas")
+        return df
+
+    if df["timestamp"].iloc[0] != siguiente:
+        print(f"ADVERTENCIA: faltan horas entre {ultima} y {df['timestamp'].iloc[0]}")
+
+    df = generar_etiquetas(df)
+
+    columnas = list(anterior.columns)
+    faltantes = [c for c in columnas if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Columnas del dataset que no se generan: {faltantes}")
+    df[columnas].to_csv(archivo, mode="a", header=False, index=False)
+    print(f"Filas agregadas: {len(df)} ({df['timestamp'].iloc[-1]} la ultima)")
     return df
 
 
@@ -350,6 +1110,14 @@ def mostrar_estadisticas(df: pd.DataFrame):
         f"  REGAR (1):    {distribucion.get(1, 0):,} ({distribucion.get(1, 0) / len(df) * 100:.1f}%)"
     )
 
+    print(f"\nRegla que decidio cada registro:")
+    _, reglas = evaluar_reglas_riego(df)
+    conteo_reglas = np.bincount(reglas, minlength=len(REGLAS_RIEGO) + 1)
+    descripciones = {regla_id: desc for regla_id, desc, _, _ in REGLAS_RIEGO}
+    descripciones[REGLA_DEFECTO] = "Ninguna regla - NO REGAR por defecto"
+    for regla_id, desc in sorted(descripciones.items()):
+        print(f"  [{regla_id}] {conteo_reglas[regla_id]:7,}  {desc}")
+
     print(f"\nEstadisticas de variables:")
     print(
         df[
@@ -368,6 +1136,45 @@ def mostrar_estadisticas(df: pd.DataFrame):
 
 def main():
     """Funcion principal."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Descarga el historico de Open-Meteo")
+    parser.add_argument(
+        "--url",
+        default=ARCHIVE_URL,
+        help="Endpoint del archivo historico (ej. un servidor de prueba local)",
+    )
+    parser.add_argument(
+        "--sin-cache",
+        action="store_true",
+        help="Descargar todos los bloques aunque esten en dataset/cache_open_meteo",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Agregar solo las horas nuevas al dataset existente",
+    )
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help="Guardar tambien en dataset/parquet (ver almacen_dataset.py)",
+    )
+    parser.add_argument(
+        "--sitios",
+        type=Path,
+        metavar="ARCHIVO",
+        help="Generar el dataset Parquet de cada sitio del CSV/YAML (ver sitios.py)",
+    )
+    parser.add_argument(
+        "--procesos",
+        type=int,
+        default=PROCESOS_SITIOS,
+        help="Procesos para --sitios (defecto: uno por nucleo)",
+    )
+    args = parser.parse_args()
+    if args.sitios and args.incremental:
+        parser.error("--incremental no se combina con --sitios")
+
     print("\n" + "=" * 60)
     print("DESCARGA DE DATOS HISTORICOS - OPEN-METEO")
     print("Sistema de Riego IoT para Pastizales")
@@ -382,29 +1189,47 @@ def main():
     )  # 2 anios
 
     try:
-        # Descargar datos
-        data = descargar_datos_historicos(fecha_inicio, fecha_fin)
-        print(f"Datos descargados correctamente")
-
-        # Procesar
-        df = procesar_datos(data)
-        print(f"Datos procesados: {len(df)} registros horarios")
-
-        # Generar etiquetas
-        df = generar_etiquetas(df)
-        print(f"Etiquetas generadas con criterios FAO")
-
-        # Limpiar NaN
-        df_clean = df.dropna()
-        print(f"Registros validos despues de limpieza: {len(df_clean)}")
+        if args.sitios:
+            from sitios import cargar_sitios
+
+            generar_multisitio(
+                cargar_sitios(args.sitios),
+                fecha_inicio,
+                fecha_fin,
+                url=args.url,
+                usar_cache=not args.sin_cache,
+                procesos=args.procesos,
+            )
+            print(f"\nDataset Parquet en: {DIRECTORIO_PARQUET}")
+            return
+        if args.incremental and ARCHIVO_DATASET.exists():
+            nuevas = actualizar_dataset(
+                ARCHIVO_DATASET, fecha_fin, url=args.url, usar_cache=not args.sin_cache
+            )
+            # El almacen Parquet, si existe, recibe las mismas filas
+            if (
+                len(nuevas)
+                and (DIRECTORIO_PARQUET / f"site_id={SITIO_DEFECTO}").exists()
+            ):
+                guardar_parquet(nuevas, agregar=True)
+            return
+        if args.incremental:
+            print(f"{ARCHIVO_DATASET} no existe, se genera completo")
+
+        df_clean = generar_dataset(
+            fecha_inicio, fecha_fin, url=args.url, usar_cache=not args.sin_cache
+        )
 
         # Mostrar estadisticas
         mostrar_estadisticas(df_clean)
 
         # Guardar
-        output_file = OUTPUT_DIR / "datos_historicos_jerusalen.csv"
-        df_clean.to_csv(output_file, index=False)
-        print(f"\nDataset guardado en: {output_file}")
+        df_clean.to_csv(ARCHIVO_DATASET, index=False)
+        print(f"\nDataset guardado en: {ARCHIVO_DATASET}")
+        # Si el almacen ya tiene la copia del CSV se reemplaza tambien: si
+        # no, quedaria con el historico anterior
+        if args.parquet or (DIRECTORIO_PARQUET / f"site_id={SITIO_DEFECTO}").exists():
+            print(f"Dataset Parquet en: {guardar_parquet(df_clean)}")
 
         # Guardar tambien parametros usados
         params_file = OUTPUT_DIR / "parametros_riego.txt"
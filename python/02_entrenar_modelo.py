@@ -17,10 +17,17 @@ Autor: Luis
 Fecha: Enero 2026
 """
 
+import argparse
+import contextlib
+import json
+import os
+import time
+import warnings
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from sklearn.model_selection import train_test_split, cross_val_score, StratifiedKFold
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split, cross_validate, StratifiedKFold
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import (
     classification_report,
@@ -34,6 +41,18 @@ from sklearn.metrics import (
 from sklearn.preprocessing import StandardScaler
 import joblib
 
+import registro_modelos
+from almacen_dataset import (
+    DIRECTORIO_PARQUET,
+    SITIO_DEFECTO,
+    cargar_parquet,
+    leer_por_bloques,
+    sitios_guardados,
+)
+from bosque_plano import BosquePlano, exportar_bosque, medir_latencia_us
+from reservorio_estratificado import ReservorioEstratificado, capacidad_para
+from tabla_decision import EJES_DEFECTO, construir_tabla
+
 # =============================================================================
 # CONFIGURACION
 # =============================================================================
@@ -42,6 +61,31 @@ DATA_DIR = Path(__file__).parent / "dataset"
 MODELS_DIR = Path(__file__).parent / "models"
 MODELS_DIR.mkdir(exist_ok=True)
 
+MODEL_FILE = MODELS_DIR / "modelo_riego.joblib"
+
+# Metadata en JSON (features, metricas, version) para el arranque de la API
+MODEL_FILE_META = MODELS_DIR / "modelo_riego.json"
+
+# Bosque exportado a arrays de NumPy (lo carga la API sin scikit-learn)
+MODEL_FILE_PLANO = MODELS_DIR / "modelo_riego_plano.joblib"
+
+# Tabla de decision para el modo LUT de la API (se genera con --lut)
+MODEL_FILE_LUT = MODELS_DIR / "modelo_riego_lut.joblib"
+
+# Grilla de la tabla: puntos por feature (ver tabla_decision.py)
+EJES_LUT = dict(EJES_DEFECTO)
+
+# Modelo compacto destilado del bosque (se genera con --compacto, ver
+# modelo_compacto.py): mismo formato que el bosque plano, para la API, y
+# como encabezado C para el ESP32 de wokwi/
+MODEL_FILE_COMPACTO = MODELS_DIR / "modelo_riego_compacto.joblib"
+HEADER_COMPACTO = Path(__file__).parent.parent / "wokwi" / "modelo_riego.h"
+
+# Presupuesto del modelo compacto: bytes en el encabezado C y latencia de
+# una prediccion en la API (None: sin limite)
+PRESUPUESTO_BYTES = 4096
+PRESUPUESTO_US = None
+
 # Features a utilizar para el modelo
 FEATURES = [
     "humedad_suelo",
@@ -56,6 +100,32 @@ FEATURES = [
 # Variable objetivo
 TARGET = "regar"
 
+# Modo --streaming: memoria para la muestra estratificada y filas leidas
+# del dataset por vez (ver cargar_muestra)
+MEMORIA_MUESTRA_MB = 256
+FILAS_BLOQUE = 100_000
+
+# Fuente del dataset: el CSV, o con --parquet el almacen dataset/parquet
+USAR_PARQUET = False
+
+# Sitios con los que se entrena (--sitio); el CSV es solo SITIO_DEFECTO
+SITIOS_ENTRENAMIENTO = [SITIO_DEFECTO]
+
+# Metricas de la validacion cruzada (todas con los mismos 5 ajustes)
+METRICAS_CV = ["accuracy", "f1", "precision", "recall"]
+
+# Folds de la validacion cruzada en paralelo (-1: un proceso por nucleo).
+# Con folds en paralelo cada bosque de la validacion usa solo su parte de
+# los nucleos (ver _modelo_cv)
+CV_N_JOBS = -1
+
+# Resultado de --buscar (ver busqueda_hiperparametros.py)
+BUSQUEDA_FILE = MODELS_DIR / "busqueda_hiperparametros.csv"
+
+# Cada modelo guardado se copia a una version del registro (ver
+# registro_modelos.py); la API sirve la version de ACTUAL
+METRICAS_FILE = MODELS_DIR / "metricas.txt"
+
 # Parametros del modelo Random Forest
 RF_PARAMS = {
     "n_estimators": 100,
@@ -68,22 +138,134 @@ RF_PARAMS = {
 }
 
 
-def cargar_datos() -> pd.DataFrame:
-    """Carga el dataset de entrenamiento."""
+def _archivo_csv() -> Path:
     archivo = DATA_DIR / "datos_historicos_jerusalen.csv"
-
     if not archivo.exists():
         raise FileNotFoundError(
             f"No se encontro el dataset en {archivo}\n"
             "Ejecuta primero: uv run 01_descargar_datos.py"
         )
+    return archivo
+
+
+def _validar_fuente(parquet: bool, sitios: list):
+    """
+    Verifica que la fuente elegida tenga los sitios pedidos.
+
+    Raises:
+        FileNotFoundError: si algun sitio no esta en el almacen Parquet
+        ValueError: si se piden otros sitios que SITIO_DEFECTO sin --parquet
+    """
+    if not parquet:
+        if list(sitios) != [SITIO_DEFECTO]:
+            raise ValueError(
+                f"El CSV solo tiene el sitio '{SITIO_DEFECTO}'; "
+                "para otros sitios usa --parquet"
+            )
+        return
+
+    guardados = sitios_guardados(DIRECTORIO_PARQUET)
+    faltantes = [s for s in sitios if s not in guardados]
+    if faltantes:
+        raise FileNotFoundError(
+            f"Sitios sin datos en {DIRECTORIO_PARQUET}: {faltantes}\n"
+            "Ejecuta primero: uv run 01_descargar_datos.py --parquet "
+            "(o --sitios ARCHIVO)"
+        )
+
 
-    df = pd.read_csv(archivo)
+def cargar_datos(
+    columnas: list = None,
+    sitios: list = SITIOS_ENTRENAMIENTO,
+    parquet: bool = USAR_PARQUET,
+) -> pd.DataFrame:
+    """
+    Carga el dataset de entrenamiento.
+
+    Lee el CSV, o con parquet=True los sitios pedidos del almacen Parquet
+    (dataset/parquet, ver almacen_dataset.py). La fuente se elige
+    explicitamente: que exista el directorio no dice si esta al dia.
+
+    Args:
+        columnas: columnas a leer (defecto: todas, con site_id)
+        sitios: site_id con los que se entrena; los demas sitios del
+            almacen no se leen (el CSV es solo SITIO_DEFECTO)
+        parquet: leer del almacen Parquet en lugar del CSV
+    """
+    _validar_fuente(parquet, sitios)
+    if parquet:
+        df = cargar_parquet(DIRECTORIO_PARQUET, columnas, sitio=sitios)
+        print(f"Dataset cargado (Parquet, {', '.join(sitios)}): {len(df):,} registros")
+        return df
+
+    df = pd.read_csv(_archivo_csv(), usecols=columnas)
+    if columnas is None:
+        df["site_id"] = SITIO_DEFECTO
     print(f"Dataset cargado: {len(df):,} registros")
 
     return df
 
 
+def cargar_muestra(
+    memoria_mb: float = MEMORIA_MUESTRA_MB,
+    filas_bloque: int = FILAS_BLOQUE,
+    sitios: list = SITIOS_ENTRENAMIENTO,
+    parquet: bool = USAR_PARQUET,
+) -> pd.DataFrame:
+    """
+    Carga una muestra estratificada del dataset sin tenerlo entero en memoria.
+
+    Lee el dataset (Parquet o CSV, como cargar_datos) por bloques de
+    `filas_bloque` filas y arma la muestra con ReservorioEstratificado. Si
+    el dataset cabe en `memoria_mb`, la muestra es el dataset completo.
+
+    Args:
+        memoria_mb: memoria para la muestra; el pico de la carga es esta mas
+            la de un bloque
+        filas_bloque: filas leidas por vez
+        sitios: site_id con los que se entrena (ver cargar_datos)
+        parquet: leer del almacen Parquet en lugar del CSV
+
+    Returns:
+        DataFrame con FEATURES (float32) y TARGET
+    """
+    import resource
+    import tracemalloc
+
+    columnas = FEATURES + [TARGET]
+    _validar_fuente(parquet, sitios)
+    if parquet:
+        bloques = leer_por_bloques(
+            DIRECTORIO_PARQUET, columnas, filas_bloque, sitio=sitios
+        )
+    else:
+        bloques = pd.read_csv(_archivo_csv(), usecols=columnas, chunksize=filas_bloque)
+
+    capacidad = capacidad_para(memoria_mb * 2**20, len(FEATURES))
+    reservorio = ReservorioEstratificado(
+        capacidad, FEATURES, TARGET, semilla=RF_PARAMS["random_state"]
+    )
+
+    tracemalloc.start()
+    for bloque in bloques:
+        reservorio.agregar(bloque)
+        del bloque
+    df = reservorio.muestra()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(
+        f"Dataset leido por bloques: {reservorio.filas_leidas:,} registros, "
+        f"muestra de {len(df):,} (capacidad {capacidad:,})"
+    )
+    print(
+        f"Memoria: limite {memoria_mb:g} MB + bloque de {filas_bloque:,} filas, "
+        f"pico de la carga {pico / 2**20:.1f} MB, "
+        f"pico del proceso {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB"
+    )
+    return df
+
+
 def preparar_datos(df: pd.DataFrame) -> tuple:
     """
     Prepara los datos para entrenamiento.
@@ -99,7 +281,8 @@ def preparar_datos(df: pd.DataFrame) -> tuple:
         raise ValueError(f"Features faltantes en dataset: {missing}")
 
     X = df[FEATURES].copy()
-    y = df[TARGET].copy()
+    # int64 como en el CSV: el almacen Parquet guarda regar en int8
+    y = df[TARGET].astype(np.int64)
 
     print(f"\nFeatures utilizadas: {FEATURES}")
     print(f"Registros: {len(X):,}")
@@ -108,15 +291,64 @@ def preparar_datos(df: pd.DataFrame) -> tuple:
     return X, y, FEATURES
 
 
-def entrenar_modelo(X: pd.DataFrame, y: pd.Series) -> tuple:
+@contextlib.contextmanager
+def medir_fase(tiempos: dict, fase: str):
+    """Acumula en tiempos[fase] los segundos del bloque."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tiempos[fase] = tiempos.get(fase, 0.0) + time.perf_counter() - inicio
+
+
+def mostrar_tiempos(tiempos: dict):
+    """Imprime el tiempo de cada fase del entrenamiento."""
+    print("\n" + "=" * 60)
+    print("TIEMPO POR FASE")
+    print("=" * 60)
+    total = sum(tiempos.values())
+    for fase, segundos in tiempos.items():
+        print(f"  {fase:<28} {segundos:8.2f} s  ({segundos / total:5.1%})")
+    print(f"  {'Total':<28} {total:8.2f} s")
+
+
+def _modelo_cv(modelo, n_folds: int):
+    """
+    Modelo para la validacion cruzada con los hilos repartidos entre folds.
+
+    Con CV_N_JOBS y RF_PARAMS["n_jobs"] en -1, cada proceso de fold armaria
+    su bosque con todos los nucleos (~nucleos^2 hilos). Con folds en paralelo,
+    cada bosque usa nucleos // folds (al menos 1).
+    """
+    procesos = min(joblib.effective_n_jobs(CV_N_JOBS), n_folds)
+    if procesos == 1:
+        return modelo
+    hilos = max(1, joblib.cpu_count() // procesos)
+    return clone(modelo).set_params(n_jobs=hilos)
+
+
+def entrenar_modelo(
+    X: pd.DataFrame, y: pd.Series, oob: bool = False, tiempos: dict = None
+) -> tuple:
     """
     Entrena el modelo Random Forest con validacion cruzada.
 
+    Las metricas de METRICAS_CV salen de un solo juego de 5 ajustes
+    (cross_validate), con los folds en paralelo (CV_N_JOBS).
+
+    Args:
+        X, y: Features y target
+        oob: En lugar de la validacion cruzada, estimar con las muestras
+            fuera de bolsa (out-of-bag) del modelo final: un solo ajuste
+        tiempos: dict donde acumular los segundos de cada fase
+
     Returns:
         modelo: Modelo entrenado
         metricas: Diccionario con metricas de evaluacion
         X_test, y_test: Datos de prueba
     """
+    tiempos = {} if tiempos is None else tiempos
+
     print("\n" + "=" * 60)
     print("ENTRENAMIENTO DEL MODELO")
     print("=" * 60)
@@ -130,55 +362,145 @@ def entrenar_modelo(X: pd.DataFrame, y: pd.Series) -> tuple:
     print(f"Conjunto de prueba: {len(X_test):,} registros")
 
     # Crear modelo
-    modelo = RandomForestClassifier(**RF_PARAMS)
-
-    # Validacion cruzada (5-fold)
-    print("\nValidacion cruzada (5-fold)...")
-    cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-
-    cv_scores = {
-        "accuracy": cross_val_score(
-            modelo, X_train, y_train, cv=cv, scoring="accuracy"
-        ),
-        "f1": cross_val_score(modelo, X_train, y_train, cv=cv, scoring="f1"),
-        "precision": cross_val_score(
-            modelo, X_train, y_train, cv=cv, scoring="precision"
-        ),
-        "recall": cross_val_score(modelo, X_train, y_train, cv=cv, scoring="recall"),
+    modelo = RandomForestClassifier(**RF_PARAMS, oob_score=oob)
+
+    if oob:
+        print("\nEstimacion fuera de bolsa (OOB), sin validacion cruzada")
+    else:
+        # Validacion cruzada (5-fold): un ajuste por fold para todas las metricas
+        print("\nValidacion cruzada (5-fold)...")
+        cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+
+        with medir_fase(tiempos, "Validacion cruzada"):
+            resultado = cross_validate(
+                _modelo_cv(modelo, cv.get_n_splits()),
+                X_train,
+                y_train,
+                cv=cv,
+                scoring=METRICAS_CV,
+                n_jobs=CV_N_JOBS,
+            )
+        cv_scores = {m: resultado[f"test_{m}"] for m in METRICAS_CV}
+
+        print(
+            f"  Accuracy:  {cv_scores['accuracy'].mean():.3f} (+/- {cv_scores['accuracy'].std() * 2:.3f})"
+        )
+        print(
+            f"  F1-Score:  {cv_scores['f1'].mean():.3f} (+/- {cv_scores['f1'].std() * 2:.3f})"
+        )
+        print(
+            f"  Precision: {cv_scores['precision'].mean():.3f} (+/- {cv_scores['precision'].std() * 2:.3f})"
+        )
+        print(
+            f"  Recall:    {cv_scores['recall'].mean():.3f} (+/- {cv_scores['recall'].std() * 2:.3f})"
+        )
+
+    # Entrenar modelo final
+    print("\nEntrenando modelo final...")
+    with medir_fase(tiempos, "Modelo final"), warnings.catch_warnings():
+        # Filas sin estimacion OOB: se descuentan en metricas_oob
+        warnings.filterwarnings("ignore", "Some inputs do not have OOB scores")
+        modelo.fit(X_train, y_train)
+
+    # Evaluar en test set
+    with medir_fase(tiempos, "Evaluacion en test"):
+        y_pred = modelo.predict(X_test)
+        y_prob = modelo.predict_proba(X_test)[:, 1]
+
+        metricas = {
+            "accuracy": accuracy_score(y_test, y_pred),
+            "precision": precision_score(y_test, y_pred),
+            "recall": recall_score(y_test, y_pred),
+            "f1": f1_score(y_test, y_pred),
+            "roc_auc": roc_auc_score(y_test, y_prob),
+        }
+
+    if oob:
+        metricas.update(metricas_oob(modelo, y_train))
+        print(
+            f"  OOB Accuracy: {metricas['oob_accuracy']:.3f} "
+            f"(cobertura {metricas['oob_cobertura']:.1%})"
+        )
+        print(f"  OOB F1-Score: {metricas['oob_f1']:.3f}")
+        if metricas["oob_cobertura"] < 1:
+            print(
+                "  ADVERTENCIA: con class_weight='balanced' el bootstrap casi "
+                "siempre incluye\n  las filas REGAR; la estimacion OOB solo usa "
+                "las que quedaron fuera alguna vez"
+            )
+    else:
+        metricas["cv_accuracy_mean"] = cv_scores["accuracy"].mean()
+        metricas["cv_accuracy_std"] = cv_scores["accuracy"].std()
+
+    return modelo, metricas, X_test, y_test, y_pred
+
+
+def metricas_oob(modelo, y_train) -> dict:
+    """
+    Accuracy y F1 fuera de bolsa de un bosque entrenado con oob_score=True.
+
+    Solo cuentan las filas que quedaron fuera del bootstrap de algun arbol
+    (scikit-learn les asigna probabilidad 0 a las demas); la fraccion de
+    filas con estimacion se reporta como oob_cobertura.
+    """
+    decision = modelo.oob_decision_function_
+    cubiertas = decision.sum(axis=1) > 0
+    y_oob = modelo.classes_[decision[cubiertas].argmax(axis=1)]
+    y_real = np.asarray(y_train)[cubiertas]
+    return {
+        "oob_accuracy": accuracy_score(y_real, y_oob),
+        "oob_f1": f1_score(y_real, y_oob),
+        "oob_cobertura": cubiertas.mean(),
     }
 
-    print(
-        f"  Accuracy:  {cv_scores['accuracy'].mean():.3f} (+/- {cv_scores['accuracy'].std() * 2:.3f})"
-    )
-    print(
-        f"  F1-Score:  {cv_scores['f1'].mean():.3f} (+/- {cv_scores['f1'].std() * 2:.3f})"
+
+def buscar_hiperparametros(X: pd.DataFrame, y: pd.Series) -> pd.DataFrame:
+    """
+    Busca bosques mas chicos y rapidos que RF_PARAMS con el mismo split.
+
+    Corre el halving sucesivo de busqueda_hiperparametros.py sobre el
+    conjunto de entrenamiento, muestra el reporte de Pareto y lo guarda en
+    BUSQUEDA_FILE. No entrena ni reemplaza el modelo.
+    """
+    import busqueda_hiperparametros as busqueda
+
+    print("\n" + "=" * 60)
+    print("BUSQUEDA DE HIPERPARAMETROS")
+    print("=" * 60)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
     )
+    n = len(busqueda.candidatos())
+    print(f"\n{n} candidatos, halving sucesivo (factor {busqueda.FACTOR})")
+    reporte = busqueda.buscar(X_train, y_train, X_test, y_test, RF_PARAMS)
+
+    print("\nFinalistas (* frente de Pareto: accuracy vs latencia y tamano):")
     print(
-        f"  Precision: {cv_scores['precision'].mean():.3f} (+/- {cv_scores['precision'].std() * 2:.3f})"
+        f"\n   {'arboles':>7} {'prof.':>5} {'hoja':>4} {'max_feat':>8} "
+        f"{'cv_acc':>7} {'test_acc':>8} {'test_f1':>7} {'lat. us':>8} {'KB':>7}"
     )
+    for fila in reporte.itertuples():
+        marca = "*" if fila.pareto else " "
+        actual = "  <- RF_PARAMS" if fila.actual else ""
+        print(
+            f" {marca} {fila.n_estimators:>7} {str(fila.max_depth):>5} "
+            f"{fila.min_samples_leaf:>4} {str(fila.max_features):>8} "
+            f"{fila.cv_accuracy:>7.4f} {fila.test_accuracy:>8.4f} {fila.test_f1:>7.4f} "
+            f"{fila.latencia_us:>8.0f} {fila.tamano_kb:>7.0f}{actual}"
+        )
+
+    elegido = busqueda.recomendar(reporte)
     print(
-        f"  Recall:    {cv_scores['recall'].mean():.3f} (+/- {cv_scores['recall'].std() * 2:.3f})"
+        f"\nRecomendado (el mas chico a {busqueda.TOLERANCIA_ACCURACY:.1%} de la "
+        f"mejor cv_accuracy):"
     )
+    for k in busqueda.ESPACIO_BUSQUEDA:
+        print(f'    "{k}": {elegido[k]!r},')
 
-    # Entrenar modelo final
-    print("\nEntrenando modelo final...")
-    modelo.fit(X_train, y_train)
-
-    # Evaluar en test set
-    y_pred = modelo.predict(X_test)
-    y_prob = modelo.predict_proba(X_test)[:, 1]
-
-    metricas = {
-        "accuracy": accuracy_score(y_test, y_pred),
-        "precision": precision_score(y_test, y_pred),
-        "recall": recall_score(y_test, y_pred),
-        "f1": f1_score(y_test, y_pred),
-        "roc_auc": roc_auc_score(y_test, y_prob),
-        "cv_accuracy_mean": cv_scores["accuracy"].mean(),
-        "cv_accuracy_std": cv_scores["accuracy"].std(),
-    }
-
-    return modelo, metricas, X_test, y_test, y_pred
+    reporte.to_csv(BUSQUEDA_FILE, index=False)
+    print(f"\nReporte guardado en: {BUSQUEDA_FILE}")
+    return reporte
 
 
 def mostrar_resultados(metricas: dict, y_test, y_pred, modelo, feature_names: list):
@@ -221,8 +543,8 @@ def mostrar_resultados(metricas: dict, y_test, y_pred, modelo, feature_names: li
     return importancias
 
 
-def guardar_modelo(modelo, feature_names: list, metricas: dict):
-    """Guarda el modelo entrenado y metadata."""
+def guardar_modelo(modelo, feature_names: list, metricas: dict, lut: bool = False):
+    """Guarda el modelo entrenado y metadata (y la tabla de decision si lut)."""
 
     # Guardar modelo
     modelo_data = {
@@ -234,12 +556,17 @@ def guardar_modelo(modelo, feature_names: list, metricas: dict):
         "parametros": RF_PARAMS,
     }
 
-    modelo_file = MODELS_DIR / "modelo_riego.joblib"
-    joblib.dump(modelo_data, modelo_file)
+    modelo_file = MODEL_FILE
+    _guardar_atomico(modelo_file, lambda ruta: joblib.dump(modelo_data, ruta))
     print(f"\nModelo guardado en: {modelo_file}")
 
+    exportar_modelo_plano(modelo_data)
+    exportar_metadata(modelo_data)
+    if lut:
+        exportar_tabla_decision(modelo_data)
+
     # Guardar metricas en texto
-    metricas_file = MODELS_DIR / "metricas.txt"
+    metricas_file = METRICAS_FILE
     with open(metricas_file, "w") as f:
         f.write("METRICAS DEL MODELO DE RIEGO\n")
         f.write("=" * 40 + "\n")
@@ -253,22 +580,410 @@ def guardar_modelo(modelo, feature_names: list, metricas: dict):
     return modelo_file
 
 
+def _guardar_atomico(archivo: Path, escribir):
+    """
+    Escribe `archivo` con escribir(ruta) en un temporal y lo reemplaza con
+    os.replace.
+
+    La API abre el bosque plano con mmap: truncar y reescribir el mismo
+    archivo con la API corriendo le cambia las paginas mapeadas (SIGBUS o
+    valores basura). Con os.replace quien lo tiene abierto sigue viendo el
+    archivo anterior, y quien lo abre despues ve el nuevo completo.
+    """
+    temporal = archivo.with_name(f".{archivo.name}.{os.getpid()}.tmp")
+    try:
+        escribir(temporal)
+        os.replace(temporal, archivo)
+    finally:
+        temporal.unlink(missing_ok=True)
+
+
+def exportar_modelo_plano(modelo_data: dict) -> Path:
+    """
+    Guarda el bosque como arrays planos de NumPy junto con la metadata.
+
+    El archivo tiene las mismas claves que modelo_riego.joblib, pero con
+    "bosque" (ver bosque_plano.exportar_bosque) en lugar de "modelo", por lo
+    que cargarlo no requiere scikit-learn.
+
+    Se guarda sin compresion: asi la API puede abrir los arrays con
+    mmap_mode y varios workers comparten una sola copia en memoria.
+    """
+    plano = {k: v for k, v in modelo_data.items() if k != "modelo"}
+    plano["bosque"] = exportar_bosque(modelo_data["modelo"])
+
+    _guardar_atomico(
+        MODEL_FILE_PLANO, lambda ruta: joblib.dump(plano, ruta, compress=0)
+    )
+    n_nodos = len(plano["bosque"]["feature"])
+    print(f"Bosque plano ({n_nodos:,} nodos) guardado en: {MODEL_FILE_PLANO}")
+
+    return MODEL_FILE_PLANO
+
+
+def exportar_tabla_decision(modelo_data: dict) -> Path:
+    """
+    Evalua el bosque en la grilla EJES_LUT y guarda la tabla de decision.
+
+    Igual que el bosque plano, el archivo lleva la metadata del modelo y
+    "tabla" (ver tabla_decision.construir_tabla) en lugar de "modelo".
+    """
+    print(f"\nConstruyendo tabla de decision...")
+    bosque = BosquePlano(exportar_bosque(modelo_data["modelo"]))
+
+    lut = {k: v for k, v in modelo_data.items() if k != "modelo"}
+    lut["tabla"] = construir_tabla(bosque, modelo_data["features"], EJES_LUT)
+
+    # Comprimida: la tabla tiene regiones grandes con el mismo valor
+    _guardar_atomico(MODEL_FILE_LUT, lambda ruta: joblib.dump(lut, ruta, compress=3))
+    forma = lut["tabla"]["prob"].shape
+    print(f"Tabla de decision {forma} ({lut['tabla']['prob'].size:,} celdas)")
+    print(f"Guardada en: {MODEL_FILE_LUT}")
+
+    return MODEL_FILE_LUT
+
+
+def exportar_modelo_compacto(
+    modelo,
+    X: pd.DataFrame,
+    y: pd.Series,
+    presupuesto_bytes: int = PRESUPUESTO_BYTES,
+    presupuesto_us: float = PRESUPUESTO_US,
+) -> Path:
+    """
+    Destila el bosque en un modelo compacto que cabe en el presupuesto.
+
+    Usa el mismo split que entrenar_modelo, compara el modelo compacto con
+    el bosque completo en test (accuracy y costo por prediccion) y lo
+    guarda en MODEL_FILE_COMPACTO (formato del bosque plano, para la API
+    con --compacto) y en HEADER_COMPACTO (encabezado C para el ESP32).
+    """
+    import modelo_compacto
+
+    print("\n" + "=" * 60)
+    print("MODELO COMPACTO (DESTILADO DEL BOSQUE)")
+    print("=" * 60)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    alumno, reporte = modelo_compacto.destilar(
+        modelo, X_train, y_train, RF_PARAMS, presupuesto_bytes, presupuesto_us
+    )
+
+    print(f"\nPresupuesto: {presupuesto_bytes} bytes, {presupuesto_us} us")
+    print("(* elegido, - fuera del presupuesto)")
+    print(
+        f"\n   {'candidato':<26} {'val_acc':>7} {'fidelidad':>9} {'nodos':>6} "
+        f"{'bytes C':>8} {'lat. us':>8}"
+    )
+    for fila in reporte.itertuples():
+        marca = "*" if fila.elegido else (" " if fila.en_presupuesto else "-")
+        print(
+            f" {marca} {fila.candidato:<26} {fila.val_accuracy:>7.4f} "
+            f"{fila.val_fidelidad:>9.4f} {fila.nodos:>6} {fila.bytes_c:>8} "
+            f"{fila.latencia_us:>8.1f}"
+        )
+
+    # Costo por prediccion de los dos con el mismo evaluador que la API
+    X_eval = np.ascontiguousarray(X_test, dtype=np.float32)
+    comparacion = {}
+    for nombre, clasificador in [("bosque completo", modelo), ("compacto", alumno)]:
+        arrays = exportar_bosque(clasificador)
+        bosque = BosquePlano(arrays)
+        inicio = time.perf_counter()
+        y_prob = bosque.predict_proba(X_eval)[:, 1]
+        lote_us = (time.perf_counter() - inicio) / len(X_eval) * 1e6
+        y_pred = bosque.predict(X_eval)
+        comparacion[nombre] = {
+            "y_pred": y_pred,
+            "metricas": {
+                "accuracy": accuracy_score(y_test, y_pred),
+                "precision": precision_score(y_test, y_pred),
+                "recall": recall_score(y_test, y_pred),
+                "f1": f1_score(y_test, y_pred),
+                "roc_auc": roc_auc_score(y_test, y_prob),
+            },
+            "latencia_us": medir_latencia_us(bosque, X_eval),
+            "lote_us": lote_us,
+            "nodos": len(arrays["feature"]),
+            "kb": sum(a.nbytes for a in arrays.values() if isinstance(a, np.ndarray))
+            / 1024,
+            "arrays": arrays,
+        }
+
+    completo, compacto = comparacion["bosque completo"], comparacion["compacto"]
+    compacto["metricas"]["fidelidad"] = float(
+        np.mean(compacto["y_pred"] == completo["y_pred"])
+    )
+    print(
+        f"\nEn test ({len(y_test):,} filas):\n"
+        f"\n  {'':<16} {'accuracy':>8} {'F1':>7} {'nodos':>8} {'KB':>8} "
+        f"{'us/pred.':>9} {'us/fila lote':>13}"
+    )
+    for nombre, r in comparacion.items():
+        print(
+            f"  {nombre:<16} {r['metricas']['accuracy']:>8.4f} "
+            f"{r['metricas']['f1']:>7.4f} {r['nodos']:>8,} {r['kb']:>8.1f} "
+            f"{r['latencia_us']:>9.1f} {r['lote_us']:>13.3f}"
+        )
+    perdida = completo["metricas"]["accuracy"] - compacto["metricas"]["accuracy"]
+    print(
+        f"\n  Perdida de accuracy: {perdida:+.4f}; coincide con el bosque en "
+        f"{compacto['metricas']['fidelidad']:.2%} de las filas"
+    )
+
+    parametros = {
+        **RF_PARAMS,
+        **modelo_compacto.CANDIDATOS_COMPACTOS[int(reporte["elegido"].idxmax())],
+    }
+    descripcion = modelo_compacto.describir(parametros)
+    arrays = compacto["arrays"]
+    comentario = [
+        f"Modelo de riego compacto: {descripcion}, destilado del Random Forest",
+        f"({completo['nodos']:,} nodos) de models/modelo_riego.joblib.",
+        "",
+        f"Test: accuracy {compacto['metricas']['accuracy']:.4f} "
+        f"(bosque completo {completo['metricas']['accuracy']:.4f}), "
+        f"F1 {compacto['metricas']['f1']:.4f}",
+        f"Coincide con el bosque en {compacto['metricas']['fidelidad']:.2%} de las "
+        f"filas de test",
+        f"{len(arrays['feature'])} nodos, "
+        f"{modelo_compacto.bytes_c(arrays)} bytes de arrays.",
+        "",
+        "Uso: float x[MODELO_RIEGO_N_FEATURES] con las features en el orden de",
+        "las constantes MODELO_RIEGO_<FEATURE>; modelo_riego_regar(x) retorna 1",
+        "para REGAR.",
+    ]
+    if parametros["n_estimators"] == 1:
+        lista_reglas = modelo_compacto.reglas(arrays, FEATURES)
+        print(f"\nReglas del arbol (el resto: NO_REGAR):")
+        for regla in lista_reglas:
+            print(f"  {regla}")
+        comentario += ["", "Reglas (el resto: NO_REGAR):"] + lista_reglas
+
+    compacto_data = {
+        "features": list(X.columns),
+        "metricas": compacto["metricas"],
+        "version": "1.0",
+        "algoritmo": f"RandomForestClassifier compacto ({descripcion})",
+        "parametros": parametros,
+        "bosque": arrays,
+    }
+    _guardar_atomico(
+        MODEL_FILE_COMPACTO, lambda ruta: joblib.dump(compacto_data, ruta, compress=0)
+    )
+    print(f"\nModelo compacto guardado en: {MODEL_FILE_COMPACTO}")
+
+    HEADER_COMPACTO.write_text(
+        modelo_compacto.generar_encabezado_c(arrays, FEATURES, comentario)
+    )
+    print(f"Encabezado C guardado en: {HEADER_COMPACTO}")
+
+    return MODEL_FILE_COMPACTO
+
+
+def registrar_version(lut: bool = False, compacto: bool = False, activar: bool = True):
+    """
+    Copia el modelo recien guardado en models/ a una version del registro.
+
+    Solo se copian la tabla de decision y el modelo compacto si se
+    generaron en esta ejecucion: los de models/ pueden ser de otro modelo.
+    """
+    archivos = [MODEL_FILE, MODEL_FILE_PLANO, MODEL_FILE_META, METRICAS_FILE]
+    if lut:
+        archivos.append(MODEL_FILE_LUT)
+    if compacto:
+        archivos.append(MODEL_FILE_COMPACTO)
+
+    version = registro_modelos.registrar(archivos, activar=activar)
+    directorio = registro_modelos.DIRECTORIO_REGISTRO / version
+    if activar:
+        print(f"\nVersion {version} registrada y activa: {directorio}")
+    else:
+        print(f"\nVersion {version} registrada (candidata, sin activar): {directorio}")
+        print(f"  Activar con: uv run 02_entrenar_modelo.py --activar {version}")
+    return version
+
+
+def mostrar_versiones():
+    """Lista las versiones del registro y marca la activa."""
+    actual = registro_modelos.version_actual()
+    versiones = registro_modelos.listar_versiones()
+    if not versiones:
+        print(f"No hay versiones en {registro_modelos.DIRECTORIO_REGISTRO}")
+        return
+
+    print(f"\n  {'version':<8} {'accuracy':>8}  algoritmo")
+    for version in versiones:
+        meta_file = (
+            registro_modelos.DIRECTORIO_REGISTRO / version / MODEL_FILE_META.name
+        )
+        meta = json.loads(meta_file.read_text()) if meta_file.exists() else {}
+        accuracy = meta.get("metricas", {}).get("accuracy", float("nan"))
+        marca = "*" if version == actual else " "
+        print(f"{marca} {version:<8} {accuracy:>8.4f}  {meta.get('algoritmo', '?')}")
+    print("\n(* version activa)")
+
+
+def exportar_metadata(modelo_data: dict) -> Path:
+    """
+    Guarda en JSON la metadata del modelo (todo menos el modelo).
+
+    La API la lee al arrancar para responder /health y /features sin
+    esperar a que termine de cargar el modelo.
+    """
+    meta = {
+        "features": list(modelo_data["features"]),
+        "metricas": {k: float(v) for k, v in modelo_data["metricas"].items()},
+        "version": modelo_data["version"],
+        "algoritmo": modelo_data["algoritmo"],
+        "parametros": modelo_data["parametros"],
+    }
+
+    _guardar_atomico(
+        MODEL_FILE_META, lambda ruta: ruta.write_text(json.dumps(meta, indent=2))
+    )
+    print(f"Metadata guardada en: {MODEL_FILE_META}")
+
+    return MODEL_FILE_META
+
+
 def main():
     """Funcion principal."""
+    parser = argparse.ArgumentParser(description="Entrena el modelo de riego")
+    parser.add_argument(
+        "--solo-exportar",
+        action="store_true",
+        help="No entrenar: solo exportar el bosque plano del modelo ya guardado",
+    )
+    parser.add_argument(
+        "--lut",
+        action="store_true",
+        help="Generar tambien la tabla de decision para el modo LUT de la API",
+    )
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help="Leer el dataset de dataset/parquet en lugar del CSV",
+    )
+    parser.add_argument(
+        "--sitio",
+        action="append",
+        metavar="SITE_ID",
+        help="Entrenar con este sitio (repetible, requiere --parquet salvo "
+        f"{SITIO_DEFECTO}; defecto: {SITIO_DEFECTO})",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Leer el dataset por bloques y entrenar con una muestra estratificada",
+    )
+    parser.add_argument(
+        "--memoria-mb",
+        type=float,
+        default=MEMORIA_MUESTRA_MB,
+        help="Memoria para la muestra en modo --streaming",
+    )
+    parser.add_argument(
+        "--filas-bloque",
+        type=int,
+        default=FILAS_BLOQUE,
+        help="Filas leidas por vez en modo --streaming",
+    )
+    parser.add_argument(
+        "--oob",
+        action="store_true",
+        help="Estimar con muestras fuera de bolsa en lugar de validacion cruzada",
+    )
+    parser.add_argument(
+        "--compacto",
+        action="store_true",
+        help="Destilar tambien un modelo compacto (API y encabezado C del ESP32)",
+    )
+    parser.add_argument(
+        "--presupuesto-bytes",
+        type=int,
+        default=PRESUPUESTO_BYTES,
+        help="Bytes maximos del modelo compacto en el encabezado C",
+    )
+    parser.add_argument(
+        "--presupuesto-us",
+        type=float,
+        default=PRESUPUESTO_US,
+        help="Latencia maxima (us) de una prediccion del modelo compacto",
+    )
+    parser.add_argument(
+        "--buscar",
+        action="store_true",
+        help="Buscar hiperparametros (reporte de Pareto) en lugar de entrenar",
+    )
+    registro = parser.add_argument_group("registro de modelos (registro_modelos.py)")
+    registro.add_argument(
+        "--sin-activar",
+        action="store_true",
+        help="Registrar la version nueva como candidata, sin cambiar ACTUAL",
+    )
+    registro.add_argument(
+        "--activar",
+        metavar="VERSION",
+        help="No entrenar: apuntar ACTUAL a una version (despliegue o rollback)",
+    )
+    registro.add_argument(
+        "--versiones",
+        action="store_true",
+        help="No entrenar: listar las versiones del registro",
+    )
+    args = parser.parse_args()
+
+    if args.versiones:
+        mostrar_versiones()
+        return
+
+    if args.activar:
+        registro_modelos.activar_version(args.activar)
+        print(f"Version activa: {args.activar}")
+        return
+
+    if args.solo_exportar:
+        modelo_data = joblib.load(MODEL_FILE)
+        exportar_modelo_plano(modelo_data)
+        exportar_metadata(modelo_data)
+        if args.lut:
+            exportar_tabla_decision(modelo_data)
+        registrar_version(lut=args.lut, activar=not args.sin_activar)
+        return
+
     print("\n" + "=" * 60)
     print("ENTRENAMIENTO DE MODELO - RANDOM FOREST")
     print("Sistema de Riego IoT para Pastizales")
     print("=" * 60)
 
+    tiempos = {}
     try:
-        # Cargar datos
-        df = cargar_datos()
-
-        # Preparar datos
-        X, y, feature_names = preparar_datos(df)
+        # Cargar datos (solo las columnas que usa el modelo)
+        with medir_fase(tiempos, "Carga de datos"):
+            sitios = args.sitio or SITIOS_ENTRENAMIENTO
+            if args.streaming:
+                df = cargar_muestra(
+                    args.memoria_mb, args.filas_bloque, sitios, args.parquet
+                )
+            else:
+                df = cargar_datos(FEATURES + [TARGET], sitios, args.parquet)
+
+            # Preparar datos
+            X, y, feature_names = preparar_datos(df)
+
+        if args.buscar:
+            with medir_fase(tiempos, "Busqueda de hiperparametros"):
+                buscar_hiperparametros(X, y)
+            mostrar_tiempos(tiempos)
+            return
 
         # Entrenar
-        modelo, metricas, X_test, y_test, y_pred = entrenar_modelo(X, y)
+        modelo, metricas, X_test, y_test, y_pred = entrenar_modelo(
+            X, y, oob=args.oob, tiempos=tiempos
+        )
 
         # Mostrar resultados
         importancias = mostrar_resultados(
@@ -276,7 +991,20 @@ def main():
         )
 
         # Guardar
-        modelo_file = guardar_modelo(modelo, feature_names, metricas)
+        with medir_fase(tiempos, "Guardado y exportacion"):
+            modelo_file = guardar_modelo(modelo, feature_names, metricas, lut=args.lut)
+
+        if args.compacto:
+            with medir_fase(tiempos, "Modelo compacto"):
+                exportar_modelo_compacto(
+                    modelo, X, y, args.presupuesto_bytes, args.presupuesto_us
+                )
+
+        registrar_version(
+            lut=args.lut, compacto=args.compacto, activar=not args.sin_activar
+        )
+
+        mostrar_tiempos(tiempos)
 
         print("\n" + "=" * 60)
         print("ENTRENAMIENTO COMPLETADO EXITOSAMENTE")
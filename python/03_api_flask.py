@@ -11,17 +11,36 @@ Endpoints:
 - GET  /health    - Estado del servicio
 - GET  /features  - Features requeridas
 - POST /predict   - Hacer prediccion
+- POST /predict/stream - Prediccion continua (NDJSON)
+- GET  /cache/stats - Contadores del cache de predicciones
+- GET  /batching/stats - Tamanio de lote y espera del agrupador
+- POST /model/reload - Cargar la version activa del registro sin reiniciar
+- GET  /model/shadow - Comparacion con la version candidata (modo sombra)
+- GET  /metrics - Metricas en formato Prometheus
 
 Autor: Luis
 Fecha: Enero 2026
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from pathlib import Path
-import joblib
-import numpy as np
+import argparse
+import json
+import logging
+import math
+import queue
+import random
+import threading
+import time
 from datetime import datetime
 
+import registro_modelos
+from metricas_api import MetricasAPI, metrica, metricas_proceso
+
+# numpy, joblib y el evaluador del modelo se importan dentro de las
+# funciones que los usan: asi /health y /features responden apenas arranca
+# el servidor, mientras el modelo se carga en segundo plano
+
 # =============================================================================
 # CONFIGURACION
 # =============================================================================
@@ -29,30 +48,586 @@ from datetime import datetime
 MODELS_DIR = Path(__file__).parent / "models"
 MODEL_FILE = MODELS_DIR / "modelo_riego.joblib"
 
+# Bosque exportado a arrays de NumPy por 02_entrenar_modelo.py
+MODEL_FILE_PLANO = MODELS_DIR / "modelo_riego_plano.joblib"
+
+# Usar el bosque plano si existe (--sklearn: el RandomForestClassifier)
+USAR_BOSQUE_PLANO = True
+
+# Abrir los arrays del bosque plano con mmap: los workers de un mismo
+# servidor comparten las paginas del archivo en lugar de copiarlas
+CARGAR_CON_MMAP = True
+
+# Modo LUT: responder desde la tabla de decision precalculada
+# (02_entrenar_modelo.py --lut) en lugar de recorrer el bosque
+MODEL_FILE_LUT = MODELS_DIR / "modelo_riego_lut.joblib"
+MODO_LUT = False
+LUT_INTERPOLAR = False
+
+# Modelo compacto destilado del bosque (02_entrenar_modelo.py --compacto):
+# mismo formato que el bosque plano, con pocos nodos
+MODEL_FILE_COMPACTO = MODELS_DIR / "modelo_riego_compacto.joblib"
+MODO_COMPACTO = False
+
+# Metadata del modelo (features, metricas, version) en JSON
+MODEL_FILE_META = MODELS_DIR / "modelo_riego.json"
+
+# Mayor valor aceptado en una feature: el bosque plano compara en float32
+FLOAT32_MAX = 3.4028234663852886e38
+
+# /predict/stream: registros maximos por pasada del modelo y lineas que
+# se aceptan por adelantado antes de dejar de leer la entrada
+STREAM_LOTE_MAX = 256
+STREAM_COLA_MAX = 4096
+
+# Agrupar /predict concurrentes en micro-lotes (ver agrupador_predicciones.py)
+USAR_AGRUPADOR = False
+AGRUPADOR_VENTANA_MS = 2.0
+AGRUPADOR_MAX_FILAS = 64
+
+# Cache de /predict por lectura cuantizada (ver cache_predicciones.py)
+USAR_CACHE = True
+CACHE_MAX_ENTRADAS = 10_000
+CACHE_TTL_S = 300.0
+
+# Registro de modelos (ver registro_modelos.py): si tiene una version
+# ACTUAL se carga esa; si no, los archivos de MODELS_DIR
+REGISTRO_DIR = registro_modelos.DIRECTORIO_REGISTRO
+
+# Con --vigilar-registro, cada cuantos segundos se revisa ACTUAL
+RECARGA_INTERVALO_S = 5.0
+
+# Filas del lote con que se calienta un modelo antes de publicarlo: recorre
+# la mayor parte de los nodos (y de las paginas mapeadas con mmap)
+CALENTAR_FILAS = 256
+
+# Modo sombra: version candidata del registro (None: desactivado) y
+# fraccion de /predict que tambien se evalua con ella (ver modelo_sombra.py)
+SOMBRA_VERSION = None
+SOMBRA_FRACCION = 0.05
+
+# Histogramas y contadores de /metrics (ver metricas_api.py)
+USAR_METRICAS = True
+
+# Fraccion de las predicciones que se escriben en el log, una linea JSON
+# cada una (los errores 500 se escriben siempre)
+LOG_FRACCION = 0.01
+
 app = Flask(__name__)
 
-# Variable global para el modelo
+# Variable global para el modelo. Se reemplaza entera al recargar: cada
+# request toma una referencia al empezar y usa esa hasta terminar
 MODELO_DATA = None
 
+# Metadata del JSON de la misma version que MODELO_DATA (ACTUAL del
+# registro o MODELS_DIR), disponible antes que el modelo
+MODELO_META = None
 
-def cargar_modelo():
-    """Carga el modelo al iniciar la aplicacion."""
-    global MODELO_DATA
+# Estado de la carga: "sin_cargar", "cargando", "listo" o "error"
+ESTADO_MODELO = "sin_cargar"
+ERROR_CARGA = None
 
-    if not MODEL_FILE.exists():
-        raise FileNotFoundError(
-            f"No se encontro el modelo en {MODEL_FILE}\n"
-            "Ejecuta primero:\n"
-            "  uv run 01_descargar_datos.py\n"
-            "  uv run 02_entrenar_modelo.py"
-        )
+# Cache de predicciones del modelo cargado (None si esta desactivado)
+CACHE = None
+
+# Agrupador de /predict (None si esta desactivado)
+AGRUPADOR = None
+
+# Comparacion con la version candidata (None si no hay modo sombra)
+SOMBRA = None
+
+# Colectores de /metrics (None si estan desactivados)
+METRICAS = MetricasAPI()
+
+LOG = logging.getLogger("riego.api")
+_AZAR = random.Random()
+
+# Una sola carga o recarga del modelo a la vez
+_LOCK_CARGA = threading.RLock()
+
+# Buffer de features preasignado por hilo para /predict
+_BUFFERS = threading.local()
+
+
+def cargar_modelo(usar_bosque_plano: bool = True):
+    """
+    Carga el modelo al iniciar la aplicacion.
+
+    Si existe el bosque plano exportado por 02_entrenar_modelo.py se usa ese:
+    se evalua solo con NumPy, sin importar scikit-learn, y sus arrays se
+    mapean en memoria de solo lectura (ver CARGAR_CON_MMAP). Si no, se carga
+    el RandomForestClassifier original. Con MODO_LUT se usa la tabla de
+    decision precalculada y con MODO_COMPACTO el modelo compacto destilado.
+
+    Los archivos se leen de la version ACTUAL del registro, si hay una, o de
+    MODELS_DIR. Con SOMBRA_VERSION se carga tambien la version candidata.
+    """
+    with _LOCK_CARGA:
+        version, directorio = _resolver_version()
+        modelo_data = _leer_modelo(directorio, usar_bosque_plano)
+        modelo_data["version_registro"] = version
+        meta = _leer_metadata(version, directorio)
+        _calentar_modelo(modelo_data)
+        _publicar_modelo(modelo_data, meta)
+
+        if SOMBRA_VERSION is not None and SOMBRA is None:
+            cargar_sombra(SOMBRA_VERSION, usar_bosque_plano)
 
-    print(f"Cargando modelo desde {MODEL_FILE}...")
-    MODELO_DATA = joblib.load(MODEL_FILE)
     print(f"Modelo cargado correctamente")
-    print(f"  Algoritmo: {MODELO_DATA.get('algoritmo', 'Unknown')}")
-    print(f"  Features: {MODELO_DATA['features']}")
-    print(f"  Accuracy: {MODELO_DATA['metricas']['accuracy']:.1%}")
+    print(f"  Version del registro: {version or 'sin registro'}")
+    print(f"  Algoritmo: {modelo_data.get('algoritmo', 'Unknown')}")
+    print(f"  Evaluador: {type(modelo_data['modelo']).__name__}")
+    print(f"  Features: {modelo_data['features']}")
+    print(f"  Accuracy: {modelo_data['metricas']['accuracy']:.1%}")
+
+
+def recargar_modelo(usar_bosque_plano: bool = True) -> bool:
+    """
+    Publica la version ACTUAL del registro si no es la que esta cargada.
+
+    La version nueva se lee y se calienta en el hilo que llama; mientras
+    tanto los requests siguen con el modelo anterior, y el cambio es una
+    sola asignacion de MODELO_DATA. Si la carga falla, queda el anterior.
+
+    Returns:
+        True si se publico otra version
+    """
+    with _LOCK_CARGA:
+        anterior = MODELO_DATA.get("version_registro") if MODELO_DATA else None
+        version, _ = _resolver_version()
+        if MODELO_DATA is not None and version == anterior:
+            return False
+
+        inicio = time.perf_counter()
+        cargar_modelo(usar_bosque_plano)
+
+    print(
+        f"[REGISTRO] Modelo {anterior} -> {MODELO_DATA.get('version_registro')} "
+        f"(cargado y calentado en {time.perf_counter() - inicio:.2f} s)"
+    )
+    return True
+
+
+def vigilar_registro(
+    usar_bosque_plano: bool = True, intervalo_s: float = RECARGA_INTERVALO_S
+) -> threading.Thread:
+    """
+    Revisa ACTUAL cada intervalo_s en un hilo y recarga cuando cambia.
+
+    Cada proceso (p. ej. cada worker de gunicorn) necesita su propio hilo.
+    Una version que no se pudo cargar no se reintenta hasta que ACTUAL
+    cambie de nuevo.
+    """
+
+    def _vigilar():
+        fallida = None
+        while True:
+            time.sleep(intervalo_s)
+            if MODELO_DATA is None:
+                continue
+            version = registro_modelos.version_actual(REGISTRO_DIR)
+            if version == fallida:
+                continue
+            try:
+                recargar_modelo(usar_bosque_plano)
+                fallida = None
+            except Exception as e:
+                fallida = version
+                print(
+                    f"[REGISTRO] No se pudo cargar {version}: {type(e).__name__}: {e}"
+                )
+
+    hilo = threading.Thread(target=_vigilar, name="vigilar-registro", daemon=True)
+    hilo.start()
+    return hilo
+
+
+def cargar_sombra(version: str, usar_bosque_plano: bool = True):
+    """
+    Carga una version del registro como candidata del modo sombra.
+
+    Raises:
+        ValueError: si la candidata no usa las mismas features que el
+            modelo activo
+    """
+    global SOMBRA
+    from modelo_sombra import ModeloSombra
+
+    print(f"Cargando version candidata {version} (modo sombra)...")
+    candidato = _leer_modelo(
+        registro_modelos.directorio_version(version, REGISTRO_DIR), usar_bosque_plano
+    )
+    if list(candidato["features"]) != list(MODELO_DATA["features"]):
+        raise ValueError(
+            f"La version {version} usa features {candidato['features']}, "
+            f"el modelo activo {MODELO_DATA['features']}"
+        )
+    _calentar_modelo(candidato)
+    SOMBRA = ModeloSombra(
+        MODELO_DATA["modelo"],
+        candidato["modelo"],
+        version,
+        fraccion=SOMBRA_FRACCION,
+    )
+
+
+def _resolver_version() -> tuple:
+    """(version ACTUAL del registro o None, directorio de donde cargar)."""
+    version = registro_modelos.version_actual(REGISTRO_DIR)
+    if version is None:
+        return None, MODELS_DIR
+    return version, registro_modelos.directorio_version(version, REGISTRO_DIR)
+
+
+def _leer_modelo(directorio: Path, usar_bosque_plano: bool) -> dict:
+    """
+    Lee el modelo de MODELS_DIR o de una version del registro, segun el modo.
+
+    Returns:
+        modelo_data con "modelo" listo para predict_proba
+    """
+    import joblib
+
+    archivo_lut = directorio / MODEL_FILE_LUT.name
+    archivo_compacto = directorio / MODEL_FILE_COMPACTO.name
+    archivo_plano = directorio / MODEL_FILE_PLANO.name
+    archivo = directorio / MODEL_FILE.name
+
+    if MODO_LUT:
+        if not archivo_lut.exists():
+            raise FileNotFoundError(
+                f"No se encontro la tabla de decision en {archivo_lut}\n"
+                "Ejecuta primero:\n"
+                "  uv run 02_entrenar_modelo.py --solo-exportar --lut"
+            )
+        from tabla_decision import TablaDecision
+
+        print(f"Cargando tabla de decision desde {archivo_lut}...")
+        modelo_data = joblib.load(archivo_lut)
+        modelo_data["modelo"] = TablaDecision(
+            modelo_data.pop("tabla"), interpolar=LUT_INTERPOLAR
+        )
+    elif MODO_COMPACTO:
+        if not archivo_compacto.exists():
+            raise FileNotFoundError(
+                f"No se encontro el modelo compacto en {archivo_compacto}\n"
+                "Ejecuta primero:\n"
+                "  uv run 02_entrenar_modelo.py --compacto"
+            )
+        from bosque_plano import BosquePlano
+
+        print(f"Cargando modelo compacto desde {archivo_compacto}...")
+        modelo_data = joblib.load(archivo_compacto)
+        modelo_data["modelo"] = BosquePlano(modelo_data.pop("bosque"))
+    elif usar_bosque_plano and archivo_plano.exists():
+        from bosque_plano import BosquePlano
+
+        print(f"Cargando bosque plano desde {archivo_plano}...")
+        modelo_data = joblib.load(
+            archivo_plano, mmap_mode="r" if CARGAR_CON_MMAP else None
+        )
+        modelo_data["modelo"] = BosquePlano(
+            modelo_data.pop("bosque"), respaldo=_respaldo_sklearn(archivo)
+        )
+    else:
+        if not archivo.exists():
+            raise FileNotFoundError(
+                f"No se encontro el modelo en {archivo}\n"
+                "Ejecuta primero:\n"
+                "  uv run 01_descargar_datos.py\n"
+                "  uv run 02_entrenar_modelo.py"
+            )
+
+        print(f"Cargando modelo desde {archivo}...")
+        modelo_data = _preparar_modelo(joblib.load(archivo))
+
+    return modelo_data
+
+
+def _respaldo_sklearn(archivo: Path):
+    """
+    Carga diferida del RandomForest para los lotes grandes del bosque plano.
+
+    Sin numba el descenso de NumPy deja de ganarle a sklearn en lotes de
+    miles de filas. sklearn se importa recien con el primero de esos lotes,
+    asi que /predict y el arranque siguen sin importarlo.
+
+    Returns:
+        funcion sin argumentos que retorna el modelo, o None si no existe
+        el archivo
+    """
+    if not archivo.exists():
+        return None
+
+    def cargar():
+        import joblib
+
+        print(f"Cargando {archivo} para lotes grandes...")
+        return _preparar_modelo(joblib.load(archivo))["modelo"]
+
+    return cargar
+
+
+def _publicar_modelo(modelo_data: dict, meta: dict = None):
+    """
+    Reemplaza el modelo que usan los requests por uno ya calentado, junto
+    con la metadata de la misma version.
+
+    Primero se publica MODELO_DATA y despues se invalida el cache: un
+    request que leyo la generacion del cache antes de la invalidacion y
+    predijo con el modelo anterior no guarda su resultado (ver predict).
+    """
+    global MODELO_DATA, MODELO_META, ESTADO_MODELO, CACHE, AGRUPADOR
+
+    if USAR_AGRUPADOR:
+        from agrupador_predicciones import AgrupadorPredicciones
+
+        if AGRUPADOR is None:
+            AGRUPADOR = AgrupadorPredicciones(
+                modelo_data["modelo"],
+                ventana_ms=AGRUPADOR_VENTANA_MS,
+                max_filas=AGRUPADOR_MAX_FILAS,
+            )
+        else:
+            AGRUPADOR.modelo = modelo_data["modelo"]
+
+    if SOMBRA is not None:
+        SOMBRA.principal = modelo_data["modelo"]
+
+    if meta is not None:
+        MODELO_META = meta
+    MODELO_DATA = modelo_data
+    ESTADO_MODELO = "listo"
+
+    # Las predicciones guardadas son del modelo anterior: empezar de cero
+    if USAR_CACHE:
+        from cache_predicciones import CachePredicciones
+
+        if CACHE is not None and CACHE.features == list(modelo_data["features"]):
+            CACHE.invalidar()
+        else:
+            CACHE = CachePredicciones(
+                modelo_data["features"],
+                max_entradas=CACHE_MAX_ENTRADAS,
+                ttl_s=CACHE_TTL_S,
+            )
+
+
+def cargar_metadata():
+    """
+    Lee la metadata del modelo desde el JSON que escribe guardar_modelo.
+
+    Es un archivo pequenio y no necesita numpy ni joblib, asi que permite
+    responder /health y /features antes de cargar el modelo. Se lee de la
+    misma version que cargara cargar_modelo (ver _resolver_version).
+    """
+    global MODELO_META
+
+    meta = _leer_metadata(*_resolver_version())
+    if meta is not None:
+        MODELO_META = meta
+
+
+def _leer_metadata(version: str, directorio: Path) -> dict:
+    """JSON de metadata de una version (o de MODELS_DIR), o None si no esta."""
+    archivo = directorio / MODEL_FILE_META.name
+    if not archivo.exists():
+        return None
+    with open(archivo) as f:
+        meta = json.load(f)
+    meta["version_registro"] = version
+    return meta
+
+
+def cargar_modelo_en_segundo_plano(usar_bosque_plano: bool = True) -> threading.Thread:
+    """Carga el modelo en un hilo; mientras tanto /health reporta 'warming'."""
+    global ESTADO_MODELO
+
+    def _cargar():
+        global ESTADO_MODELO, ERROR_CARGA
+        try:
+            cargar_modelo(usar_bosque_plano)
+        except Exception as e:
+            ERROR_CARGA = f"{type(e).__name__}: {e}"
+            ESTADO_MODELO = "error"
+            print(f"\nError al cargar el modelo: {ERROR_CARGA}")
+
+    ESTADO_MODELO = "cargando"
+    hilo = threading.Thread(target=_cargar, name="carga-modelo", daemon=True)
+    hilo.start()
+    return hilo
+
+
+def _calentar_modelo(modelo_data: dict):
+    """
+    Hace predicciones de prueba antes de publicar el modelo, para que el
+    primer request no pague la inicializacion perezosa (p. ej. numba) ni
+    la lectura desde disco de las paginas mapeadas con mmap.
+    """
+    import numpy as np
+
+    n_features = len(modelo_data["features"])
+    modelo_data["modelo"].predict_proba(np.zeros((1, n_features)))
+    X = np.random.default_rng(0).uniform(0, 100, (CALENTAR_FILAS, n_features))
+    modelo_data["modelo"].predict_proba(X)
+
+
+def _metadata():
+    """Metadata del modelo cargado o, si aun no termina de cargar, la del JSON."""
+    return MODELO_DATA if MODELO_DATA is not None else MODELO_META
+
+
+def _registrar_error(endpoint: str, tipo: str, excepcion: Exception = None):
+    """Cuenta el error en /metrics; las excepciones se escriben en el log."""
+    if METRICAS is not None:
+        METRICAS.registrar_error(endpoint, tipo)
+    if excepcion is not None:
+        LOG.error(
+            json.dumps(
+                {
+                    "evento": "error",
+                    "endpoint": endpoint,
+                    "tipo": tipo,
+                    "mensaje": str(excepcion),
+                }
+            )
+        )
+
+
+def _respuesta_sin_modelo():
+    """Respuesta de error cuando se pide una prediccion sin modelo cargado."""
+    if ESTADO_MODELO == "cargando":
+        return jsonify({"error": "Modelo cargandose, reintenta en unos segundos"}), 503
+    return jsonify({"error": "Modelo no cargado"}), 500
+
+
+def _preparar_modelo(modelo_data: dict) -> dict:
+    """
+    Ajusta el modelo cargado para inferencia fila a fila.
+
+    - Verifica que el modelo fue entrenado con las features en el mismo
+      orden que MODELO_DATA["features"] y luego descarta los nombres, para
+      que acepte arrays de NumPy sin warnings de sklearn.
+    - Usa un solo hilo por prediccion: la API ya atiende requests en
+      paralelo y repartir 100 arboles entre hilos por cada fila cuesta mas
+      de lo que ahorra.
+    """
+    modelo = modelo_data["modelo"]
+
+    nombres = getattr(modelo, "feature_names_in_", None)
+    if nombres is not None:
+        if list(nombres) != list(modelo_data["features"]):
+            raise ValueError(
+                f"El modelo fue entrenado con features {list(nombres)}, "
+                f"pero la metadata indica {modelo_data['features']}"
+            )
+        del modelo.feature_names_in_
+
+    if "n_jobs" in modelo.get_params():
+        modelo.set_params(n_jobs=1)
+
+    return modelo_data
+
+
+def _buffer_features(n_features: int):
+    """Retorna el buffer (1, n_features) del hilo actual, creandolo si hace falta."""
+    import numpy as np
+
+    buffer = getattr(_BUFFERS, "X", None)
+    if buffer is None or buffer.shape[1] != n_features:
+        buffer = _BUFFERS.X = np.empty((1, n_features))
+    return buffer
+
+
+def _error_valor(feature: str, value):
+    """
+    Valida el valor de una feature: numerico, finito y representable en
+    float32 (el bosque plano compara en float32: 1e39 seria infinito).
+
+    Returns:
+        Mensaje de error, o None si el valor es valido
+    """
+    if not isinstance(value, (int, float)):
+        return f"Campo '{feature}' debe ser numerico, recibido: {type(value).__name__}"
+    # abs() primero: math.isfinite no acepta enteros mas grandes que un float
+    if abs(value) > FLOAT32_MAX or not math.isfinite(value):
+        return f"Campo '{feature}' fuera de rango: {value}"
+    return None
+
+
+def _validar_registro(registro, features: list):
+    """
+    Valida que un registro tenga todas las features y que sean numeros
+    finitos dentro del rango de float32.
+
+    Returns:
+        Mensaje de error, o None si el registro es valido
+    """
+    if not isinstance(registro, dict):
+        return f"Registro debe ser un objeto JSON, recibido: {type(registro).__name__}"
+
+    missing = [f for f in features if f not in registro]
+    if missing:
+        return f"Campos faltantes: {missing}"
+
+    for feature in features:
+        error = _error_valor(feature, registro[feature])
+        if error:
+            return error
+
+    return None
+
+
+def _predecir_lote(registros: list, inicio: int = 0) -> list:
+    """
+    Valida y predice una lista de registros con una sola pasada del modelo.
+
+    Args:
+        registros: lista de dicts con las features
+        inicio: indice del primer registro (para numerar los resultados)
+
+    Returns:
+        Un resultado por registro, en el mismo orden: la decision o el error
+        de validacion, con "index" = inicio + posicion
+    """
+    import numpy as np
+
+    modelo_data = MODELO_DATA
+    features = modelo_data["features"]
+    modelo = modelo_data["modelo"]
+
+    # Validar todos los registros antes de predecir; los errores
+    # conservan el indice original del registro
+    resultados = [None] * len(registros)
+    validos = []
+    for i, registro in enumerate(registros):
+        error = _validar_registro(registro, features)
+        if error:
+            resultados[i] = {"index": inicio + i, "error": error}
+        else:
+            validos.append(i)
+
+    if validos:
+        # Una sola matriz contigua y una sola pasada por el bosque
+        X = np.array(
+            [[registros[i][f] for f in features] for i in validos], dtype=float
+        )
+        probabilidades = modelo.predict_proba(X)
+
+        # Misma decision que modelo.predict: clase de mayor probabilidad
+        columnas = probabilidades.argmax(axis=1)
+        predicciones = modelo.classes_[columnas].tolist()
+        confianzas = probabilidades[np.arange(len(validos)), columnas].tolist()
+
+        for i, prediccion, confianza in zip(validos, predicciones, confianzas):
+            resultados[i] = {
+                "index": inicio + i,
+                "decision": "REGAR" if prediccion == 1 else "NO_REGAR",
+                "decision_int": int(prediccion),
+                "confianza": round(confianza * 100, 1),
+            }
+
+    return resultados
 
 
 # =============================================================================
@@ -66,13 +641,19 @@ def index():
     return jsonify(
         {
             "nombre": "API de Prediccion de Riego",
-            "version": MODELO_DATA.get("version", "1.0") if MODELO_DATA else "N/A",
+            "version": _metadata().get("version", "1.0") if _metadata() else "N/A",
             "descripcion": "Sistema IoT de Riego Inteligente para Pastizales",
             "endpoints": {
                 "GET /": "Esta informacion",
                 "GET /health": "Estado del servicio",
                 "GET /features": "Features requeridas por el modelo",
                 "POST /predict": "Hacer prediccion de riego",
+                "POST /predict/stream": "Prediccion continua (NDJSON)",
+                "GET /cache/stats": "Contadores del cache de predicciones",
+                "GET /batching/stats": "Tamanio de lote y espera del agrupador",
+                "POST /model/reload": "Cargar la version activa del registro",
+                "GET /model/shadow": "Comparacion con la version candidata",
+                "GET /metrics": "Metricas en formato Prometheus",
             },
         }
     )
@@ -81,15 +662,32 @@ def index():
 @app.route("/health", methods=["GET"])
 def health():
     """Endpoint de salud para verificar que el servicio esta activo."""
-    if MODELO_DATA is None:
-        return jsonify({"status": "error", "message": "Modelo no cargado"}), 500
+    modelo_data = MODELO_DATA
+    if modelo_data is None:
+        if ESTADO_MODELO == "cargando":
+            meta = MODELO_META or {}
+            return jsonify(
+                {
+                    "status": "warming",
+                    "model_loaded": False,
+                    "model_version": meta.get("version"),
+                    "registry_version": meta.get("version_registro"),
+                    "timestamp": datetime.now().isoformat(),
+                }
+            ), 503
+
+        mensaje = "Modelo no cargado"
+        if ERROR_CARGA:
+            mensaje += f": {ERROR_CARGA}"
+        return jsonify({"status": "error", "message": mensaje}), 500
 
     return jsonify(
         {
             "status": "ok",
             "model_loaded": True,
-            "model_version": MODELO_DATA.get("version", "1.0"),
-            "accuracy": round(MODELO_DATA["metricas"]["accuracy"], 3),
+            "model_version": modelo_data.get("version", "1.0"),
+            "registry_version": modelo_data.get("version_registro"),
+            "accuracy": round(modelo_data["metricas"]["accuracy"], 3),
             "timestamp": datetime.now().isoformat(),
         }
     )
@@ -98,12 +696,13 @@ def health():
 @app.route("/features", methods=["GET"])
 def get_features():
     """Retorna las features esperadas por el modelo."""
-    if MODELO_DATA is None:
+    meta = _metadata()
+    if meta is None:
         return jsonify({"error": "Modelo no cargado"}), 500
 
     return jsonify(
         {
-            "features": MODELO_DATA["features"],
+            "features": meta["features"],
             "descripcion": {
                 "humedad_suelo": "Humedad del suelo en % (0-100)",
                 "temperatura": "Temperatura en grados Celsius",
@@ -151,23 +750,34 @@ def predict():
         "inputs": {...}
     }
     """
-    if MODELO_DATA is None:
-        return jsonify({"error": "Modelo no cargado"}), 500
+    inicio = time.perf_counter()
+
+    # La generacion del cache se lee antes que el modelo: si el modelo se
+    # reemplaza en medio del request, su prediccion no se guarda
+    cache = CACHE
+    generacion = cache.generacion if cache is not None else None
+    modelo_data = MODELO_DATA
+    if modelo_data is None:
+        _registrar_error("predict", "sin_modelo")
+        return _respuesta_sin_modelo()
 
     try:
         data = request.get_json()
+        fin_parse = time.perf_counter()
 
         if data is None:
+            _registrar_error("predict", "sin_json")
             return jsonify(
                 {"error": "No se recibio JSON. Usa Content-Type: application/json"}
             ), 400
 
-        features = MODELO_DATA["features"]
-        modelo = MODELO_DATA["modelo"]
+        features = modelo_data["features"]
+        modelo = modelo_data["modelo"]
 
         # Validar campos requeridos
         missing = [f for f in features if f not in data]
         if missing:
+            _registrar_error("predict", "campos_faltantes")
             return jsonify(
                 {
                     "error": f"Campos requeridos faltantes: {missing}",
@@ -177,27 +787,50 @@ def predict():
 
         # Validar tipos y rangos
         for feature in features:
-            value = data[feature]
-            if not isinstance(value, (int, float)):
-                return jsonify(
-                    {
-                        "error": f"Campo '{feature}' debe ser numerico, recibido: {type(value).__name__}"
-                    }
-                ), 400
+            error = _error_valor(feature, data[feature])
+            if error:
+                _registrar_error("predict", "valor_invalido")
+                return jsonify({"error": error}), 400
+        fin_validacion = time.perf_counter()
 
-        # Crear DataFrame con nombres de features (evita warning de sklearn)
-        import pandas as pd
+        valores = [data[f] for f in features]
+        clave = cache.clave(valores) if cache is not None else None
+        fin_armado = time.perf_counter()
 
-        X = pd.DataFrame([[float(data[f]) for f in features]], columns=features)
+        # Lecturas casi iguales a una reciente reutilizan su prediccion
+        probabilidades = None
+        if cache is not None:
+            probabilidades = cache.obtener(clave)
 
-        # Predecir
-        prediccion = modelo.predict(X)[0]
-        probabilidades = modelo.predict_proba(X)[0]
+        if probabilidades is None:
+            agrupador = AGRUPADOR
+            if agrupador is not None:
+                # Se predice junto con los demas requests concurrentes
+                probabilidades = agrupador.predecir(valores)
+            else:
+                # Copiar features al buffer en el orden del modelo (sin pandas)
+                X = _buffer_features(len(features))
+                X[0] = valores
+
+                # Una sola pasada por el bosque
+                probabilidades = modelo.predict_proba(X)[0]
+            if cache is not None:
+                cache.guardar(clave, probabilidades, generacion)
+
+        # Una fraccion de las lecturas se compara con la version candidata
+        sombra = SOMBRA
+        if sombra is not None:
+            sombra.muestrear(valores)
+        fin_inferencia = time.perf_counter()
+
+        # La decision es la clase mas probable
+        columna = int(probabilidades.argmax())
+        prediccion = modelo.classes_[columna]
 
         # Probabilidad de la clase predicha
         prob_no_regar = probabilidades[0]
         prob_regar = probabilidades[1]
-        confianza = probabilidades[prediccion]
+        confianza = probabilidades[columna]
 
         resultado = {
             "decision": "REGAR" if prediccion == 1 else "NO_REGAR",
@@ -209,14 +842,32 @@ def predict():
             "timestamp": datetime.now().isoformat(),
         }
 
-        # Log para debugging
-        print(
-            f"[PREDICCION] {resultado['decision']} (confianza: {resultado['confianza']}%)"
-        )
+        respuesta = jsonify(resultado)
+        fin = time.perf_counter()
 
-        return jsonify(resultado)
+        if METRICAS is not None:
+            METRICAS.registrar_predict(
+                (inicio, fin_parse, fin_validacion, fin_armado, fin_inferencia, fin),
+                resultado["decision"],
+            )
+        # Log muestreado: el sorteo es lo unico que paga cada request
+        if _AZAR.random() < LOG_FRACCION:
+            LOG.info(
+                json.dumps(
+                    {
+                        "evento": "prediccion",
+                        "decision": resultado["decision"],
+                        "confianza": resultado["confianza"],
+                        "duracion_ms": round((fin - inicio) * 1000, 3),
+                        "version_registro": modelo_data.get("version_registro"),
+                    }
+                )
+            )
+
+        return respuesta
 
     except Exception as e:
+        _registrar_error("predict", type(e).__name__, e)
         return jsonify({"error": str(e), "tipo": type(e).__name__}), 500
 
 
@@ -233,69 +884,266 @@ def predict_batch():
         ]
     }
     """
+    inicio = time.perf_counter()
     if MODELO_DATA is None:
-        return jsonify({"error": "Modelo no cargado"}), 500
+        _registrar_error("batch", "sin_modelo")
+        return _respuesta_sin_modelo()
 
     try:
         data = request.get_json()
 
         if "datos" not in data:
+            _registrar_error("batch", "sin_datos")
             return jsonify(
                 {"error": "Se requiere campo 'datos' con lista de registros"}
             ), 400
 
         registros = data["datos"]
-        features = MODELO_DATA["features"]
-        modelo = MODELO_DATA["modelo"]
-
-        resultados = []
-        for i, registro in enumerate(registros):
-            # Validar campos
-            missing = [f for f in features if f not in registro]
-            if missing:
-                resultados.append({"index": i, "error": f"Campos faltantes: {missing}"})
-                continue
-
-            # Predecir
-            X = np.array([[float(registro[f]) for f in features]])
-            prediccion = modelo.predict(X)[0]
-            probabilidades = modelo.predict_proba(X)[0]
+        resultados = _predecir_lote(registros)
+        respuesta = jsonify({"total": len(registros), "resultados": resultados})
 
-            resultados.append(
-                {
-                    "index": i,
-                    "decision": "REGAR" if prediccion == 1 else "NO_REGAR",
-                    "decision_int": int(prediccion),
-                    "confianza": round(float(probabilidades[prediccion]) * 100, 1),
-                }
+        duracion = time.perf_counter() - inicio
+        if METRICAS is not None:
+            METRICAS.registrar_lote("batch", resultados, duracion)
+        if _AZAR.random() < LOG_FRACCION:
+            LOG.info(
+                json.dumps(
+                    {
+                        "evento": "lote",
+                        "registros": len(registros),
+                        "duracion_ms": round(duracion * 1000, 3),
+                    }
+                )
             )
-
-        return jsonify({"total": len(registros), "resultados": resultados})
+        return respuesta
 
     except Exception as e:
+        _registrar_error("batch", type(e).__name__, e)
         return jsonify({"error": str(e)}), 500
 
 
+_FIN_STREAM = object()
+
+
+@app.route("/predict/stream", methods=["POST"])
+def predict_stream():
+    """
+    Prediccion continua sobre una sola conexion, en NDJSON.
+
+    El cuerpo es un registro JSON por linea y puede seguir llegando mientras
+    se responde (Transfer-Encoding: chunked). La respuesta tiene un
+    resultado por linea, en el mismo orden, con el formato de
+    /predict/batch:
+
+        {"index": 0, "decision": "REGAR", "decision_int": 1, "confianza": 87.0}
+        {"index": 1, "error": "Campos faltantes: ['mes']"}
+
+    Un hilo lee las lineas a una cola; la respuesta toma lo que ya llego
+    (hasta STREAM_LOTE_MAX registros) y lo predice en una sola pasada.
+    """
+    if MODELO_DATA is None:
+        _registrar_error("stream", "sin_modelo")
+        return _respuesta_sin_modelo()
+
+    entrada = request.stream
+    cola = queue.Queue(maxsize=STREAM_COLA_MAX)
+    cerrado = threading.Event()
+
+    def encolar(item) -> bool:
+        # Con la cola llena se espera, salvo que la respuesta ya termino
+        while not cerrado.is_set():
+            try:
+                cola.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def leer():
+        try:
+            for linea in entrada:
+                linea = linea.strip()
+                if linea and not encolar(linea):
+                    return
+        except (OSError, ValueError):
+            # El cliente corto la conexion a mitad de la entrada
+            pass
+        finally:
+            encolar(_FIN_STREAM)
+
+    threading.Thread(target=leer, name="stream-lectura", daemon=True).start()
+
+    def generar():
+        indice = 0
+        try:
+            while True:
+                lineas = [cola.get()]
+                while len(lineas) < STREAM_LOTE_MAX and lineas[-1] is not _FIN_STREAM:
+                    try:
+                        lineas.append(cola.get_nowait())
+                    except queue.Empty:
+                        break
+
+                fin = lineas[-1] is _FIN_STREAM
+                if fin:
+                    lineas.pop()
+
+                if lineas:
+                    inicio = time.perf_counter()
+                    registros, errores = [], {}
+                    for k, linea in enumerate(lineas):
+                        try:
+                            registros.append(json.loads(linea))
+                        except ValueError as e:
+                            registros.append(None)
+                            errores[k] = f"JSON invalido: {e}"
+
+                    resultados = _predecir_lote(registros, indice)
+                    for k, error in errores.items():
+                        resultados[k] = {"index": indice + k, "error": error}
+                    indice += len(lineas)
+                    salida = "".join(json.dumps(r) + "\n" for r in resultados)
+
+                    if METRICAS is not None:
+                        METRICAS.registrar_lote(
+                            "stream", resultados, time.perf_counter() - inicio
+                        )
+                    yield salida
+
+                if fin:
+                    return
+        finally:
+            cerrado.set()
+
+    return Response(generar(), mimetype="application/x-ndjson")
+
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    """Aciertos, fallos y expulsiones del cache de /predict."""
+    if CACHE is None:
+        return jsonify({"activo": False})
+
+    return jsonify({"activo": True, **CACHE.estadisticas()})
+
+
+@app.route("/batching/stats", methods=["GET"])
+def batching_stats():
+    """Distribucion del tamanio de lote y espera en cola del agrupador."""
+    if AGRUPADOR is None:
+        return jsonify({"activo": False})
+
+    return jsonify({"activo": True, **AGRUPADOR.estadisticas()})
+
+
 @app.route("/model/info", methods=["GET"])
 def model_info():
     """Retorna informacion detallada del modelo."""
-    if MODELO_DATA is None:
+    modelo_data = MODELO_DATA
+    if modelo_data is None:
         return jsonify({"error": "Modelo no cargado"}), 500
 
     return jsonify(
         {
-            "version": MODELO_DATA.get("version", "1.0"),
-            "algoritmo": MODELO_DATA.get("algoritmo", "RandomForestClassifier"),
-            "features": MODELO_DATA["features"],
+            "version": modelo_data.get("version", "1.0"),
+            "version_registro": modelo_data.get("version_registro"),
+            "algoritmo": modelo_data.get("algoritmo", "RandomForestClassifier"),
+            "evaluador": type(modelo_data["modelo"]).__name__,
+            "features": modelo_data["features"],
             "metricas": {
                 k: round(v, 4) if isinstance(v, float) else v
-                for k, v in MODELO_DATA["metricas"].items()
+                for k, v in modelo_data["metricas"].items()
             },
-            "parametros": MODELO_DATA.get("parametros", {}),
+            "parametros": modelo_data.get("parametros", {}),
+        }
+    )
+
+
+@app.route("/model/reload", methods=["POST"])
+def model_reload():
+    """
+    Carga la version ACTUAL del registro si cambio, sin reiniciar.
+
+    Solo recarga el proceso que atiende el request: con varios workers
+    conviene --vigilar-registro.
+    """
+    if MODELO_DATA is None:
+        return _respuesta_sin_modelo()
+
+    anterior = MODELO_DATA.get("version_registro")
+    try:
+        recargado = recargar_modelo(USAR_BOSQUE_PLANO)
+    except Exception as e:
+        return jsonify({"error": str(e), "tipo": type(e).__name__}), 500
+
+    return jsonify(
+        {
+            "recargado": recargado,
+            "version_anterior": anterior,
+            "version_registro": MODELO_DATA.get("version_registro"),
         }
     )
 
 
+@app.route("/model/shadow", methods=["GET"])
+def model_shadow():
+    """Coincidencia y latencia de la version candidata en modo sombra."""
+    if SOMBRA is None:
+        return jsonify({"activo": False})
+
+    return jsonify({"activo": True, **SOMBRA.estadisticas()})
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Metricas en el formato de texto de Prometheus.
+
+    Fases de /predict, tiempos y lotes por endpoint, decisiones y errores
+    (ver metricas_api.py), el modelo cargado, el cache y el proceso.
+    """
+    lineas = METRICAS.exportar() if METRICAS is not None else []
+
+    modelo_data = MODELO_DATA
+    if modelo_data is not None:
+        etiquetas = {
+            "version": modelo_data.get("version", "1.0"),
+            "version_registro": modelo_data.get("version_registro") or "",
+            "evaluador": type(modelo_data["modelo"]).__name__,
+        }
+        lineas += metrica(
+            "riego_modelo_info",
+            "Modelo que responde (valor 1)",
+            "gauge",
+            [(etiquetas, 1)],
+        )
+
+    cache = CACHE
+    if cache is not None:
+        e = cache.estadisticas()
+        lineas += metrica(
+            "riego_cache_aciertos_total",
+            "Aciertos del cache de /predict",
+            "counter",
+            [({}, e["aciertos"])],
+        )
+        lineas += metrica(
+            "riego_cache_fallos_total",
+            "Fallos del cache de /predict",
+            "counter",
+            [({}, e["fallos"])],
+        )
+        lineas += metrica(
+            "riego_cache_entradas",
+            "Entradas en el cache de /predict",
+            "gauge",
+            [({}, e["entradas"])],
+        )
+
+    lineas += metricas_proceso()
+    return Response("\n".join(lineas) + "\n", mimetype="text/plain; version=0.0.4")
+
+
 # =============================================================================
 # MAIN
 # =============================================================================
@@ -303,14 +1151,197 @@ def model_info():
 
 def main():
     """Funcion principal para ejecutar la API."""
+    global USAR_CACHE, CACHE_TTL_S, CACHE_MAX_ENTRADAS, MODO_LUT, LUT_INTERPOLAR
+    global MODO_COMPACTO, USAR_BOSQUE_PLANO
+    global USAR_AGRUPADOR, AGRUPADOR_VENTANA_MS, AGRUPADOR_MAX_FILAS
+    global REGISTRO_DIR, RECARGA_INTERVALO_S, SOMBRA_VERSION, SOMBRA_FRACCION
+    global USAR_METRICAS, METRICAS, LOG_FRACCION
+
+    parser = argparse.ArgumentParser(description="API de prediccion de riego")
+    parser.add_argument(
+        "--sklearn",
+        action="store_true",
+        help="Usar el modelo de scikit-learn en lugar del bosque plano",
+    )
+    parser.add_argument(
+        "--arranque-rapido",
+        action="store_true",
+        help="Servir /health y /features de inmediato y cargar el modelo en segundo plano",
+    )
+    parser.add_argument(
+        "--sin-numba",
+        action="store_true",
+        help="Evaluar el bosque plano con NumPy (~160 MB menos por proceso)",
+    )
+    parser.add_argument(
+        "--modo-lut",
+        action="store_true",
+        help="Predecir desde la tabla de decision precalculada (tiempo constante)",
+    )
+    parser.add_argument(
+        "--lut-interpolar",
+        action="store_true",
+        help="En modo LUT, interpolar probabilidades entre puntos de la grilla",
+    )
+    parser.add_argument(
+        "--compacto",
+        action="store_true",
+        help="Predecir con el modelo compacto destilado (pocos nodos)",
+    )
+    parser.add_argument(
+        "--sin-cache", action="store_true", help="Desactivar el cache de /predict"
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=CACHE_TTL_S,
+        help="Segundos que se reutiliza una prediccion",
+    )
+    parser.add_argument(
+        "--cache-max",
+        type=int,
+        default=CACHE_MAX_ENTRADAS,
+        help="Entradas maximas del cache",
+    )
+    parser.add_argument(
+        "--agrupar",
+        action="store_true",
+        help="Juntar /predict concurrentes en un solo predict_proba",
+    )
+    parser.add_argument(
+        "--ventana-ms",
+        type=float,
+        default=AGRUPADOR_VENTANA_MS,
+        help="Espera maxima para completar un lote (defecto: 2 ms)",
+    )
+    parser.add_argument(
+        "--lote-max",
+        type=int,
+        default=AGRUPADOR_MAX_FILAS,
+        help="Filas maximas por lote (defecto: 64)",
+    )
+    registro = parser.add_argument_group("registro de modelos (registro_modelos.py)")
+    registro.add_argument(
+        "--registro",
+        type=Path,
+        default=REGISTRO_DIR,
+        help="Directorio del registro de versiones (defecto: models/registro)",
+    )
+    registro.add_argument(
+        "--vigilar-registro",
+        action="store_true",
+        help="Recargar en caliente cuando cambia la version ACTUAL del registro",
+    )
+    registro.add_argument(
+        "--intervalo-recarga",
+        type=float,
+        default=RECARGA_INTERVALO_S,
+        help="Segundos entre revisiones de ACTUAL (defecto: 5)",
+    )
+    registro.add_argument(
+        "--sombra",
+        metavar="VERSION",
+        help="Comparar una version candidata con una fraccion del trafico",
+    )
+    registro.add_argument(
+        "--sombra-fraccion",
+        type=float,
+        default=SOMBRA_FRACCION,
+        help="Fraccion de /predict evaluada tambien en sombra (defecto: 0.05)",
+    )
+    parser.add_argument(
+        "--sin-metricas",
+        action="store_true",
+        help="No registrar histogramas ni contadores para /metrics",
+    )
+    parser.add_argument(
+        "--log-fraccion",
+        type=float,
+        default=LOG_FRACCION,
+        help="Fraccion de predicciones escritas en el log (defecto: 0.01)",
+    )
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--puerto", type=int, default=5001)
+
+    produccion = parser.add_argument_group("servidor de produccion (gunicorn)")
+    produccion.add_argument(
+        "--produccion",
+        action="store_true",
+        help="Servir con gunicorn en lugar del servidor de desarrollo de Flask",
+    )
+    produccion.add_argument(
+        "--workers", type=int, default=2, help="Procesos worker (defecto: 2)"
+    )
+    produccion.add_argument(
+        "--hilos", type=int, default=4, help="Hilos por worker (defecto: 4)"
+    )
+    produccion.add_argument(
+        "--keepalive",
+        type=int,
+        default=5,
+        help="Segundos que se mantiene abierta una conexion inactiva (defecto: 5)",
+    )
+    produccion.add_argument(
+        "--precargar",
+        action="store_true",
+        help="Cargar el modelo una vez antes de crear los workers",
+    )
+    args = parser.parse_args()
+
+    MODO_LUT = args.modo_lut
+    LUT_INTERPOLAR = args.lut_interpolar
+    MODO_COMPACTO = args.compacto
+    USAR_AGRUPADOR = args.agrupar
+    AGRUPADOR_VENTANA_MS = args.ventana_ms
+    AGRUPADOR_MAX_FILAS = args.lote_max
+    USAR_CACHE = not args.sin_cache
+    CACHE_TTL_S = args.cache_ttl
+    CACHE_MAX_ENTRADAS = args.cache_max
+    USAR_BOSQUE_PLANO = not args.sklearn
+    REGISTRO_DIR = args.registro
+    RECARGA_INTERVALO_S = args.intervalo_recarga
+    SOMBRA_VERSION = args.sombra
+    SOMBRA_FRACCION = args.sombra_fraccion
+    USAR_METRICAS = not args.sin_metricas
+    METRICAS = MetricasAPI() if USAR_METRICAS else None
+    LOG_FRACCION = args.log_fraccion
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.sin_numba:
+        import bosque_plano
+
+        bosque_plano.USAR_NUMBA = False
+
     print("\n" + "=" * 60)
     print("API DE PREDICCION DE RIEGO")
     print("Sistema IoT para Pastizales - UTPL")
     print("=" * 60)
 
+    cargar_metadata()
+
+    if args.produccion:
+        servir_produccion(args)
+        return
+
     # Cargar modelo
-    cargar_modelo()
+    if args.arranque_rapido:
+        cargar_modelo_en_segundo_plano(usar_bosque_plano=not args.sklearn)
+    else:
+        cargar_modelo(usar_bosque_plano=not args.sklearn)
+    if args.vigilar_registro:
+        vigilar_registro(not args.sklearn, RECARGA_INTERVALO_S)
 
+    mostrar_endpoints()
+    print(f"\nIniciando servidor en http://localhost:{args.puerto}")
+    print("Presiona Ctrl+C para detener\n")
+
+    # Ejecutar servidor (puerto 5001 para evitar conflicto con AirPlay en macOS)
+    app.run(host=args.host, port=args.puerto, debug=True)
+
+
+def mostrar_endpoints():
+    """Imprime la lista de endpoints al arrancar."""
     print("\n" + "-" * 60)
     print("ENDPOINTS DISPONIBLES:")
     print("-" * 60)
@@ -319,13 +1350,72 @@ def main():
     print("  GET  /features   - Features requeridas")
     print("  POST /predict    - Hacer prediccion")
     print("  POST /predict/batch - Prediccion en lote")
+    print("  POST /predict/stream - Prediccion continua (NDJSON)")
     print("  GET  /model/info - Informacion del modelo")
+    print("  GET  /cache/stats - Contadores del cache")
+    print("  GET  /batching/stats - Metricas del agrupador de lotes")
+    print("  POST /model/reload - Recargar la version activa del registro")
+    print("  GET  /model/shadow - Comparacion con la version candidata")
+    print("  GET  /metrics    - Metricas en formato Prometheus")
     print("-" * 60)
-    print("\nIniciando servidor en http://localhost:5001")
-    print("Presiona Ctrl+C para detener\n")
 
-    # Ejecutar servidor (puerto 5001 para evitar conflicto con AirPlay en macOS)
-    app.run(host="0.0.0.0", port=5001, debug=True)
+
+def servir_produccion(args):
+    """
+    Sirve la misma app con gunicorn: varios workers, hilos por worker y
+    conexiones keep-alive.
+
+    Con --precargar el modelo se carga una sola vez en el proceso maestro y
+    los workers lo heredan al crearse (copy-on-write). Sin esa opcion cada
+    worker carga su propio modelo al iniciar.
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise SystemExit(
+            "El modo produccion requiere gunicorn:\n  uv sync --extra produccion"
+        )
+
+    if args.precargar and args.arranque_rapido:
+        # El hilo de carga no sobrevive al fork de los workers
+        raise SystemExit("--arranque-rapido no se puede combinar con --precargar")
+
+    usar_bosque_plano = not args.sklearn
+
+    class ServidorRiego(BaseApplication):
+        def load_config(self):
+            opciones = {
+                "bind": f"{args.host}:{args.puerto}",
+                "workers": args.workers,
+                "threads": args.hilos,
+                "worker_class": "gthread",
+                "keepalive": args.keepalive,
+                "preload_app": args.precargar,
+            }
+            if args.vigilar_registro:
+                # El hilo de vigilancia no sobrevive al fork: uno por worker
+                opciones["post_fork"] = lambda servidor, worker: vigilar_registro(
+                    usar_bosque_plano, RECARGA_INTERVALO_S
+                )
+            for clave, valor in opciones.items():
+                self.cfg.set(clave, valor)
+
+        def load(self):
+            # Con preload_app se ejecuta en el maestro; si no, en cada worker
+            if args.arranque_rapido:
+                cargar_modelo_en_segundo_plano(usar_bosque_plano)
+            else:
+                cargar_modelo(usar_bosque_plano)
+            return app
+
+    mostrar_endpoints()
+    print(
+        f"\nIniciando gunicorn en http://{args.host}:{args.puerto} "
+        f"({args.workers} workers x {args.hilos} hilos, "
+        f"keep-alive {args.keepalive} s"
+        f"{', modelo precargado' if args.precargar else ''})\n"
+    )
+    ServidorRiego().run()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,572 @@
+"""
+04 - Ingesta MQTT con Prediccion Directa
+========================================
+Sistema IoT de Riego Inteligente para Pastizales
+UTPL - Maestria en IA Aplicada
+
+Con Node-RED, una lectura del ESP32 hace este recorrido:
+
+    ESP32 -> pastizal/sensores -> Node-RED -> HTTP /predict -> Node-RED
+          -> pastizal/prediccion -> ESP32
+
+Este servicio se suscribe directamente a pastizal/sensores, completa cada
+lectura con el ultimo pronostico de Open-Meteo (guardado en cache y
+refrescado cada 30 min, como el flujo de Node-RED) y con la hora y mes
+actuales, predice con el mismo modelo que carga 03_api_flask.py y publica
+"ON" u "OFF" en pastizal/valvula/control, que es lo que espera
+wokwi/sketch.ino.
+
+Cada lectura se guarda en el estado de su dispositivo
+(estado_dispositivos.py), que tambien lleva las features de ventana
+(precip_24h, temp_promedio_6h) con la misma definicion que el
+entrenamiento. El comando se publica cuando la decision de un dispositivo
+cambia o cuando el estado de la valvula que reporta la lectura ("valvula")
+no coincide con la decision (el ESP32 se reinicio o se perdio un comando);
+un pronostico nuevo vuelve a evaluar a todos.
+
+Las lecturas que llegan mientras el modelo procesa se juntan y se
+predicen en una sola pasada (hasta LOTE_MAX), sin ventana de espera.
+
+Requiere paho-mqtt para conectarse a HiveMQ (uv sync --extra mqtt). Con
+--broker-local no necesita red: usa el broker en memoria de
+broker_local.py y un ESP32 simulado que publica lecturas del historico.
+
+Autor: Luis
+Fecha: Enero 2026
+"""
+
+import argparse
+import importlib
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from estado_dispositivos import CAMPOS_SENSOR, EstadoDispositivos
+
+# El modelo se carga y evalua con las mismas funciones que la API
+api = importlib.import_module("03_api_flask")
+
+# =============================================================================
+# CONFIGURACION
+# =============================================================================
+
+# HiveMQ Cloud (mismo cluster que wokwi/sketch.ino); las credenciales se
+# leen de MQTT_USUARIO y MQTT_CLAVE
+BROKER_HOST = "3f53469d473648f8a48abff7da04d106.s1.eu.hivemq.cloud"
+BROKER_PUERTO = 8883
+QOS = 1
+
+TOPIC_SENSORES = "pastizal/sensores"
+TOPIC_CONTROL = "pastizal/valvula/control"
+
+# Con varios nodos, cada uno publica en pastizal/sensores/<id> (o envia su
+# id en el campo "dispositivo") y recibe su comando en
+# pastizal/valvula/control/<id>. El ESP32 de wokwi/sketch.ino no envia id:
+# es DISPOSITIVO_DEFECTO y usa los topics sin sufijo.
+CAMPO_DISPOSITIVO = "dispositivo"
+DISPOSITIVO_DEFECTO = "esp32"
+
+# Estado de la valvula que reporta el ESP32 en cada lectura
+ESTADOS_VALVULA = {"OFF": 0, "ON": 1}
+
+# Pronostico: misma consulta que el nodo "Open-Meteo API" de Node-RED
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+LATITUD = -2.690425
+LONGITUD = -78.935117
+TIMEZONE = "America/Guayaquil"
+PRONOSTICO_INTERVALO_S = 1800
+
+# Ultimo pronostico descargado, para arrancar con el sin esperar a la red
+PRONOSTICO_CACHE = Path(__file__).parent / "dataset" / "pronostico_cache.json"
+
+# Lecturas maximas por pasada del modelo y lecturas en espera antes de
+# empezar a descartar (la cola no debe bloquear el hilo de red de MQTT)
+LOTE_MAX = 256
+COLA_MAX = 4096
+
+_FIN = object()
+
+
+# =============================================================================
+# PRONOSTICO
+# =============================================================================
+
+
+class PronosticoClima:
+    """
+    Ultimo pronostico de Open-Meteo con las features del modelo.
+
+    Args:
+        archivo: JSON donde se guarda el ultimo pronostico (None para no
+            leer ni escribir cache en disco)
+    """
+
+    def __init__(self, archivo: Path = PRONOSTICO_CACHE):
+        self.archivo = archivo
+        self.actualizado = None
+
+        # Sin pronostico se asume que no llueve, como el flujo de Node-RED
+        self._valores = {"precipitacion": 0.0, "prob_lluvia": 0.0}
+
+        if archivo is not None and archivo.exists():
+            with open(archivo) as f:
+                guardado = json.load(f)
+            self._valores = guardado["valores"]
+            self.actualizado = guardado["actualizado"]
+
+    def valores(self) -> dict:
+        """Features del pronostico: precipitacion y prob_lluvia."""
+        return self._valores
+
+    def fijar(self, precipitacion: float, prob_lluvia: float):
+        """Reemplaza el pronostico (pruebas o entrada manual)."""
+        self._valores = {"precipitacion": precipitacion, "prob_lluvia": prob_lluvia}
+        self.actualizado = datetime.now().isoformat()
+
+    def actualizar(self):
+        """Descarga el pronostico y lo guarda en el cache."""
+        import requests
+
+        params = {
+            "latitude": LATITUD,
+            "longitude": LONGITUD,
+            "current": "precipitation",
+            "hourly": "precipitation_probability",
+            "timezone": TIMEZONE,
+            "forecast_days": 2,
+        }
+        response = requests.get(OPEN_METEO_URL, params=params, timeout=30)
+        response.raise_for_status()
+        clima = response.json()
+
+        # Probabilidad maxima de lluvia en las proximas 24 horas
+        probabilidades = clima["hourly"]["precipitation_probability"][:24]
+        self.fijar(
+            float(clima["current"]["precipitation"] or 0.0),
+            float(max((p for p in probabilidades if p is not None), default=0)),
+        )
+
+        if self.archivo is not None:
+            with open(self.archivo, "w") as f:
+                json.dump(
+                    {"valores": self._valores, "actualizado": self.actualizado}, f
+                )
+
+    def iniciar_refresco(self, intervalo_s: float = PRONOSTICO_INTERVALO_S):
+        """Actualiza el pronostico ahora y luego cada intervalo_s, en un hilo."""
+
+        def _refrescar():
+            while True:
+                try:
+                    self.actualizar()
+                    print(f"Pronostico actualizado: {self._valores}")
+                except Exception as e:
+                    # Se sigue prediciendo con el ultimo pronostico conocido
+                    print(f"No se pudo actualizar el pronostico: {e}")
+                time.sleep(intervalo_s)
+
+        threading.Thread(target=_refrescar, name="pronostico", daemon=True).start()
+
+
+# =============================================================================
+# CLIENTE MQTT
+# =============================================================================
+
+
+class ClientePaho:
+    """
+    Cliente paho-mqtt con la interfaz de broker_local.ClienteLocal.
+
+    Los callbacks se ejecutan en el hilo de red de paho; al reconectar se
+    renuevan las suscripciones.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        puerto: int,
+        usuario: str = None,
+        clave: str = None,
+        tls: bool = True,
+    ):
+        try:
+            import paho.mqtt.client as mqtt
+        except ImportError:
+            raise SystemExit(
+                "La ingesta MQTT requiere paho-mqtt:\n  uv sync --extra mqtt"
+            )
+
+        self._mqtt = mqtt
+        self._suscripciones = []
+        self._cliente = mqtt.Client(
+            mqtt.CallbackAPIVersion.VERSION2, client_id=f"ingesta_riego_{os.getpid()}"
+        )
+        if usuario:
+            self._cliente.username_pw_set(usuario, clave)
+        if tls:
+            self._cliente.tls_set()
+        self._cliente.on_connect = self._al_conectar
+        self._cliente.on_message = self._al_recibir
+
+        print(f"Conectando a {host}:{puerto}...")
+        self._cliente.connect(host, puerto, keepalive=60)
+        self._cliente.loop_start()
+
+    def suscribir(self, topic: str, callback):
+        """Registra callback(topic, payload) para los mensajes del filtro topic."""
+        self._suscripciones.append((topic, callback))
+        self._cliente.subscribe(topic, qos=QOS)
+
+    def publicar(self, topic: str, payload):
+        self._cliente.publish(topic, payload, qos=QOS)
+
+    def cerrar(self):
+        self._cliente.disconnect()
+        self._cliente.loop_stop()
+
+    def _al_conectar(self, cliente, userdata, flags, reason_code, properties):
+        if reason_code.is_failure:
+            print(f"Conexion MQTT rechazada: {reason_code}")
+            return
+        print("Conectado al broker MQTT")
+        for topic, _ in self._suscripciones:
+            cliente.subscribe(topic, qos=QOS)
+
+    def _al_recibir(self, cliente, userdata, mensaje):
+        for filtro, callback in self._suscripciones:
+            if self._mqtt.topic_matches_sub(filtro, mensaje.topic):
+                callback(mensaje.topic, mensaje.payload)
+
+
+# =============================================================================
+# INGESTA
+# =============================================================================
+
+
+def dispositivo_de(topic: str, lectura: dict) -> str:
+    """Id del dispositivo: campo de la lectura, sufijo del topic o el ESP32 unico."""
+    if CAMPO_DISPOSITIVO in lectura:
+        return str(lectura[CAMPO_DISPOSITIVO])
+    return topic[len(TOPIC_SENSORES) + 1 :] or DISPOSITIVO_DEFECTO
+
+
+def topic_control(dispositivo: str) -> str:
+    """Topic donde la valvula de un dispositivo espera su comando."""
+    if dispositivo == DISPOSITIVO_DEFECTO:
+        return TOPIC_CONTROL
+    return f"{TOPIC_CONTROL}/{dispositivo}"
+
+
+class IngestaMQTT:
+    """
+    Recibe lecturas de sensores, predice en lotes y publica los comandos
+    que cambian.
+
+    Args:
+        cliente: cliente MQTT (ClientePaho o broker_local.ClienteLocal)
+        pronostico: PronosticoClima con el que se completan las lecturas
+        lote_max: lecturas maximas por pasada del modelo
+        cola_max: lecturas en espera antes de descartar las nuevas
+    """
+
+    def __init__(
+        self,
+        cliente,
+        pronostico: PronosticoClima,
+        lote_max: int = LOTE_MAX,
+        cola_max: int = COLA_MAX,
+    ):
+        self.cliente = cliente
+        self.pronostico = pronostico
+        self.lote_max = lote_max
+        self._cola = queue.Queue(maxsize=cola_max)
+        self._hilo = None
+
+        # Ultima lectura, ventanas y decision de cada dispositivo
+        self.estado = EstadoDispositivos()
+        self._clima = None
+
+        # Contadores
+        self.mensajes = 0
+        self.lotes = 0
+        self.decisiones = 0
+        self.comandos = 0
+        self.reenviados = 0
+        self.errores = 0
+        self.descartados = 0
+
+    def iniciar(self):
+        """Arranca el hilo de prediccion y se suscribe al topic de sensores."""
+        self._hilo = threading.Thread(
+            target=self._procesar, name="ingesta-mqtt", daemon=True
+        )
+        self._hilo.start()
+        self.cliente.suscribir(TOPIC_SENSORES, self._al_recibir)
+        self.cliente.suscribir(f"{TOPIC_SENSORES}/+", self._al_recibir)
+
+    def detener(self):
+        """Procesa las lecturas ya recibidas y detiene el hilo."""
+        self._cola.put(_FIN)
+        self._hilo.join()
+
+    def estadisticas(self) -> dict:
+        return {
+            "mensajes": self.mensajes,
+            "lotes": self.lotes,
+            "lecturas_por_lote": self.mensajes / self.lotes if self.lotes else 0.0,
+            "dispositivos": self.estado.n,
+            "decisiones": self.decisiones,
+            "comandos": self.comandos,
+            "reenviados": self.reenviados,
+            "errores": self.errores,
+            "descartados": self.descartados,
+        }
+
+    def _al_recibir(self, topic: str, payload: bytes):
+        # Corre en el hilo de red del cliente: solo encolar
+        try:
+            self._cola.put_nowait((topic, payload))
+        except queue.Full:
+            self.descartados += 1
+
+    def _procesar(self):
+        while True:
+            lote = [self._cola.get()]
+            while len(lote) < self.lote_max:
+                try:
+                    lote.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+
+            fin = _FIN in lote
+            lote = [mensaje for mensaje in lote if mensaje is not _FIN]
+            if lote:
+                # Un lote que falla no debe detener el hilo: sin el, ninguna
+                # lectura siguiente tendria comando
+                try:
+                    self._procesar_lote(lote)
+                except Exception as e:
+                    self.errores += len(lote)
+                    print(f"Error procesando {len(lote)} lecturas: {e!r}")
+            if fin:
+                return
+
+    def _procesar_lote(self, mensajes: list):
+        """
+        Guarda un lote de lecturas en el estado de sus dispositivos, predice
+        para los pendientes y publica las decisiones que cambiaron o que no
+        coinciden con la valvula reportada.
+        """
+        t = time.time()
+        estado = self.estado
+
+        # Un pronostico nuevo puede cambiar la decision de todos
+        clima = self.pronostico.valores()
+        if clima is not self._clima:
+            self._clima = clima
+            estado.fijar_clima(clima)
+
+        dispositivos, lecturas = [], []
+        for topic, payload in mensajes:
+            try:
+                lectura = json.loads(payload)
+            except ValueError:
+                lectura = None
+            error = api._validar_registro(lectura, CAMPOS_SENSOR)
+            if error:
+                self.errores += 1
+                print(f"Lectura descartada: {error}")
+                continue
+            dispositivos.append(dispositivo_de(topic, lectura))
+            lecturas.append(lectura)
+
+        # Valvula reportada en la ultima lectura del lote de cada dispositivo;
+        # -1 si no la reporto
+        valvula = np.full(estado.n + len(lecturas), -1, dtype=np.int8)
+
+        if lecturas:
+            registrados = estado.n
+            indices = estado.indices(dispositivos)
+            # Los dispositivos nuevos empiezan con el pronostico vigente
+            estado.fijar_clima(clima, np.arange(registrados, estado.n))
+            estado.registrar_lecturas(
+                indices,
+                {c: [lectura[c] for lectura in lecturas] for c in CAMPOS_SENSOR},
+                t,
+            )
+            estado.actualizar_ventanas(np.unique(indices), int(t // 3600))
+            valvula[indices] = [
+                ESTADOS_VALVULA.get(lectura.get("valvula"), -1) for lectura in lecturas
+            ]
+
+        # hora y mes en la zona horaria del historico de entrenamiento, no
+        # en la del servidor
+        modelo_data = api.MODELO_DATA
+        barrido = estado.barrer(
+            modelo_data["modelo"],
+            modelo_data["features"],
+            datetime.fromtimestamp(t, ZoneInfo(TIMEZONE)),
+        )
+        indices, decision = barrido["indices"], barrido["decision"]
+        reportada = valvula[indices]
+        desincronizada = (reportada >= 0) & (reportada != decision)
+        publicar = barrido["cambio"] | desincronizada
+        for i, d in zip(indices[publicar], decision[publicar]):
+            self.cliente.publicar(
+                topic_control(estado.ids[i]), "ON" if d == 1 else "OFF"
+            )
+        self.decisiones += len(indices)
+        self.comandos += int(publicar.sum())
+        self.reenviados += int((desincronizada & ~barrido["cambio"]).sum())
+
+        self.mensajes += len(mensajes)
+        self.lotes += 1
+
+
+# =============================================================================
+# EJECUCION
+# =============================================================================
+
+
+def simular_esp32(broker, n_lecturas: int = 10, intervalo_s: float = 0.5):
+    """
+    Publica lecturas del historico como lo haria el ESP32 y muestra los
+    comandos que recibe la valvula (solo llegan cuando la decision cambia o
+    la valvula reportada no coincide con ella).
+    """
+    import pandas as pd
+
+    datos = pd.read_csv(
+        Path(__file__).parent / "dataset" / "datos_historicos_jerusalen.csv"
+    )
+    lecturas = datos[["humedad_suelo", "temperatura", "humedad_ambiente"]].sample(
+        n_lecturas, random_state=0
+    )
+
+    valvula = broker.conectar("valvula")
+    recibidos = queue.SimpleQueue()
+    valvula.suscribir(TOPIC_CONTROL, lambda topic, payload: recibidos.put(payload))
+
+    esp32 = broker.conectar("esp32")
+    estado_valvula = "OFF"
+    for lectura in lecturas.to_dict("records"):
+        inicio = time.monotonic()
+        esp32.publicar(
+            TOPIC_SENSORES, json.dumps({**lectura, "valvula": estado_valvula})
+        )
+        try:
+            comando = estado_valvula = recibidos.get(timeout=intervalo_s).decode()
+        except queue.Empty:
+            comando = "(sin cambio)"
+        print(
+            f"  suelo {lectura['humedad_suelo']:5.1f}%  "
+            f"temp {lectura['temperatura']:5.1f}C  "
+            f"hum {lectura['humedad_ambiente']:5.1f}%  ->  {comando}"
+        )
+        time.sleep(max(0.0, inicio + intervalo_s - time.monotonic()))
+
+    esp32.cerrar()
+    valvula.cerrar()
+
+
+def main():
+    """Funcion principal."""
+    parser = argparse.ArgumentParser(description="Ingesta MQTT con prediccion directa")
+    parser.add_argument("--host", default=BROKER_HOST)
+    parser.add_argument("--puerto", type=int, default=BROKER_PUERTO)
+    parser.add_argument(
+        "--sin-tls", action="store_true", help="Conectar sin TLS (broker local)"
+    )
+    parser.add_argument(
+        "--broker-local",
+        action="store_true",
+        help="Usar el broker en memoria con un ESP32 simulado (sin red)",
+    )
+    parser.add_argument(
+        "--sklearn",
+        action="store_true",
+        help="Usar el modelo de scikit-learn en lugar del bosque plano",
+    )
+    parser.add_argument(
+        "--sin-numba",
+        action="store_true",
+        help="Evaluar el bosque plano con NumPy (~160 MB menos por proceso)",
+    )
+    parser.add_argument(
+        "--sin-pronostico",
+        action="store_true",
+        help="No consultar Open-Meteo; usar el ultimo pronostico guardado",
+    )
+    parser.add_argument(
+        "--lote-max",
+        type=int,
+        default=LOTE_MAX,
+        help="Lecturas maximas por pasada del modelo (defecto: 256)",
+    )
+    args = parser.parse_args()
+
+    if args.sin_numba:
+        import bosque_plano
+
+        bosque_plano.USAR_NUMBA = False
+
+    print("\n" + "=" * 60)
+    print("INGESTA MQTT - PREDICCION DE RIEGO")
+    print("Sistema IoT para Pastizales - UTPL")
+    print("=" * 60)
+
+    # La ingesta no usa el cache de /predict
+    api.USAR_CACHE = False
+    api.cargar_modelo(usar_bosque_plano=not args.sklearn)
+
+    pronostico = PronosticoClima()
+    if not args.sin_pronostico and not args.broker_local:
+        pronostico.iniciar_refresco()
+    print(f"\nPronostico inicial: {pronostico.valores()}")
+
+    if args.broker_local:
+        from broker_local import BrokerLocal
+
+        broker = BrokerLocal()
+        cliente = broker.conectar("ingesta")
+    else:
+        cliente = ClientePaho(
+            args.host,
+            args.puerto,
+            usuario=os.environ.get("MQTT_USUARIO"),
+            clave=os.environ.get("MQTT_CLAVE"),
+            tls=not args.sin_tls,
+        )
+
+    ingesta = IngestaMQTT(cliente, pronostico, lote_max=args.lote_max)
+    ingesta.iniciar()
+    print(f"\nEscuchando {TOPIC_SENSORES} -> publicando en {TOPIC_CONTROL}")
+
+    try:
+        if args.broker_local:
+            print("\nESP32 simulado (lecturas del historico):")
+            simular_esp32(broker)
+        else:
+            print("Presiona Ctrl+C para detener\n")
+            while True:
+                time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ingesta.detener()
+        cliente.cerrar()
+
+    print("\n" + "-" * 60)
+    for clave, valor in ingesta.estadisticas().items():
+        print(f"  {clave}: {valor}")
+
+
+if __name__ == "__main__":
+    main()
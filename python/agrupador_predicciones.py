@@ -0,0 +1,180 @@
+"""
+Agrupador de Predicciones - Micro-lotes para /predict
+=====================================================
+Sistema IoT de Riego Inteligente para Pastizales
+UTPL - Maestria en IA Aplicada
+
+Con muchos /predict concurrentes, cada request recorre el bosque para una
+sola fila, pero el costo por fila de predict_proba baja mucho con lotes.
+El agrupador junta las filas que llegan al mismo tiempo (hasta una ventana
+de unos milisegundos o un maximo de filas), hace una sola llamada a
+predict_proba y entrega a cada request su fila de probabilidades.
+
+La ventana es adaptativa: si los lotes recientes son de una sola fila (poca
+concurrencia) no se espera, para no agregar latencia sin beneficio. Con
+carga, mientras el modelo procesa un lote se acumulan los siguientes
+requests y la ventana se activa.
+
+Autor: Luis
+Fecha: Enero 2026
+"""
+
+import collections
+import threading
+import time
+
+import numpy as np
+
+# Limites de los buckets del histograma de tamanio de lote
+BUCKETS_LOTE = (1, 2, 4, 8, 16, 32, 64, 128, 256, float("inf"))
+
+# Peso de cada lote nuevo en el promedio movil del tamanio de lote
+ALFA_TAMANIO = 0.1
+
+
+class _Pendiente:
+    """Una fila esperando su prediccion."""
+
+    __slots__ = ("fila", "llegada", "listo", "resultado", "error")
+
+    def __init__(self, fila):
+        self.fila = fila
+        self.llegada = time.perf_counter()
+        self.listo = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+class AgrupadorPredicciones:
+    """
+    Junta predicciones concurrentes de una fila en un solo predict_proba.
+
+    Args:
+        modelo: clasificador con predict_proba (se puede reemplazar en
+            caliente asignando el atributo `modelo`)
+        ventana_ms: espera maxima desde que llega la primera fila del lote
+        max_filas: filas maximas por lote
+    """
+
+    def __init__(self, modelo, ventana_ms: float = 2.0, max_filas: int = 64):
+        self.modelo = modelo
+        self.ventana_s = ventana_ms / 1000
+        self.max_filas = max_filas
+
+        self._pendientes = []
+        self._condicion = threading.Condition()
+        self._hilo = None
+        self._tamanio_medio = 1.0
+
+        # Metricas
+        self.lotes = 0
+        self.filas = 0
+        self.histograma = dict.fromkeys(BUCKETS_LOTE, 0)
+        self.espera_total_s = 0.0
+        self._esperas = collections.deque(maxlen=10_000)
+
+    def predecir(self, fila) -> np.ndarray:
+        """
+        Encola una fila y espera su resultado.
+
+        Args:
+            fila: valores de las features, en el orden del modelo
+
+        Returns:
+            Probabilidades de cada clase para la fila
+        """
+        pendiente = _Pendiente(fila)
+        with self._condicion:
+            self._asegurar_hilo()
+            self._pendientes.append(pendiente)
+            self._condicion.notify()
+
+        pendiente.listo.wait()
+        if pendiente.error is not None:
+            raise pendiente.error
+        return pendiente.resultado
+
+    def estadisticas(self) -> dict:
+        """Distribucion del tamanio de lote y espera agregada en cola."""
+        with self._condicion:
+            esperas = np.array(self._esperas) * 1000
+            if len(esperas) == 0:
+                esperas = np.zeros(1)
+
+            return {
+                "ventana_ms": self.ventana_s * 1000,
+                "max_filas": self.max_filas,
+                "lotes": self.lotes,
+                "filas": self.filas,
+                "tamanio_medio": self.filas / self.lotes if self.lotes else 0.0,
+                "histograma_tamanio": {
+                    f"<={limite}": n for limite, n in self.histograma.items()
+                },
+                "espera_media_ms": (
+                    self.espera_total_s * 1000 / self.filas if self.filas else 0.0
+                ),
+                "espera_p50_ms": float(np.percentile(esperas, 50)),
+                "espera_p99_ms": float(np.percentile(esperas, 99)),
+            }
+
+    def _asegurar_hilo(self):
+        # Se crea al primer uso: un hilo creado antes del fork de los
+        # workers de gunicorn (--precargar) no existe en los hijos
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(
+                target=self._despachar, name="agrupador-predicciones", daemon=True
+            )
+            self._hilo.start()
+
+    def _tomar_lote(self) -> list:
+        """Espera filas y retorna el siguiente lote (bloquea hasta que haya)."""
+        with self._condicion:
+            while not self._pendientes:
+                self._condicion.wait()
+
+            # Ventana adaptativa: sin concurrencia reciente no se espera
+            if self._tamanio_medio >= 2.0:
+                limite = self._pendientes[0].llegada + self.ventana_s
+                while len(self._pendientes) < self.max_filas:
+                    restante = limite - time.perf_counter()
+                    if restante <= 0:
+                        break
+                    self._condicion.wait(restante)
+
+            lote = self._pendientes[: self.max_filas]
+            del self._pendientes[: self.max_filas]
+            return lote
+
+    def _despachar(self):
+        while True:
+            lote = self._tomar_lote()
+            inicio = time.perf_counter()
+
+            try:
+                X = np.array([p.fila for p in lote], dtype=float)
+                probabilidades = self.modelo.predict_proba(X)
+                for p, fila in zip(lote, probabilidades):
+                    p.resultado = fila
+            except Exception as e:
+                for p in lote:
+                    p.error = e
+
+            for p in lote:
+                p.listo.set()
+
+            self._registrar(lote, inicio)
+
+    def _registrar(self, lote: list, inicio: float):
+        n = len(lote)
+        with self._condicion:
+            self.lotes += 1
+            self.filas += n
+            for limite in BUCKETS_LOTE:
+                if n <= limite:
+                    self.histograma[limite] += 1
+                    break
+            for p in lote:
+                espera = inicio - p.llegada
+                self.espera_total_s += espera
+                self._esperas.append(espera)
+            self._tamanio_medio += ALFA_TAMANIO * (n - self._tamanio_medio)
@@ -0,0 +1,209 @@
+"""
+Almacen del Dataset - Historico en Parquet particionado
+=======================================================
+Sistema IoT de Riego Inteligente para Pastizales
+UTPL - Maestria en IA Aplicada
+
+Alternativa columnar a datos_historicos_jerusalen.csv. El CSV guarda cada
+valor como texto: al leerlo pandas vuelve a parsear el timestamp e inferir
+el tipo de cada columna, y para usar 8 columnas hay que recorrer las 13.
+En Parquet cada columna se guarda por separado, comprimida y con su tipo:
+
+    dataset/parquet/site_id=jerusalen/periodo=2024-01/parte-0-0.parquet
+
+- particionado por sitio y mes: un sitio o un rango de meses se leen sin
+  tocar el resto, y la actualizacion incremental solo escribe un archivo
+  nuevo en el mes que corresponde
+- tipos compactos (TIPOS): int8 para hora/mes/regar, float32 para las
+  mediciones. float32 es la precision con la que el Random Forest de
+  scikit-learn compara los umbrales, asi que el modelo entrenado no cambia
+- cargar_parquet(columnas=...) lee solo las columnas pedidas, y
+  leer_por_bloques las entrega por partes para historicos que no caben en
+  memoria; las dos incluyen site_id (salvo que se pidan otras columnas) y
+  pueden leer uno o varios sitios
+
+Requiere pyarrow (extra opcional `parquet`).
+
+Autor: Luis
+Fecha: Enero 2026
+"""
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+
+DIRECTORIO_PARQUET = Path(__file__).parent / "dataset" / "parquet"
+
+# Sitio del dataset actual (Jerusalen, Azuay)
+SITIO_DEFECTO = "jerusalen"
+
+# Tipo de cada columna conocida; las demas se guardan como vengan
+TIPOS = {
+    "temperatura": np.float32,
+    "humedad_ambiente": np.float32,
+    "precipitacion": np.float32,
+    "hora": np.int8,
+    "mes": np.int8,
+    "dia_semana": np.int8,
+    "dia_del_anio": np.int16,
+    "precip_24h": np.float32,
+    "prob_lluvia": np.float32,
+    "temp_promedio_6h": np.float32,
+    "humedad_suelo": np.float32,
+    "regar": np.int8,
+}
+
+PARTICIONES = ["site_id", "periodo"]
+
+# Columnas de particion que no se devuelven al leer: periodo se deriva de
+# timestamp, site_id distingue los sitios
+OMITIR_AL_LEER = ["periodo"]
+
+
+def _requiere_pyarrow():
+    if pa is None:
+        raise ImportError(
+            "El almacen Parquet requiere pyarrow: uv sync --extra parquet"
+        )
+
+
+def aplicar_tipos(df: pd.DataFrame) -> pd.DataFrame:
+    """Copia de df con los tipos de TIPOS y timestamp como fecha."""
+    df = df.astype({c: t for c, t in TIPOS.items() if c in df.columns})
+    if "timestamp" in df.columns:
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df
+
+
+def guardar_parquet(
+    df: pd.DataFrame,
+    directorio: Path = DIRECTORIO_PARQUET,
+    sitio: str = SITIO_DEFECTO,
+    agregar: bool = False,
+) -> Path:
+    """
+    Guarda el historico de un sitio particionado por mes.
+
+    Args:
+        df: historico con columna timestamp (ej. el de 01_descargar_datos.py)
+        directorio: raiz del dataset Parquet
+        sitio: valor de la particion site_id
+        agregar: True para agregar las filas a las ya guardadas (actualizacion
+            incremental); False reemplaza todos los datos del sitio
+
+    Returns:
+        Directorio del sitio
+    """
+    _requiere_pyarrow()
+    directorio = Path(directorio)
+    destino = directorio / f"site_id={sitio}"
+    if not agregar and destino.exists():
+        import shutil
+
+        shutil.rmtree(destino)
+
+    df = aplicar_tipos(df)
+    df["site_id"] = sitio
+    df["periodo"] = df["timestamp"].dt.strftime("%Y-%m")
+
+    # Los archivos de una particion se leen en orden de nombre: los de cada
+    # actualizacion llevan un numero creciente para quedar despues
+    lote = time.time_ns() if agregar else 0
+    ds.write_dataset(
+        pa.Table.from_pandas(df, preserve_index=False),
+        directorio,
+        format="parquet",
+        partitioning=ds.partitioning(
+            pa.schema([("site_id", pa.string()), ("periodo", pa.string())]),
+            flavor="hive",
+        ),
+        basename_template=f"parte-{lote}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    return destino
+
+
+def sitios_guardados(directorio: Path = DIRECTORIO_PARQUET) -> list:
+    """site_id de las particiones del almacen, en orden."""
+    directorio = Path(directorio)
+    if not directorio.exists():
+        return []
+    return sorted(
+        d.name.split("=", 1)[1]
+        for d in directorio.iterdir()
+        if d.is_dir() and d.name.startswith("site_id=")
+    )
+
+
+def _abrir(directorio: Path, columnas: list, sitio) -> tuple:
+    """(dataset, columnas a leer, filtro de sitio) para cargar y leer."""
+    dataset = ds.dataset(directorio, format="parquet", partitioning="hive")
+    if columnas is None:
+        columnas = [c for c in dataset.schema.names if c not in OMITIR_AL_LEER]
+    if sitio is None:
+        filtro = None
+    elif isinstance(sitio, str):
+        filtro = ds.field("site_id") == sitio
+    else:
+        filtro = ds.field("site_id").isin(list(sitio))
+    return dataset, columnas, filtro
+
+
+def cargar_parquet(
+    directorio: Path = DIRECTORIO_PARQUET, columnas: list = None, sitio=None
+) -> pd.DataFrame:
+    """
+    Carga el historico guardado con guardar_parquet.
+
+    Args:
+        directorio: raiz del dataset Parquet
+        columnas: columnas a leer (defecto: todas con site_id, sin periodo)
+        sitio: site_id o lista de site_id a leer (defecto: todos)
+
+    Returns:
+        DataFrame en orden de sitio y tiempo, con los tipos de TIPOS
+    """
+    _requiere_pyarrow()
+    dataset, columnas, filtro = _abrir(directorio, columnas, sitio)
+
+    # Arrow descubre los archivos en orden de ruta (sitio, mes, archivo) y
+    # to_table conserva ese orden; el filtro de sitio descarta directorios
+    # sin abrirlos
+    return dataset.to_table(columns=columnas, filter=filtro).to_pandas()
+
+
+def leer_por_bloques(
+    directorio: Path = DIRECTORIO_PARQUET,
+    columnas: list = None,
+    filas_bloque: int = 100_000,
+    sitio=None,
+):
+    """
+    Recorre el historico en DataFrames de unas `filas_bloque` filas.
+
+    Los bloques salen en el mismo orden que cargar_parquet; cada uno junta
+    los archivos de varios meses para no pasar de a un archivo por vez.
+
+    Yields:
+        DataFrame con las columnas pedidas
+    """
+    _requiere_pyarrow()
+    dataset, columnas, filtro = _abrir(directorio, columnas, sitio)
+
+    pendientes, filas = [], 0
+    for lote in dataset.to_batches(columns=columnas, filter=filtro):
+        pendientes.append(lote)
+        filas += lote.num_rows
+        if filas >= filas_bloque:
+            yield pa.Table.from_batches(pendientes).to_pandas()
+            pendientes, filas = [], 0
+    if pendientes:
+        yield pa.Table.from_batches(pendientes).to_pandas()
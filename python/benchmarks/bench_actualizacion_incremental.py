@@ -0,0 +1,133 @@
+"""
+Benchmark - Actualizacion incremental del dataset
+=================================================
+Con el servidor de prueba de bench_descarga.py (mismo formato que el
+archivo historico de Open-Meteo), compara la actualizacion diaria de
+datos_historicos_jerusalen.csv:
+
+- regenerar todo: descargar (con cache de bloques), procesar, simular la
+  humedad desde HUMEDAD_INICIAL y reescribir el CSV de 730 dias
+- incremental (actualizar_dataset): solo el dia nuevo, continuando la
+  simulacion y las ventanas desde las ultimas filas del CSV
+
+Antes verifica que el resultado es el mismo: un CSV generado completo y
+otro generado hasta 7 dias antes y actualizado dia por dia son identicos
+byte a byte (con la misma semilla el ruido de la simulacion se sortea en
+el mismo orden).
+
+Uso:
+    uv run benchmarks/bench_actualizacion_incremental.py [--dias 730]
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from comun import importar_script, titulo
+
+from bench_descarga import ServidorOpenMeteo
+
+descarga = importar_script("01_descargar_datos")
+
+DIAS_ACTUALIZADOS = 7
+
+
+def silencioso(funcion, *args, **kwargs):
+    """Ejecuta funcion sin sus mensajes de progreso."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return funcion(*args, **kwargs)
+
+
+def generar(servidor, archivo: Path, inicio, fin):
+    """Genera el dataset completo en `archivo`; retorna las filas."""
+    df = silencioso(descarga.generar_dataset, str(inicio), str(fin), url=servidor.url)
+    df.to_csv(archivo, index=False)
+    return len(df)
+
+
+def actualizar(servidor, archivo: Path, fin) -> int:
+    """Actualiza `archivo` hasta `fin`; retorna las filas agregadas."""
+    df = silencioso(descarga.actualizar_dataset, archivo, str(fin), url=servidor.url)
+    return len(df)
+
+
+def medir(servidor, funcion) -> tuple:
+    """Retorna (resultado, segundos, solicitudes al servidor)."""
+    antes = servidor.solicitudes
+    t = time.perf_counter()
+    resultado = funcion()
+    return resultado, time.perf_counter() - t, servidor.solicitudes - antes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dias", type=int, default=730)
+    args = parser.parse_args()
+
+    titulo("BENCHMARK - ACTUALIZACION INCREMENTAL DEL DATASET")
+
+    fin = datetime(2026, 1, 10).date()
+    inicio = fin - timedelta(days=args.dias)
+    servidor = ServidorOpenMeteo()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        descarga.CACHE_DIR = tmp / "cache"
+
+        # --- Mismo resultado ---
+        completo = tmp / "completo.csv"
+        np.random.seed(0)
+        generar(servidor, completo, inicio, fin)
+
+        incremental = tmp / "incremental.csv"
+        np.random.seed(0)
+        generar(servidor, incremental, inicio, fin - timedelta(days=DIAS_ACTUALIZADOS))
+        for d in range(DIAS_ACTUALIZADOS - 1, -1, -1):
+            actualizar(servidor, incremental, fin - timedelta(days=d))
+        iguales = completo.read_bytes() == incremental.read_bytes()
+        print(
+            f"\nCompleto vs generado {DIAS_ACTUALIZADOS} dias antes y actualizado "
+            f"dia por dia: {'identicos' if iguales else 'DISTINTOS'}"
+        )
+
+        # --- Costo de agregar un dia (el dia nuevo no esta en el cache) ---
+        nuevo = fin + timedelta(days=1)
+        filas, s_completo, n_completo = medir(
+            servidor, lambda: generar(servidor, completo, inicio, nuevo)
+        )
+        bytes_completo = completo.stat().st_size
+
+        descarga.CACHE_DIR = tmp / "cache_incremental"
+        antes = incremental.stat().st_size
+        agregadas, s_incremental, n_incremental = medir(
+            servidor, lambda: actualizar(servidor, incremental, nuevo)
+        )
+        bytes_incremental = incremental.stat().st_size - antes
+
+    servidor.cerrar()
+
+    print(f"\nAgregar 1 dia a un historico de {args.dias} dias:")
+    print(
+        f"\n{'Modo':<14} {'tiempo (s)':>11} {'solicitudes':>12} "
+        f"{'filas procesadas':>17} {'KB escritos':>12}"
+    )
+    print("-" * 70)
+    print(
+        f"{'regenerar':<14} {s_completo:>11.3f} {n_completo:>12} {filas:>17,} "
+        f"{bytes_completo / 1024:>12,.0f}"
+    )
+    print(
+        f"{'incremental':<14} {s_incremental:>11.3f} {n_incremental:>12} "
+        f"{agregadas:>17,} {bytes_incremental / 1024:>12,.1f}"
+    )
+    print(f"\nAceleracion: {s_completo / s_incremental:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
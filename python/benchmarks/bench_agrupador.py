@@ -0,0 +1,100 @@
+"""
+Benchmark - Agrupador de micro-lotes
+====================================
+Carga sobre POST /predict con 1, 16 y 128 clientes concurrentes, con y sin
+--agrupar, sirviendo con gunicorn (1 worker con 128 hilos para que todos
+los requests puedan estar en curso a la vez) y sin cache.
+
+Ademas de requests por segundo y latencia, lee /batching/stats: tamanio
+medio de lote y espera media agregada en cola por el agrupador.
+
+Con --evaluadores se elige como predice el modelo: numba (bosque plano),
+numpy (bosque plano sin numba) o sklearn.
+
+Uso:
+    uv run benchmarks/bench_agrupador.py [--segundos 5] [--clientes 1,16,128]
+        [--evaluadores numba,sklearn]
+"""
+
+import argparse
+import http.client
+import json
+
+import pandas as pd
+
+from bench_carga_api import medir
+from comun import PYTHON_DIR, servidor_api, titulo
+
+ARGUMENTOS_EVALUADOR = {
+    "numba": [],
+    "numpy": ["--sin-numba"],
+    "sklearn": ["--sklearn"],
+}
+
+
+def leer_estadisticas(puerto: int) -> dict:
+    conexion = http.client.HTTPConnection("127.0.0.1", puerto)
+    conexion.request("GET", "/batching/stats")
+    return json.loads(conexion.getresponse().read())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--segundos", type=float, default=5.0)
+    parser.add_argument("--clientes", default="1,16,128")
+    parser.add_argument("--evaluadores", default="numba,sklearn")
+    args = parser.parse_args()
+    niveles = [int(n) for n in args.clientes.split(",")]
+
+    titulo("BENCHMARK - AGRUPADOR DE MICRO-LOTES")
+
+    df = pd.read_csv(PYTHON_DIR / "dataset" / "datos_historicos_jerusalen.csv")
+    features = json.loads((PYTHON_DIR / "models" / "modelo_riego.json").read_text())[
+        "features"
+    ]
+    muestra = df[features].sample(5000, random_state=0)
+    cuerpos = [json.dumps(r).encode() for r in muestra.to_dict("records")]
+
+    base = ["--produccion", "--workers", "1", "--hilos", str(max(niveles))]
+    base += ["--sin-cache"]
+
+    print(
+        f"\n{'Evaluador':<9} {'Agrupar':<8} {'Clientes':>8} {'req/s':>7} "
+        f"{'p50 (ms)':>9} {'p99 (ms)':>9} {'lote':>6} {'espera':>11}"
+    )
+    print("-" * 74)
+    for evaluador in args.evaluadores.split(","):
+        for agrupar in (False, True):
+            argumentos = base + ARGUMENTOS_EVALUADOR[evaluador]
+            if agrupar:
+                argumentos = argumentos + ["--agrupar"]
+
+            with servidor_api(argumentos) as puerto:
+                medir(puerto, 4, cuerpos, 1.0)  # calentamiento
+                for n in niveles:
+                    antes = leer_estadisticas(puerto)
+                    r = medir(puerto, n, cuerpos, args.segundos)
+                    despues = leer_estadisticas(puerto)
+
+                    lote, espera = "-", "-"
+                    if agrupar:
+                        lotes = despues["lotes"] - antes["lotes"]
+                        filas = despues["filas"] - antes["filas"]
+                        # Espera media de este nivel a partir de los acumulados
+                        espera_ms = (
+                            despues["espera_media_ms"] * despues["filas"]
+                            - antes["espera_media_ms"] * antes["filas"]
+                        )
+                        if lotes:
+                            lote = f"{filas / lotes:.1f}"
+                            espera = f"{espera_ms / filas:.2f} ms"
+
+                    print(
+                        f"{evaluador:<9} {'si' if agrupar else 'no':<8} {n:>8} "
+                        f"{r['rps']:>7.0f} {r['p50']:>9.2f} {r['p99']:>9.2f} "
+                        f"{lote:>6} {espera:>11}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
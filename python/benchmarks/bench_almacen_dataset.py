@@ -0,0 +1,129 @@
+"""
+Benchmark - Historico en CSV vs Parquet particionado
+====================================================
+Compara datos_historicos_jerusalen.csv con el almacen de almacen_dataset.py
+(Parquet particionado por sitio y mes, tipos compactos) al tamano actual y
+a 100 veces el tamano actual (100 sitios con el mismo historico; en el CSV
+se agrega una columna site_id):
+
+- tamano en disco y tiempo de escritura
+- carga completa (el CSV con parse_dates para tener el timestamp como fecha)
+- carga de las columnas de entrenamiento (FEATURES + TARGET) y su memoria
+- carga de un solo sitio
+
+Antes verifica que las columnas de entrenamiento leidas del Parquet son
+las del CSV convertidas a sus tipos compactos.
+
+Uso:
+    uv run benchmarks/bench_almacen_dataset.py [--escalas 1,100]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from comun import PYTHON_DIR, cronometrar, importar_script, titulo
+
+from almacen_dataset import aplicar_tipos, cargar_parquet, guardar_parquet
+
+entrenar = importar_script("02_entrenar_modelo")
+COLUMNAS = entrenar.FEATURES + [entrenar.TARGET]
+
+
+def tamano(ruta: Path) -> int:
+    """Bytes de un archivo o de todos los archivos de un directorio."""
+    if ruta.is_file():
+        return ruta.stat().st_size
+    return sum(p.stat().st_size for p in ruta.rglob("*") if p.is_file())
+
+
+def escribir(df: pd.DataFrame, sitios: int, csv: Path, parquet: Path) -> tuple:
+    """Escribe `sitios` copias del historico; retorna (s CSV, s Parquet)."""
+    inicio = time.perf_counter()
+    if sitios == 1:
+        df.to_csv(csv, index=False)
+    else:
+        pd.concat([df.assign(site_id=f"sitio{k:03d}") for k in range(sitios)]).to_csv(
+            csv, index=False
+        )
+    s_csv = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for k in range(sitios):
+        guardar_parquet(df, parquet, sitio=f"sitio{k:03d}")
+    return s_csv, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--escalas", default="1,100")
+    args = parser.parse_args()
+
+    titulo("BENCHMARK - HISTORICO EN CSV VS PARQUET")
+
+    df = pd.read_csv(PYTHON_DIR / "dataset" / "datos_historicos_jerusalen.csv")
+    print(f"\nHistorico: {len(df):,} horas, {len(df.columns)} columnas")
+
+    for escala in [int(x) for x in args.escalas.split(",")]:
+        repeticiones = 3 if escala == 1 else 1
+        with tempfile.TemporaryDirectory() as tmp:
+            csv, parquet = Path(tmp) / "historico.csv", Path(tmp) / "parquet"
+            s_csv, s_parquet = escribir(df, escala, csv, parquet)
+            archivos = sum(1 for _ in parquet.rglob("*.parquet"))
+
+            if escala == 1:
+                leido = cargar_parquet(parquet, COLUMNAS)
+                esperado = aplicar_tipos(df[COLUMNAS])
+                iguales = leido.equals(esperado)
+                print(
+                    f"Columnas de entrenamiento Parquet = CSV con tipos compactos: "
+                    f"{'si' if iguales else 'NO'}"
+                )
+
+            cargas = {
+                "completo": (
+                    lambda: pd.read_csv(csv, parse_dates=["timestamp"]),
+                    lambda: cargar_parquet(parquet),
+                ),
+                "entrenamiento": (
+                    lambda: pd.read_csv(csv, usecols=COLUMNAS),
+                    lambda: cargar_parquet(parquet, COLUMNAS),
+                ),
+            }
+            if escala > 1:
+                cargas["un sitio"] = (
+                    lambda: pd.read_csv(csv).query("site_id == 'sitio007'"),
+                    lambda: cargar_parquet(parquet, sitio="sitio007"),
+                )
+            tiempos = {
+                nombre: [cronometrar(f, repeticiones) for f in funciones]
+                for nombre, funciones in cargas.items()
+            }
+            memoria = [
+                pd.read_csv(csv, usecols=COLUMNAS).memory_usage().sum(),
+                cargar_parquet(parquet, COLUMNAS).memory_usage().sum(),
+            ]
+
+            print(
+                f"\n{escala}x: {len(df) * escala:,} filas "
+                f"({escala} sitio{'s' if escala > 1 else ''}, {archivos:,} "
+                f"archivos Parquet)"
+            )
+            print(f"{'':<28} {'CSV':>10} {'Parquet':>10} {'CSV/Parquet':>12}")
+            print("-" * 63)
+            filas = [
+                ("tamano (MB)", tamano(csv) / 1e6, tamano(parquet) / 1e6),
+                ("escritura (s)", s_csv, s_parquet),
+                *((f"carga {n} (s)", *t) for n, t in tiempos.items()),
+                ("memoria entrenamiento (MB)", *(np.array(memoria) / 1e6)),
+            ]
+            for nombre, a, b in filas:
+                print(f"{nombre:<28} {a:>10.3f} {b:>10.3f} {a / b:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
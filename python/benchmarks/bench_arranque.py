@@ -0,0 +1,158 @@
+"""
+Benchmark - Arranque de la API
+==============================
+Mide cuanto tarda 03_api_flask.py en estar disponible:
+
+1. Tiempo de importar el modulo y que librerias pesadas deja cargadas.
+2. Lanzando el servidor real, tiempo hasta el primer /health que responde
+   (200 o 503 "warming") y hasta el primer /predict exitoso.
+
+Compara el arranque normal (carga el modelo antes de abrir el puerto) con
+--arranque-rapido (abre el puerto de inmediato y carga en segundo plano).
+
+Uso:
+    uv run benchmarks/bench_arranque.py [repeticiones]
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from comun import PYTHON_DIR, puerto_libre, titulo
+
+MODULOS_PESADOS = ["numpy", "pandas", "joblib", "sklearn", "scipy", "numba"]
+
+REGISTRO = {
+    "humedad_suelo": 25.0,
+    "temperatura": 22.0,
+    "humedad_ambiente": 60.0,
+    "precipitacion": 0.0,
+    "prob_lluvia": 10.0,
+    "hora": 7,
+    "mes": 8,
+}
+
+CODIGO_IMPORTACION = f"""
+import importlib, json, sys, time
+sys.path.insert(0, {str(PYTHON_DIR)!r})
+inicio = time.perf_counter()
+importlib.import_module("03_api_flask")
+tiempo = time.perf_counter() - inicio
+print(json.dumps({{
+    "tiempo": tiempo,
+    "modulos": [m for m in {MODULOS_PESADOS!r} if m in sys.modules],
+}}))
+"""
+
+
+def medir_importacion() -> dict:
+    """Importa la API en un proceso nuevo (sin cache de modulos)."""
+    salida = subprocess.run(
+        [sys.executable, "-c", CODIGO_IMPORTACION],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def _pedir(url: str, datos: dict = None) -> int:
+    """Retorna el codigo HTTP, o None si el servidor aun no escucha."""
+    cuerpo = json.dumps(datos).encode() if datos is not None else None
+    peticion = urllib.request.Request(
+        url, data=cuerpo, headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(peticion, timeout=5) as respuesta:
+            return respuesta.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError):
+        return None
+
+
+def medir_servidor(argumentos: list, limite_s: float = 120.0) -> dict:
+    """Lanza la API y mide el primer /health y el primer /predict exitoso."""
+    puerto = puerto_libre()
+    base = f"http://127.0.0.1:{puerto}"
+    comando = [
+        sys.executable,
+        str(PYTHON_DIR / "03_api_flask.py"),
+        "--host",
+        "127.0.0.1",
+        "--puerto",
+        str(puerto),
+        *argumentos,
+    ]
+
+    inicio = time.perf_counter()
+    # Grupo de procesos propio: el modo debug de Flask lanza un hijo (reloader)
+    proceso = subprocess.Popen(
+        comando,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+    resultado = {"health": None, "estado_health": None, "predict": None}
+    try:
+        while time.perf_counter() - inicio < limite_s:
+            if resultado["health"] is None:
+                codigo = _pedir(f"{base}/health")
+                if codigo is not None:
+                    resultado["health"] = time.perf_counter() - inicio
+                    resultado["estado_health"] = codigo
+
+            if resultado["health"] is not None:
+                if _pedir(f"{base}/predict", REGISTRO) == 200:
+                    resultado["predict"] = time.perf_counter() - inicio
+                    break
+
+            time.sleep(0.005)
+    finally:
+        # SIGKILL: el hilo de carga puede estar compilando y no atender SIGTERM
+        os.killpg(proceso.pid, signal.SIGKILL)
+        proceso.wait()
+
+    return resultado
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    titulo("BENCHMARK - ARRANQUE DE LA API")
+
+    importacion = [medir_importacion() for _ in range(repeticiones)]
+    mejor = min(i["tiempo"] for i in importacion)
+    print(f"\nImportar 03_api_flask: {mejor * 1000:.0f} ms (mejor de {repeticiones})")
+    print(f"  Librerias pesadas cargadas: {importacion[0]['modulos'] or 'ninguna'}")
+
+    modos = [
+        ("normal", []),
+        ("--arranque-rapido", ["--arranque-rapido"]),
+    ]
+
+    print(f"\n{'Modo':<20} {'1er /health':>12} {'codigo':>7} {'1er /predict':>13}")
+    print("-" * 55)
+    for nombre, argumentos in modos:
+        mediciones = [medir_servidor(argumentos) for _ in range(repeticiones)]
+        if any(m["predict"] is None for m in mediciones):
+            print(f"{nombre:<20} el servidor no respondio a tiempo")
+            continue
+
+        health = min(m["health"] for m in mediciones)
+        predict = min(m["predict"] for m in mediciones)
+        codigo = mediciones[0]["estado_health"]
+        print(
+            f"{nombre:<20} {health * 1000:>9.0f} ms {codigo:>7} "
+            f"{predict * 1000:>10.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
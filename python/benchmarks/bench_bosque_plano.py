@@ -0,0 +1,140 @@
+"""
+Benchmark - Bosque plano vs scikit-learn
+========================================
+Verifica que BosquePlano (bosque_plano.py) reproduce predict_proba del
+RandomForestClassifier guardado y compara tiempos por tamanio de lote:
+sklearn con n_jobs=1, el descenso vectorizado de NumPy y, si numba esta
+instalado, el kernel compilado. La columna API es lo que usa la API: el
+kernel si numba esta disponible y, si no, NumPy hasta FILAS_MAX_NUMPY
+filas y sklearn (respaldo) para lotes mas grandes.
+
+Falla si la API no es al menos ACELERACION_MIN veces mas rapida que
+sklearn con una fila y con cada lote que evalua el bosque plano. Tambien
+comprueba que la API carga el bosque plano sin importar sklearn.
+
+Uso:
+    uv run benchmarks/bench_bosque_plano.py
+"""
+
+import subprocess
+import sys
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from comun import PYTHON_DIR, cronometrar, importar_script, titulo
+
+import bosque_plano
+
+entrenamiento = importar_script("02_entrenar_modelo")
+
+TAMANIOS_LOTE = [1, 10, 100, 1_000, 10_000, 100_000]
+
+# Aceleracion minima contra sklearn que se exige al camino de la API
+ACELERACION_MIN = 1.5
+
+
+def api_importa_sklearn() -> bool:
+    """Carga la API en un proceso aparte y revisa si se importo sklearn."""
+    codigo = (
+        "import sys, importlib;"
+        "api = importlib.import_module('03_api_flask');"
+        "api.cargar_modelo();"
+        "print('sklearn' in sys.modules)"
+    )
+    salida = subprocess.run(
+        [sys.executable, "-c", codigo],
+        cwd=PYTHON_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return salida.stdout.strip().splitlines()[-1] == "True"
+
+
+def main():
+    titulo("BENCHMARK - BOSQUE PLANO VS SCIKIT-LEARN")
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        modelo_data = joblib.load(entrenamiento.MODEL_FILE)
+    modelo = modelo_data["modelo"].set_params(n_jobs=1)
+    arrays = bosque_plano.exportar_bosque(modelo)
+    bosque = bosque_plano.BosquePlano(arrays)
+    # Como lo carga la API: con sklearn de respaldo para lotes grandes
+    bosque_api = bosque_plano.BosquePlano(arrays, respaldo=lambda: modelo)
+
+    df = pd.read_csv(PYTHON_DIR / "dataset" / "datos_historicos_jerusalen.csv")
+    X_historico = df[modelo_data["features"]].to_numpy(dtype=float)
+    rng = np.random.default_rng(0)
+    X_aleatorio = rng.uniform(
+        [0, -5, 0, 0, 0, 0, 1], [100, 40, 100, 20, 100, 23, 12], (100_000, 7)
+    )
+
+    # Las matrices de NumPy no llevan nombres de columnas
+    del modelo.feature_names_in_
+
+    print("\nEquivalencia con sklearn predict_proba:")
+    for nombre, X in [("historico", X_historico), ("aleatorio", X_aleatorio)]:
+        esperado = modelo.predict_proba(X)
+        obtenido = bosque.predict_proba(X)
+        diferencia = np.abs(esperado - obtenido).max()
+        mismas = (esperado.argmax(axis=1) == obtenido.argmax(axis=1)).all()
+        print(
+            f"  {nombre:<10} max |diferencia| = {diferencia:.2e}, decisiones iguales: {mismas}"
+        )
+        if diferencia > 1e-9 or not mismas:
+            raise SystemExit("El bosque plano no coincide con sklearn")
+
+    print(f"\nLa API importa scikit-learn al cargar el modelo: {api_importa_sklearn()}")
+
+    hay_numba = bosque_plano._kernel_numba() is not None
+
+    print(
+        f"\n{'Filas':>8} {'sklearn':>11} {'NumPy':>11} {'numba':>11} "
+        f"{'API':>11} {'aceleracion':>12}"
+    )
+    lentos = []
+    for n in TAMANIOS_LOTE:
+        X = X_aleatorio[:n]
+        repeticiones = 20 if n <= 1_000 else 3
+        t_sklearn = cronometrar(lambda: modelo.predict_proba(X), repeticiones)
+
+        bosque_plano.USAR_NUMBA = False
+        t_numpy = cronometrar(lambda: bosque.predict_proba(X), repeticiones)
+
+        bosque_plano.USAR_NUMBA = True
+        t_numba = float("nan")
+        if hay_numba:
+            t_numba = cronometrar(lambda: bosque.predict_proba(X), repeticiones)
+        t_api = cronometrar(lambda: bosque_api.predict_proba(X), repeticiones)
+
+        aceleracion = t_sklearn / t_api
+        print(
+            f"{n:>8,} {t_sklearn * 1e3:>8.2f} ms {t_numpy * 1e3:>8.2f} ms "
+            f"{t_numba * 1e3:>8.2f} ms {t_api * 1e3:>8.2f} ms {aceleracion:>11.1f}x"
+        )
+        # Sin numba los lotes grandes van a sklearn: ahi no hay aceleracion
+        usa_bosque = hay_numba or n <= bosque_plano.FILAS_MAX_NUMPY
+        if usa_bosque and aceleracion < ACELERACION_MIN:
+            lentos.append(f"{n:,} filas ({aceleracion:.1f}x)")
+
+    if lentos:
+        raise SystemExit(
+            f"La API no es {ACELERACION_MIN}x mas rapida que sklearn con: "
+            + ", ".join(lentos)
+        )
+    if hay_numba:
+        print(f"\nLa API es al menos {ACELERACION_MIN}x mas rapida que sklearn")
+    else:
+        print(
+            f"\nLa API es al menos {ACELERACION_MIN}x mas rapida que sklearn hasta "
+            f"{bosque_plano.FILAS_MAX_NUMPY:,} filas; sin numba los lotes mayores "
+            "usan sklearn"
+        )
+
+
+if __name__ == "__main__":
+    main()
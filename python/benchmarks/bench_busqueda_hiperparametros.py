@@ -0,0 +1,96 @@
+"""
+Benchmark - Halving sucesivo contra busqueda exhaustiva
+=======================================================
+Corre la validacion cruzada de busqueda_hiperparametros.py de dos formas
+sobre el mismo conjunto de entrenamiento que 02_entrenar_modelo.py:
+
+- halving: la busqueda de --buscar (FACTOR, MIN_FILAS)
+- exhaustiva: todos los candidatos con el fold completo, en una sola ronda
+
+y compara tiempo, ajustes y filas ajustadas, la mejor accuracy de
+validacion y el candidato que se recomendaria (el de menos nodos a
+TOLERANCIA_ACCURACY de la mejor).
+
+Uso:
+    uv run benchmarks/bench_busqueda_hiperparametros.py
+"""
+
+import contextlib
+import io
+import os
+import time
+
+from comun import importar_script, titulo
+
+import busqueda_hiperparametros as busqueda
+
+entrenar = importar_script("02_entrenar_modelo")
+
+
+def recomendado(media, lista) -> tuple:
+    """Candidato con menos nodos a TOLERANCIA_ACCURACY de la mejor accuracy."""
+    empatados = media[
+        media["accuracy"] >= media["accuracy"].max() - busqueda.TOLERANCIA_ACCURACY
+    ]
+    fila = empatados.loc[empatados["nodos"].idxmin()]
+    parametros = lista[int(fila["candidato"])]
+    return tuple(parametros[k] for k in busqueda.ESPACIO_BUSQUEDA), fila["accuracy"]
+
+
+def main():
+    titulo("BENCHMARK - HALVING SUCESIVO VS BUSQUEDA EXHAUSTIVA")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        X, y, _ = entrenar.preparar_datos(
+            entrenar.cargar_datos(entrenar.FEATURES + [entrenar.TARGET])
+        )
+    X_train, _, y_train, _ = entrenar.train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    lista = busqueda.candidatos()
+    print(
+        f"\n{len(X_train):,} filas de entrenamiento, {len(lista)} candidatos, "
+        f"{busqueda.PLIEGUES} folds, {os.cpu_count()} nucleo(s)"
+    )
+
+    variantes = {
+        "halving": {},
+        "exhaustiva": {"min_filas": len(X_train)},
+    }
+    resultados = {}
+    for nombre, opciones in variantes.items():
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, rondas = busqueda.halving(
+                X_train, y_train, entrenar.RF_PARAMS, **opciones
+            )
+        total = time.perf_counter() - inicio
+        ultima = rondas[rondas["ronda"] == rondas["ronda"].max()]
+        resultados[nombre] = {
+            "tiempo": total,
+            "ajustes": len(rondas) * busqueda.PLIEGUES,
+            "filas": int(rondas["filas"].sum()) * busqueda.PLIEGUES,
+            "mejor": ultima["accuracy"].max(),
+            "recomendado": recomendado(ultima, lista),
+        }
+
+    print(
+        f"\n{'Variante':<12} {'tiempo (s)':>11} {'ajustes':>8} "
+        f"{'filas ajustadas':>16} {'mejor cv_acc':>13}"
+    )
+    print("-" * 64)
+    base = resultados["exhaustiva"]["tiempo"]
+    for nombre, r in resultados.items():
+        print(
+            f"{nombre:<12} {r['tiempo']:>11.1f} {r['ajustes']:>8,} "
+            f"{r['filas']:>16,} {r['mejor']:>13.4f}  ({base / r['tiempo']:.1f}x)"
+        )
+
+    print("\nRecomendado (arboles, profundidad, hoja, max_features) y cv_accuracy:")
+    for nombre, r in resultados.items():
+        parametros, accuracy = r["recomendado"]
+        print(f"  {nombre:<12} {parametros}  {accuracy:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Benchmark - Cache de predicciones
+=================================
+Reproduce datos_historicos_jerusalen.csv como lo veria la API en campo:
+el ESP32 publica cada 3 segundos, asi que entre cada par de horas del CSV
+se generan 1200 lecturas interpoladas con el ruido y la resolucion de los
+sensores (humedad de suelo entera por el map() del sketch, DHT22 con 0.1).
+La precipitacion y la probabilidad de lluvia vienen del pronostico y solo
+cambian cada hora.
+
+Cada lectura se envia a POST /predict con el cliente de pruebas de Flask,
+con y sin cache, y se reporta:
+- tasa de aciertos y contadores de /cache/stats
+- latencia total y por request (aciertos vs fallos)
+- decisiones distintas a las del modelo sin cache (error de cuantizar)
+
+Con --evaluador se elige como predice el modelo en los fallos del cache:
+numba (defecto), numpy (bosque plano sin numba) o sklearn.
+
+Uso:
+    uv run benchmarks/bench_cache_predicciones.py [--horas 24] [--evaluador numba]
+"""
+
+import argparse
+import contextlib
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from comun import PYTHON_DIR, importar_script, percentiles_ms, titulo
+
+api = importar_script("03_api_flask")
+
+LECTURAS_POR_HORA = 3600 // 3
+
+# (desviacion del ruido, resolucion del sensor)
+SENSORES = {
+    "humedad_suelo": (0.5, 1.0),
+    "temperatura": (0.1, 0.1),
+    "humedad_ambiente": (0.3, 0.1),
+}
+
+
+def generar_lecturas(df: pd.DataFrame, horas: int, seed: int = 0) -> pd.DataFrame:
+    """Interpola las primeras `horas` del CSV a una lectura cada 3 segundos."""
+    rng = np.random.default_rng(seed)
+    tramo = df.iloc[: horas + 1].reset_index(drop=True)
+
+    # Posicion de cada lectura en horas desde el inicio del tramo
+    t = np.arange(horas * LECTURAS_POR_HORA) / LECTURAS_POR_HORA
+    hora_base = t.astype(int)
+
+    lecturas = pd.DataFrame(
+        {
+            "precipitacion": tramo["precipitacion"].to_numpy()[hora_base],
+            "prob_lluvia": tramo["prob_lluvia"].to_numpy()[hora_base],
+            "hora": tramo["hora"].to_numpy()[hora_base],
+            "mes": tramo["mes"].to_numpy()[hora_base],
+        }
+    )
+    for columna, (ruido, resolucion) in SENSORES.items():
+        valor = np.interp(t, np.arange(len(tramo)), tramo[columna].to_numpy())
+        valor = valor + rng.normal(0, ruido, len(t))
+        lecturas[columna] = np.round(valor / resolucion) * resolucion
+
+    lecturas["humedad_suelo"] = lecturas["humedad_suelo"].clip(0, 100)
+    lecturas["humedad_ambiente"] = lecturas["humedad_ambiente"].clip(0, 100)
+    return lecturas
+
+
+def reproducir(cliente, registros: list) -> tuple:
+    """
+    Envia los registros a /predict.
+
+    Returns:
+        (tiempos, decisiones, aciertos): arrays por request; aciertos indica
+        si la prediccion salio del cache
+    """
+    tiempos, decisiones, aciertos = [], [], []
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        for registro in registros:
+            previos = api.CACHE.aciertos if api.CACHE is not None else 0
+            inicio = time.perf_counter()
+            respuesta = cliente.post("/predict", json=registro)
+            tiempos.append(time.perf_counter() - inicio)
+            decisiones.append(respuesta.get_json()["decision_int"])
+            aciertos.append(api.CACHE is not None and api.CACHE.aciertos > previos)
+    return np.array(tiempos), np.array(decisiones), np.array(aciertos)
+
+
+def verificar_umbrales(features: list):
+    """
+    Lecturas a ambos lados de un umbral de las reglas de riego no deben
+    compartir celda del cache.
+    """
+    from cache_predicciones import CachePredicciones
+
+    cache = CachePredicciones(features)
+    base = dict.fromkeys(features, 0.0)
+    pares = [
+        ("humedad_suelo", 19.9, 20.1),  # HUMEDAD_CRITICA: < 20
+        ("humedad_suelo", 39.9, 40.0),  # HUMEDAD_OPTIMA_MIN: >= 40
+        ("precipitacion", 0.5, 0.6),  # LLUVIA_ACTUAL_MIN: > 0.5
+        ("prob_lluvia", 70.0, 71.0),  # PROB_LLUVIA_ESPERAR: > 70
+    ]
+    print("\nCeldas a ambos lados de los umbrales de riego:")
+    for feature, abajo, arriba in pares:
+        claves = [
+            cache.clave([{**base, feature: v}[f] for f in features])
+            for v in (abajo, arriba)
+        ]
+        if claves[0] == claves[1]:
+            raise SystemExit(f"{feature} {abajo} y {arriba} comparten celda")
+        print(f"  {feature:<14} {abajo:>5} | {arriba:<5} celdas distintas")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--horas", type=int, default=24)
+    parser.add_argument(
+        "--evaluador", choices=["numba", "numpy", "sklearn"], default="numba"
+    )
+    args = parser.parse_args()
+    horas = args.horas
+
+    titulo(f"BENCHMARK - CACHE DE PREDICCIONES ({args.evaluador})")
+
+    import bosque_plano
+
+    bosque_plano.USAR_NUMBA = args.evaluador == "numba"
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        api.cargar_modelo(usar_bosque_plano=args.evaluador != "sklearn")
+    features = api.MODELO_DATA["features"]
+    cliente = api.app.test_client()
+    verificar_umbrales(features)
+
+    df = pd.read_csv(PYTHON_DIR / "dataset" / "datos_historicos_jerusalen.csv")
+    lecturas = generar_lecturas(df, horas)
+    registros = lecturas[features].to_dict("records")
+    print(f"\n{horas} horas del CSV -> {len(registros):,} lecturas (cada 3 s)")
+
+    # Sin cache: referencia de latencia y de decisiones
+    cache = api.CACHE
+    api.CACHE = None
+    reproducir(cliente, registros[:200])
+    tiempos_sin, decisiones_sin, _ = reproducir(cliente, registros)
+
+    api.CACHE = cache
+    tiempos_con, decisiones_con, es_acierto = reproducir(cliente, registros)
+
+    stats = cliente.get("/cache/stats").get_json()
+    n = len(registros)
+    print(f"\nTasa de aciertos: {stats['tasa_aciertos']:.1%}")
+    print(
+        f"  aciertos={stats['aciertos']:,}  fallos={stats['fallos']:,}  "
+        f"expulsiones={stats['expulsiones']:,}  expiradas={stats['expiradas']:,}  "
+        f"entradas={stats['entradas']:,}"
+    )
+
+    print(f"\n{'':<22} {'total (s)':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for nombre, tiempos in [("sin cache", tiempos_sin), ("con cache", tiempos_con)]:
+        r = percentiles_ms(tiempos)
+        print(
+            f"{nombre:<22} {tiempos.sum():>10.2f} {r['p50']:>10.3f} {r['p99']:>10.3f}"
+        )
+    for nombre, mascara in [("  aciertos", es_acierto), ("  fallos", ~es_acierto)]:
+        if mascara.any():
+            r = percentiles_ms(tiempos_con[mascara])
+            print(f"{nombre:<22} {'':>10} {r['p50']:>10.3f} {r['p99']:>10.3f}")
+
+    ahorro = tiempos_sin.sum() - tiempos_con.sum()
+    print(
+        f"\nTiempo ahorrado: {ahorro:.2f} s "
+        f"({ahorro / n * 1000:.3f} ms por request, "
+        f"{ahorro / tiempos_sin.sum():.0%} del total)"
+    )
+
+    distintas = int((decisiones_sin != decisiones_con).sum())
+    print(f"Decisiones distintas por cuantizar: {distintas:,} de {n:,}")
+
+
+if __name__ == "__main__":
+    main()
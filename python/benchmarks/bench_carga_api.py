@@ -0,0 +1,122 @@
+"""
+Benchmark - Carga sobre /predict
+================================
+Lanza la API en distintos modos y la somete a N clientes concurrentes que
+envian POST /predict en bucle durante unos segundos, cada uno con su propia
+conexion HTTP (keep-alive si el servidor la mantiene). Reporta requests por
+segundo y latencia p50/p99 para cada nivel de concurrencia.
+
+Modos:
+    desarrollo   app.run(debug=True) - servidor de desarrollo de Flask
+    produccion   gunicorn, 1 worker x 4 hilos
+    produccion   gunicorn, 4 workers x 4 hilos, modelo precargado
+
+El generador de carga corre en la misma maquina que el servidor, asi que
+compite por CPU con el: los numeros sirven para comparar modos entre si.
+
+Uso:
+    uv run benchmarks/bench_carga_api.py [--segundos 5] [--clientes 1,8,32]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from comun import PYTHON_DIR, percentiles_ms, servidor_api, titulo
+
+MODOS = [
+    ("desarrollo", []),
+    ("prod 1x4", ["--produccion", "--workers", "1", "--hilos", "4"]),
+    (
+        "prod 4x4 precarga",
+        ["--produccion", "--workers", "4", "--hilos", "4", "--precargar"],
+    ),
+]
+
+
+def cliente(puerto: int, cuerpos: list, fin: float, tiempos: list, errores: list):
+    """Envia requests por una conexion propia hasta el instante `fin`."""
+    conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=10)
+    cabeceras = {"Content-Type": "application/json"}
+    i = 0
+    while time.perf_counter() < fin:
+        cuerpo = cuerpos[i % len(cuerpos)]
+        i += 1
+        inicio = time.perf_counter()
+        try:
+            # http.client reconecta solo si el servidor cerro la conexion
+            conexion.request("POST", "/predict", body=cuerpo, headers=cabeceras)
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            if respuesta.status != 200:
+                errores.append(respuesta.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            errores.append(type(e).__name__)
+            conexion.close()
+            continue
+        tiempos.append(time.perf_counter() - inicio)
+    conexion.close()
+
+
+def medir(puerto: int, n_clientes: int, cuerpos: list, segundos: float) -> dict:
+    tiempos, errores = [], []
+    fin = time.perf_counter() + segundos
+    hilos = [
+        threading.Thread(
+            target=cliente,
+            args=(puerto, cuerpos[k::n_clientes], fin, tiempos, errores),
+        )
+        for k in range(n_clientes)
+    ]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    resultado = percentiles_ms(tiempos) if tiempos else {"p50": 0.0, "p99": 0.0}
+    resultado["rps"] = len(tiempos) / segundos
+    resultado["errores"] = len(errores)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--segundos", type=float, default=5.0)
+    parser.add_argument("--clientes", default="1,8,32")
+    args = parser.parse_args()
+    niveles = [int(n) for n in args.clientes.split(",")]
+
+    titulo("BENCHMARK - CARGA SOBRE /predict")
+    print(f"\nCPUs: {os.cpu_count()}  |  {args.segundos:.0f} s por nivel")
+
+    df = pd.read_csv(PYTHON_DIR / "dataset" / "datos_historicos_jerusalen.csv")
+    features = json.loads((PYTHON_DIR / "models" / "modelo_riego.json").read_text())[
+        "features"
+    ]
+    muestra = df[features].sample(5000, random_state=0)
+    cuerpos = [json.dumps(r).encode() for r in muestra.to_dict("records")]
+
+    print(
+        f"\n{'Modo':<18} {'Clientes':>8} {'req/s':>8} {'p50 (ms)':>9} "
+        f"{'p99 (ms)':>9} {'errores':>8}"
+    )
+    print("-" * 65)
+    for nombre, argumentos in MODOS:
+        with servidor_api(argumentos) as puerto:
+            medir(puerto, 1, cuerpos, 1.0)  # calentamiento
+            for n in niveles:
+                r = medir(puerto, n, cuerpos, args.segundos)
+                print(
+                    f"{nombre:<18} {n:>8} {r['rps']:>8.0f} {r['p50']:>9.2f} "
+                    f"{r['p99']:>9.2f} {r['errores']:>8}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Benchmark - Descarga del historico por bloques
+==============================================
+Levanta un servidor HTTP local que imita el archivo historico de
+Open-Meteo (mismos parametros y formato de respuesta, valores
+deterministas por hora) con una latencia que crece con los dias pedidos,
+y verifica descargar_datos_historicos de 01_descargar_datos.py:
+
+- una sola solicitud (como antes) vs bloques en paralelo: tiempo y datos
+  identicos
+- con una fraccion de respuestas 503: los reintentos completan la
+  descarga y los datos no cambian
+- segunda ejecucion: todo desde el cache, sin solicitudes
+- rango extendido 10 dias: solo se piden los dias nuevos
+
+Uso:
+    uv run benchmarks/bench_descarga.py [--dias 730] [--fallos 0.2]
+"""
+
+import argparse
+import json
+import math
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from comun import importar_script, titulo
+
+descarga = importar_script("01_descargar_datos")
+
+# Latencia simulada del servidor: fija + proporcional a los dias pedidos
+LATENCIA_BASE_S = 0.05
+LATENCIA_POR_DIA_S = 0.002
+
+
+class ServidorOpenMeteo:
+    """Servidor de prueba del endpoint /v1/archive en un puerto libre."""
+
+    def __init__(self, fallos: float = 0.0):
+        self.fallos = fallos
+        self.solicitudes = 0
+        self.rechazadas = 0
+        self._azar = random.Random(0)
+        self._lock = threading.Lock()
+
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                servidor._atender(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._http = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+        self.url = f"http://127.0.0.1:{self._http.server_port}/v1/archive"
+        threading.Thread(target=self._http.serve_forever, daemon=True).start()
+
+    def cerrar(self):
+        self._http.shutdown()
+        self._http.server_close()
+
+    def _atender(self, manejador):
+        with self._lock:
+            self.solicitudes += 1
+            rechazar = self._azar.random() < self.fallos
+            self.rechazadas += rechazar
+        if rechazar:
+            manejador.send_response(503)
+            manejador.end_headers()
+            return
+
+        params = parse_qs(urlparse(manejador.path).query)
+        desde = datetime.strptime(params["start_date"][0], "%Y-%m-%d")
+        hasta = datetime.strptime(params["end_date"][0], "%Y-%m-%d")
+        horas = int((hasta - desde).total_seconds() // 3600) + 24
+        time.sleep(LATENCIA_BASE_S + LATENCIA_POR_DIA_S * horas / 24)
+
+        tiempos = [desde + timedelta(hours=h) for h in range(horas)]
+        hourly = {"time": [t.strftime("%Y-%m-%dT%H:%M") for t in tiempos]}
+        for variable in params["hourly"]:
+            hourly[variable] = [_valor(variable, t) for t in tiempos]
+
+        cuerpo = json.dumps(
+            {
+                "latitude": float(params["latitude"][0]),
+                "longitude": float(params["longitude"][0]),
+                "timezone": params["timezone"][0],
+                "hourly_units": {v: "" for v in hourly},
+                "hourly": hourly,
+            }
+        ).encode()
+        manejador.send_response(200)
+        manejador.send_header("Content-Type", "application/json")
+        manejador.send_header("Content-Length", str(len(cuerpo)))
+        manejador.end_headers()
+        manejador.wfile.write(cuerpo)
+
+
+def _valor(variable: str, t: datetime) -> float:
+    """Valor determinista de una variable en una hora."""
+    x = t.timestamp() / 3600
+    if variable == "temperature_2m":
+        return round(12 + 6 * math.sin(2 * math.pi * (t.hour - 9) / 24), 1)
+    if variable == "relative_humidity_2m":
+        return round(75 + 20 * math.sin(x / 37))
+    return round(max(0.0, 3 * math.sin(x / 11)) ** 2 / 3, 1)
+
+
+def descargar(servidor, inicio, fin, cache_dir, usar_cache=True) -> tuple:
+    """Retorna (datos, segundos, solicitudes al servidor)."""
+    descarga.CACHE_DIR = cache_dir
+    antes = servidor.solicitudes
+    t = time.perf_counter()
+    datos = descarga.descargar_datos_historicos(
+        str(inicio), str(fin), url=servidor.url, usar_cache=usar_cache
+    )
+    return datos, time.perf_counter() - t, servidor.solicitudes - antes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dias", type=int, default=730)
+    parser.add_argument(
+        "--fallos", type=float, default=0.2, help="Fraccion de respuestas 503"
+    )
+    args = parser.parse_args()
+
+    titulo("BENCHMARK - DESCARGA DEL HISTORICO POR BLOQUES")
+
+    fin = datetime(2026, 1, 10).date()
+    inicio = fin - timedelta(days=args.dias)
+    servidor = ServidorOpenMeteo()
+    resultados = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = Path(tmp)
+
+        # Como antes: todo el rango en una solicitud
+        meses = descarga.MESES_POR_BLOQUE
+        descarga.MESES_POR_BLOQUE = 12 * 100
+        unico, segundos, n = descargar(servidor, inicio, fin, cache, usar_cache=False)
+        descarga.MESES_POR_BLOQUE = meses
+        resultados.append(("una solicitud", segundos, n, "-"))
+
+        bloques, segundos, n = descargar(servidor, inicio, fin, cache / "frio")
+        resultados.append(
+            ("bloques, cache vacio", segundos, n, bloques["hourly"] == unico["hourly"])
+        )
+
+        _, segundos, n = descargar(servidor, inicio, fin, cache / "frio")
+        resultados.append(("bloques, desde cache", segundos, n, "-"))
+
+        nuevo_fin = fin + timedelta(days=10)
+        extendido, segundos, n = descargar(servidor, inicio, nuevo_fin, cache / "frio")
+        completo, _, _ = descargar(
+            servidor, inicio, nuevo_fin, cache / "otro", usar_cache=False
+        )
+        resultados.append(
+            (
+                "bloques, +10 dias",
+                segundos,
+                n,
+                extendido["hourly"] == completo["hourly"],
+            )
+        )
+
+        # Con fallos: los reintentos esperan poco para no alargar la prueba
+        servidor.fallos = args.fallos
+        descarga.BACKOFF_S = 0.05
+        rechazadas = servidor.rechazadas
+        con_fallos, segundos, n = descargar(servidor, inicio, fin, cache / "fallos")
+        resultados.append(
+            (
+                f"bloques, {args.fallos:.0%} de 503",
+                segundos,
+                n,
+                con_fallos["hourly"] == unico["hourly"],
+            )
+        )
+        rechazadas = servidor.rechazadas - rechazadas
+
+    servidor.cerrar()
+
+    print(
+        f"\n{args.dias} dias ({len(unico['hourly']['time']):,} horas), bloques de "
+        f"{descarga.MESES_POR_BLOQUE} meses, {descarga.DESCARGAS_PARALELAS} en paralelo"
+    )
+    print(f"\n{'Descarga':<24} {'tiempo (s)':>11} {'solicitudes':>12} {'igual':>7}")
+    print("-" * 57)
+    for nombre, segundos, n, igual in resultados:
+        igual = igual if igual == "-" else ("si" if igual else "NO")
+        print(f"{nombre:<24} {segundos:>11.2f} {n:>12} {igual:>7}")
+    print(f"\nRespuestas 503 reintentadas: {rechazadas}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark - Validacion cruzada de entrenar_modelo
+=================================================
+Compara entrenar_modelo de 02_entrenar_modelo.py con la version anterior,
+que llamaba a cross_val_score una vez por metrica (4 x 5 = 20 bosques de
+validacion mas el modelo final):
+
+- antes: 4 cross_val_score + modelo final
+- cross_validate: las 4 metricas con los mismos 5 ajustes + modelo final
+- --oob: sin validacion cruzada, metricas fuera de bolsa del modelo final
+
+Verifica que las metricas que van a metricas.txt son identicas a las de
+antes y muestra el tiempo por fase de cada variante. Los folds corren en
+paralelo con CV_N_JOBS; con un solo nucleo el ahorro es solo el de los
+ajustes repetidos.
+
+Uso:
+    uv run benchmarks/bench_entrenamiento.py
+"""
+
+import contextlib
+import io
+import os
+import time
+
+from comun import importar_script, titulo
+
+entrenar = importar_script("02_entrenar_modelo")
+
+
+def entrenar_antes(X, y, tiempos: dict) -> dict:
+    """entrenar_modelo como era antes: un cross_val_score por metrica."""
+    from sklearn.model_selection import cross_val_score
+
+    X_train, X_test, y_train, y_test = entrenar.train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    modelo = entrenar.RandomForestClassifier(**entrenar.RF_PARAMS)
+    cv = entrenar.StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+
+    with entrenar.medir_fase(tiempos, "Validacion cruzada"):
+        cv_scores = {
+            m: cross_val_score(modelo, X_train, y_train, cv=cv, scoring=m)
+            for m in ["accuracy", "f1", "precision", "recall"]
+        }
+    with entrenar.medir_fase(tiempos, "Modelo final"):
+        modelo.fit(X_train, y_train)
+    with entrenar.medir_fase(tiempos, "Evaluacion en test"):
+        y_pred = modelo.predict(X_test)
+        y_prob = modelo.predict_proba(X_test)[:, 1]
+        return {
+            "accuracy": entrenar.accuracy_score(y_test, y_pred),
+            "precision": entrenar.precision_score(y_test, y_pred),
+            "recall": entrenar.recall_score(y_test, y_pred),
+            "f1": entrenar.f1_score(y_test, y_pred),
+            "roc_auc": entrenar.roc_auc_score(y_test, y_prob),
+            "cv_accuracy_mean": cv_scores["accuracy"].mean(),
+            "cv_accuracy_std": cv_scores["accuracy"].std(),
+        }
+
+
+def main():
+    titulo("BENCHMARK - VALIDACION CRUZADA DE ENTRENAR_MODELO")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        X, y, _ = entrenar.preparar_datos(
+            entrenar.cargar_datos(entrenar.FEATURES + [entrenar.TARGET])
+        )
+    print(f"\n{len(X):,} registros, {os.cpu_count()} nucleo(s)")
+
+    variantes = {
+        "antes (4 x cross_val_score)": lambda t: entrenar_antes(X, y, t),
+        "cross_validate": lambda t: entrenar.entrenar_modelo(X, y, tiempos=t)[1],
+        "--oob": lambda t: entrenar.entrenar_modelo(X, y, oob=True, tiempos=t)[1],
+    }
+    resultados = {}
+    for nombre, funcion in variantes.items():
+        tiempos = {}
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            metricas = funcion(tiempos)
+        resultados[nombre] = (metricas, tiempos, time.perf_counter() - inicio)
+
+    fases = ["Validacion cruzada", "Modelo final", "Evaluacion en test"]
+    print(f"\n{'Variante':<28}" + "".join(f"{f[:18]:>20}" for f in fases) + "   total")
+    print("-" * 98)
+    base = resultados["antes (4 x cross_val_score)"][2]
+    for nombre, (_, tiempos, total) in resultados.items():
+        columnas = "".join(f"{tiempos.get(f, 0.0):>18.2f} s" for f in fases)
+        print(f"{nombre:<28}{columnas} {total:6.2f} s ({base / total:.1f}x)")
+
+    antes = resultados["antes (4 x cross_val_score)"][0]
+    ahora = resultados["cross_validate"][0]
+    print(f"\nmetricas.txt identico al de antes: {'si' if antes == ahora else 'NO'}")
+
+    oob = resultados["--oob"][0]
+    print(
+        f"\nAccuracy de validacion: cv {ahora['cv_accuracy_mean']:.4f} "
+        f"(+/- {ahora['cv_accuracy_std'] * 2:.4f}), oob {oob['oob_accuracy']:.4f} "
+        f"(filas con estimacion OOB: {oob['oob_cobertura']:.1%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark - Entrenamiento por bloques con muestra estratificada
+===============================================================
+Genera un historico sintetico 100 veces el actual: 100 sitios, cada uno
+con el historico de Jerusalen perturbado (temperatura, lluvia, pronostico
+y humedad del suelo desplazados por sitio, con ruido por hora) y
+etiquetado otra vez con generar_etiquetas. Se guarda en Parquet con
+almacen_dataset.py, como lo leeria 02_entrenar_modelo.py.
+
+Compara, cada modo en un proceso nuevo para medir su pico de memoria:
+
+- todo en memoria: cargar_datos + Random Forest con todas las filas
+- --streaming con varios limites de memoria: cargar_muestra + Random Forest
+  con la muestra
+
+y evalua cada modelo en 5 sitios sinteticos que no estan en el historico.
+La memoria es el pico de RSS del proceso menos el que tenia con los
+modulos ya importados. El bosque usa los RF_PARAMS del script con menos arboles (--arboles) para
+que la prueba termine en minutos.
+
+Uso:
+    uv run benchmarks/bench_entrenamiento_streaming.py [--sitios 100]
+        [--memorias 16,64,256] [--arboles 20]
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from comun import PYTHON_DIR, importar_script, titulo
+
+from almacen_dataset import guardar_parquet
+
+descarga = importar_script("01_descargar_datos")
+entrenar = importar_script("02_entrenar_modelo")
+
+SITIOS_PRUEBA = 5
+
+
+def sitio_sintetico(df: pd.DataFrame, semilla: int) -> pd.DataFrame:
+    """Historico de un sitio sintetico, con etiquetas recalculadas."""
+    rng = np.random.default_rng(semilla)
+    n = len(df)
+    df = df.copy()
+
+    delta_t = rng.normal(0, 2)
+    df["temperatura"] = (df["temperatura"] + delta_t + rng.normal(0, 0.5, n)).round(1)
+    df["temp_promedio_6h"] += delta_t
+
+    lluvia = rng.uniform(0.5, 1.5)
+    df["precipitacion"] = (df["precipitacion"] * lluvia).round(1)
+    df["precip_24h"] *= lluvia
+
+    df["humedad_ambiente"] = (df["humedad_ambiente"] + rng.normal(0, 5)).clip(0, 100)
+    df["prob_lluvia"] = (df["prob_lluvia"] + rng.normal(0, 10, n)).clip(0, 100)
+    df["humedad_suelo"] = (
+        df["humedad_suelo"] + rng.normal(0, 8) + rng.normal(0, 3, n)
+    ).clip(0, 100)
+
+    return descarga.generar_etiquetas(df)
+
+
+def entrenar_en_proceso(directorio, sitios, memoria_mb, arboles, prueba, cola):
+    """Entrena en este proceso y envia metricas, tiempos y memoria."""
+    # Memoria del proceso con los modulos importados, antes de cargar datos
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    entrenar.DIRECTORIO_PARQUET = Path(directorio)
+    salida = io.StringIO()
+
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(salida):
+        if memoria_mb is None:
+            df = entrenar.cargar_datos(
+                entrenar.FEATURES + [entrenar.TARGET], sitios, parquet=True
+            )
+        else:
+            df = entrenar.cargar_muestra(memoria_mb, sitios=sitios, parquet=True)
+        X, y, _ = entrenar.preparar_datos(df)
+        del df
+    carga = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    modelo = entrenar.RandomForestClassifier(
+        **{**entrenar.RF_PARAMS, "n_estimators": arboles}
+    ).fit(X, y)
+    ajuste = time.perf_counter() - inicio
+
+    y_pred = modelo.predict(prueba[entrenar.FEATURES])
+    cola.put(
+        {
+            "filas": len(X),
+            "carga_s": carga,
+            "ajuste_s": ajuste,
+            "pico_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 - base,
+            "accuracy": entrenar.accuracy_score(prueba[entrenar.TARGET], y_pred),
+            "f1": entrenar.f1_score(prueba[entrenar.TARGET], y_pred),
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sitios", type=int, default=100)
+    parser.add_argument("--memorias", default="16,64,256")
+    parser.add_argument("--arboles", type=int, default=20)
+    args = parser.parse_args()
+
+    titulo("BENCHMARK - ENTRENAMIENTO POR BLOQUES")
+
+    base = pd.read_csv(PYTHON_DIR / "dataset" / "datos_historicos_jerusalen.csv")
+    prueba = pd.concat(
+        [sitio_sintetico(base, 10_000 + k) for k in range(SITIOS_PRUEBA)],
+        ignore_index=True,
+    )
+    contexto = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        regar = 0
+        sitios = [f"sitio{k:03d}" for k in range(args.sitios)]
+        for k, site_id in enumerate(sitios):
+            sitio = sitio_sintetico(base, k)
+            regar += sitio["regar"].sum()
+            guardar_parquet(sitio, tmp, sitio=site_id)
+        total = len(base) * args.sitios
+        print(
+            f"\nHistorico sintetico: {args.sitios} sitios, {total:,} filas "
+            f"({regar / total:.1%} REGAR); prueba: {len(prueba):,} filas de "
+            f"{SITIOS_PRUEBA} sitios nuevos; {args.arboles} arboles"
+        )
+
+        modos = [("todo en memoria", None)] + [
+            (f"streaming {m} MB", float(m)) for m in args.memorias.split(",")
+        ]
+        resultados = []
+        for nombre, memoria in modos:
+            cola = contexto.Queue()
+            proceso = contexto.Process(
+                target=entrenar_en_proceso,
+                args=(tmp, sitios, memoria, args.arboles, prueba, cola),
+            )
+            proceso.start()
+            resultados.append((nombre, cola.get()))
+            proceso.join()
+
+    print(
+        f"\n{'Modo':<18} {'filas':>10} {'carga (s)':>10} {'ajuste (s)':>11} "
+        f"{'+RSS pico (MB)':>14} {'accuracy':>9} {'F1':>7}"
+    )
+    print("-" * 85)
+    for nombre, r in resultados:
+        print(
+            f"{nombre:<18} {r['filas']:>10,} {r['carga_s']:>10.1f} "
+            f"{r['ajuste_s']:>11.1f} {r['pico_mb']:>14.0f} {r['accuracy']:>9.4f} "
+            f"{r['f1']:>7.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Benchmark - Estado por dispositivo con miles de sensores
+========================================================
+Simula 10,000 y 100,000 nodos ESP32 con lecturas tomadas del historico y
+compara el estado en arrays de estado_dispositivos.py con un dict de dicts
+(un dict por dispositivo, como flow.get('ultimosDatos') multiplicado):
+
+- memoria por dispositivo (tracemalloc, incluye el indice id -> posicion)
+- tiempo de registrar una lectura de todos los dispositivos
+- barrido completo: predecir para todos los dispositivos
+- barrido parcial: predecir solo para el 10% con lecturas nuevas
+
+La memoria de los arrays incluye la capacidad libre (crecen al doble) y
+se muestra tambien el tiempo de predict_proba solo, para separar el costo
+del modelo del de armar la matriz y guardar las decisiones.
+
+Uso:
+    uv run benchmarks/bench_estado_dispositivos.py [--dispositivos 10000,100000]
+        [--sin-numba]
+"""
+
+import argparse
+import time
+import tracemalloc
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from comun import PYTHON_DIR, titulo
+
+import bosque_plano
+from bosque_plano import BosquePlano
+from estado_dispositivos import CAMPOS_SENSOR, EstadoDispositivos
+
+FRACCION_PARCIAL = 0.1
+AHORA = datetime(2026, 1, 15, 7)
+CLIMA = {"precipitacion": 0.0, "prob_lluvia": 20.0}
+
+
+class EstadoDicts:
+    """Mismo estado con un dict por dispositivo."""
+
+    def __init__(self):
+        self.dispositivos = {}
+
+    def registrar_lectura(self, dispositivo: str, lectura: dict, t: float):
+        estado = self.dispositivos.get(dispositivo)
+        if estado is None:
+            estado = self.dispositivos[dispositivo] = {
+                **CLIMA,
+                "humedad_suelo_media": lectura["humedad_suelo"],
+                "temperatura_media": lectura["temperatura"],
+                "n_lecturas": 0,
+                "decision": -1,
+                "confianza": 0.0,
+                "t_decision": 0.0,
+            }
+        estado.update(lectura)
+        for campo in ("humedad_suelo", "temperatura"):
+            media = campo + "_media"
+            estado[media] += 0.1 * (lectura[campo] - estado[media])
+        estado["n_lecturas"] += 1
+        estado["t_lectura"] = t
+        estado["pendiente"] = True
+
+    def barrer(self, modelo, features: list, ahora: datetime):
+        pendientes = [d for d, e in self.dispositivos.items() if e["pendiente"]]
+        base = {"hora": ahora.hour, "mes": ahora.month}
+        X = np.array(
+            [
+                [{**self.dispositivos[d], **base}[f] for f in features]
+                for d in pendientes
+            ]
+        )
+        probabilidades = modelo.predict_proba(X)
+        columnas = probabilidades.argmax(axis=1)
+        for d, columna, fila in zip(pendientes, columnas, probabilidades):
+            estado = self.dispositivos[d]
+            estado["decision"] = int(modelo.classes_[columna])
+            estado["confianza"] = float(fila[columna])
+            estado["t_decision"] = ahora.timestamp()
+            estado["pendiente"] = False
+
+
+def medir_memoria(funcion):
+    """Retorna (resultado, bytes retenidos) de funcion()."""
+    tracemalloc.start()
+    resultado = funcion()
+    retenido = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return resultado, retenido
+
+
+def cronometrar_una(funcion) -> float:
+    inicio = time.perf_counter()
+    funcion()
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dispositivos", default="10000,100000")
+    parser.add_argument(
+        "--sin-numba", action="store_true", help="Evaluar el bosque con NumPy"
+    )
+    args = parser.parse_args()
+    bosque_plano.USAR_NUMBA = not args.sin_numba
+
+    titulo("BENCHMARK - ESTADO POR DISPOSITIVO")
+
+    plano = joblib.load(PYTHON_DIR / "models" / "modelo_riego_plano.joblib")
+    features = plano["features"]
+    modelo = BosquePlano(plano["bosque"])
+    modelo.predict_proba(np.zeros((1, len(features))))  # compilar numba
+
+    df = pd.read_csv(PYTHON_DIR / "dataset" / "datos_historicos_jerusalen.csv")
+    rng = np.random.default_rng(0)
+
+    print(
+        f"\n{'Dispositivos':>12} {'Estado':<8} {'B/disp.':>8} {'registrar':>11} "
+        f"{'barrido':>10} {'10%':>10}"
+    )
+    print("-" * 66)
+    for n in [int(x) for x in args.dispositivos.split(",")]:
+        ids = [f"esp32-{i:06d}" for i in range(n)]
+        muestra = df[list(CAMPOS_SENSOR)].sample(n, random_state=0, replace=True)
+        lecturas = {c: muestra[c].to_numpy(dtype=np.float32) for c in CAMPOS_SENSOR}
+        registros = muestra.to_dict("records")
+        parcial = rng.choice(n, int(n * FRACCION_PARCIAL), replace=False)
+
+        # --- Arrays ---
+        def crear_arrays():
+            estado = EstadoDispositivos()
+            estado.registrar_lecturas(estado.indices(ids), lecturas, time.time())
+            estado.fijar_clima(CLIMA)
+            return estado
+
+        estado, memoria = medir_memoria(crear_arrays)
+        registrar = cronometrar_una(
+            lambda: estado.registrar_lecturas(
+                estado.indices(ids), lecturas, time.time()
+            )
+        )
+        barrido = cronometrar_una(lambda: estado.barrer(modelo, features, AHORA))
+        estado.registrar_lecturas(
+            parcial, {c: v[parcial] for c, v in lecturas.items()}, time.time()
+        )
+        barrido_parcial = cronometrar_una(
+            lambda: estado.barrer(modelo, features, AHORA)
+        )
+        print(
+            f"{n:>12,} {'arrays':<8} {memoria / n:>8.0f} {registrar * 1000:>8.1f} ms "
+            f"{barrido * 1000:>7.1f} ms {barrido_parcial * 1000:>7.1f} ms"
+        )
+        X = estado.matriz_features(np.arange(n), features, AHORA)
+        solo_modelo = cronometrar_una(lambda: modelo.predict_proba(X))
+        desglose = {k: v / n for k, v in estado.memoria_bytes().items()}
+        print(
+            f"{'':>12} {'':<8} arrays {desglose['arrays']:.0f} B + indice "
+            f"{desglose['indice']:.0f} B; predict_proba sola: "
+            f"{solo_modelo * 1000:.1f} ms"
+        )
+
+        # --- Dict de dicts ---
+        dicts, memoria = medir_memoria(lambda: crear_dicts(ids, registros))
+        registrar = cronometrar_una(lambda: registrar_dicts(dicts, ids, registros))
+        barrido = cronometrar_una(lambda: dicts.barrer(modelo, features, AHORA))
+        registrar_dicts(
+            dicts, [ids[i] for i in parcial], [registros[i] for i in parcial]
+        )
+        barrido_parcial = cronometrar_una(lambda: dicts.barrer(modelo, features, AHORA))
+        print(
+            f"{n:>12,} {'dicts':<8} {memoria / n:>8.0f} {registrar * 1000:>8.1f} ms "
+            f"{barrido * 1000:>7.1f} ms {barrido_parcial * 1000:>7.1f} ms"
+        )
+
+
+def registrar_dicts(dicts: EstadoDicts, ids: list, registros: list):
+    t = time.time()
+    for d, r in zip(ids, registros):
+        dicts.registrar_lectura(d, r, t)
+
+
+def crear_dicts(ids: list, registros: list) -> EstadoDicts:
+    dicts = EstadoDicts()
+    registrar_dicts(dicts, ids, registros)
+    return dicts
+
+
+if __name__ == "__main__":
+    main()
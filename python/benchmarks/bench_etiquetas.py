@@ -0,0 +1,153 @@
+"""
+Benchmark - Motor de reglas de etiquetado
+=========================================
+Verifica que la tabla de reglas vectorizada de generar_etiquetas
+(01_descargar_datos.py) da exactamente las mismas etiquetas que la logica
+original fila a fila (df.apply con decidir_riego) y compara sus tiempos
+con 1M y 10M de filas.
+
+La version fila a fila se mide sobre una muestra y se extrapola, porque
+con 10M de filas tardaria decenas de minutos.
+
+Uso:
+    uv run benchmarks/bench_etiquetas.py [filas ...]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from comun import PYTHON_DIR, cronometrar, importar_script, titulo
+
+descarga = importar_script("01_descargar_datos")
+
+FILAS_MUESTRA_APPLY = 100_000
+
+
+def decidir_riego(row, p: dict) -> int:
+    """Copia de la logica original fila a fila, usada como referencia."""
+    humedad = row["humedad_suelo"]
+    temp = row["temperatura"]
+    precip = row["precipitacion"]
+    precip_24h = row["precip_24h"]
+    prob_lluvia = row["prob_lluvia"]
+    hora = row["hora"]
+
+    if humedad < p["HUMEDAD_CRITICA"]:
+        return 1
+    if humedad >= p["HUMEDAD_EXCESO"]:
+        return 0
+    if precip > 0.5 or precip_24h > p["LLUVIA_RECIENTE_MIN"]:
+        return 0
+    if prob_lluvia > p["PROB_LLUVIA_ESPERAR"]:
+        return 0
+    if (
+        humedad < p["HUMEDAD_BAJA"]
+        and temp > p["TEMP_ALTA"]
+        and p["HORA_RIEGO_INICIO"] <= hora <= p["HORA_RIEGO_FIN"]
+    ):
+        return 1
+    if (
+        humedad < p["HUMEDAD_OPTIMA_MIN"]
+        and p["HORA_RIEGO_INICIO"] <= hora <= p["HORA_RIEGO_FIN"]
+        and prob_lluvia < 50
+    ):
+        return 1
+    if humedad < 50 and temp > 30:
+        return 1
+    if p["HUMEDAD_OPTIMA_MIN"] <= humedad <= p["HUMEDAD_OPTIMA_MAX"]:
+        return 0
+    return 0
+
+
+def etiquetas_fila_a_fila(df: pd.DataFrame) -> np.ndarray:
+    p = descarga.PARAMETROS_RIEGO
+    return df.apply(lambda row: decidir_riego(row, p), axis=1).to_numpy()
+
+
+def generar_filas(n: int, semilla: int = 0) -> pd.DataFrame:
+    """
+    Genera filas aleatorias que cubren todas las reglas, incluyendo valores
+    exactamente en los umbrales y algunos NaN.
+    """
+    rng = np.random.default_rng(semilla)
+    umbrales_humedad = np.array([20.0, 35.0, 40.0, 50.0, 70.0, 80.0])
+
+    humedad = rng.uniform(5, 85, n)
+    en_umbral = rng.random(n) < 0.05
+    humedad[en_umbral] = rng.choice(umbrales_humedad, en_umbral.sum())
+
+    df = pd.DataFrame(
+        {
+            "humedad_suelo": humedad,
+            "temperatura": np.round(rng.uniform(5, 35, n), 1),
+            "precipitacion": np.where(
+                rng.random(n) < 0.8, 0.0, np.round(rng.uniform(0, 2, n), 1)
+            ),
+            "precip_24h": np.round(rng.exponential(2.0, n), 1),
+            "prob_lluvia": np.round(rng.uniform(0, 100, n)),
+            "hora": rng.integers(0, 24, n),
+        }
+    )
+    nulos = rng.random(n) < 0.001
+    df.loc[nulos, "humedad_suelo"] = np.nan
+    return df
+
+
+def verificar_equivalencia():
+    """Compara ambas implementaciones sobre el dataset historico y filas aleatorias."""
+    casos = {"aleatorio (200k filas)": generar_filas(200_000, semilla=1)}
+
+    historico = PYTHON_DIR / "dataset" / "datos_historicos_jerusalen.csv"
+    if historico.exists():
+        casos["datos_historicos_jerusalen.csv"] = pd.read_csv(historico)
+
+    for nombre, df in casos.items():
+        esperado = etiquetas_fila_a_fila(df)
+        etiquetas, reglas = descarga.evaluar_reglas_riego(df)
+        if not np.array_equal(esperado, etiquetas):
+            diferentes = int((esperado != etiquetas).sum())
+            raise SystemExit(f"[{nombre}] {diferentes} etiquetas difieren")
+
+        if "regar" in df.columns and not np.array_equal(df["regar"], etiquetas):
+            raise SystemExit(f"[{nombre}] no coincide con la columna 'regar'")
+
+        conteo = np.bincount(reglas, minlength=len(descarga.REGLAS_RIEGO) + 1)
+        print(f"  {nombre}: etiquetas identicas, reglas disparadas {conteo.tolist()}")
+
+
+def medir_vectorizado(n: int) -> float:
+    """Segundos de evaluar_reglas_riego sobre n filas (se liberan al salir)."""
+    df = generar_filas(n)
+    return cronometrar(lambda: descarga.evaluar_reglas_riego(df))
+
+
+def main():
+    tamanios = [int(n) for n in sys.argv[1:]] or [1_000_000, 10_000_000]
+
+    titulo("BENCHMARK - MOTOR DE REGLAS DE ETIQUETADO")
+
+    print("\nEquivalencia con la logica fila a fila:")
+    verificar_equivalencia()
+
+    muestra = generar_filas(FILAS_MUESTRA_APPLY)
+    inicio = time.perf_counter()
+    etiquetas_fila_a_fila(muestra)
+    t_por_fila = (time.perf_counter() - inicio) / len(muestra)
+
+    print(
+        f"\n{'Filas':>12}  {'apply (est.)':>14}  {'vectorizado':>12}  {'aceleracion':>12}"
+    )
+    for n in tamanios:
+        t_vectorizado = medir_vectorizado(n)
+        t_apply = t_por_fila * n
+        print(
+            f"{n:>12,}  {t_apply:>12.1f} s  {t_vectorizado:>10.3f} s  "
+            f"{t_apply / t_vectorizado:>11.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
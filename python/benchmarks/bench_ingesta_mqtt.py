@@ -0,0 +1,188 @@
+"""
+Benchmark - Latencia de extremo a extremo de la ingesta MQTT
+============================================================
+Mide el tiempo desde que un sensor publica una lectura en
+pastizal/sensores hasta que la valvula recibe su comando en
+pastizal/valvula/control, sobre el broker en memoria (broker_local.py),
+para dos caminos:
+
+- directo: 04_ingesta_mqtt.py predice en el mismo proceso, en lotes
+- via HTTP: un puente que hace lo mismo que Node-RED hoy: por cada
+  lectura abre una conexion, llama POST /predict a la API (servidor de
+  desarrollo, sin cache) y publica el comando
+
+Las lecturas se publican a una tasa fija (mensajes por segundo) o en
+rafaga, tan rapido como se puede. Cada lectura viene de un dispositivo
+nuevo, asi su primera decision siempre se publica; como el broker entrega
+en orden, el k-esimo comando corresponde a la k-esima lectura. El puente HTTP no incluye el costo propio de Node-RED, asi que
+es una cota inferior de la latencia actual.
+
+Uso:
+    uv run benchmarks/bench_ingesta_mqtt.py [--segundos 3] [--tasas 10,100,1000]
+        [--rafaga 5000]
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from comun import PYTHON_DIR, importar_script, percentiles_ms, servidor_api, titulo
+
+from broker_local import BrokerLocal
+
+ingesta_mqtt = importar_script("04_ingesta_mqtt")
+
+
+class PuenteHTTP:
+    """Reenvia cada lectura a POST /predict, como el flujo de Node-RED."""
+
+    def __init__(self, cliente, puerto: int, pronostico):
+        self.cliente = cliente
+        self.puerto = puerto
+        self.pronostico = pronostico
+
+    def iniciar(self):
+        self.cliente.suscribir(ingesta_mqtt.TOPIC_SENSORES, self._al_recibir)
+
+    def detener(self):
+        pass
+
+    def _al_recibir(self, topic: str, payload: bytes):
+        ahora = datetime.now()
+        lectura = json.loads(payload)
+        dispositivo = lectura.pop(ingesta_mqtt.CAMPO_DISPOSITIVO)
+        cuerpo = {
+            **self.pronostico.valores(),
+            "hora": ahora.hour,
+            "mes": ahora.month,
+            **lectura,
+        }
+        conexion = http.client.HTTPConnection("127.0.0.1", self.puerto)
+        conexion.request(
+            "POST",
+            "/predict",
+            body=json.dumps(cuerpo),
+            headers={"Content-Type": "application/json"},
+        )
+        respuesta = json.loads(conexion.getresponse().read())
+        conexion.close()
+        self.cliente.publicar(
+            ingesta_mqtt.topic_control(dispositivo),
+            "ON" if respuesta["decision_int"] == 1 else "OFF",
+        )
+
+
+def medir(broker, mensajes: list, tasa: float = None) -> dict:
+    """
+    Publica las lecturas (a `tasa` por segundo, o en rafaga si es None) y
+    espera todos los comandos.
+    """
+    llegadas = []
+    completo = threading.Event()
+
+    def al_recibir(topic, payload):
+        llegadas.append(time.perf_counter())
+        if len(llegadas) == len(mensajes):
+            completo.set()
+
+    valvula = broker.conectar("valvula")
+    valvula.suscribir(f"{ingesta_mqtt.TOPIC_CONTROL}/+", al_recibir)
+    sensor = broker.conectar("sensor")
+
+    enviados = []
+    inicio = time.perf_counter()
+    for i, mensaje in enumerate(mensajes):
+        if tasa:
+            espera = inicio + i / tasa - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+        enviados.append(time.perf_counter())
+        sensor.publicar(ingesta_mqtt.TOPIC_SENSORES, mensaje)
+
+    if not completo.wait(timeout=300):
+        raise RuntimeError(f"Llegaron {len(llegadas)} de {len(mensajes)} comandos")
+    total = llegadas[-1] - inicio
+
+    sensor.cerrar()
+    valvula.cerrar()
+
+    resultado = percentiles_ms([b - a for a, b in zip(enviados, llegadas)])
+    resultado["msg_s"] = len(mensajes) / total
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--segundos", type=float, default=3.0)
+    parser.add_argument("--tasas", default="10,100,1000")
+    parser.add_argument(
+        "--rafaga", type=int, default=5000, help="Lecturas de la prueba en rafaga"
+    )
+    args = parser.parse_args()
+    tasas = [float(t) for t in args.tasas.split(",")]
+
+    titulo("BENCHMARK - INGESTA MQTT: SENSOR -> COMANDO DE VALVULA")
+
+    df = pd.read_csv(PYTHON_DIR / "dataset" / "datos_historicos_jerusalen.csv")
+    sensores = df[["humedad_suelo", "temperatura", "humedad_ambiente"]]
+
+    ids = itertools.count()
+
+    def lecturas(n: int) -> list:
+        muestra = sensores.sample(n, random_state=0, replace=True)
+        return [
+            json.dumps({**r, "valvula": "OFF", "dispositivo": f"sensor-{next(ids)}"})
+            for r in muestra.to_dict("records")
+        ]
+
+    pruebas = [(f"{t:g} msg/s", lecturas(int(t * args.segundos)), t) for t in tasas]
+    pruebas.append((f"rafaga x{args.rafaga}", lecturas(args.rafaga), None))
+
+    ingesta_mqtt.api.USAR_CACHE = False
+    ingesta_mqtt.api.cargar_modelo()
+    pronostico = ingesta_mqtt.PronosticoClima(archivo=None)
+    pronostico.fijar(precipitacion=0.0, prob_lluvia=20.0)
+
+    def con_ingesta(broker):
+        return ingesta_mqtt.IngestaMQTT(broker.conectar("ingesta"), pronostico)
+
+    resultados = []
+    with servidor_api(["--sin-cache"]) as puerto:
+        caminos = [
+            ("directo", con_ingesta),
+            (
+                "via HTTP",
+                lambda broker: PuenteHTTP(
+                    broker.conectar("puente"), puerto, pronostico
+                ),
+            ),
+        ]
+        for camino, crear in caminos:
+            broker = BrokerLocal()
+            servicio = crear(broker)
+            servicio.iniciar()
+            medir(broker, lecturas(200))  # calentamiento
+            for nombre, mensajes, tasa in pruebas:
+                resultados.append((camino, nombre, medir(broker, mensajes, tasa)))
+            servicio.detener()
+
+    print(
+        f"\n{'Camino':<10} {'Carga':<13} {'msg/s':>8} {'p50 (ms)':>9} "
+        f"{'p99 (ms)':>9} {'media (ms)':>11}"
+    )
+    print("-" * 65)
+    for camino, nombre, r in resultados:
+        print(
+            f"{camino:<10} {nombre:<13} {r['msg_s']:>8,.0f} {r['p50']:>9.2f} "
+            f"{r['p99']:>9.2f} {r['media']:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
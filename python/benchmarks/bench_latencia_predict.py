@@ -0,0 +1,109 @@
+"""
+Benchmark - Latencia de /predict
+================================
+Mide la latencia p50/p99 de POST /predict en un solo nucleo, comparando
+el handler original (DataFrame de pandas por request + predict y
+predict_proba) con el handler actual de 03_api_flask.py (buffer de NumPy
+preasignado + una sola llamada a predict_proba).
+
+Ambos handlers se llaman con el cliente de pruebas de Flask, asi que la
+medicion incluye el parseo del JSON y la serializacion de la respuesta.
+
+Uso:
+    uv run benchmarks/bench_latencia_predict.py [requests]
+"""
+
+import contextlib
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import pandas as pd
+from flask import jsonify, request
+
+from comun import PYTHON_DIR, percentiles_ms, importar_script, titulo
+
+api = importar_script("03_api_flask")
+
+MODELO_ORIGINAL = None
+
+
+def predict_original():
+    """Copia del handler original de /predict, usada como referencia."""
+    data = request.get_json()
+    features = MODELO_ORIGINAL["features"]
+    modelo = MODELO_ORIGINAL["modelo"]
+
+    X = pd.DataFrame([[float(data[f]) for f in features]], columns=features)
+
+    prediccion = modelo.predict(X)[0]
+    probabilidades = modelo.predict_proba(X)[0]
+
+    return jsonify(
+        {
+            "decision": "REGAR" if prediccion == 1 else "NO_REGAR",
+            "decision_int": int(prediccion),
+            "probabilidad_regar": round(float(probabilidades[1]), 3),
+            "probabilidad_no_regar": round(float(probabilidades[0]), 3),
+            "confianza": round(float(probabilidades[prediccion]) * 100, 1),
+            "inputs": {f: data[f] for f in features},
+        }
+    )
+
+
+def medir(cliente, ruta: str, registros: list) -> list:
+    tiempos = []
+    # El log por prediccion se sigue ejecutando, pero no ensucia la salida
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        for registro in registros:
+            inicio = time.perf_counter()
+            respuesta = cliente.post(ruta, json=registro)
+            tiempos.append(time.perf_counter() - inicio)
+            assert respuesta.status_code == 200, respuesta.get_json()
+    return tiempos
+
+
+def main():
+    global MODELO_ORIGINAL
+
+    n_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+
+    titulo("BENCHMARK - LATENCIA DE /predict (1 nucleo)")
+
+    api.cargar_modelo()
+    MODELO_ORIGINAL = joblib.load(api.MODEL_FILE)
+    api.app.add_url_rule(
+        "/predict_original", view_func=predict_original, methods=["POST"]
+    )
+
+    features = api.MODELO_DATA["features"]
+    df = pd.read_csv(PYTHON_DIR / "dataset" / "datos_historicos_jerusalen.csv")
+    registros = df[features].sample(n_requests, random_state=0, replace=True)
+    registros = registros.to_dict("records")
+
+    cliente = api.app.test_client()
+
+    # Calentamiento
+    medir(cliente, "/predict", registros[:50])
+    medir(cliente, "/predict_original", registros[:50])
+
+    with warnings.catch_warnings(record=True) as capturados:
+        warnings.simplefilter("always")
+        actual = percentiles_ms(medir(cliente, "/predict", registros))
+    print(f"\nWarnings de sklearn en el handler actual: {len(capturados)}")
+    original = percentiles_ms(medir(cliente, "/predict_original", registros))
+
+    print(f"\n{n_requests:,} requests por handler")
+    print(f"\n{'Handler':<12} {'p50 (ms)':>10} {'p99 (ms)':>10} {'media (ms)':>11}")
+    for nombre, r in [("original", original), ("actual", actual)]:
+        print(f"{nombre:<12} {r['p50']:>10.2f} {r['p99']:>10.2f} {r['media']:>11.2f}")
+    print(f"\nAceleracion p50: {original['p50'] / actual['p50']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
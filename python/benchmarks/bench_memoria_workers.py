@@ -0,0 +1,109 @@
+"""
+Benchmark - Memoria por worker
+==============================
+Lanza N procesos que cargan el modelo igual que 03_api_flask.py (como los
+workers de un servidor de produccion), hacen una prediccion y, con todos
+cargados a la vez, leen su memoria de /proc/self/smaps_rollup:
+
+- RSS: paginas residentes del proceso, incluidas las compartidas.
+- PSS: cada pagina compartida se reparte entre los procesos que la usan;
+  la suma de PSS es la memoria real que ocupan los N workers.
+
+Modos comparados:
+    sklearn      joblib.load del RandomForestClassifier (carga original)
+    plano        bosque plano copiado en memoria en cada worker
+    plano+mmap   bosque plano con mmap_mode="r" (carga actual)
+    mmap-numpy   igual, pero evaluando con NumPy en lugar de numba
+
+Solo Linux (usa /proc). Uso:
+    uv run benchmarks/bench_memoria_workers.py [1,4,16]
+"""
+
+import multiprocessing as mp
+import sys
+
+from comun import importar_script, titulo
+
+MODOS = ["sklearn", "plano", "plano+mmap", "mmap-numpy"]
+
+
+def leer_memoria_kb() -> dict:
+    """Rss y Pss del proceso actual, en kB."""
+    memoria = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for linea in f:
+            campo, _, valor = linea.partition(":")
+            if campo in ("Rss", "Pss"):
+                memoria[campo] = int(valor.split()[0])
+    return memoria
+
+
+def _worker(modo: str, barrera, cola):
+    import contextlib
+    import os
+    import warnings
+
+    import bosque_plano
+
+    warnings.simplefilter("ignore")
+    api = importar_script("03_api_flask")
+    api.CARGAR_CON_MMAP = modo in ("plano+mmap", "mmap-numpy")
+    bosque_plano.USAR_NUMBA = modo != "mmap-numpy"
+
+    base = leer_memoria_kb()
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        api.cargar_modelo(usar_bosque_plano=modo != "sklearn")
+
+    # Medir cuando todos los workers ya cargaron el modelo
+    barrera.wait()
+    memoria = leer_memoria_kb()
+    memoria["modelo_rss"] = memoria["Rss"] - base["Rss"]
+    cola.put(memoria)
+    barrera.wait()
+
+
+def medir(modo: str, n_workers: int) -> list:
+    """Lanza n_workers procesos nuevos (spawn) y retorna la memoria de cada uno."""
+    contexto = mp.get_context("spawn")
+    barrera = contexto.Barrier(n_workers)
+    cola = contexto.Queue()
+    procesos = [
+        contexto.Process(target=_worker, args=(modo, barrera, cola))
+        for _ in range(n_workers)
+    ]
+    for p in procesos:
+        p.start()
+    resultados = [cola.get() for _ in procesos]
+    for p in procesos:
+        p.join()
+    return resultados
+
+
+def main():
+    tamanios = [1, 4, 16]
+    if len(sys.argv) > 1:
+        tamanios = [int(n) for n in sys.argv[1].split(",")]
+
+    titulo("BENCHMARK - MEMORIA POR WORKER")
+
+    print(
+        f"\n{'Modo':<12} {'Workers':>7} {'RSS/worker':>11} {'modelo RSS':>11} "
+        f"{'PSS/worker':>11} {'PSS total':>10}"
+    )
+    print("-" * 67)
+    for modo in MODOS:
+        for n in tamanios:
+            resultados = medir(modo, n)
+            rss = sum(r["Rss"] for r in resultados) / n / 1024
+            modelo = sum(r["modelo_rss"] for r in resultados) / n / 1024
+            pss = sum(r["Pss"] for r in resultados) / 1024
+            print(
+                f"{modo:<12} {n:>7} {rss:>8.1f} MB {modelo:>8.2f} MB "
+                f"{pss / n:>8.1f} MB {pss:>7.0f} MB"
+            )
+
+    print("\nmodelo RSS: memoria residente que agrega cargar y calentar el modelo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Benchmark - Costo de la instrumentacion de /predict
+===================================================
+Compara lo que cuesta por request:
+
+- el print "[PREDICCION] ..." que hacia /predict, con stdout a un archivo
+  con buffer de linea (terminal, PYTHONUNBUFFERED) y con buffer de bloque
+- la instrumentacion actual: las marcas de tiempo de cada fase,
+  MetricasAPI.registrar_predict y una linea JSON de log en el 1% de los
+  requests
+
+y la latencia p50/p99 de POST /predict (cliente de pruebas de Flask, sin
+cache, un nucleo) sin instrumentacion, con metricas y log del 1%, y con
+log de todos los requests.
+
+Al final verifica que /metrics cuente todos los requests y muestra sus
+series de fases.
+
+Uso:
+    uv run benchmarks/bench_metricas_api.py [requests]
+"""
+
+import contextlib
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from comun import PYTHON_DIR, percentiles_ms, importar_script, titulo
+
+from metricas_api import MetricasAPI
+
+api = importar_script("03_api_flask")
+
+REPETICIONES = 100_000
+
+
+def archivo_log(directorio: str, nombre: str, buffer_linea: bool):
+    """Archivo de texto donde escribir, con buffer de linea o de bloque."""
+    return open(
+        os.path.join(directorio, nombre), "w", buffering=1 if buffer_linea else -1
+    )
+
+
+def costo_print(destino) -> float:
+    """Microsegundos por print del log anterior de /predict."""
+    resultado = {"decision": "NO_REGAR", "confianza": 97.3}
+    with contextlib.redirect_stdout(destino):
+        inicio = time.perf_counter()
+        for _ in range(REPETICIONES):
+            print(
+                f"[PREDICCION] {resultado['decision']} (confianza: {resultado['confianza']}%)"
+            )
+        return (time.perf_counter() - inicio) / REPETICIONES * 1e6
+
+
+def costo_instrumentacion(log: logging.Logger, fraccion: float) -> float:
+    """Microsegundos por request de marcas + registrar_predict + log muestreado."""
+    metricas = MetricasAPI()
+    azar = random.Random(0)
+    perf = time.perf_counter
+    inicio = perf()
+    for _ in range(REPETICIONES):
+        # Las marcas de cada fase, como en el handler
+        marcas = (perf(), perf(), perf(), perf(), perf(), perf())
+        metricas.registrar_predict(marcas, "NO_REGAR")
+        if azar.random() < fraccion:
+            log.info(
+                json.dumps(
+                    {
+                        "evento": "prediccion",
+                        "decision": "NO_REGAR",
+                        "confianza": 97.3,
+                        "duracion_ms": round((marcas[-1] - marcas[0]) * 1000, 3),
+                        "version_registro": None,
+                    }
+                )
+            )
+    return (perf() - inicio) / REPETICIONES * 1e6
+
+
+def medir(cliente, registros: list) -> list:
+    tiempos = []
+    for registro in registros:
+        inicio = time.perf_counter()
+        respuesta = cliente.post("/predict", json=registro)
+        tiempos.append(time.perf_counter() - inicio)
+        assert respuesta.status_code == 200, respuesta.get_json()
+    return tiempos
+
+
+def main():
+    n_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+
+    titulo("BENCHMARK - COSTO DE LA INSTRUMENTACION DE /predict")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = logging.getLogger("bench.metricas")
+        log.setLevel(logging.INFO)
+        log.propagate = False
+        log.addHandler(logging.StreamHandler(archivo_log(tmp, "log.jsonl", True)))
+
+        print(f"\nCosto por request ({REPETICIONES:,} repeticiones)")
+        print("-" * 60)
+        with archivo_log(tmp, "linea.txt", True) as destino:
+            print(f"{'print, buffer de linea':<40} {costo_print(destino):>8.2f} us")
+        with archivo_log(tmp, "bloque.txt", False) as destino:
+            print(f"{'print, buffer de bloque':<40} {costo_print(destino):>8.2f} us")
+        for fraccion in (0.0, 0.01, 1.0):
+            nombre = f"metricas + log {fraccion:.0%}"
+            costo = costo_instrumentacion(log, fraccion)
+            print(f"{nombre:<40} {costo:>8.2f} us")
+
+        # Latencia de /predict con la API real
+        api.cargar_modelo()
+        api.CACHE = None
+        api.LOG.setLevel(logging.INFO)
+        api.LOG.propagate = False
+        api.LOG.addHandler(logging.StreamHandler(archivo_log(tmp, "api.jsonl", True)))
+
+        df = pd.read_csv(PYTHON_DIR / "dataset" / "datos_historicos_jerusalen.csv")
+        registros = (
+            df[api.MODELO_DATA["features"]]
+            .sample(n_requests, random_state=0)
+            .to_dict("records")
+        )
+        cliente = api.app.test_client()
+        medir(cliente, registros[:200])  # calentamiento
+
+        variantes = {
+            "sin instrumentacion": (None, 0.0),
+            "metricas + log 1%": (MetricasAPI(), 0.01),
+            "metricas + log 100%": (MetricasAPI(), 1.0),
+        }
+        tiempos = {nombre: [] for nombre in variantes}
+        # Rondas alternadas para que las variantes vean la misma maquina
+        for _ in range(3):
+            for nombre, (metricas, fraccion) in variantes.items():
+                api.METRICAS, api.LOG_FRACCION = metricas, fraccion
+                tiempos[nombre] += medir(cliente, registros)
+
+    print(f"\nPOST /predict, {3 * n_requests:,} requests por variante, sin cache")
+    print(f"{'Variante':<24} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    print("-" * 46)
+    for nombre, t in tiempos.items():
+        p = percentiles_ms(t)
+        print(f"{nombre:<24} {p['p50']:>10.3f} {p['p99']:>10.3f}")
+
+    # /metrics de la variante con log del 1%
+    api.METRICAS = variantes["metricas + log 1%"][0]
+    texto = cliente.get("/metrics").get_data(as_text=True)
+    cuentas = {
+        linea.split("{")[1].split('"')[1]: int(linea.split()[-1])
+        for linea in texto.splitlines()
+        if linea.startswith("riego_predict_fase_segundos_count")
+    }
+    assert all(n == 3 * n_requests for n in cuentas.values()), cuentas
+    print(
+        f"\n/metrics: {len(texto.splitlines())} lineas, fases con {3 * n_requests:,} requests"
+    )
+    for linea in texto.splitlines():
+        if linea.startswith("riego_predict_fase_segundos_sum"):
+            fase = linea.split('"')[1]
+            media_us = float(linea.split()[-1]) / cuentas[fase] * 1e6
+            print(f"  {fase:<14} media {media_us:>8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark - Dataset de varios sitios en un pool de procesos
+===========================================================
+Genera con 01_descargar_datos.py --sitios el historico de un ano de los
+sitios de dataset/sitios.csv (repetidos hasta --sitios N, con otro
+site_id) contra un servidor Open-Meteo local, sin cache, con distinto
+numero de procesos, y compara:
+
+- tiempo total y sitios por segundo
+- la suma de cada fase (descarga, proceso, etiquetas, guardado) de todos
+  los sitios: con P procesos el tiempo total baja hasta suma / P
+
+Antes verifica que el dataset de cada sitio no depende del numero de
+procesos (cada sitio tiene su propia semilla).
+
+Con un solo nucleo los procesos no pueden escalar las fases de CPU: el
+numero de nucleos se muestra junto a los resultados.
+
+Uso:
+    uv run benchmarks/bench_multisitio.py [--sitios 12] [--procesos 1,2,4]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from comun import PYTHON_DIR, importar_script, titulo
+
+from almacen_dataset import SITIO_DEFECTO, cargar_parquet
+from bench_descarga import ServidorOpenMeteo
+from sitios import cargar_sitios
+
+descarga = importar_script("01_descargar_datos")
+
+FASES = ["descarga", "proceso", "etiquetas", "guardado"]
+
+
+def lista_sitios(n: int) -> list:
+    """n sitios a partir de dataset/sitios.csv (copias con sufijo _k)."""
+    # El sitio del CSV no se genera con --sitios (ver generar_multisitio)
+    base = [
+        sitio
+        for sitio in cargar_sitios(PYTHON_DIR / "dataset" / "sitios.csv")
+        if sitio["site_id"] != SITIO_DEFECTO
+    ]
+    sitios = []
+    for i in range(n):
+        sitio = dict(base[i % len(base)])
+        if i >= len(base):
+            sitio["site_id"] = f"{sitio['site_id']}_{i // len(base)}"
+        sitios.append(sitio)
+    return sitios
+
+
+def generar(sitios: list, url: str, procesos: int, directorio: Path) -> tuple:
+    """Retorna (segundos, resumen de generar_multisitio)."""
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resumen = descarga.generar_multisitio(
+            sitios,
+            "2024-01-01",
+            "2024-12-31",
+            url=url,
+            usar_cache=False,
+            directorio=directorio,
+            procesos=procesos,
+        )
+    return time.perf_counter() - inicio, resumen
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sitios", type=int, default=12)
+    parser.add_argument("--procesos", default="1,2,4")
+    args = parser.parse_args()
+    variantes = [int(p) for p in args.procesos.split(",")]
+
+    titulo("BENCHMARK - DATASET DE VARIOS SITIOS EN UN POOL DE PROCESOS")
+    sitios = lista_sitios(args.sitios)
+    print(f"\n{len(sitios)} sitios, un ano cada uno, {os.cpu_count()} nucleo(s)")
+
+    servidor = ServidorOpenMeteo()
+    resultados = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            datasets = {}
+            for procesos in variantes:
+                directorio = Path(tmp) / f"procesos_{procesos}"
+                resultados[procesos] = generar(
+                    sitios, servidor.url, procesos, directorio
+                )
+                datasets[procesos] = cargar_parquet(directorio)
+
+            referencia = datasets[variantes[0]]
+            for procesos, df in datasets.items():
+                pd.testing.assert_frame_equal(df, referencia)
+            print(
+                f"Datasets iguales con {', '.join(map(str, variantes))} procesos "
+                f"({len(referencia):,} filas)"
+            )
+    finally:
+        servidor.cerrar()
+
+    print(
+        f"\n{'Procesos':>8} {'total (s)':>10} {'sitios/s':>9} "
+        + " ".join(f"{fase:>10}" for fase in FASES)
+    )
+    print("-" * 73)
+    base = resultados[variantes[0]][0]
+    for procesos, (total, resumen) in resultados.items():
+        suma = resumen[FASES].sum()
+        print(
+            f"{procesos:>8} {total:>10.2f} {len(sitios) / total:>9.2f} "
+            + " ".join(f"{suma[fase]:>10.2f}" for fase in FASES)
+            + f"  ({base / total:.1f}x)"
+        )
+    print("\nFases: segundos sumados de todos los sitios")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Benchmark - Cambio de version del modelo sin reiniciar la API
+=============================================================
+Arma un registro temporal (registro_modelos.py) con dos versiones:
+
+- v0001: el bosque de models/ (modelo_riego_plano.joblib)
+- v0002: el modelo compacto (models/modelo_riego_compacto.joblib, mismo
+  formato), o una copia de v0001 si no se genero con --compacto
+
+y lanza la API con --vigilar-registro, sin cache (cada request recorre el
+modelo). Con varios clientes enviando /predict, cambia ACTUAL a v0002 y
+luego vuelve a v0001, y reporta:
+
+- requests con error (503/500 o conexion cortada) durante los cambios
+- latencia p50/p99/max de toda la corrida y de los 0.5 s despues de cada
+  cambio
+- cuanto tarda la API en servir la version nueva desde que cambia ACTUAL
+- el tiempo hasta responder de un arranque de la API, lo que dejaria de
+  atender un reinicio para cambiar de modelo
+
+Despues corre la API con --sombra v0002: el modelo activo responde y una
+fraccion de los requests se evalua tambien con la candidata, fuera del
+request. Compara la latencia de /predict sin sombra y con sombra, y
+muestra la coincidencia y latencia de la candidata en /model/shadow.
+
+Uso:
+    uv run benchmarks/bench_recarga_modelo.py [--clientes 8] [--segundos 6]
+"""
+
+import argparse
+import http.client
+import json
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from comun import PYTHON_DIR, percentiles_ms, servidor_api, titulo
+
+import registro_modelos
+
+MODELS_DIR = PYTHON_DIR / "models"
+
+COLUMNAS = (
+    f"{'requests':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9} {'errores':>8}"
+)
+
+
+def armar_registro(registro: Path) -> bool:
+    """Publica v0001 y v0002 en el registro; True si v0002 es el compacto."""
+    archivos = [
+        MODELS_DIR / "modelo_riego.json",
+        MODELS_DIR / "modelo_riego_plano.joblib",
+    ]
+    registro_modelos.registrar(archivos, registro)
+
+    compacto = MODELS_DIR / "modelo_riego_compacto.joblib"
+    with tempfile.TemporaryDirectory() as tmp:
+        if compacto.exists():
+            shutil.copy(compacto, Path(tmp) / "modelo_riego_plano.joblib")
+            archivos = [
+                MODELS_DIR / "modelo_riego.json",
+                Path(tmp) / "modelo_riego_plano.joblib",
+            ]
+        registro_modelos.registrar(archivos, registro, activar=False)
+    return compacto.exists()
+
+
+def pedir(conexion, metodo: str, ruta: str, cuerpo: bytes = None):
+    """Un request por una conexion abierta; retorna (status, json)."""
+    cabeceras = {"Content-Type": "application/json"} if cuerpo else {}
+    conexion.request(metodo, ruta, body=cuerpo, headers=cabeceras)
+    respuesta = conexion.getresponse()
+    return respuesta.status, json.loads(respuesta.read())
+
+
+def cliente(puerto: int, cuerpos: list, fin: float, registros: list):
+    """Envia /predict hasta `fin`; guarda (inicio, latencia, ok) por request."""
+    conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=10)
+    i = 0
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        try:
+            status, _ = pedir(conexion, "POST", "/predict", cuerpos[i % len(cuerpos)])
+            ok = status == 200
+        except (OSError, http.client.HTTPException):
+            conexion.close()
+            ok = False
+        registros.append((inicio, time.perf_counter() - inicio, ok))
+        i += 1
+    conexion.close()
+
+
+def carga(puerto: int, cuerpos: list, n_clientes: int, segundos: float) -> tuple:
+    """Lanza n_clientes durante `segundos`; retorna (hilos, registros)."""
+    registros = []
+    fin = time.perf_counter() + segundos
+    hilos = [
+        threading.Thread(
+            target=cliente, args=(puerto, cuerpos[k::n_clientes], fin, registros)
+        )
+        for k in range(n_clientes)
+    ]
+    for h in hilos:
+        h.start()
+    return hilos, registros
+
+
+def correr(puerto: int, cuerpos: list, n_clientes: int, segundos: float) -> list:
+    """Como carga, pero espera a que terminen los clientes."""
+    hilos, registros = carga(puerto, cuerpos, n_clientes, segundos)
+    for h in hilos:
+        h.join()
+    return registros
+
+
+def esperar_version(puerto: int, version: str, desde: float) -> float:
+    """Segundos desde `desde` hasta que /model/info reporta la version."""
+    conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=10)
+    while True:
+        _, info = pedir(conexion, "GET", "/model/info")
+        if info.get("version_registro") == version:
+            conexion.close()
+            return time.perf_counter() - desde
+        time.sleep(0.01)
+
+
+def resumen(registros: list) -> str:
+    """Fila de la tabla (ver COLUMNAS) para un conjunto de requests."""
+    if not registros:
+        return f"{0:>8} {'-':>9} {'-':>9} {'-':>9} {0:>8}"
+    tiempos = [latencia for _, latencia, ok in registros if ok]
+    errores = sum(1 for *_, ok in registros if not ok)
+    p = percentiles_ms(tiempos) if tiempos else {"p50": 0.0, "p99": 0.0}
+    maximo = max(tiempos) * 1000 if tiempos else 0.0
+    return (
+        f"{len(registros):>8,} {p['p50']:>9.2f} {p['p99']:>9.2f} "
+        f"{maximo:>9.2f} {errores:>8}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clientes", type=int, default=8)
+    parser.add_argument("--segundos", type=float, default=6.0)
+    args = parser.parse_args()
+
+    titulo("BENCHMARK - CAMBIO DE VERSION DEL MODELO SIN REINICIAR")
+
+    df = pd.read_csv(PYTHON_DIR / "dataset" / "datos_historicos_jerusalen.csv")
+    features = json.loads((MODELS_DIR / "modelo_riego.json").read_text())["features"]
+    muestra = df[features].sample(5000, random_state=0)
+    cuerpos = [json.dumps(r).encode() for r in muestra.to_dict("records")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        registro = Path(tmp) / "registro"
+        es_compacto = armar_registro(registro)
+        print(
+            f"\nRegistro: v0001 bosque completo, v0002 "
+            f"{'modelo compacto' if es_compacto else 'copia de v0001'}"
+        )
+        base = ["--sin-cache", "--registro", str(registro)]
+
+        # Arranque de la API: lo que no se atiende si se reinicia
+        inicio = time.perf_counter()
+        with servidor_api(base):
+            arranque = time.perf_counter() - inicio
+
+        registro_modelos.activar_version("v0001", registro)
+        opciones = base + ["--vigilar-registro", "--intervalo-recarga", "0.2"]
+        with servidor_api(opciones) as puerto:
+            correr(puerto, cuerpos, 1, 1.0)  # calentamiento
+
+            hilos, registros = carga(puerto, cuerpos, args.clientes, args.segundos)
+            t0 = time.perf_counter()
+            cambios = []
+            for instante, version in [(1 / 3, "v0002"), (2 / 3, "v0001")]:
+                time.sleep(
+                    max(0.0, t0 + instante * args.segundos - time.perf_counter())
+                )
+                cambio = time.perf_counter()
+                registro_modelos.activar_version(version, registro)
+                cambios.append(
+                    (version, cambio, esperar_version(puerto, version, cambio))
+                )
+            for h in hilos:
+                h.join()
+
+        print(
+            f"\n{args.clientes} clientes, {args.segundos:.0f} s, ACTUAL cambia 2 veces"
+        )
+        print(f"\n{'Ventana':<24} {COLUMNAS}")
+        print("-" * 72)
+        print(f"{'toda la corrida':<24} {resumen(registros)}")
+        for version, cambio, _ in cambios:
+            ventana = [r for r in registros if cambio <= r[0] < cambio + 0.5]
+            print(f"{'0.5 s tras -> ' + version:<24} {resumen(ventana)}")
+
+        print()
+        for version, _, demora in cambios:
+            print(f"ACTUAL -> {version}: servida en {demora:.2f} s")
+        print(f"Arranque de la API (reinicio): {arranque:.2f} s sin atender")
+
+        # Modo sombra
+        print(f"\n{'Sombra':<24} {COLUMNAS}")
+        print("-" * 72)
+        for nombre, extra in [
+            ("sin sombra", []),
+            ("sombra 5%", ["--sombra", "v0002"]),
+            ("sombra 100%", ["--sombra", "v0002", "--sombra-fraccion", "1.0"]),
+        ]:
+            with servidor_api(base + extra) as puerto:
+                correr(puerto, cuerpos, 1, 1.0)
+                registros = correr(puerto, cuerpos, args.clientes, args.segundos / 2)
+                print(f"{nombre:<24} {resumen(registros)}")
+                if extra:
+                    time.sleep(0.5)  # que la sombra termine lo encolado
+                    conexion = http.client.HTTPConnection("127.0.0.1", puerto)
+                    _, sombra = pedir(conexion, "GET", "/model/shadow")
+                    conexion.close()
+
+        print(
+            f"\n/model/shadow (100%): {sombra['muestras']:,} muestras, "
+            f"{sombra['descartadas']:,} descartadas, "
+            f"coincidencia {sombra['coincidencia']:.2%}, "
+            f"|dp| media {sombra['dif_prob_media']:.4f}"
+        )
+        print(
+            f"Latencia por fila: activo p50 "
+            f"{sombra['latencia_principal_p50_us']:.1f} us, "
+            f"candidata p50 {sombra['latencia_candidato_p50_us']:.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
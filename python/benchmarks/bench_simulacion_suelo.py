@@ -0,0 +1,148 @@
+"""
+Benchmark - Simulacion de humedad del suelo
+===========================================
+Compara el bucle original de simular_humedad_suelo (iloc fila a fila y
+np.random.normal por muestra) con la version vectorizada de
+01_descargar_datos.py sobre 10+ anios de datos horarios sinteticos, y
+verifica que ambas producen la misma serie bit a bit con la misma semilla.
+
+Uso:
+    uv run benchmarks/bench_simulacion_suelo.py [anios]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from comun import cronometrar, importar_script, titulo
+
+descarga = importar_script("01_descargar_datos")
+
+
+def simular_humedad_suelo_original(df: pd.DataFrame) -> pd.Series:
+    """Copia del bucle original, usada como referencia."""
+    n = len(df)
+    humedad = np.zeros(n)
+
+    CAPACIDAD_CAMPO = 70.0
+    PUNTO_MARCHITEZ = 12.0
+    HUMEDAD_INICIAL = 40.0
+    TASA_INFILTRACION = 6.0
+    TASA_DRENAJE = 0.8
+
+    humedad[0] = HUMEDAD_INICIAL
+
+    for i in range(1, n):
+        h_anterior = humedad[i - 1]
+        precip = df["precipitacion"].iloc[i]
+        temp = df["temperatura"].iloc[i]
+        hum_amb = df["humedad_ambiente"].iloc[i]
+        hora = df["hora"].iloc[i]
+        mes = df["mes"].iloc[i]
+
+        ganancia = precip * TASA_INFILTRACION
+
+        es_dia = 6 <= hora <= 18
+        factor_solar = 2.0 if es_dia else 0.4
+        factor_temp = max(0, (temp - 8) / 15)
+        factor_humedad = max(0.2, (100 - hum_amb) / 80)
+
+        es_estacion_seca = mes in [6, 7, 8, 9]
+        factor_estacional = 1.8 if es_estacion_seca else 1.0
+
+        perdida_eto = (
+            0.6 * factor_solar * factor_temp * factor_humedad * factor_estacional
+        )
+
+        if h_anterior > CAPACIDAD_CAMPO:
+            perdida_drenaje = TASA_DRENAJE
+        else:
+            perdida_drenaje = 0
+
+        perdida_plantas = 0.15
+
+        h_nueva = (
+            h_anterior + ganancia - perdida_eto - perdida_drenaje - perdida_plantas
+        )
+        h_nueva = max(PUNTO_MARCHITEZ * 0.6, min(CAPACIDAD_CAMPO * 1.1, h_nueva))
+
+        ruido = np.random.normal(0, 2.5)
+        h_nueva = max(8, min(80, h_nueva + ruido))
+
+        humedad[i] = h_nueva
+
+    return pd.Series(humedad, index=df.index)
+
+
+def generar_clima_sintetico(anios: int, semilla: int = 0) -> pd.DataFrame:
+    """Genera datos horarios con un ciclo diario y lluvias esporadicas."""
+    rng = np.random.default_rng(semilla)
+    timestamps = pd.date_range("2010-01-01", periods=anios * 365 * 24, freq="h")
+    n = len(timestamps)
+    hora = timestamps.hour.to_numpy()
+
+    temperatura = np.round(
+        14 + 6 * np.sin((hora - 9) / 24 * 2 * np.pi) + rng.normal(0, 2, n), 1
+    )
+    humedad_ambiente = np.clip(
+        np.round(80 - 2 * (temperatura - 14) + rng.normal(0, 8, n)), 20, 100
+    )
+    lluvia = rng.random(n) < 0.12
+    precipitacion = np.where(lluvia, np.round(rng.exponential(1.0, n), 1), 0.0)
+
+    return pd.DataFrame(
+        {
+            "timestamp": timestamps,
+            "temperatura": temperatura,
+            "humedad_ambiente": humedad_ambiente.astype(int),
+            "precipitacion": precipitacion,
+            "hora": hora,
+            "mes": timestamps.month.to_numpy(),
+        }
+    )
+
+
+def main():
+    anios = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+
+    titulo("BENCHMARK - SIMULACION DE HUMEDAD DEL SUELO")
+    df = generar_clima_sintetico(anios)
+    print(f"\nDatos sinteticos: {anios} anios, {len(df):,} registros horarios")
+
+    # Equivalencia bit a bit con la misma semilla
+    np.random.seed(42)
+    inicio = time.perf_counter()
+    referencia = simular_humedad_suelo_original(df).to_numpy()
+    t_original = time.perf_counter() - inicio
+
+    kernel_compilado = descarga._integrar_balance_hidrico_nb
+    kernels = {"Python puro": None}
+    if kernel_compilado is not None:
+        kernels["numba"] = kernel_compilado
+
+    tiempos = {}
+    for nombre, kernel in kernels.items():
+        descarga._integrar_balance_hidrico_nb = kernel
+
+        np.random.seed(42)
+        vectorizada = descarga.simular_humedad_suelo(df).to_numpy()
+        if not np.array_equal(referencia, vectorizada):
+            diferencia = np.abs(referencia - vectorizada).max()
+            raise SystemExit(f"[{nombre}] Las series difieren (max: {diferencia})")
+        print(f"Kernel {nombre}: identica bit a bit (np.random.seed(42))")
+
+        tiempos[nombre] = cronometrar(
+            lambda: descarga.simular_humedad_suelo(df, rng=42)
+        )
+
+    descarga._integrar_balance_hidrico_nb = kernel_compilado
+
+    print(f"\n  Original (iloc por fila):  {t_original:8.3f} s")
+    for nombre, t in tiempos.items():
+        print(f"  Vectorizada ({nombre + '):':13s}{t:8.3f} s  ({t_original / t:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark - /predict/stream vs /predict
+=======================================
+Compara cuantos mensajes por segundo procesa la API con:
+
+- POST /predict abriendo una conexion nueva por mensaje (como el nodo
+  "http request" de nodered/flujo_riego.json)
+- POST /predict reutilizando la conexion (keep-alive)
+- POST /predict/stream: una sola conexion; un hilo envia lecturas NDJSON
+  en chunks mientras se leen las decisiones, que llegan en orden
+
+Para el stream tambien se mide la latencia de cada mensaje (desde que se
+envia su linea hasta que llega su decision). Como las lineas se envian tan
+rapido como se puede, esa latencia incluye la espera en la cola del
+servidor: es la de un stream saturado.
+
+Uso:
+    uv run benchmarks/bench_stream.py [--mensajes 5000] [--produccion]
+"""
+
+import argparse
+import http.client
+import json
+import socket
+import threading
+import time
+
+import pandas as pd
+
+from comun import PYTHON_DIR, percentiles_ms, servidor_api, titulo
+
+
+def por_request(puerto: int, cuerpos: list, keep_alive: bool) -> float:
+    """Envia cada mensaje con POST /predict; retorna el tiempo total."""
+    cabeceras = {"Content-Type": "application/json"}
+    conexion = http.client.HTTPConnection("127.0.0.1", puerto)
+    inicio = time.perf_counter()
+    for cuerpo in cuerpos:
+        if not keep_alive:
+            conexion = http.client.HTTPConnection("127.0.0.1", puerto)
+        conexion.request("POST", "/predict", body=cuerpo, headers=cabeceras)
+        respuesta = conexion.getresponse()
+        respuesta.read()
+        assert respuesta.status == 200
+        if not keep_alive:
+            conexion.close()
+    total = time.perf_counter() - inicio
+    conexion.close()
+    return total
+
+
+def por_stream(puerto: int, cuerpos: list) -> tuple:
+    """
+    Envia todos los mensajes por /predict/stream y lee las decisiones en
+    paralelo sobre el mismo socket.
+
+    Returns:
+        (tiempo total, latencias por mensaje)
+    """
+    sock = socket.create_connection(("127.0.0.1", puerto))
+    sock.sendall(
+        b"POST /predict/stream HTTP/1.1\r\n"
+        b"Host: 127.0.0.1\r\n"
+        b"Content-Type: application/x-ndjson\r\n"
+        b"Transfer-Encoding: chunked\r\n\r\n"
+    )
+    enviado = [0.0] * len(cuerpos)
+
+    def escribir():
+        for i, cuerpo in enumerate(cuerpos):
+            linea = cuerpo + b"\n"
+            enviado[i] = time.perf_counter()
+            sock.sendall(b"%x\r\n%s\r\n" % (len(linea), linea))
+        sock.sendall(b"0\r\n\r\n")
+
+    inicio = time.perf_counter()
+    escritor = threading.Thread(target=escribir)
+    escritor.start()
+
+    # Respuesta chunked: cabeceras y luego chunks con lineas NDJSON
+    lector = sock.makefile("rb")
+    estado = lector.readline()
+    assert b" 200 " in estado, estado
+    while lector.readline() not in (b"\r\n", b""):
+        pass
+
+    latencias = []
+    pendiente = b""
+    while True:
+        tamanio = int(lector.readline().strip(), 16)
+        if tamanio == 0:
+            break
+        pendiente += lector.read(tamanio)
+        lector.readline()
+        *lineas, pendiente = pendiente.split(b"\n")
+        ahora = time.perf_counter()
+        for linea in lineas:
+            resultado = json.loads(linea)
+            assert "decision" in resultado, resultado
+            latencias.append(ahora - enviado[resultado["index"]])
+
+    total = time.perf_counter() - inicio
+    escritor.join()
+    sock.close()
+    assert len(latencias) == len(cuerpos)
+    return total, latencias
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mensajes", type=int, default=5000)
+    parser.add_argument(
+        "--produccion",
+        action="store_true",
+        help="Servir con gunicorn en lugar del servidor de desarrollo",
+    )
+    args = parser.parse_args()
+
+    titulo("BENCHMARK - /predict/stream VS /predict")
+
+    df = pd.read_csv(PYTHON_DIR / "dataset" / "datos_historicos_jerusalen.csv")
+    features = json.loads((PYTHON_DIR / "models" / "modelo_riego.json").read_text())[
+        "features"
+    ]
+    muestra = df[features].sample(args.mensajes, random_state=0, replace=True)
+    cuerpos = [json.dumps(r).encode() for r in muestra.to_dict("records")]
+
+    argumentos = ["--sin-cache"]
+    if args.produccion:
+        argumentos += ["--produccion", "--workers", "1", "--hilos", "4"]
+
+    with servidor_api(argumentos) as puerto:
+        por_request(puerto, cuerpos[:200], keep_alive=True)  # calentamiento
+        por_stream(puerto, cuerpos[:200])
+
+        sin_keep_alive = por_request(puerto, cuerpos, keep_alive=False)
+        con_keep_alive = por_request(puerto, cuerpos, keep_alive=True)
+        stream, latencias = por_stream(puerto, cuerpos)
+
+    n = len(cuerpos)
+    servidor = "gunicorn 1x4" if args.produccion else "desarrollo"
+    print(f"\n{n:,} mensajes, servidor de {servidor}, sin cache")
+    print(f"\n{'Endpoint':<32} {'msg/s':>9} {'vs /predict':>12}")
+    print("-" * 55)
+    for nombre, total in [
+        ("/predict (conexion nueva)", sin_keep_alive),
+        ("/predict (keep-alive)", con_keep_alive),
+        ("/predict/stream", stream),
+    ]:
+        print(f"{nombre:<32} {n / total:>9,.0f} {sin_keep_alive / total:>11.1f}x")
+
+    r = percentiles_ms(latencias)
+    print(
+        f"\nLatencia por mensaje en el stream: p50 {r['p50']:.1f} ms, "
+        f"p99 {r['p99']:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
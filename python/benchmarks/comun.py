@@ -0,0 +1,111 @@
+"""
+Utilidades comunes para los benchmarks
+======================================
+Sistema IoT de Riego Inteligente para Pastizales
+
+Los scripts del proyecto empiezan con un numero (01_, 02_, 03_), asi que
+no se pueden importar con `import`; aqui se cargan con importlib.
+"""
+
+import contextlib
+import http.client
+import importlib
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PYTHON_DIR = Path(__file__).resolve().parent.parent
+
+if str(PYTHON_DIR) not in sys.path:
+    sys.path.insert(0, str(PYTHON_DIR))
+
+
+def importar_script(nombre: str):
+    """Importa un script del proyecto por nombre (ej. '01_descargar_datos')."""
+    return importlib.import_module(nombre)
+
+
+def cronometrar(funcion, repeticiones: int = 3) -> float:
+    """Retorna el mejor tiempo (segundos) de varias ejecuciones de funcion()."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def percentiles_ms(tiempos_s) -> dict:
+    """Resume una lista de latencias (segundos) en milisegundos."""
+    t = np.asarray(tiempos_s) * 1000
+    return {
+        "p50": float(np.percentile(t, 50)),
+        "p99": float(np.percentile(t, 99)),
+        "media": float(t.mean()),
+    }
+
+
+def titulo(texto: str):
+    """Imprime un encabezado con el mismo formato que los scripts."""
+    print("\n" + "=" * 60)
+    print(texto)
+    print("=" * 60)
+
+
+def puerto_libre() -> int:
+    """Un puerto TCP libre en localhost."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def servidor_api(argumentos: list = (), limite_s: float = 120.0):
+    """
+    Lanza 03_api_flask.py en un puerto libre, espera a que /health responda
+    200 y entrega el puerto. Al salir termina el servidor y sus workers.
+    """
+    puerto = puerto_libre()
+    proceso = subprocess.Popen(
+        [
+            sys.executable,
+            str(PYTHON_DIR / "03_api_flask.py"),
+            "--host",
+            "127.0.0.1",
+            "--puerto",
+            str(puerto),
+            *argumentos,
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        # Grupo propio: el reloader de Flask y gunicorn lanzan procesos hijos
+        start_new_session=True,
+    )
+    try:
+        inicio = time.perf_counter()
+        while True:
+            try:
+                conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=2)
+                conexion.request("GET", "/health")
+                if conexion.getresponse().status == 200:
+                    break
+            except OSError:
+                pass
+            if time.perf_counter() - inicio > limite_s:
+                raise TimeoutError("El servidor no respondio a tiempo")
+            time.sleep(0.2)
+
+        yield puerto
+    finally:
+        os.killpg(proceso.pid, signal.SIGTERM)
+        try:
+            proceso.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            os.killpg(proceso.pid, signal.SIGKILL)
+            proceso.wait()
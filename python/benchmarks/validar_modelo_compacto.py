@@ -0,0 +1,172 @@
+"""
+Validacion - Modelo compacto en Python y en C
+=============================================
+Compara, sobre datos_historicos_jerusalen.csv:
+
+- el modelo compacto de models/modelo_riego_compacto.joblib evaluado con
+  BosquePlano (como la API con --compacto)
+- el mismo modelo compilado desde wokwi/modelo_riego.h (como el ESP32),
+  con el compilador de C del sistema
+- el bosque completo de models/modelo_riego_plano.joblib
+
+y muestra en cuantas filas difieren las decisiones, la diferencia de
+probabilidad entre Python y C, el acuerdo con las etiquetas de las reglas
+de riego y el costo por prediccion de cada uno (el de C es en este
+equipo, no en el ESP32).
+
+Requiere el modelo generado con:
+    uv run 02_entrenar_modelo.py --compacto
+
+Uso:
+    uv run benchmarks/validar_modelo_compacto.py
+"""
+
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from comun import PYTHON_DIR, titulo
+
+from bosque_plano import BosquePlano, medir_latencia_us
+
+MODELS_DIR = PYTHON_DIR / "models"
+HEADER = PYTHON_DIR.parent / "wokwi" / "modelo_riego.h"
+
+# Lee filas float32 de un archivo, escribe P(regar) (float32) y la
+# decision (uint8) de cada una e imprime los nanosegundos por fila de
+# modelo_riego_prob
+PROGRAMA_C = r"""
+#define _POSIX_C_SOURCE 199309L
+#include <stdio.h>
+#include <stdlib.h>
+#include <time.h>
+#include "modelo_riego.h"
+
+int main(int argc, char** argv) {
+  if (argc != 4) return 2;
+  long n = atol(argv[1]);
+  float* x = malloc(sizeof(float) * n * MODELO_RIEGO_N_FEATURES);
+  float* prob = malloc(sizeof(float) * n);
+  unsigned char* regar = malloc(n);
+  FILE* f = fopen(argv[2], "rb");
+  if (fread(x, sizeof(float) * MODELO_RIEGO_N_FEATURES, n, f) != (size_t)n) return 1;
+  fclose(f);
+
+  struct timespec t0, t1;
+  clock_gettime(CLOCK_MONOTONIC, &t0);
+  for (long i = 0; i < n; i++) {
+    prob[i] = modelo_riego_prob(&x[i * MODELO_RIEGO_N_FEATURES]);
+  }
+  clock_gettime(CLOCK_MONOTONIC, &t1);
+  for (long i = 0; i < n; i++) {
+    regar[i] = modelo_riego_regar(&x[i * MODELO_RIEGO_N_FEATURES]);
+  }
+
+  f = fopen(argv[3], "wb");
+  fwrite(prob, sizeof(float), n, f);
+  fwrite(regar, 1, n, f);
+  fclose(f);
+  printf("%.2f\n", ((t1.tv_sec - t0.tv_sec) * 1e9 + (t1.tv_nsec - t0.tv_nsec)) / n);
+  return 0;
+}
+"""
+
+
+def evaluar_en_c(X: np.ndarray, directorio: Path) -> tuple:
+    """Compila el encabezado y evalua X; retorna (prob, decision, ns por fila)."""
+    compilador = shutil.which("cc") or shutil.which("gcc")
+    fuente = directorio / "validar.c"
+    fuente.write_text(PROGRAMA_C)
+    ejecutable = directorio / "validar"
+    subprocess.run(
+        [compilador, "-O2", "-std=c99", "-Wall", "-Wextra", f"-I{HEADER.parent}"]
+        + [str(fuente), "-o", str(ejecutable)],
+        check=True,
+    )
+
+    entrada, salida = directorio / "x.bin", directorio / "salida.bin"
+    X.astype(np.float32).tofile(entrada)
+    resultado = subprocess.run(
+        [str(ejecutable), str(len(X)), str(entrada), str(salida)],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    datos = salida.read_bytes()
+    prob = np.frombuffer(datos[: 4 * len(X)], dtype=np.float32)
+    decision = np.frombuffer(datos[4 * len(X) :], dtype=np.uint8)
+    return prob, decision, float(resultado.stdout)
+
+
+def main():
+    titulo("VALIDACION - MODELO COMPACTO EN PYTHON Y EN C")
+
+    archivo = MODELS_DIR / "modelo_riego_compacto.joblib"
+    if not archivo.exists() or not HEADER.exists():
+        print(f"\nNo existe {archivo} o {HEADER}")
+        print("Ejecuta: uv run 02_entrenar_modelo.py --compacto")
+        return
+    if not (shutil.which("cc") or shutil.which("gcc")):
+        print("\nNo hay un compilador de C (cc/gcc) para probar el encabezado")
+        return
+
+    compacto_data = joblib.load(archivo)
+    plano = joblib.load(MODELS_DIR / "modelo_riego_plano.joblib")
+    features = compacto_data["features"]
+    compacto = BosquePlano(compacto_data["bosque"])
+    bosque = BosquePlano(plano["bosque"])
+
+    df = pd.read_csv(PYTHON_DIR / "dataset" / "datos_historicos_jerusalen.csv")
+    X = df[features].to_numpy(dtype=np.float32)
+    etiquetas = df["regar"].to_numpy()
+    print(f"\nModelo compacto: {compacto_data['algoritmo']}")
+    print(f"Filas del historico: {len(X):,}")
+
+    decision_bosque = bosque.predict(X)
+    prob_python = compacto.predict_proba(X)[:, 1]
+    decision_python = compacto.predict(X)
+    with tempfile.TemporaryDirectory() as tmp:
+        prob_c, decision_c, ns_c = evaluar_en_c(X, Path(tmp))
+
+    difiere = decision_c != decision_python
+    print(
+        f"\nC vs BosquePlano: {difiere.sum()} decisiones distintas, "
+        f"|dp| max {np.abs(prob_c - prob_python).max():.2e}"
+    )
+
+    print(
+        f"\n{'Evaluador':<24} {'vs bosque':>10} {'vs reglas':>10} {'costo/pred.':>14}"
+    )
+    print("-" * 61)
+    for nombre, decision, costo in [
+        (
+            "bosque completo",
+            decision_bosque,
+            f"{medir_latencia_us(bosque, X):.1f} us",
+        ),
+        (
+            "compacto (BosquePlano)",
+            decision_python,
+            f"{medir_latencia_us(compacto, X):.1f} us",
+        ),
+        ("compacto (C)", decision_c, f"{ns_c:.1f} ns"),
+    ]:
+        print(
+            f"{nombre:<24} {(decision == decision_bosque).mean():>10.3%} "
+            f"{(decision == etiquetas).mean():>10.3%} {costo:>14}"
+        )
+
+    inicio = time.perf_counter()
+    compacto.predict_proba(X)
+    lote = (time.perf_counter() - inicio) / len(X) * 1e9
+    print(f"\nBosquePlano compacto por lote: {lote:.1f} ns por fila")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Validacion - Tabla de decision (modo LUT)
+=========================================
+Compara la tabla de decision de models/modelo_riego_lut.joblib con el
+bosque exacto sobre datos_historicos_jerusalen.csv:
+
+- porcentaje de filas en que la decision de la tabla difiere del bosque,
+  con el punto mas cercano de la grilla y con interpolacion
+- diferencia de probabilidad (media y maxima)
+- acuerdo de cada evaluador con las etiquetas de las reglas de riego
+- latencia de una prediccion de una fila
+
+Requiere la tabla generada con:
+    uv run 02_entrenar_modelo.py --solo-exportar --lut
+
+Uso:
+    uv run benchmarks/validar_tabla_decision.py
+"""
+
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from comun import PYTHON_DIR, percentiles_ms, titulo
+
+import bosque_plano
+from bosque_plano import BosquePlano
+from tabla_decision import TablaDecision
+
+MODELS_DIR = PYTHON_DIR / "models"
+
+
+def latencia_una_fila(modelo, X: np.ndarray, n: int = 2000) -> dict:
+    tiempos = []
+    for i in range(n):
+        fila = X[i % len(X)][np.newaxis, :]
+        inicio = time.perf_counter()
+        modelo.predict_proba(fila)
+        tiempos.append(time.perf_counter() - inicio)
+    return percentiles_ms(tiempos)
+
+
+def main():
+    titulo("VALIDACION - TABLA DE DECISION VS BOSQUE")
+
+    archivo_lut = MODELS_DIR / "modelo_riego_lut.joblib"
+    if not archivo_lut.exists():
+        print(f"\nNo existe {archivo_lut}")
+        print("Ejecuta: uv run 02_entrenar_modelo.py --solo-exportar --lut")
+        return
+
+    lut = joblib.load(archivo_lut)
+    plano = joblib.load(MODELS_DIR / "modelo_riego_plano.joblib")
+    features = plano["features"]
+
+    bosque = BosquePlano(plano["bosque"])
+    evaluadores = {
+        "lut": TablaDecision(lut["tabla"]),
+        "lut interpolada": TablaDecision(lut["tabla"], interpolar=True),
+    }
+
+    df = pd.read_csv(PYTHON_DIR / "dataset" / "datos_historicos_jerusalen.csv")
+    X = df[features].to_numpy(dtype=np.float64)
+    etiquetas = df["regar"].to_numpy()
+
+    forma = lut["tabla"]["prob"].shape
+    print(f"\nGrilla: {forma} = {lut['tabla']['prob'].size:,} celdas")
+    print(f"Tamanio en memoria: {lut['tabla']['prob'].nbytes / 1e6:.1f} MB")
+    print(f"Filas del historico: {len(X):,}")
+
+    prob_exacta = bosque.predict_proba(X)[:, 1]
+    decision_exacta = bosque.predict(X)
+
+    print(
+        f"\n{'Evaluador':<17} {'difiere':>9} {'filas':>6} "
+        f"{'|dp| media':>11} {'|dp| max':>9} {'vs reglas':>10}"
+    )
+    print("-" * 67)
+    print(
+        f"{'bosque exacto':<17} {'-':>9} {'-':>6} {'-':>11} {'-':>9} "
+        f"{(decision_exacta == etiquetas).mean():>10.3%}"
+    )
+    for nombre, evaluador in evaluadores.items():
+        prob = evaluador.predict_proba(X)[:, 1]
+        decision = evaluador.predict(X)
+        difiere = decision != decision_exacta
+        dp = np.abs(prob - prob_exacta)
+        print(
+            f"{nombre:<17} {difiere.mean():>9.3%} {difiere.sum():>6} "
+            f"{dp.mean():>11.4f} {dp.max():>9.3f} "
+            f"{(decision == etiquetas).mean():>10.3%}"
+        )
+
+    # Donde difiere la tabla: casos cerca de los limites de la grilla
+    difiere = evaluadores["lut"].predict(X) != decision_exacta
+    if difiere.any():
+        print("\nEjemplos en que la tabla (punto mas cercano) difiere del bosque:")
+        ejemplos = df.loc[difiere, features].head(5).copy()
+        ejemplos["p_bosque"] = prob_exacta[difiere][:5].round(3)
+        print(ejemplos.to_string(index=False))
+
+    print(f"\n{'Latencia 1 fila':<17} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    for nombre, modelo, numba in [
+        ("bosque (numba)", bosque, True),
+        ("bosque (numpy)", bosque, False),
+        *[(nombre, evaluador, False) for nombre, evaluador in evaluadores.items()],
+    ]:
+        bosque_plano.USAR_NUMBA = numba
+        modelo.predict_proba(X[:1])
+        r = latencia_una_fila(modelo, X)
+        print(f"{nombre:<17} {r['p50']:>9.4f} {r['p99']:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
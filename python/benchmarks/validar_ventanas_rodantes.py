@@ -0,0 +1,157 @@
+"""
+Validacion - Ventanas rodantes incrementales vs lote
+====================================================
+Recorre datos_historicos_jerusalen.csv hora por hora con VentanasRodantes
+y compara cada feature de ventana con calcular_ventanas (la que usa
+01_descargar_datos.py) y con las columnas del CSV, que se generaron con
+rolling() de pandas:
+
+- un dispositivo alimentado hora por hora
+- 1,000 dispositivos a la vez, cada uno con el historico desplazado, con
+  lecturas cada 3 segundos: la primera de cada hora con agregar() y las
+  demas con reemplazar_ultima()
+
+Las filas del CSV en que precip_24h cruza el umbral de 5 mm de las
+etiquetas se reportan aparte, junto con cuantas etiquetas cambian.
+
+Tambien mide el costo por actualizacion contra recalcular rolling() sobre
+el historico de un dispositivo cada vez que llega una hora.
+
+Uso:
+    uv run benchmarks/validar_ventanas_rodantes.py [--dispositivos 1000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from comun import PYTHON_DIR, importar_script, titulo
+
+from ventanas_rodantes import VENTANAS, VentanasRodantes, calcular_ventanas
+
+descargar = importar_script("01_descargar_datos")
+
+ORIGENES = sorted({origen for origen, _, _ in VENTANAS.values()})
+
+# Lecturas intermedias por hora en la prueba con varios dispositivos
+# (una de cada 3 s daria 1200; con 3 ya se ejercita reemplazar_ultima)
+LECTURAS_POR_HORA = 3
+
+
+def recorrer_un_dispositivo(df: pd.DataFrame) -> tuple:
+    """Alimenta un dispositivo hora por hora; retorna (valores, s/hora)."""
+    ventanas = VentanasRodantes(capacidad=1)
+    indice = np.array([0])
+    columnas = {o: df[o].to_numpy() for o in ORIGENES}
+    valores = {nombre: np.empty(len(df)) for nombre in VENTANAS}
+
+    inicio = time.perf_counter()
+    for h in range(len(df)):
+        ventanas.agregar(indice, {o: columnas[o][h : h + 1] for o in ORIGENES})
+        for nombre in VENTANAS:
+            valores[nombre][h] = ventanas.valores(nombre, indice)[0]
+    segundos = time.perf_counter() - inicio
+    return valores, segundos / len(df)
+
+
+def recorrer_muchos(df: pd.DataFrame, n: int, horas: int) -> tuple:
+    """
+    n dispositivos, el k-esimo con el historico desde la hora k. Retorna
+    (dispositivos con todas las horas identicas al lote, s por hora y
+    dispositivo).
+    """
+    rng = np.random.default_rng(0)
+    columnas = {o: df[o].to_numpy() for o in ORIGENES}
+    indices = np.arange(n)
+    ventanas = VentanasRodantes(capacidad=n)
+    valores = {nombre: np.empty((n, horas)) for nombre in VENTANAS}
+
+    inicio = time.perf_counter()
+    for h in range(horas):
+        filas = indices + h
+        finales = {o: columnas[o][filas] for o in ORIGENES}
+        # Lecturas con ruido durante la hora; la ultima es el valor horario
+        ruido = {o: v + rng.normal(0, 1, n).round(1) for o, v in finales.items()}
+        ventanas.agregar(indices, ruido)
+        for _ in range(LECTURAS_POR_HORA - 2):
+            ventanas.reemplazar_ultima(indices, ruido)
+        ventanas.reemplazar_ultima(indices, finales)
+        for nombre in VENTANAS:
+            valores[nombre][:, h] = ventanas.valores(nombre, indices)
+    segundos = time.perf_counter() - inicio
+
+    identicos = np.ones(n, dtype=bool)
+    for k in range(n):
+        lote = calcular_ventanas(df.iloc[k : k + horas])
+        for nombre in VENTANAS:
+            identicos[k] &= np.array_equal(lote[nombre], valores[nombre][k])
+    return identicos.sum(), segundos / (horas * n)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dispositivos", type=int, default=1000)
+    parser.add_argument("--horas", type=int, default=500)
+    args = parser.parse_args()
+
+    titulo("VALIDACION - VENTANAS RODANTES INCREMENTALES")
+
+    df = pd.read_csv(PYTHON_DIR / "dataset" / "datos_historicos_jerusalen.csv")
+    print(f"\nHistorico: {len(df):,} horas")
+
+    lote = calcular_ventanas(df)
+    incremental, por_hora = recorrer_un_dispositivo(df)
+
+    print(
+        f"\n{'Feature':<17} {'incremental = lote':>19} "
+        f"{'|dif| vs CSV (rolling)':>23} {'difiere > 5 mm':>15}"
+    )
+    print("-" * 78)
+    for nombre in VENTANAS:
+        iguales = np.array_equal(incremental[nombre], lote[nombre], equal_nan=True)
+        en_csv = nombre in df.columns
+        dif = f"{np.abs(lote[nombre] - df[nombre]).max():.1e}" if en_csv else "-"
+        # El umbral de LLUVIA_RECIENTE_MIN que usan las etiquetas
+        cruza = (
+            ((lote[nombre] > 5) != (df[nombre] > 5)).sum()
+            if nombre == "precip_24h"
+            else "-"
+        )
+        print(f"{nombre:<17} {'si' if iguales else 'NO':>19} {dif:>23} {cruza:>15}")
+
+    # Las filas que cruzan 5 mm valen exactamente 5.0: rolling() da
+    # 5.000000000000001. Efecto sobre las etiquetas de entrenamiento:
+    con_lote = df.assign(precip_24h=lote["precip_24h"])
+    distintas = (descargar.generar_etiquetas(con_lote)["regar"] != df["regar"]).sum()
+    print(f"\nEtiquetas distintas recalculando con calcular_ventanas: {distintas}")
+
+    n, horas = args.dispositivos, min(args.horas, len(df) - args.dispositivos)
+    identicos, por_actualizacion = recorrer_muchos(df, n, horas)
+    print(
+        f"\n{n:,} dispositivos x {horas} horas ({LECTURAS_POR_HORA} lecturas por "
+        f"hora): {identicos:,} de {n:,} identicos al lote"
+    )
+
+    # Alternativa sin estado: recalcular rolling sobre el historico
+    historico = df[ORIGENES].iloc[:720]  # 30 dias de un dispositivo
+    inicio = time.perf_counter()
+    for _ in range(50):
+        historico["precipitacion"].rolling(24, min_periods=1).sum().iloc[-1]
+        historico["precipitacion"].rolling(6, min_periods=1).sum().iloc[-1]
+        historico["temperatura"].rolling(6, min_periods=1).mean().iloc[-1]
+    recalcular = (time.perf_counter() - inicio) / 50
+
+    print(f"\n{'Costo por hora nueva':<45} {'us':>10}")
+    print("-" * 56)
+    print(f"{'Incremental, 1 dispositivo por llamada':<45} {por_hora * 1e6:>10.1f}")
+    print(
+        f"{f'Incremental, {n:,} disp. por llamada (por disp.)':<45} "
+        f"{por_actualizacion * 1e6:>10.3f}"
+    )
+    print(f"{'rolling() sobre 30 dias de historico':<45} {recalcular * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
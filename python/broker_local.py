@@ -0,0 +1,113 @@
+"""
+Broker Local - Sustituto de HiveMQ en el mismo proceso
+======================================================
+Sistema IoT de Riego Inteligente para Pastizales
+UTPL - Maestria en IA Aplicada
+
+Broker MQTT minimo para probar 04_ingesta_mqtt.py sin red ni HiveMQ. Los
+clientes tienen la misma interfaz que el cliente paho de la ingesta
+(suscribir, publicar, cerrar) y, como en paho, cada cliente recibe sus
+mensajes en su propio hilo: quien publica no ejecuta los callbacks de los
+suscriptores.
+
+Soporta los comodines de MQTT en las suscripciones ('+' y '#'). No hay
+QoS, retained ni sesiones: cada mensaje se entrega una vez, en orden, a
+los clientes suscritos en el momento de publicar.
+
+Autor: Luis
+Fecha: Enero 2026
+"""
+
+import queue
+import threading
+
+_CERRAR = object()
+
+
+def topic_coincide(filtro: str, topic: str) -> bool:
+    """
+    Indica si un topic coincide con un filtro de suscripcion MQTT.
+
+    Args:
+        filtro: filtro con comodines opcionales (ej. 'pastizal/+/control')
+        topic: topic de un mensaje publicado
+    """
+    partes_filtro = filtro.split("/")
+    partes_topic = topic.split("/")
+    for i, parte in enumerate(partes_filtro):
+        if parte == "#":
+            return True
+        if i >= len(partes_topic) or parte not in ("+", partes_topic[i]):
+            return False
+    return len(partes_filtro) == len(partes_topic)
+
+
+class BrokerLocal:
+    """Broker en memoria; crea clientes con conectar()."""
+
+    def __init__(self):
+        self._clientes = []
+        self._lock = threading.Lock()
+
+    def conectar(self, nombre: str = "cliente") -> "ClienteLocal":
+        """Crea un cliente conectado a este broker."""
+        cliente = ClienteLocal(self, nombre)
+        with self._lock:
+            self._clientes.append(cliente)
+        return cliente
+
+    def _publicar(self, topic: str, payload: bytes):
+        with self._lock:
+            clientes = list(self._clientes)
+        for cliente in clientes:
+            cliente._entregar(topic, payload)
+
+    def _desconectar(self, cliente: "ClienteLocal"):
+        with self._lock:
+            if cliente in self._clientes:
+                self._clientes.remove(cliente)
+
+
+class ClienteLocal:
+    """Cliente de BrokerLocal con un hilo de entrega propio."""
+
+    def __init__(self, broker: BrokerLocal, nombre: str):
+        self._broker = broker
+        self._suscripciones = []
+        self._entrantes = queue.SimpleQueue()
+        self._hilo = threading.Thread(
+            target=self._bucle, name=f"mqtt-local-{nombre}", daemon=True
+        )
+        self._hilo.start()
+
+    def suscribir(self, topic: str, callback):
+        """
+        Registra callback(topic, payload) para los mensajes del filtro topic.
+        """
+        self._suscripciones.append((topic, callback))
+
+    def publicar(self, topic: str, payload):
+        """Publica un mensaje (str o bytes) a todos los suscriptores."""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        self._broker._publicar(topic, payload)
+
+    def cerrar(self):
+        """Desconecta el cliente y espera a que termine su hilo de entrega."""
+        self._broker._desconectar(self)
+        self._entrantes.put(_CERRAR)
+        self._hilo.join()
+
+    def _entregar(self, topic: str, payload: bytes):
+        if any(topic_coincide(filtro, topic) for filtro, _ in self._suscripciones):
+            self._entrantes.put((topic, payload))
+
+    def _bucle(self):
+        while True:
+            mensaje = self._entrantes.get()
+            if mensaje is _CERRAR:
+                return
+            topic, payload = mensaje
+            for filtro, callback in self._suscripciones:
+                if topic_coincide(filtro, topic):
+                    callback(topic, payload)
@@ -0,0 +1,333 @@
+"""
+Busqueda de Hiperparametros - Bosques mas chicos y rapidos
+==========================================================
+Sistema IoT de Riego Inteligente para Pastizales
+UTPL - Maestria en IA Aplicada
+
+Busca combinaciones de n_estimators, max_depth, min_samples_leaf y
+max_features (ESPACIO_BUSQUEDA) para el Random Forest de
+02_entrenar_modelo.py, con el resto de RF_PARAMS fijo.
+
+Halving sucesivo: en la primera ronda todos los candidatos se evaluan con
+pocas filas de entrenamiento por fold; en cada ronda siguiente quedan los
+mejores (1/FACTOR de ellos) y las filas se multiplican por FACTOR hasta
+usar todo el fold. Como un bosque mas chico con casi la misma accuracy
+nos sirve mas que 0.1% extra, ademas de los mejores pasan tambien los que
+estan en el frente de Pareto de accuracy contra numero de nodos.
+
+- los folds, las filas de cada ronda y los arrays (float32, como los usa
+  el bosque) se preparan una sola vez y se guardan en .npy; cada proceso
+  del pool los abre con mmap en lugar de recibir copias
+- cada ajuste (candidato, fold) es una tarea del pool de procesos, con
+  n_jobs=1 por bosque
+
+Los finalistas se entrenan con todo el conjunto de entrenamiento y se
+mide lo que importa en la API: accuracy en test, latencia de una
+prediccion con BosquePlano y tamano del bosque plano exportado.
+
+Autor: Luis
+Fecha: Enero 2026
+"""
+
+import itertools
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import StratifiedKFold
+
+from bosque_plano import BosquePlano, exportar_bosque, medir_latencia_us
+
+ESPACIO_BUSQUEDA = {
+    "n_estimators": [10, 25, 50, 100],
+    "max_depth": [4, 6, 8, 10, None],
+    "min_samples_leaf": [1, 2, 5, 10],
+    "max_features": ["sqrt", 0.5, 1.0],
+}
+
+# Candidatos que pasan de ronda (1/FACTOR) y crecimiento de las filas
+FACTOR = 3
+
+# Filas de entrenamiento por fold en la primera ronda
+MIN_FILAS = 1000
+
+PLIEGUES = 3
+
+# Un candidato se considera empatado con el mejor si su accuracy de
+# validacion no esta mas de esto por debajo
+TOLERANCIA_ACCURACY = 0.001
+
+# Estado de cada proceso del pool (ver _iniciar_proceso)
+_CACHE = {}
+
+
+def candidatos(espacio: dict = None) -> list:
+    """Todas las combinaciones del espacio, como lista de dicts."""
+    espacio = espacio or ESPACIO_BUSQUEDA
+    nombres = list(espacio)
+    return [dict(zip(nombres, v)) for v in itertools.product(*espacio.values())]
+
+
+def preparar_cache(X, y, directorio: Path, pliegues: int, semilla: int) -> list:
+    """
+    Guarda X, y y los indices de cada fold en `directorio`.
+
+    Los indices de entrenamiento de cada fold se guardan permutados: las
+    primeras n filas son una muestra aleatoria del fold de tamano n.
+
+    Returns:
+        filas de entrenamiento de cada fold
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    y = np.asarray(y)
+    np.save(directorio / "X.npy", X)
+    np.save(directorio / "y.npy", y)
+
+    rng = np.random.default_rng(semilla)
+    cv = StratifiedKFold(n_splits=pliegues, shuffle=True, random_state=semilla)
+    tamanos = []
+    for k, (entrenamiento, validacion) in enumerate(cv.split(X, y)):
+        np.save(directorio / f"entrenamiento_{k}.npy", rng.permutation(entrenamiento))
+        np.save(directorio / f"validacion_{k}.npy", validacion)
+        tamanos.append(len(entrenamiento))
+    return tamanos
+
+
+def _iniciar_proceso(directorio: str, base: dict):
+    directorio = Path(directorio)
+    _CACHE["base"] = base
+    _CACHE["X"] = np.load(directorio / "X.npy", mmap_mode="r")
+    _CACHE["y"] = np.load(directorio / "y.npy", mmap_mode="r")
+    _CACHE["directorio"] = directorio
+
+
+def _evaluar(tarea: tuple) -> dict:
+    """Ajusta un candidato en un fold con las primeras `filas` filas."""
+    id_candidato, parametros, fold, filas = tarea
+    directorio = _CACHE["directorio"]
+    entrenamiento = np.load(directorio / f"entrenamiento_{fold}.npy")[:filas]
+    validacion = np.load(directorio / f"validacion_{fold}.npy")
+    X, y = _CACHE["X"], _CACHE["y"]
+
+    entrenamiento = np.sort(entrenamiento)  # orden original: lectura secuencial
+    modelo = RandomForestClassifier(**{**_CACHE["base"], **parametros, "n_jobs": 1})
+    inicio = time.perf_counter()
+    modelo.fit(X[entrenamiento], y[entrenamiento])
+    ajuste = time.perf_counter() - inicio
+
+    y_pred = modelo.predict(X[validacion])
+    return {
+        "candidato": id_candidato,
+        "accuracy": accuracy_score(y[validacion], y_pred),
+        "f1": f1_score(y[validacion], y_pred),
+        "nodos": sum(e.tree_.node_count for e in modelo.estimators_),
+        "ajuste_s": ajuste,
+    }
+
+
+def frente_pareto(df: pd.DataFrame, maximizar: list, minimizar: list) -> np.ndarray:
+    """True para las filas que ninguna otra supera en todos los objetivos."""
+    valores = np.column_stack(
+        [df[c].to_numpy(dtype=float) for c in maximizar]
+        + [-df[c].to_numpy(dtype=float) for c in minimizar]
+    )
+    en_frente = np.ones(len(df), dtype=bool)
+    for i in range(len(df)):
+        domina = np.all(valores >= valores[i], axis=1) & np.any(
+            valores > valores[i], axis=1
+        )
+        en_frente[i] = not domina.any()
+    return en_frente
+
+
+def halving(
+    X,
+    y,
+    base: dict,
+    espacio: dict = None,
+    factor: int = FACTOR,
+    min_filas: int = MIN_FILAS,
+    pliegues: int = PLIEGUES,
+    n_procesos: int = None,
+) -> tuple:
+    """
+    Halving sucesivo con validacion cruzada en un pool de procesos.
+
+    Args:
+        X, y: conjunto de entrenamiento
+        base: parametros fijos del bosque (ej. RF_PARAMS)
+        espacio: valores de cada hiperparametro (defecto: ESPACIO_BUSQUEDA)
+        factor: 1/factor de los candidatos pasan; las filas se multiplican
+            por factor en cada ronda
+        min_filas: filas de entrenamiento por fold en la primera ronda
+        pliegues: folds de la validacion cruzada
+        n_procesos: procesos del pool (defecto: un proceso por nucleo)
+
+    Returns:
+        (finalistas, rondas): lista de dicts con "parametros", "cv_accuracy"
+        y "cv_f1" de los que llegaron a la ultima ronda, y DataFrame con la
+        media por candidato de cada ronda
+    """
+    lista = candidatos(espacio)
+    n_procesos = n_procesos or os.cpu_count()
+    rondas = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tamanos = preparar_cache(X, y, Path(tmp), pliegues, base["random_state"])
+        filas_fold = min(tamanos)
+        vivos = list(range(len(lista)))
+        filas = min(min_filas, filas_fold)
+
+        with ProcessPoolExecutor(
+            n_procesos, initializer=_iniciar_proceso, initargs=(tmp, base)
+        ) as pool:
+            for ronda in itertools.count():
+                tareas = [
+                    (i, lista[i], fold, filas)
+                    for i in vivos
+                    for fold in range(pliegues)
+                ]
+                inicio = time.perf_counter()
+                resultados = pd.DataFrame(pool.map(_evaluar, tareas, chunksize=4))
+                media = resultados.groupby("candidato").mean().reset_index()
+                media["ronda"] = ronda
+                media["filas"] = filas
+                rondas.append(media)
+                print(
+                    f"  Ronda {ronda}: {len(vivos):>3} candidatos x {pliegues} folds, "
+                    f"{filas:,} filas por fold ({time.perf_counter() - inicio:.1f} s)"
+                )
+
+                if filas >= filas_fold or len(vivos) <= factor:
+                    break
+
+                # Pasan los mejores y los del frente accuracy vs nodos
+                n_pasan = math.ceil(len(vivos) / factor)
+                mejores = media.nlargest(n_pasan, "accuracy")["candidato"]
+                frente = media["candidato"][
+                    frente_pareto(media, ["accuracy"], ["nodos"])
+                ]
+                vivos = sorted(set(mejores) | set(frente))
+                filas = min(filas * factor, filas_fold)
+
+    finalistas = [
+        {
+            "parametros": lista[fila.candidato],
+            "cv_accuracy": fila.accuracy,
+            "cv_f1": fila.f1,
+        }
+        for fila in rondas[-1].itertuples()
+    ]
+    return finalistas, pd.concat(rondas, ignore_index=True)
+
+
+def evaluar_finalistas(
+    finalistas: list, base: dict, X_train, y_train, X_test, y_test
+) -> pd.DataFrame:
+    """
+    Entrena cada finalista con todo X_train y mide test, latencia y tamano.
+
+    La latencia es la mediana de predict_proba de BosquePlano con una fila
+    (como /predict) y el tamano la suma de los arrays del bosque plano.
+
+    Args:
+        finalistas: dicts con "parametros" y metricas de validacion (ver
+            halving); las metricas pasan al resultado
+    """
+    X_train = np.ascontiguousarray(X_train, dtype=np.float32)
+    X_test = np.ascontiguousarray(X_test, dtype=np.float32)
+    filas = []
+    for finalista in finalistas:
+        parametros = finalista["parametros"]
+        modelo = RandomForestClassifier(**{**base, **parametros}).fit(X_train, y_train)
+        arrays = exportar_bosque(modelo)
+        bosque = BosquePlano(arrays)
+
+        y_pred = bosque.predict(X_test)
+
+        filas.append(
+            {
+                **parametros,
+                **{k: v for k, v in finalista.items() if k != "parametros"},
+                "test_accuracy": accuracy_score(y_test, y_pred),
+                "test_f1": f1_score(y_test, y_pred),
+                "latencia_us": medir_latencia_us(bosque, X_test),
+                "tamano_kb": sum(
+                    a.nbytes for a in arrays.values() if isinstance(a, np.ndarray)
+                )
+                / 1024,
+                "nodos": len(arrays["feature"]),
+            }
+        )
+    reporte = pd.DataFrame(filas)
+    # Sin inferir tipos: max_depth=None no debe volverse NaN
+    for k in ESPACIO_BUSQUEDA:
+        reporte[k] = pd.Series([f["parametros"][k] for f in finalistas], dtype=object)
+    return reporte
+
+
+def buscar(X_train, y_train, X_test, y_test, base: dict, **opciones) -> pd.DataFrame:
+    """
+    Halving sucesivo y evaluacion de los finalistas; ver halving().
+
+    Los parametros de `base` (la configuracion actual) se evaluan siempre
+    como referencia, en la fila con actual=True.
+
+    Returns:
+        DataFrame con un finalista por fila: hiperparametros, cv_accuracy,
+        cv_f1, test_accuracy, test_f1, latencia_us, tamano_kb, nodos,
+        actual y pareto (frente de cv_accuracy contra latencia y tamano)
+    """
+    finalistas, _ = halving(X_train, y_train, base, **opciones)
+
+    actual = {k: base.get(k, "sqrt") for k in ESPACIO_BUSQUEDA}
+    if actual not in [f["parametros"] for f in finalistas]:
+        print("  Validando la configuracion actual como referencia...")
+        cv = StratifiedKFold(
+            n_splits=opciones.get("pliegues", PLIEGUES),
+            shuffle=True,
+            random_state=base["random_state"],
+        )
+        X = np.ascontiguousarray(X_train, dtype=np.float32)
+        y = np.asarray(y_train)
+        metricas = []
+        for entrenamiento, validacion in cv.split(X, y):
+            modelo = RandomForestClassifier(**{**base, **actual}).fit(
+                X[entrenamiento], y[entrenamiento]
+            )
+            y_pred = modelo.predict(X[validacion])
+            metricas.append(
+                (accuracy_score(y[validacion], y_pred), f1_score(y[validacion], y_pred))
+            )
+        finalistas.append(
+            {
+                "parametros": actual,
+                "cv_accuracy": np.mean([m[0] for m in metricas]),
+                "cv_f1": np.mean([m[1] for m in metricas]),
+            }
+        )
+
+    reporte = evaluar_finalistas(finalistas, base, X_train, y_train, X_test, y_test)
+    reporte["actual"] = [
+        {k: fila[k] for k in ESPACIO_BUSQUEDA} == actual
+        for fila in reporte.to_dict("records")
+    ]
+    reporte["pareto"] = frente_pareto(
+        reporte, ["cv_accuracy"], ["latencia_us", "tamano_kb"]
+    )
+    return reporte.sort_values("tamano_kb", ignore_index=True)
+
+
+def recomendar(reporte: pd.DataFrame, tolerancia: float = TOLERANCIA_ACCURACY):
+    """El finalista mas chico con cv_accuracy a `tolerancia` de la mejor."""
+    empatados = reporte[
+        reporte["cv_accuracy"] >= reporte["cv_accuracy"].max() - tolerancia
+    ]
+    return empatados.loc[empatados["tamano_kb"].idxmin()]
@@ -0,0 +1,154 @@
+"""
+Cache de Predicciones
+=====================
+Sistema IoT de Riego Inteligente para Pastizales
+UTPL - Maestria en IA Aplicada
+
+Los sensores publican cada 3 segundos y las lecturas casi no cambian entre
+mensajes, asi que la API puede reutilizar la prediccion de una lectura
+anterior. La clave del cache es el vector de features cuantizado con una
+resolucion por feature (ej. 0.5% de humedad, 0.1 grado de temperatura):
+lecturas que caen en la misma celda comparten prediccion.
+
+Politica: LRU con un maximo de entradas y TTL por entrada. El cache se
+vacia al cargar un modelo nuevo; lo que se calculo con el modelo anterior
+y llega despues de vaciarlo no se guarda (ver `generacion`).
+
+Autor: Luis
+Fecha: Enero 2026
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+# Resolucion de cuantizacion por feature (unidades del sensor)
+RESOLUCIONES_DEFECTO = {
+    "humedad_suelo": 0.5,  # %
+    "temperatura": 0.1,  # grados C
+    "humedad_ambiente": 1.0,  # %
+    "precipitacion": 0.1,  # mm
+    "prob_lluvia": 1.0,  # %
+    "hora": 1,
+    "mes": 1,
+}
+
+# Se suma antes de truncar: 0.6 / 0.1 da 5.999..., que caeria en la celda 5
+EPSILON_CELDA = 1e-9
+
+
+class CachePredicciones:
+    """
+    Cache LRU/TTL de predicciones, seguro para varios hilos.
+
+    Args:
+        features: nombres de las features, en el orden del modelo
+        resoluciones: resolucion por feature; las que falten no se cuantizan
+        max_entradas: entradas maximas antes de expulsar la menos usada
+        ttl_s: segundos que una entrada es valida desde que se guardo
+    """
+
+    def __init__(
+        self,
+        features: list,
+        resoluciones: dict = None,
+        max_entradas: int = 10_000,
+        ttl_s: float = 300.0,
+    ):
+        if resoluciones is None:
+            resoluciones = RESOLUCIONES_DEFECTO
+
+        self.features = list(features)
+        self.resoluciones = [resoluciones.get(f) for f in self.features]
+        self.max_entradas = max_entradas
+        self.ttl_s = ttl_s
+
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Aumenta con cada invalidar(); guardar descarta valores calculados
+        # en una generacion anterior
+        self.generacion = 0
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.expiradas = 0
+        self.invalidaciones = 0
+
+    def clave(self, valores) -> tuple:
+        """
+        Cuantiza los valores (en el orden de features) a la celda del cache.
+
+        Cada celda es [k * r, (k + 1) * r): los umbrales de las reglas de
+        riego que son multiplos de r (humedad 20%, lluvia 0.5 mm, ...) caen
+        en el borde entre dos celdas, asi 19.9 y 20.1 no comparten
+        prediccion. Con round() la celda quedaba centrada en el umbral.
+        """
+        return tuple(
+            v if r is None else math.floor(v / r + EPSILON_CELDA)
+            for v, r in zip(valores, self.resoluciones)
+        )
+
+    def obtener(self, clave: tuple):
+        """Retorna el valor guardado para la clave, o None si no esta o expiro."""
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+
+            valor, expira = entrada
+            if ahora >= expira:
+                del self._entradas[clave]
+                self.expiradas += 1
+                self.fallos += 1
+                return None
+
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave: tuple, valor, generacion: int = None):
+        """
+        Guarda el valor y expulsa la entrada menos usada si se llena.
+
+        Args:
+            generacion: self.generacion leida antes de calcular el valor; si
+                el cache se invalido desde entonces, el valor no se guarda
+        """
+        expira = time.monotonic() + self.ttl_s
+        with self._lock:
+            if generacion is not None and generacion != self.generacion:
+                return
+            self._entradas[clave] = (valor, expira)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self.expulsiones += 1
+
+    def invalidar(self):
+        """Vacia el cache (por ejemplo, al cargar otra version del modelo)."""
+        with self._lock:
+            self._entradas.clear()
+            self.invalidaciones += 1
+            self.generacion += 1
+
+    def estadisticas(self) -> dict:
+        """Contadores del cache."""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "max_entradas": self.max_entradas,
+                "ttl_s": self.ttl_s,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+                "expulsiones": self.expulsiones,
+                "expiradas": self.expiradas,
+                "invalidaciones": self.invalidaciones,
+                "resoluciones": dict(zip(self.features, self.resoluciones)),
+            }
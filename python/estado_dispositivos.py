@@ -0,0 +1,284 @@
+"""
+Estado de Dispositivos - Ultimo estado de miles de sensores
+===========================================================
+Sistema IoT de Riego Inteligente para Pastizales
+UTPL - Maestria en IA Aplicada
+
+Node-RED guarda una sola lectura (flow.get('ultimosDatos')) porque hay un
+solo pastizal. Para miles de nodos ESP32 este modulo guarda, por
+dispositivo, la ultima lectura, el pronostico de su sitio, promedios
+moviles y la ultima decision del modelo.
+
+Cada campo es un array de NumPy indexado por dispositivo (struct of
+arrays) en lugar de un dict por dispositivo: un float32 ocupa 4 bytes en
+el array y ~24 bytes mas la entrada del dict como objeto de Python, y
+armar la matriz de features para el modelo es una indexacion vectorizada
+en lugar de un bucle sobre dicts. Las lecturas se guardan en float32, la
+misma precision con la que el bosque compara los umbrales.
+
+Cada lectura o cambio de pronostico marca al dispositivo como pendiente;
+barrer() predice en una sola pasada para todos los pendientes.
+
+Las features de ventana del historico horario (precip_24h,
+temp_promedio_6h, ...) se mantienen en `ventanas`, con los mismos indices
+(ver ventanas_rodantes.py); actualizar_ventanas() les pasa un valor por
+hora de las lecturas y el pronostico guardados.
+
+Autor: Luis
+Fecha: Enero 2026
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+from ventanas_rodantes import VentanasRodantes
+
+# Lecturas que envia cada ESP32 (ver wokwi/sketch.ino)
+CAMPOS_SENSOR = ("humedad_suelo", "temperatura", "humedad_ambiente")
+
+# Pronostico del sitio de cada dispositivo
+CAMPOS_CLIMA = ("precipitacion", "prob_lluvia")
+
+# Peso de cada lectura nueva en los promedios moviles
+ALFA_MEDIA = 0.1
+
+# Decision de un dispositivo que todavia no se ha barrido
+SIN_DECISION = -1
+
+
+class EstadoDispositivos:
+    """
+    Estado por dispositivo en arrays indexados por un entero.
+
+    Los arrays crecen al doble cuando se registra un dispositivo y ya no
+    hay espacio.
+
+    Args:
+        capacidad: dispositivos para los que se reserva espacio al inicio
+    """
+
+    def __init__(self, capacidad: int = 1024):
+        self.n = 0
+        self.ids = []
+        self._indices = {}
+
+        self.campos = {
+            # Ultima lectura y pronostico
+            **{c: np.zeros(capacidad, dtype=np.float32) for c in CAMPOS_SENSOR},
+            **{c: np.zeros(capacidad, dtype=np.float32) for c in CAMPOS_CLIMA},
+            # Promedios moviles exponenciales de las lecturas
+            "humedad_suelo_media": np.zeros(capacidad, dtype=np.float32),
+            "temperatura_media": np.zeros(capacidad, dtype=np.float32),
+            "n_lecturas": np.zeros(capacidad, dtype=np.uint32),
+            "t_lectura": np.zeros(capacidad, dtype=np.float64),
+            # Hora (desde la epoca) de la ultima hora agregada a las ventanas
+            "hora_ventana": np.zeros(capacidad, dtype=np.int64),
+            # Ultima decision del modelo
+            "decision": np.full(capacidad, SIN_DECISION, dtype=np.int8),
+            "confianza": np.zeros(capacidad, dtype=np.float32),
+            "t_decision": np.zeros(capacidad, dtype=np.float64),
+        }
+        self.pendiente = np.zeros(capacidad, dtype=bool)
+        self.ventanas = VentanasRodantes(capacidad)
+
+    @property
+    def capacidad(self) -> int:
+        return len(self.pendiente)
+
+    def indice(self, dispositivo: str) -> int:
+        """Indice de un dispositivo, registrandolo si es nuevo."""
+        i = self._indices.get(dispositivo)
+        if i is None:
+            if self.n == self.capacidad:
+                self._crecer(2 * self.capacidad)
+            i = self._indices[dispositivo] = self.n
+            self.ids.append(dispositivo)
+            self.n += 1
+        return i
+
+    def indices(self, dispositivos) -> np.ndarray:
+        """Indices de varios dispositivos, registrando los nuevos."""
+        return np.fromiter(
+            (self.indice(d) for d in dispositivos),
+            dtype=np.intp,
+            count=len(dispositivos),
+        )
+
+    def registrar_lectura(self, dispositivo: str, lectura: dict, t: float):
+        """
+        Guarda la lectura de un dispositivo y lo marca como pendiente.
+
+        Args:
+            dispositivo: id del dispositivo
+            lectura: dict con CAMPOS_SENSOR
+            t: instante de la lectura (segundos, ej. time.time())
+        """
+        i = self.indice(dispositivo)
+        self.registrar_lecturas(
+            np.array([i]), {c: lectura[c] for c in CAMPOS_SENSOR}, t
+        )
+
+    def registrar_lecturas(self, indices: np.ndarray, lecturas: dict, t):
+        """
+        Guarda lecturas de muchos dispositivos a la vez.
+
+        Si un indice se repite, queda la ultima lectura pero los promedios
+        moviles solo cuentan una.
+
+        Args:
+            indices: indices de los dispositivos (ver indices())
+            lecturas: dict campo -> array con un valor por indice
+            t: instante de las lecturas (escalar o un valor por indice)
+        """
+        c = self.campos
+        nuevos = c["n_lecturas"][indices] == 0
+
+        for campo in CAMPOS_SENSOR:
+            c[campo][indices] = lecturas[campo]
+
+        # La primera lectura inicializa el promedio
+        for campo, media in (
+            ("humedad_suelo", "humedad_suelo_media"),
+            ("temperatura", "temperatura_media"),
+        ):
+            valor = c[campo][indices]
+            anterior = np.where(nuevos, valor, c[media][indices])
+            c[media][indices] = anterior + ALFA_MEDIA * (valor - anterior)
+
+        c["n_lecturas"][indices] += 1
+        c["t_lectura"][indices] = t
+        self.pendiente[indices] = True
+
+    def fijar_clima(self, valores: dict, indices: np.ndarray = None):
+        """
+        Actualiza el pronostico de algunos dispositivos (o de todos) y los
+        marca como pendientes.
+
+        Args:
+            valores: dict con CAMPOS_CLIMA (escalares o un valor por indice)
+            indices: dispositivos del sitio; None para todos
+        """
+        if indices is None:
+            indices = slice(0, self.n)
+        for campo in CAMPOS_CLIMA:
+            self.campos[campo][indices] = valores[campo]
+        self.pendiente[indices] = True
+
+    def actualizar_ventanas(self, indices: np.ndarray, hora: int):
+        """
+        Pasa las ultimas lecturas y pronosticos a las ventanas rodantes.
+
+        La primera actualizacion de una hora agrega una hora nueva; las
+        siguientes de la misma hora la reemplazan, asi la ventana guarda un
+        valor por hora como el historico. Las horas sin lecturas entran
+        como NaN, que no cuentan (igual que un faltante en el historico).
+
+        Args:
+            indices: dispositivos con lecturas nuevas, sin repetir
+            hora: hora en curso, en horas desde la epoca (int(t // 3600))
+        """
+        ventanas = self.ventanas
+        anterior = self.campos["hora_ventana"][indices]
+        nueva = anterior < hora
+
+        # Solo importan las horas vacias que caben en la ventana mas larga
+        huecos = np.where(anterior > 0, hora - anterior - 1, 0)
+        huecos = np.clip(huecos, 0, max(ventanas.largo.values()))
+        for k in range(int(huecos.max(initial=0))):
+            con_hueco = indices[huecos > k]
+            vacio = np.full(len(con_hueco), np.nan)
+            ventanas.agregar(con_hueco, {o: vacio for o in ventanas.largo})
+
+        valores = {o: self.campos[o][indices] for o in ventanas.largo}
+        ventanas.agregar(indices[nueva], {o: v[nueva] for o, v in valores.items()})
+        ventanas.reemplazar_ultima(
+            indices[~nueva], {o: v[~nueva] for o, v in valores.items()}
+        )
+        self.campos["hora_ventana"][indices] = np.maximum(anterior, hora)
+
+    def matriz_features(self, indices: np.ndarray, features: list, ahora: datetime):
+        """
+        Arma la matriz (len(indices), len(features)) para el modelo.
+
+        hora y mes se toman de `ahora`; el resto de los campos guardados o
+        de las ventanas rodantes.
+        """
+        X = np.empty((len(indices), len(features)))
+        for j, feature in enumerate(features):
+            if feature == "hora":
+                X[:, j] = ahora.hour
+            elif feature == "mes":
+                X[:, j] = ahora.month
+            elif feature in self.campos:
+                X[:, j] = self.campos[feature][indices]
+            else:
+                X[:, j] = self.ventanas.valores(feature, indices)
+        return X
+
+    def barrer(self, modelo, features: list, ahora: datetime = None) -> dict:
+        """
+        Predice para todos los dispositivos pendientes en una sola pasada.
+
+        Args:
+            modelo: clasificador con predict_proba y classes_
+            features: features del modelo, en orden
+            ahora: instante de la prediccion (defecto: datetime.now())
+
+        Returns:
+            dict con arrays:
+                indices: dispositivos barridos
+                decision: nueva decision de cada uno
+                cambio: True donde la decision es distinta de la anterior
+        """
+        ahora = ahora or datetime.now()
+        indices = np.flatnonzero(self.pendiente[: self.n])
+        decision = np.empty(0, dtype=np.int8)
+        cambio = np.empty(0, dtype=bool)
+
+        if len(indices):
+            probabilidades = modelo.predict_proba(
+                self.matriz_features(indices, features, ahora)
+            )
+            columnas = probabilidades.argmax(axis=1)
+            decision = modelo.classes_[columnas].astype(np.int8)
+
+            c = self.campos
+            cambio = c["decision"][indices] != decision
+            c["decision"][indices] = decision
+            c["confianza"][indices] = probabilidades[np.arange(len(indices)), columnas]
+            c["t_decision"][indices] = ahora.timestamp()
+            self.pendiente[indices] = False
+
+        return {"indices": indices, "decision": decision, "cambio": cambio}
+
+    def estado(self, dispositivo: str) -> dict:
+        """Estado guardado de un dispositivo, como dict de valores de Python."""
+        i = self._indices[dispositivo]
+        estado = {campo: array[i].item() for campo, array in self.campos.items()}
+        estado["pendiente"] = bool(self.pendiente[i])
+        for nombre in self.ventanas.nombres:
+            estado[nombre] = self.ventanas.valores(nombre, i).item()
+        return estado
+
+    def memoria_bytes(self) -> dict:
+        """Bytes de los arrays y del indice id -> posicion."""
+        import sys
+
+        arrays = sum(a.nbytes for a in self.campos.values()) + self.pendiente.nbytes
+        arrays += self.ventanas.nbytes
+        indice = sys.getsizeof(self._indices) + sys.getsizeof(self.ids)
+        indice += sum(sys.getsizeof(d) for d in self.ids)
+        return {"arrays": arrays, "indice": indice}
+
+    def _crecer(self, capacidad: int):
+        for campo, array in self.campos.items():
+            nuevo = np.zeros(capacidad, dtype=array.dtype)
+            if campo == "decision":
+                nuevo[:] = SIN_DECISION
+            nuevo[: len(array)] = array
+            self.campos[campo] = nuevo
+        pendiente = np.zeros(capacidad, dtype=bool)
+        pendiente[: self.n] = self.pendiente[: self.n]
+        self.pendiente = pendiente
+        self.ventanas.crecer(capacidad)
@@ -0,0 +1,286 @@
+"""
+Metricas de la API - Histogramas y contadores para /metrics
+===========================================================
+Sistema IoT de Riego Inteligente para Pastizales
+UTPL - Maestria en IA Aplicada
+
+Colectores en memoria del proceso para GET /metrics, en el formato de
+texto de Prometheus (sin depender de prometheus_client):
+
+- tiempo de cada fase de /predict: parse del JSON, validacion, armado de
+  las features, inferencia (cache o modelo) y serializacion
+- tiempo total por endpoint y registros por lote de /predict/batch y de
+  cada pasada de /predict/stream
+- predicciones por decision y errores por tipo
+- memoria y CPU del proceso
+
+Registrar un /predict es un append a una cola, sin lock: las marcas de
+tiempo pendientes se pasan a los histogramas (limites fijos) de a
+AGREGAR_CADA requests con NumPy, o antes de exportar. Los lotes y errores,
+mucho menos frecuentes, se registran directamente con una toma del lock.
+
+Cada proceso tiene sus propios contadores: con varios workers de gunicorn,
+/metrics muestra los del worker que atiende.
+
+Autor: Luis
+Fecha: Enero 2026
+"""
+
+import bisect
+import collections
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+# Fases de /predict, en orden
+FASES = ("parse", "validacion", "armado", "inferencia", "serializacion")
+
+# Limites (segundos) de los histogramas de fases: de 5 us a 0.1 s
+LIMITES_FASE_S = (5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 5e-3, 0.025, 0.1)
+
+# Limites (segundos) del tiempo total de un request
+LIMITES_REQUEST_S = (1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 0.01, 0.05, 0.25, 1.0)
+
+# Limites de registros por lote
+LIMITES_LOTE = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+# /predict pendientes que disparan el paso a los histogramas
+AGREGAR_CADA = 1024
+
+_INICIO_PROCESO = time.time()
+
+
+class _Serie:
+    """Cuentas por bucket, suma y total de un histograma (sin lock propio)."""
+
+    __slots__ = ("limites", "cuentas", "suma", "n")
+
+    def __init__(self, limites: tuple):
+        self.limites = limites
+        self.cuentas = [0] * (len(limites) + 1)
+        self.suma = 0.0
+        self.n = 0
+
+    def observar(self, valor: float):
+        self.cuentas[bisect.bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.n += 1
+
+    def observar_varios(self, valores: np.ndarray):
+        indices = np.searchsorted(self.limites, valores, side="left")
+        cuentas = np.bincount(indices, minlength=len(self.cuentas))
+        for i, cuenta in enumerate(cuentas.tolist()):
+            self.cuentas[i] += cuenta
+        self.suma += float(valores.sum())
+        self.n += len(valores)
+
+    def lineas(self, nombre: str, etiquetas: dict) -> list:
+        lineas = []
+        acumulado = 0
+        for limite, cuenta in zip(self.limites + (float("inf"),), self.cuentas):
+            acumulado += cuenta
+            le = "+Inf" if limite == float("inf") else repr(limite)
+            lineas.append(
+                f"{nombre}_bucket{_etiquetas({**etiquetas, 'le': le})} {acumulado}"
+            )
+        lineas.append(f"{nombre}_sum{_etiquetas(etiquetas)} {self.suma!r}")
+        lineas.append(f"{nombre}_count{_etiquetas(etiquetas)} {self.n}")
+        return lineas
+
+
+class MetricasAPI:
+    """
+    Histogramas y contadores de la API, seguros para varios hilos.
+
+    Los endpoints llaman a registrar_predict, registrar_lote o
+    registrar_error al terminar; /metrics llama a exportar.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pendientes = collections.deque()
+        self._fases = {fase: _Serie(LIMITES_FASE_S) for fase in FASES}
+        self._requests = {}
+        self._lotes = {}
+        self._decisiones = Counter()
+        self._errores = Counter()
+
+    def registrar_predict(self, marcas: tuple, decision: str):
+        """
+        Registra un /predict exitoso.
+
+        Args:
+            marcas: time.perf_counter() al empezar y al terminar cada fase
+                de FASES (len(FASES) + 1 valores)
+            decision: "REGAR" o "NO_REGAR"
+        """
+        # deque.append es atomico: no hace falta el lock
+        self._pendientes.append((marcas, decision))
+        if len(self._pendientes) >= AGREGAR_CADA:
+            self._agregar()
+
+    def registrar_lote(self, endpoint: str, resultados: list, duracion_s: float):
+        """Registra un lote de _predecir_lote: tamanio, decisiones y errores."""
+        decisiones = Counter(r.get("decision", "error") for r in resultados)
+        invalidos = decisiones.pop("error", 0)
+        with self._lock:
+            self._serie(self._lotes, endpoint, LIMITES_LOTE).observar(len(resultados))
+            self._serie(self._requests, endpoint, LIMITES_REQUEST_S).observar(
+                duracion_s
+            )
+            for decision, n in decisiones.items():
+                self._decisiones[endpoint, decision] += n
+            if invalidos:
+                self._errores[endpoint, "registro_invalido"] += invalidos
+
+    def registrar_error(self, endpoint: str, tipo: str):
+        """Cuenta un request que termino en error (tipo: causa o excepcion)."""
+        with self._lock:
+            self._errores[endpoint, tipo] += 1
+
+    def exportar(self) -> list:
+        """Lineas de texto de Prometheus con todas las metricas."""
+        self._agregar()
+        with self._lock:
+            lineas = [
+                "# HELP riego_predict_fase_segundos Tiempo de cada fase de /predict",
+                "# TYPE riego_predict_fase_segundos histogram",
+            ]
+            for fase, serie in self._fases.items():
+                lineas += serie.lineas("riego_predict_fase_segundos", {"fase": fase})
+
+            lineas += [
+                "# HELP riego_request_segundos Tiempo total de los requests de prediccion",
+                "# TYPE riego_request_segundos histogram",
+            ]
+            for endpoint, serie in self._requests.items():
+                lineas += serie.lineas("riego_request_segundos", {"endpoint": endpoint})
+
+            lineas += [
+                "# HELP riego_lote_registros Registros por /predict/batch y por pasada de /predict/stream",
+                "# TYPE riego_lote_registros histogram",
+            ]
+            for endpoint, serie in self._lotes.items():
+                lineas += serie.lineas("riego_lote_registros", {"endpoint": endpoint})
+
+            lineas += [
+                "# HELP riego_decisiones_total Predicciones por decision",
+                "# TYPE riego_decisiones_total counter",
+            ]
+            for (endpoint, decision), n in sorted(self._decisiones.items()):
+                etiquetas = {"endpoint": endpoint, "decision": decision}
+                lineas.append(f"riego_decisiones_total{_etiquetas(etiquetas)} {n}")
+
+            lineas += [
+                "# HELP riego_errores_total Requests o registros con error, por tipo",
+                "# TYPE riego_errores_total counter",
+            ]
+            for (endpoint, tipo), n in sorted(self._errores.items()):
+                etiquetas = {"endpoint": endpoint, "tipo": tipo}
+                lineas.append(f"riego_errores_total{_etiquetas(etiquetas)} {n}")
+
+        return lineas
+
+    def _agregar(self):
+        """Pasa los /predict pendientes a los histogramas."""
+        with self._lock:
+            # Solo se saca bajo el lock; lo que llegue mientras queda para
+            # la proxima vez
+            n = len(self._pendientes)
+            if n == 0:
+                return
+            pendientes = [self._pendientes.popleft() for _ in range(n)]
+
+            marcas = np.array([m for m, _ in pendientes], dtype=float)
+            duraciones = np.diff(marcas, axis=1)
+            for i, fase in enumerate(FASES):
+                self._fases[fase].observar_varios(duraciones[:, i])
+            self._serie(self._requests, "predict", LIMITES_REQUEST_S).observar_varios(
+                marcas[:, -1] - marcas[:, 0]
+            )
+            for decision, cuenta in Counter(d for _, d in pendientes).items():
+                self._decisiones["predict", decision] += cuenta
+
+    @staticmethod
+    def _serie(series: dict, clave: str, limites: tuple) -> _Serie:
+        serie = series.get(clave)
+        if serie is None:
+            serie = series[clave] = _Serie(limites)
+        return serie
+
+
+def metrica(nombre: str, ayuda: str, tipo: str, valores: list) -> list:
+    """
+    Lineas de una metrica simple (gauge o counter).
+
+    Args:
+        valores: lista de (etiquetas, valor); etiquetas puede ser {}
+    """
+    lineas = [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}"]
+    for etiquetas, valor in valores:
+        lineas.append(f"{nombre}{_etiquetas(etiquetas)} {valor!r}")
+    return lineas
+
+
+def metricas_proceso() -> list:
+    """Memoria, CPU, hilos e inicio del proceso, con los nombres de Prometheus."""
+    lineas = []
+    try:
+        # Linux: paginas residentes actuales
+        with open("/proc/self/statm") as f:
+            paginas = int(f.read().split()[1])
+        lineas += metrica(
+            "process_resident_memory_bytes",
+            "Memoria residente del proceso",
+            "gauge",
+            [({}, paginas * os.sysconf("SC_PAGE_SIZE"))],
+        )
+    except OSError:
+        pass
+
+    # ru_maxrss esta en KB en Linux y en bytes en macOS
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        maximo *= 1024
+    lineas += metrica(
+        "process_max_resident_memory_bytes",
+        "Pico de memoria residente del proceso",
+        "gauge",
+        [({}, maximo)],
+    )
+    lineas += metrica(
+        "process_cpu_seconds_total",
+        "CPU de usuario y sistema del proceso",
+        "counter",
+        [({}, time.process_time())],
+    )
+    lineas += metrica(
+        "process_threads",
+        "Hilos del proceso",
+        "gauge",
+        [({}, threading.active_count())],
+    )
+    lineas += metrica(
+        "process_start_time_seconds",
+        "Inicio del proceso (epoch)",
+        "gauge",
+        [({}, _INICIO_PROCESO)],
+    )
+    return lineas
+
+
+def _etiquetas(etiquetas: dict) -> str:
+    """{"a": "x"} -> '{a="x"}' con los valores escapados ('' si no hay)."""
+    if not etiquetas:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in etiquetas.items()) + "}"
+
+
+def _escapar(valor) -> str:
+    """Escapa \\, comillas y saltos de linea en el valor de una etiqueta."""
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,305 @@
+"""
+Modelo Compacto - Bosque destilado con presupuesto de bytes o latencia
+======================================================================
+Sistema IoT de Riego Inteligente para Pastizales
+UTPL - Maestria en IA Aplicada
+
+Las etiquetas de entrenamiento salen de 8 reglas con umbrales fijos
+(generar_etiquetas en 01_descargar_datos.py), pero el Random Forest de
+02_entrenar_modelo.py tiene 100 arboles y unos 15 mil nodos. Aqui se
+destila:
+
+- el bosque completo (el "profesor") etiqueta el conjunto de entrenamiento
+- se entrenan alumnos chicos con esas etiquetas (CANDIDATOS_COMPACTOS): un
+  solo arbol de poca profundidad o unos pocos arboles poco profundos
+- se elige el de mejor accuracy de validacion entre los que caben en el
+  presupuesto de bytes (en el ESP32) y de latencia (en la API)
+
+El alumno se exporta con bosque_plano.exportar_bosque, asi que la API lo
+evalua con BosquePlano igual que al bosque completo, y tambien como un
+encabezado C (generar_encabezado_c) que el ESP32 puede evaluar sin red.
+Si el alumno es un solo arbol, reglas() lo escribe como reglas SI/ENTONCES.
+
+Autor: Luis
+Fecha: Enero 2026
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+
+from bosque_plano import BosquePlano, exportar_bosque, medir_latencia_us
+from busqueda_hiperparametros import TOLERANCIA_ACCURACY
+
+# Alumnos posibles, de menor a mayor. Un arbol es un bosque de 1 sin
+# bootstrap y con todas las features en cada division
+CANDIDATOS_COMPACTOS = [
+    {"n_estimators": 1, "bootstrap": False, "max_features": None, "max_depth": d}
+    for d in range(2, 11)
+] + [
+    {"n_estimators": n, "max_features": 1.0, "max_depth": d}
+    for n in (3, 5, 10)
+    for d in (4, 6, 8)
+]
+
+# Bytes por nodo en el encabezado C: feature (int8), umbral (float) e
+# hijos izquierdo y derecho (uint16). Las hojas guardan P(regar) en umbral
+BYTES_NODO_C = 1 + 4 + 2 + 2
+
+# Bytes por arbol en el encabezado C: nodo raiz (uint16)
+BYTES_ARBOL_C = 2
+
+
+def bytes_c(arrays: dict) -> int:
+    """Bytes que ocupa en el encabezado C un bosque exportado."""
+    return len(arrays["feature"]) * BYTES_NODO_C + len(arrays["raices"]) * BYTES_ARBOL_C
+
+
+def describir(parametros: dict) -> str:
+    """Descripcion corta de un candidato (ej. 'arbol, profundidad 5')."""
+    profundidad = parametros.get("max_depth") or "libre"
+    if parametros["n_estimators"] == 1:
+        return f"arbol, profundidad {profundidad}"
+    return f"{parametros['n_estimators']} arboles, profundidad {profundidad}"
+
+
+def destilar(
+    profesor,
+    X_train,
+    y_train,
+    base: dict,
+    presupuesto_bytes: int = None,
+    presupuesto_us: float = None,
+    candidatos: list = None,
+) -> tuple:
+    """
+    Entrena los alumnos con las etiquetas del profesor y elige uno.
+
+    Los candidatos se ajustan con el 80% de X_train y se validan con el 20%
+    restante contra las etiquetas reales. Entre los que cumplen los
+    presupuestos se elige el mas chico a TOLERANCIA_ACCURACY de la mejor
+    accuracy, y se vuelve a entrenar con todo X_train.
+
+    Args:
+        profesor: clasificador ya entrenado (el bosque completo)
+        X_train, y_train: conjunto de entrenamiento del profesor
+        base: parametros fijos del bosque (ej. RF_PARAMS); los del
+            candidato los reemplazan
+        presupuesto_bytes: bytes maximos en el encabezado C (None: sin limite)
+        presupuesto_us: latencia maxima de una prediccion con BosquePlano
+            (None: sin limite)
+        candidatos: alumnos a probar (defecto: CANDIDATOS_COMPACTOS)
+
+    Returns:
+        (alumno, reporte): RandomForestClassifier elegido y DataFrame con un
+        candidato por fila (validacion, bytes, latencia, presupuesto y elegido)
+
+    Raises:
+        ValueError: si ningun candidato cumple los presupuestos
+    """
+    candidatos = candidatos or CANDIDATOS_COMPACTOS
+    X = np.ascontiguousarray(X_train, dtype=np.float32)
+    y = np.asarray(y_train)
+    y_profesor = profesor.predict(X_train)
+
+    ajuste, validacion = train_test_split(
+        np.arange(len(X)), test_size=0.2, random_state=base["random_state"], stratify=y
+    )
+
+    filas = []
+    for parametros in candidatos:
+        alumno = _entrenar_alumno(parametros, base, X[ajuste], y_profesor[ajuste])
+        arrays = exportar_bosque(alumno)
+        y_pred = alumno.predict(X[validacion])
+        filas.append(
+            {
+                "candidato": describir(parametros),
+                "val_accuracy": accuracy_score(y[validacion], y_pred),
+                "val_fidelidad": accuracy_score(y_profesor[validacion], y_pred),
+                "nodos": len(arrays["feature"]),
+                "bytes_c": bytes_c(arrays),
+                "latencia_us": medir_latencia_us(BosquePlano(arrays), X[validacion]),
+            }
+        )
+
+    reporte = pd.DataFrame(filas)
+    cabe = np.ones(len(reporte), dtype=bool)
+    if presupuesto_bytes is not None:
+        cabe &= reporte["bytes_c"] <= presupuesto_bytes
+    if presupuesto_us is not None:
+        cabe &= reporte["latencia_us"] <= presupuesto_us
+    reporte["en_presupuesto"] = cabe
+    if not cabe.any():
+        raise ValueError(
+            f"Ningun candidato cabe en el presupuesto ({presupuesto_bytes} bytes, "
+            f"{presupuesto_us} us); el mas chico ocupa {reporte['bytes_c'].min()} "
+            f"bytes y tarda {reporte['latencia_us'].min():.1f} us"
+        )
+
+    validos = reporte[cabe]
+    empatados = validos[
+        validos["val_accuracy"] >= validos["val_accuracy"].max() - TOLERANCIA_ACCURACY
+    ]
+    elegido = empatados["bytes_c"].idxmin()
+    reporte["elegido"] = reporte.index == elegido
+
+    alumno = _entrenar_alumno(candidatos[elegido], base, X, y_profesor)
+    return alumno, reporte
+
+
+def _entrenar_alumno(parametros: dict, base: dict, X, y) -> RandomForestClassifier:
+    """Bosque con los parametros de base y los del candidato."""
+    return RandomForestClassifier(**{**base, **parametros}).fit(X, y)
+
+
+def reglas(arrays: dict, features: list) -> list:
+    """
+    Escribe un arbol exportado como reglas SI/ENTONCES, una por hoja REGAR.
+
+    Las condiciones de cada camino sobre una misma feature se juntan en un
+    intervalo (a < x <= b). Solo tiene sentido para un bosque de 1 arbol.
+
+    Returns:
+        lista de strings (vacia si ninguna hoja predice REGAR)
+    """
+    if len(arrays["raices"]) != 1:
+        raise ValueError("reglas() requiere un bosque de un solo arbol")
+    indice_regar = list(arrays["clases"]).index(1)
+    resultado = []
+
+    def bajar(nodo: int, limites: dict):
+        if np.isinf(arrays["umbral"][nodo]):
+            prob = arrays["valor"][nodo, indice_regar]
+            if prob > 0.5:
+                condiciones = [
+                    _intervalo(features[f], *limites[f]) for f in sorted(limites)
+                ]
+                resultado.append(
+                    f"SI {' Y '.join(condiciones) or 'siempre'} "
+                    f"ENTONCES REGAR (p={prob:.2f})"
+                )
+            return
+        f = int(arrays["feature"][nodo])
+        umbral = float(arrays["umbral"][nodo])
+        minimo, maximo = limites.get(f, (-np.inf, np.inf))
+        izquierdo, derecho = arrays["hijos"][nodo]
+        bajar(int(izquierdo), {**limites, f: (minimo, min(maximo, umbral))})
+        bajar(int(derecho), {**limites, f: (max(minimo, umbral), maximo)})
+
+    bajar(int(arrays["raices"][0]), {})
+    return resultado
+
+
+def _intervalo(nombre: str, minimo: float, maximo: float) -> str:
+    if np.isinf(minimo):
+        return f"{nombre} <= {maximo:.4g}"
+    if np.isinf(maximo):
+        return f"{nombre} > {minimo:.4g}"
+    return f"{minimo:.4g} < {nombre} <= {maximo:.4g}"
+
+
+def generar_encabezado_c(
+    arrays: dict, features: list, comentario: list = None, prefijo="modelo_riego"
+) -> str:
+    """
+    Genera un encabezado C que evalua el bosque exportado.
+
+    Los arrays quedan como `static const` (en flash en el ESP32) y el
+    recorrido es el mismo que el de BosquePlano: a la derecha si
+    x > umbral, con x y umbral en float.
+
+    Args:
+        arrays: bosque exportado con bosque_plano.exportar_bosque
+        features: nombres de las features, en el orden de x[]
+        comentario: lineas para el comentario inicial (metricas, reglas)
+        prefijo: prefijo de los nombres en C
+
+    Returns:
+        texto del archivo .h, con <prefijo>_prob(x) (P(regar)) y
+        <prefijo>_regar(x) (1 si P(regar) > 0.5)
+    """
+    n_nodos = len(arrays["feature"])
+    if n_nodos > np.iinfo(np.uint16).max:
+        raise ValueError(f"{n_nodos} nodos no entran en indices uint16")
+
+    es_hoja = np.isinf(arrays["umbral"])
+    indice_regar = list(arrays["clases"]).index(1)
+    feature = np.where(es_hoja, -1, arrays["feature"])
+    umbral = np.where(es_hoja, arrays["valor"][:, indice_regar], arrays["umbral"])
+    umbral = umbral.astype(np.float32)
+    hijos = np.where(es_hoja[:, np.newaxis], 0, arrays["hijos"])
+
+    p = prefijo
+    guarda = f"{p.upper()}_H"
+    lineas = ["/*"]
+    lineas += [f" * {linea}".rstrip() for linea in (comentario or [])]
+    lineas += [
+        " *",
+        " * Generado por python/02_entrenar_modelo.py --compacto; no editar a mano.",
+        " */",
+        "",
+        f"#ifndef {guarda}",
+        f"#define {guarda}",
+        "",
+        "#include <stdint.h>",
+        "",
+        f"#define {p.upper()}_N_FEATURES {len(features)}",
+        f"#define {p.upper()}_N_ARBOLES {len(arrays['raices'])}",
+        f"#define {p.upper()}_N_NODOS {n_nodos}",
+        "",
+        "// Posicion de cada feature en x[]",
+    ]
+    lineas += [f"#define {p.upper()}_{f.upper()} {i}" for i, f in enumerate(features)]
+    lineas += [
+        "",
+        "// Feature de cada nodo (-1: hoja)",
+        _array_c("int8_t", f"{p}_feature", [str(v) for v in feature]),
+        "// Umbral de cada nodo: a la derecha si x > umbral. En las hojas, P(regar)",
+        _array_c("float", f"{p}_umbral", [_float_c(v) for v in umbral], 6),
+        _array_c("uint16_t", f"{p}_izquierdo", [str(v) for v in hijos[:, 0]]),
+        _array_c("uint16_t", f"{p}_derecho", [str(v) for v in hijos[:, 1]]),
+        "// Nodo raiz de cada arbol",
+        _array_c("uint16_t", f"{p}_raices", [str(v) for v in arrays["raices"]]),
+        "",
+        "// Probabilidad de regar: promedio de las hojas de todos los arboles",
+        f"static inline float {p}_prob(const float x[{p.upper()}_N_FEATURES]) {{",
+        "  float suma = 0.0f;",
+        f"  for (int a = 0; a < {p.upper()}_N_ARBOLES; a++) {{",
+        f"    uint16_t nodo = {p}_raices[a];",
+        f"    while ({p}_feature[nodo] >= 0) {{",
+        f"      nodo = x[{p}_feature[nodo]] > {p}_umbral[nodo]",
+        f"                 ? {p}_derecho[nodo]",
+        f"                 : {p}_izquierdo[nodo];",
+        "    }",
+        f"    suma += {p}_umbral[nodo];",
+        "  }",
+        f"  return suma / {p.upper()}_N_ARBOLES;",
+        "}",
+        "",
+        "// 1: REGAR, 0: NO_REGAR",
+        f"static inline int {p}_regar(const float x[{p.upper()}_N_FEATURES]) {{",
+        f"  return {p}_prob(x) > 0.5f;",
+        "}",
+        "",
+        f"#endif  // {guarda}",
+        "",
+    ]
+    return "\n".join(lineas)
+
+
+def _float_c(valor) -> str:
+    # 9 cifras significativas reproducen exactamente un float32
+    texto = f"{float(valor):.9g}"
+    if "e" not in texto and "." not in texto:
+        texto += ".0"
+    return texto + "f"
+
+
+def _array_c(tipo: str, nombre: str, valores: list, por_linea: int = 10) -> str:
+    filas = [
+        "  " + ", ".join(valores[i : i + por_linea]) + ","
+        for i in range(0, len(valores), por_linea)
+    ]
+    return "\n".join([f"static const {tipo} {nombre}[] = {{", *filas, "};"])
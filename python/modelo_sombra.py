@@ -0,0 +1,173 @@
+"""
+Modelo Sombra - Comparar un modelo candidato con trafico real
+=============================================================
+Sistema IoT de Riego Inteligente para Pastizales
+UTPL - Maestria en IA Aplicada
+
+Antes de activar una version nueva del registro (registro_modelos.py) se
+puede correr en sombra: la API sigue respondiendo con el modelo activo y
+copia una fraccion de las lecturas de /predict a una cola. Un hilo aparte
+evalua cada lectura con los dos modelos y acumula cuantas decisiones
+coinciden, la diferencia de P(regar) y la latencia de cada uno.
+
+El request solo paga el sorteo y un put_nowait: si la cola esta llena la
+lectura se descarta en lugar de frenar la respuesta.
+
+Autor: Luis
+Fecha: Enero 2026
+"""
+
+import collections
+import queue
+import random
+import threading
+import time
+
+import numpy as np
+
+# Discrepancias recientes que se guardan como ejemplo
+MAX_DISCREPANCIAS = 20
+
+
+class ModeloSombra:
+    """
+    Evalua una muestra de las lecturas con el modelo activo y un candidato.
+
+    Args:
+        principal: modelo que responde (se puede reemplazar en caliente
+            asignando el atributo `principal`)
+        candidato: modelo a comparar, con las mismas features
+        version: version del registro del candidato
+        fraccion: fraccion de las lecturas que se evaluan en sombra
+        cola_max: lecturas pendientes maximas antes de descartar
+    """
+
+    def __init__(
+        self,
+        principal,
+        candidato,
+        version: str,
+        fraccion: float = 0.05,
+        cola_max: int = 1000,
+    ):
+        self.principal = principal
+        self.candidato = candidato
+        self.version = version
+        self.fraccion = fraccion
+
+        self._cola = queue.Queue(maxsize=cola_max)
+        self._azar = random.Random()
+        self._lock = threading.Lock()
+        self._hilo = None
+
+        # Metricas
+        self.muestras = 0
+        self.coincidencias = 0
+        self.descartadas = 0
+        self.errores = 0
+        self.dif_prob_max = 0.0
+        self._dif_prob_total = 0.0
+        self._latencias = {
+            "principal": collections.deque(maxlen=10_000),
+            "candidato": collections.deque(maxlen=10_000),
+        }
+        self._discrepancias = collections.deque(maxlen=MAX_DISCREPANCIAS)
+
+    def muestrear(self, fila) -> bool:
+        """
+        Encola la lectura con probabilidad `fraccion`, sin esperar.
+
+        Args:
+            fila: valores de las features, en el orden del modelo
+
+        Returns:
+            True si la lectura quedo encolada
+        """
+        if self._azar.random() >= self.fraccion:
+            return False
+
+        self._asegurar_hilo()
+        try:
+            self._cola.put_nowait(fila)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.descartadas += 1
+            return False
+
+    def estadisticas(self) -> dict:
+        """Coincidencia de decisiones, diferencia de probabilidad y latencias."""
+        with self._lock:
+            resultado = {
+                "version_candidata": self.version,
+                "fraccion": self.fraccion,
+                "muestras": self.muestras,
+                "pendientes": self._cola.qsize(),
+                "descartadas": self.descartadas,
+                "errores": self.errores,
+                "coincidencia": (
+                    self.coincidencias / self.muestras if self.muestras else None
+                ),
+                "dif_prob_media": (
+                    self._dif_prob_total / self.muestras if self.muestras else None
+                ),
+                "dif_prob_max": self.dif_prob_max,
+                "discrepancias": list(self._discrepancias),
+            }
+            for nombre, latencias in self._latencias.items():
+                us = np.array(latencias) * 1e6
+                if len(us) == 0:
+                    us = np.zeros(1)
+                resultado[f"latencia_{nombre}_p50_us"] = float(np.percentile(us, 50))
+                resultado[f"latencia_{nombre}_p99_us"] = float(np.percentile(us, 99))
+            return resultado
+
+    def _asegurar_hilo(self):
+        # Se crea al primer uso, como en AgrupadorPredicciones: un hilo
+        # creado antes del fork de los workers no existe en los hijos
+        if self._hilo is None or not self._hilo.is_alive():
+            with self._lock:
+                if self._hilo is None or not self._hilo.is_alive():
+                    self._hilo = threading.Thread(
+                        target=self._evaluar, name="modelo-sombra", daemon=True
+                    )
+                    self._hilo.start()
+
+    def _evaluar(self):
+        while True:
+            fila = self._cola.get()
+            X = np.array([fila], dtype=float)
+            principal, candidato = self.principal, self.candidato
+
+            try:
+                inicio = time.perf_counter()
+                p_principal = principal.predict_proba(X)[0]
+                medio = time.perf_counter()
+                p_candidato = candidato.predict_proba(X)[0]
+                fin = time.perf_counter()
+            except Exception:
+                with self._lock:
+                    self.errores += 1
+                continue
+
+            decision_principal = int(principal.classes_[p_principal.argmax()])
+            decision_candidato = int(candidato.classes_[p_candidato.argmax()])
+            dif_prob = abs(float(p_principal[-1]) - float(p_candidato[-1]))
+
+            with self._lock:
+                self.muestras += 1
+                self._latencias["principal"].append(medio - inicio)
+                self._latencias["candidato"].append(fin - medio)
+                self._dif_prob_total += dif_prob
+                self.dif_prob_max = max(self.dif_prob_max, dif_prob)
+                if decision_principal == decision_candidato:
+                    self.coincidencias += 1
+                else:
+                    self._discrepancias.append(
+                        {
+                            "inputs": [float(v) for v in fila],
+                            "principal": decision_principal,
+                            "candidato": decision_candidato,
+                            "dif_prob": round(dif_prob, 4),
+                        }
+                    )
@@ -0,0 +1,120 @@
+"""
+Registro de Modelos - Versiones y puntero ACTUAL
+================================================
+Sistema IoT de Riego Inteligente para Pastizales
+UTPL - Maestria en IA Aplicada
+
+Cada entrenamiento (02_entrenar_modelo.py) copia sus archivos a una
+version nueva del registro, que no se vuelve a modificar:
+
+    models/registro/
+    ├── v0001/                 # modelo_riego.joblib, _plano, .json, ...
+    ├── v0002/
+    └── ACTUAL                 # nombre de la version que sirve la API
+
+- Una version se arma en un directorio temporal y se publica con un
+  rename, asi que nunca se ve a medio copiar.
+- ACTUAL se reemplaza con os.replace: quien lo lee ve la version anterior
+  o la nueva, nunca un archivo vacio. Cambiarlo es el despliegue (o el
+  rollback) de un modelo; la API lo vigila y recarga sin reiniciar (ver
+  03_api_flask.py --vigilar-registro).
+- Los archivos de una version son copias, no enlaces: 02 sobrescribe los
+  de models/ y la API puede tener mapeados (mmap) los de la version.
+
+Autor: Luis
+Fecha: Enero 2026
+"""
+
+import os
+import re
+import shutil
+from pathlib import Path
+
+DIRECTORIO_REGISTRO = Path(__file__).parent / "models" / "registro"
+
+# Archivo con el nombre de la version activa
+ARCHIVO_ACTUAL = "ACTUAL"
+
+_VERSION_VALIDA = re.compile(r"^v(\d{4,})$")
+
+
+def listar_versiones(registro: Path = DIRECTORIO_REGISTRO) -> list:
+    """Versiones publicadas, de la mas antigua a la mas nueva."""
+    if not registro.exists():
+        return []
+    versiones = [d.name for d in registro.iterdir() if _VERSION_VALIDA.match(d.name)]
+    return sorted(versiones, key=lambda v: int(v[1:]))
+
+
+def version_actual(registro: Path = DIRECTORIO_REGISTRO) -> str:
+    """Nombre de la version activa, o None si el registro no tiene ACTUAL."""
+    try:
+        return (registro / ARCHIVO_ACTUAL).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def directorio_version(version: str, registro: Path = DIRECTORIO_REGISTRO) -> Path:
+    """
+    Directorio de una version publicada.
+
+    Raises:
+        FileNotFoundError: si la version no existe
+    """
+    directorio = registro / version
+    if not _VERSION_VALIDA.match(version) or not directorio.is_dir():
+        raise FileNotFoundError(f"No existe la version '{version}' en {registro}")
+    return directorio
+
+
+def registrar(
+    archivos: list, registro: Path = DIRECTORIO_REGISTRO, activar: bool = True
+) -> str:
+    """
+    Copia los archivos de un modelo a una version nueva del registro.
+
+    Args:
+        archivos: rutas a copiar (las que no existen se omiten)
+        registro: directorio del registro
+        activar: apuntar ACTUAL a la version nueva; si no, queda como
+            candidata (p. ej. para el modo sombra de la API)
+
+    Returns:
+        Nombre de la version creada
+    """
+    registro.mkdir(parents=True, exist_ok=True)
+    temporal = registro / f".nueva-{os.getpid()}"
+    shutil.rmtree(temporal, ignore_errors=True)
+    temporal.mkdir()
+    for archivo in map(Path, archivos):
+        if archivo.exists():
+            shutil.copy2(archivo, temporal / archivo.name)
+
+    # Otro entrenamiento puede publicar el mismo numero a la vez: el rename
+    # falla para el segundo, que prueba con el siguiente
+    while True:
+        versiones = listar_versiones(registro)
+        numero = int(versiones[-1][1:]) + 1 if versiones else 1
+        version = f"v{numero:04d}"
+        try:
+            os.rename(temporal, registro / version)
+            break
+        except OSError:
+            if not (registro / version).exists():
+                raise
+
+    if activar:
+        activar_version(version, registro)
+    return version
+
+
+def activar_version(version: str, registro: Path = DIRECTORIO_REGISTRO):
+    """Apunta ACTUAL a una version publicada (despliegue o rollback)."""
+    directorio_version(version, registro)
+
+    temporal = registro / f".{ARCHIVO_ACTUAL}-{os.getpid()}"
+    with open(temporal, "w") as f:
+        f.write(version + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, registro / ARCHIVO_ACTUAL)
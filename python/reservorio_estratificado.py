@@ -0,0 +1,121 @@
+"""
+Reservorio Estratificado - Muestra del historico en memoria acotada
+===================================================================
+Sistema IoT de Riego Inteligente para Pastizales
+UTPL - Maestria en IA Aplicada
+
+Con datos horarios de cientos de pastizales durante anios el historico no
+cabe en memoria. El Random Forest se entrena entonces con una muestra que
+se arma leyendo el historico por bloques:
+
+- cada fila recibe una clave aleatoria uniforme y, por clase, se conservan
+  las `capacidad` filas con las claves mas chicas (bottom-k). Es una
+  muestra uniforme sin reemplazo de la clase, igual a la que se obtendria
+  con todo el historico en memoria, sin importar el orden de los bloques
+- al final cada clase aporta filas en proporcion a las que se vieron de
+  ella (muestra estratificada, como train_test_split(stratify=y))
+- las features se guardan en float32, la precision con la que el bosque
+  compara los umbrales
+
+Si el historico cabe en la capacidad, la muestra es el historico completo
+en su orden original y el modelo es el mismo que sin muestreo.
+
+Autor: Luis
+Fecha: Enero 2026
+"""
+
+import numpy as np
+import pandas as pd
+
+# Bytes por fila en el reservorio ademas de las features: clave aleatoria
+# (float64) y posicion en el historico (int64)
+BYTES_EXTRA_FILA = 16
+
+
+def capacidad_para(memoria_bytes: int, n_features: int, n_clases: int = 2) -> int:
+    """
+    Filas de la muestra que caben en `memoria_bytes`.
+
+    Cada clase puede llegar a tener `capacidad` filas y al agregar un bloque
+    se copia el reservorio de una clase, asi que el pico es de
+    (n_clases + 1) reservorios llenos.
+    """
+    por_fila = 4 * n_features + BYTES_EXTRA_FILA
+    return int(memoria_bytes // ((n_clases + 1) * por_fila))
+
+
+class ReservorioEstratificado:
+    """
+    Muestra estratificada de tamano fijo sobre un historico leido por bloques.
+
+    Args:
+        capacidad: filas de la muestra final (y maximo por clase)
+        features: columnas a conservar, en orden
+        objetivo: columna con la clase
+        semilla: semilla de las claves aleatorias
+    """
+
+    def __init__(self, capacidad: int, features: list, objetivo: str, semilla=0):
+        self.capacidad = capacidad
+        self.features = list(features)
+        self.objetivo = objetivo
+        self.rng = np.random.default_rng(semilla)
+        self.filas_leidas = 0
+        self.vistas = {}  # clase -> filas leidas de esa clase
+        self._clases = {}  # clase -> (clave, posicion, X)
+
+    def agregar(self, bloque: pd.DataFrame):
+        """Procesa un bloque del historico (filas consecutivas)."""
+        y = bloque[self.objetivo].to_numpy()
+        X = bloque[self.features].to_numpy(dtype=np.float32)
+        posicion = np.arange(self.filas_leidas, self.filas_leidas + len(bloque))
+        self.filas_leidas += len(bloque)
+
+        for clase in np.unique(y):
+            filas = y == clase
+            self.vistas[clase] = self.vistas.get(clase, 0) + int(filas.sum())
+            partes = [(self.rng.random(filas.sum()), posicion[filas], X[filas])]
+            if clase in self._clases:
+                partes.insert(0, self._clases[clase])
+            clave, pos, x = (np.concatenate(p) for p in zip(*partes))
+
+            if len(clave) > self.capacidad:
+                quedan = np.argpartition(clave, self.capacidad - 1)[: self.capacidad]
+                clave, pos, x = clave[quedan], pos[quedan], x[quedan]
+            self._clases[clase] = (clave, pos, x)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes de los reservorios de todas las clases."""
+        return sum(a.nbytes for r in self._clases.values() for a in r)
+
+    def muestra(self) -> pd.DataFrame:
+        """
+        Muestra estratificada con hasta `capacidad` filas.
+
+        Returns:
+            DataFrame con features (float32) y objetivo (int64), en el orden
+            del historico
+        """
+        total = min(self.capacidad, self.filas_leidas)
+        clases = sorted(self._clases)
+        # Filas por clase proporcionales a las vistas (al menos 1 si hubo)
+        cuotas = {
+            c: max(1, round(total * self.vistas[c] / self.filas_leidas)) for c in clases
+        }
+
+        posiciones, X, y = [], [], []
+        for c in clases:
+            clave, pos, x = self._clases[c]
+            n = min(cuotas[c], len(clave))
+            # Las n claves mas chicas: una muestra uniforme de la clase
+            primeras = np.argsort(clave, kind="stable")[:n]
+            posiciones.append(pos[primeras])
+            X.append(x[primeras])
+            y.append(np.full(n, c, dtype=np.int64))
+
+        posiciones = np.concatenate(posiciones)
+        orden = np.argsort(posiciones, kind="stable")
+        df = pd.DataFrame(np.concatenate(X)[orden], columns=self.features)
+        df[self.objetivo] = np.concatenate(y)[orden]
+        return df
@@ -0,0 +1,155 @@
+"""
+Sitios - Lista de pastizales para generar el dataset de varios sitios
+=====================================================================
+Sistema IoT de Riego Inteligente para Pastizales
+UTPL - Maestria en IA Aplicada
+
+01_descargar_datos.py --sitios lee de aqui los pastizales a procesar.
+La lista puede ser un CSV, una fila por sitio:
+
+    site_id,nombre,latitud,longitud,timezone,capacidad_campo,punto_marchitez
+    jerusalen,Jerusalen,-2.690425,-78.935117,America/Guayaquil,,
+    giron,Giron,-3.1547,-79.1486,America/Guayaquil,60,10
+
+o un YAML (requiere pyyaml, extra opcional `sitios`):
+
+    sitios:
+      - site_id: jerusalen
+        latitud: -2.690425
+        longitud: -78.935117
+        suelo:
+          capacidad_campo: 60
+
+- site_id, latitud y longitud son obligatorios; site_id es el nombre de
+  la particion del dataset (minusculas, numeros, _ y -)
+- timezone y los parametros de suelo (COLUMNAS_SUELO) son opcionales: los
+  que faltan o quedan vacios toman el valor de 01_descargar_datos.py
+  (TIMEZONE y PARAMETROS_SUELO)
+
+Autor: Luis
+Fecha: Enero 2026
+"""
+
+import csv
+import re
+from pathlib import Path
+
+# Parametros del balance hidrico que se pueden dar por sitio: las claves
+# de PARAMETROS_SUELO (01_descargar_datos.py) en minusculas
+COLUMNAS_SUELO = [
+    "capacidad_campo",
+    "punto_marchitez",
+    "humedad_inicial",
+    "tasa_infiltracion",
+    "tasa_drenaje",
+]
+
+COLUMNAS = ["site_id", "nombre", "latitud", "longitud", "timezone"] + COLUMNAS_SUELO
+
+_SITE_ID_VALIDO = re.compile(r"^[a-z0-9_-]+$")
+
+
+def cargar_sitios(archivo: Path) -> list:
+    """
+    Lee y valida la lista de sitios de un CSV o un YAML.
+
+    Args:
+        archivo: .csv, .yaml o .yml
+
+    Returns:
+        lista de dicts con site_id, nombre, latitud, longitud, timezone
+        (None si no se dio) y suelo (dict con las claves de PARAMETROS_SUELO
+        que se dieron)
+
+    Raises:
+        ValueError: si falta un campo obligatorio, un valor no es valido o
+            hay site_id repetidos
+    """
+    archivo = Path(archivo)
+    if archivo.suffix.lower() in (".yaml", ".yml"):
+        filas = _leer_yaml(archivo)
+    elif archivo.suffix.lower() == ".csv":
+        with open(archivo, newline="") as f:
+            filas = list(csv.DictReader(f))
+    else:
+        raise ValueError(f"{archivo}: formato no soportado (usar .csv o .yaml)")
+
+    sitios = [
+        _validar(fila, f"{archivo.name}, sitio {i + 1}") for i, fila in enumerate(filas)
+    ]
+    if not sitios:
+        raise ValueError(f"{archivo}: la lista de sitios esta vacia")
+
+    vistos = set()
+    for sitio in sitios:
+        if sitio["site_id"] in vistos:
+            raise ValueError(f"{archivo}: site_id repetido: {sitio['site_id']}")
+        vistos.add(sitio["site_id"])
+    return sitios
+
+
+def _leer_yaml(archivo: Path) -> list:
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError(
+            "Leer la lista de sitios en YAML requiere pyyaml: uv sync --extra sitios"
+        ) from None
+
+    with open(archivo) as f:
+        datos = yaml.safe_load(f)
+    if isinstance(datos, dict):
+        datos = datos.get("sitios")
+    if not isinstance(datos, list):
+        raise ValueError(f"{archivo}: se esperaba una lista de sitios")
+
+    # Los parametros de suelo pueden ir anidados en `suelo` o sueltos
+    filas = []
+    for fila in datos:
+        fila = dict(fila)
+        filas.append({**(fila.pop("suelo", None) or {}), **fila})
+    return filas
+
+
+def _validar(fila: dict, donde: str) -> dict:
+    """Normaliza una fila leida del archivo; ver cargar_sitios."""
+    desconocidas = set(fila) - set(COLUMNAS)
+    if desconocidas:
+        raise ValueError(f"{donde}: campos desconocidos {sorted(desconocidas)}")
+
+    def valor(campo):
+        v = fila.get(campo)
+        return None if v is None or str(v).strip() == "" else v
+
+    for campo in ("site_id", "latitud", "longitud"):
+        if valor(campo) is None:
+            raise ValueError(f"{donde}: falta {campo}")
+
+    site_id = str(valor("site_id")).strip()
+    if not _SITE_ID_VALIDO.match(site_id):
+        raise ValueError(
+            f"{donde}: site_id '{site_id}' no valido (minusculas, numeros, _ y -)"
+        )
+
+    def numero(campo, minimo=None, maximo=None):
+        try:
+            v = float(valor(campo))
+        except ValueError:
+            raise ValueError(f"{donde}: {campo} no es un numero: {valor(campo)}")
+        if (minimo is not None and v < minimo) or (maximo is not None and v > maximo):
+            raise ValueError(f"{donde}: {campo}={v} fuera de [{minimo}, {maximo}]")
+        return v
+
+    suelo = {
+        campo.upper(): numero(campo, 0)
+        for campo in COLUMNAS_SUELO
+        if valor(campo) is not None
+    }
+    return {
+        "site_id": site_id,
+        "nombre": str(valor("nombre") or site_id),
+        "latitud": numero("latitud", -90, 90),
+        "longitud": numero("longitud", -180, 180),
+        "timezone": None if valor("timezone") is None else str(valor("timezone")),
+        "suelo": suelo,
+    }
@@ -0,0 +1,193 @@
+"""
+Tabla de Decision - Modelo tabulado en una grilla
+=================================================
+Sistema IoT de Riego Inteligente para Pastizales
+UTPL - Maestria en IA Aplicada
+
+El modelo usa solo 7 features, acotadas (porcentajes, hora 0-23, mes 1-12),
+asi que su superficie de decision se puede tabular: se evalua el bosque en
+todos los puntos de una grilla y se guarda la probabilidad de regar en un
+array de 7 dimensiones (uint8, 0-255).
+
+Para predecir basta ubicar cada feature en su eje de la grilla y leer la
+celda: tiempo constante, sin recorrer arboles. Opcionalmente se interpola
+linealmente entre los puntos vecinos de la grilla.
+
+Autor: Luis
+Fecha: Enero 2026
+"""
+
+import bisect
+import itertools
+
+import numpy as np
+
+# Puntos de la grilla por feature. Con la busqueda del punto mas cercano,
+# el limite entre celdas es el punto medio entre vecinos: los ejes se
+# eligen para que esos limites coincidan con los umbrales de las reglas de
+# riego (humedad 20/40%, lluvia 0.5 mm, probabilidad 50/70%). Temperatura
+# y humedad ambiente casi no influyen en la decision y van en pocos puntos.
+# Fuera de los extremos se usa el borde.
+EJES_DEFECTO = {
+    "humedad_suelo": np.arange(9, 80, 2.0),
+    "temperatura": np.array([2.0, 8.0, 14.0, 20.0]),
+    "humedad_ambiente": np.array([30.0, 60.0, 90.0]),
+    "precipitacion": np.array([0.0, 0.3, 0.7, 1.5]),
+    "prob_lluvia": np.arange(2.5, 72.5, 5.0),
+    "hora": np.arange(0, 24.0),
+    "mes": np.arange(1, 13.0),
+}
+
+# Escala de la probabilidad guardada (uint8)
+ESCALA = 255
+
+
+def construir_tabla(modelo, features: list, ejes: dict = None) -> dict:
+    """
+    Evalua el modelo en todos los puntos de la grilla.
+
+    Args:
+        modelo: clasificador binario con predict_proba (sklearn o BosquePlano)
+        features: nombres de las features, en el orden del modelo
+        ejes: puntos de la grilla por feature (por defecto EJES_DEFECTO)
+
+    Returns:
+        dict con:
+            ejes: lista de arrays float64, uno por feature
+            prob: uint8 (len(eje_1), ..., len(eje_7)) - P(clases[1]) * 255
+            clases: clases del modelo
+    """
+    if ejes is None:
+        ejes = EJES_DEFECTO
+
+    if len(modelo.classes_) != 2:
+        raise ValueError("La tabla de decision solo soporta modelos binarios")
+
+    ejes = [np.asarray(ejes[f], dtype=np.float64) for f in features]
+    forma = tuple(len(e) for e in ejes)
+
+    # Se evalua una rebanada del primer eje a la vez para no armar la grilla
+    # completa (decenas de millones de filas) en memoria
+    resto = np.stack(
+        [m.reshape(-1) for m in np.meshgrid(*ejes[1:], indexing="ij")], axis=1
+    )
+    X = np.empty((len(resto), len(ejes)))
+    X[:, 1:] = resto
+
+    prob = np.empty(forma, dtype=np.uint8)
+    for i, valor in enumerate(ejes[0]):
+        X[:, 0] = valor
+        p = modelo.predict_proba(X)[:, 1]
+        prob[i] = np.rint(p * ESCALA).reshape(forma[1:])
+
+    return {
+        "ejes": ejes,
+        "prob": prob,
+        "clases": np.asarray(modelo.classes_),
+    }
+
+
+class TablaDecision:
+    """
+    Evaluador de una tabla construida con construir_tabla.
+
+    Expone `predict_proba`, `predict` y `classes_` como BosquePlano, para
+    usarlo en su lugar desde la API.
+
+    Args:
+        arrays: dict retornado por construir_tabla
+        interpolar: interpolar linealmente entre puntos de la grilla en lugar
+            de usar el punto mas cercano
+    """
+
+    def __init__(self, arrays: dict, interpolar: bool = False):
+        self.ejes = [np.asarray(e) for e in arrays["ejes"]]
+        self.prob = arrays["prob"]
+        self.classes_ = np.array(arrays["clases"])
+        self.interpolar = interpolar
+        self.n_features_in_ = len(self.ejes)
+
+        # Punto medio entre puntos vecinos: searchsorted sobre ellos da el
+        # indice del punto mas cercano
+        self._medios = [(e[1:] + e[:-1]) / 2 for e in self.ejes]
+        self._medios_listas = [m.tolist() for m in self._medios]
+
+        # Desplazamiento de un paso en cada eje dentro de la tabla aplanada
+        self._prob_plana = self.prob.reshape(-1)
+        self._pasos = np.array(self.prob.strides) // self.prob.itemsize
+        self._pasos_lista = self._pasos.tolist()
+
+        # Esquinas de una celda para interpolar: desplazamiento de cada una
+        # y si en cada eje toma el punto de arriba (1) o el de abajo (0). Un
+        # eje de un solo punto no tiene punto de arriba: esa esquina repite
+        # el de abajo (y pesa cero, ver _interpolar)
+        self._esquinas = np.array(
+            list(itertools.product((0, 1), repeat=len(self.ejes))), dtype=bool
+        )
+        pasos_arriba = np.where(np.array(self.prob.shape) > 1, self._pasos, 0)
+        self._desplazamientos = self._esquinas.astype(np.intp) @ pasos_arriba
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Probabilidad de cada clase leida (o interpolada) de la tabla.
+
+        Args:
+            X: array (filas, n_features)
+
+        Returns:
+            array (filas, 2)
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X debe tener forma (filas, {self.n_features_in_}), recibido {X.shape}"
+            )
+        if not np.isfinite(X).all():
+            raise ValueError("X contiene NaN o infinito")
+
+        if self.interpolar:
+            p = self._interpolar(X)
+        elif len(X) == 1:
+            # Una fila (caso de /predict): bisect en listas evita el costo
+            # fijo de las llamadas de NumPy
+            celda = 0
+            for x, medios, paso in zip(
+                X[0].tolist(), self._medios_listas, self._pasos_lista
+            ):
+                celda += bisect.bisect_left(medios, x) * paso
+            p = np.array([self._prob_plana[celda] / ESCALA])
+        else:
+            celda = np.zeros(len(X), dtype=np.intp)
+            for j, medios in enumerate(self._medios):
+                celda += np.searchsorted(medios, X[:, j]) * self._pasos[j]
+            p = self._prob_plana[celda] / ESCALA
+
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X) -> np.ndarray:
+        """Clase mas probable para cada fila."""
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def _interpolar(self, X: np.ndarray) -> np.ndarray:
+        """Interpolacion multilineal entre las 2^7 esquinas de cada celda."""
+        base = np.zeros(len(X), dtype=np.intp)
+        t = np.zeros(X.shape)
+        for j, eje in enumerate(self.ejes):
+            if len(eje) == 1:
+                continue
+            i = np.clip(
+                np.searchsorted(eje, X[:, j], side="right") - 1, 0, len(eje) - 2
+            )
+            t[:, j] = np.clip((X[:, j] - eje[i]) / (eje[i + 1] - eje[i]), 0.0, 1.0)
+            base += i * self._pasos[j]
+
+        # pesos[fila, esquina]: producto de t o (1 - t) segun la esquina.
+        # En ejes de un solo punto t = 0 y la esquina de arriba pesa cero.
+        pesos = np.where(
+            self._esquinas[np.newaxis, :, :],
+            t[:, np.newaxis, :],
+            1.0 - t[:, np.newaxis, :],
+        ).prod(axis=2)
+        valores = self._prob_plana[base[:, np.newaxis] + self._desplazamientos]
+
+        return (pesos * valores).sum(axis=1) / ESCALA
@@ -0,0 +1,217 @@
+"""
+Ventanas Rodantes - Features de ventana en lote e incrementales
+===============================================================
+Sistema IoT de Riego Inteligente para Pastizales
+UTPL - Maestria en IA Aplicada
+
+Definicion unica de las features de ventana del historico horario:
+
+    precip_24h         suma de precipitacion de las ultimas 24 horas
+    precip_6h          suma de precipitacion de las ultimas 6 horas
+                       (usada por calcular_prob_lluvia_simulada)
+    temp_promedio_6h   temperatura media de las ultimas 6 horas
+
+Hay dos formas de calcularlas con la misma definicion:
+
+- calcular_ventanas(df): todo el historico de una vez (01_descargar_datos.py)
+- VentanasRodantes: por dispositivo, una hora a la vez, en O(1) por
+  actualizacion con anillos y sumas acumuladas (servicio en vivo)
+
+Para que ambas den exactamente los mismos valores, los datos se escalan a
+enteros (centesimas; Open-Meteo y el DHT22 reportan decimas) y las sumas
+se hacen en enteros, que no acumulan error de redondeo sin importar el
+orden en que se suman. La conversion a float es la misma en los dos
+caminos. Como rolling(min_periods=1) de pandas, las primeras horas usan
+las que haya y los valores faltantes (NaN) no cuentan.
+
+Autor: Luis
+Fecha: Enero 2026
+"""
+
+import numpy as np
+
+# nombre -> (columna de origen, horas, operacion)
+VENTANAS = {
+    "precip_24h": ("precipitacion", 24, "suma"),
+    "precip_6h": ("precipitacion", 6, "suma"),
+    "temp_promedio_6h": ("temperatura", 6, "media"),
+}
+
+# Los valores se guardan como enteros en centesimas
+ESCALA = 100
+
+
+def _a_enteros(valores) -> tuple:
+    """Retorna (enteros escalados, 1 donde el valor no es NaN)."""
+    valores = np.asarray(valores, dtype=np.float64)
+    validos = ~np.isnan(valores)
+    enteros = np.rint(np.where(validos, valores, 0.0) * ESCALA).astype(np.int64)
+    return enteros, validos.astype(np.int64)
+
+
+def _a_valor(suma: np.ndarray, n_validos: np.ndarray, operacion: str) -> np.ndarray:
+    """Convierte una suma entera de la ventana al valor de la feature."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if operacion == "suma":
+            valor = suma / ESCALA
+        else:
+            valor = suma / (n_validos * ESCALA)
+    return np.where(n_validos > 0, valor, np.nan)
+
+
+def calcular_ventanas(df, nombres=None) -> dict:
+    """
+    Calcula features de ventana sobre un historico horario ordenado.
+
+    Args:
+        df: DataFrame (o dict de arrays) con las columnas de origen
+        nombres: features a calcular (defecto: todas las de VENTANAS)
+
+    Returns:
+        dict nombre -> array float64 con un valor por fila
+    """
+    resultado = {}
+    for nombre in nombres or VENTANAS:
+        origen, horas, operacion = VENTANAS[nombre]
+        enteros, validos = _a_enteros(df[origen])
+
+        # Suma de la ventana = diferencia de sumas acumuladas
+        fin = np.arange(1, len(enteros) + 1)
+        inicio = np.maximum(fin - horas, 0)
+        acumulado = np.concatenate([[0], np.cumsum(enteros)])
+        acumulado_validos = np.concatenate([[0], np.cumsum(validos)])
+
+        resultado[nombre] = _a_valor(
+            acumulado[fin] - acumulado[inicio],
+            acumulado_validos[fin] - acumulado_validos[inicio],
+            operacion,
+        )
+    return resultado
+
+
+class VentanasRodantes:
+    """
+    Features de ventana por dispositivo, actualizadas hora a hora.
+
+    Cada columna de origen tiene un anillo por dispositivo con las ultimas
+    horas (tantas como la ventana mas larga que la usa). Cada ventana
+    mantiene su suma entera: al agregar una hora se suma el valor nuevo y
+    se resta el que sale de la ventana.
+
+    Los dispositivos se identifican con el mismo indice entero que
+    estado_dispositivos.EstadoDispositivos.
+
+    Args:
+        capacidad: dispositivos para los que se reserva espacio
+    """
+
+    def __init__(self, capacidad: int = 1024):
+        self.nombres = list(VENTANAS)
+        self.largo = {}
+        for origen, horas, _ in VENTANAS.values():
+            self.largo[origen] = max(self.largo.get(origen, 0), horas)
+
+        # Enteros de +-2e9 centesimas bastan para cualquier lectura horaria
+        self.anillo = {
+            o: np.zeros((capacidad, n), dtype=np.int32) for o, n in self.largo.items()
+        }
+        self.valido = {
+            o: np.zeros((capacidad, n), dtype=np.int8) for o, n in self.largo.items()
+        }
+        self.horas = np.zeros(capacidad, dtype=np.int64)
+        self.suma = {nombre: np.zeros(capacidad, dtype=np.int64) for nombre in VENTANAS}
+        self.n_validos = {
+            nombre: np.zeros(capacidad, dtype=np.int64) for nombre in VENTANAS
+        }
+
+    def agregar(self, indices: np.ndarray, valores: dict):
+        """
+        Agrega una hora nueva para cada dispositivo de `indices`.
+
+        Args:
+            indices: indices de dispositivos, sin repetir
+            valores: dict columna de origen -> array con un valor por indice
+        """
+        indices = np.asarray(indices)
+        horas = self.horas[indices]
+
+        for origen, largo in self.largo.items():
+            nuevo, nuevo_valido = _a_enteros(valores[origen])
+            posicion = horas % largo
+
+            for nombre, (o, ventana, _) in VENTANAS.items():
+                if o != origen:
+                    continue
+                # Hora que sale de esta ventana (si ya tiene `ventana` horas)
+                sale = (horas - ventana) % largo
+                lleno = horas >= ventana
+                self.suma[nombre][indices] += nuevo - np.where(
+                    lleno, self.anillo[origen][indices, sale], 0
+                )
+                self.n_validos[nombre][indices] += nuevo_valido - np.where(
+                    lleno, self.valido[origen][indices, sale], 0
+                )
+
+            self.anillo[origen][indices, posicion] = nuevo
+            self.valido[origen][indices, posicion] = nuevo_valido
+
+        self.horas[indices] = horas + 1
+
+    def reemplazar_ultima(self, indices: np.ndarray, valores: dict):
+        """
+        Corrige el valor de la hora en curso (la ultima agregada).
+
+        Sirve para lecturas que llegan varias veces por hora: la primera de
+        la hora se agrega con agregar() y las siguientes la reemplazan.
+        """
+        indices = np.asarray(indices)
+        horas = self.horas[indices]
+        if np.any(horas == 0):
+            raise ValueError("reemplazar_ultima requiere al menos una hora agregada")
+
+        for origen, largo in self.largo.items():
+            nuevo, nuevo_valido = _a_enteros(valores[origen])
+            posicion = (horas - 1) % largo
+            anterior = self.anillo[origen][indices, posicion]
+            anterior_valido = self.valido[origen][indices, posicion]
+
+            for nombre, (o, _, _) in VENTANAS.items():
+                if o == origen:
+                    self.suma[nombre][indices] += nuevo - anterior
+                    self.n_validos[nombre][indices] += nuevo_valido - anterior_valido
+
+            self.anillo[origen][indices, posicion] = nuevo
+            self.valido[origen][indices, posicion] = nuevo_valido
+
+    def valores(self, nombre: str, indices: np.ndarray) -> np.ndarray:
+        """Valor actual de una feature de ventana para varios dispositivos."""
+        operacion = VENTANAS[nombre][2]
+        return _a_valor(
+            self.suma[nombre][indices], self.n_validos[nombre][indices], operacion
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes de todos los arrays."""
+        arrays = [
+            *self.anillo.values(),
+            *self.valido.values(),
+            *self.suma.values(),
+            *self.n_validos.values(),
+            self.horas,
+        ]
+        return sum(a.nbytes for a in arrays)
+
+    def crecer(self, capacidad: int):
+        """Amplia los arrays a `capacidad` dispositivos, conservando los datos."""
+
+        def ampliar(array):
+            nuevo = np.zeros((capacidad, *array.shape[1:]), dtype=array.dtype)
+            nuevo[: len(array)] = array
+            return nuevo
+
+        self.anillo = {o: ampliar(a) for o, a in self.anillo.items()}
+        self.valido = {o: ampliar(a) for o, a in self.valido.items()}
+        self.horas = ampliar(self.horas)
+        self.suma = {n: ampliar(a) for n, a in self.suma.items()}
+        self.n_validos = {n: ampliar(a) for n, a in self.n_validos.items()}
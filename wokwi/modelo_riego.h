@@ -0,0 +1,83 @@
+/*
+ * Modelo de riego compacto: arbol, profundidad 5, destilado del Random Forest
+ * (16,526 nodos) de models/modelo_riego.joblib.
+ *
+ * Test: accuracy 0.9991 (bosque completo 0.9983), F1 0.9959
+ * Coincide con el bosque en 99.91% de las filas de test
+ * 15 nodos, 137 bytes de arrays.
+ *
+ * Uso: float x[MODELO_RIEGO_N_FEATURES] con las features en el orden de
+ * las constantes MODELO_RIEGO_<FEATURE>; modelo_riego_regar(x) retorna 1
+ * para REGAR.
+ *
+ * Reglas (el resto: NO_REGAR):
+ * SI humedad_suelo <= 20.01 ENTONCES REGAR (p=1.00)
+ * SI 20.01 < humedad_suelo <= 20.22 Y hora <= 4.5 ENTONCES REGAR (p=0.81)
+ * SI 20.01 < humedad_suelo <= 40 Y prob_lluvia <= 49.75 Y 4.5 < hora <= 9.5 ENTONCES REGAR (p=1.00)
+ *
+ * Generado por python/02_entrenar_modelo.py --compacto; no editar a mano.
+ */
+
+#ifndef MODELO_RIEGO_H
+#define MODELO_RIEGO_H
+
+#include <stdint.h>
+
+#define MODELO_RIEGO_N_FEATURES 7
+#define MODELO_RIEGO_N_ARBOLES 1
+#define MODELO_RIEGO_N_NODOS 15
+
+// Posicion de cada feature en x[]
+#define MODELO_RIEGO_HUMEDAD_SUELO 0
+#define MODELO_RIEGO_TEMPERATURA 1
+#define MODELO_RIEGO_HUMEDAD_AMBIENTE 2
+#define MODELO_RIEGO_PRECIPITACION 3
+#define MODELO_RIEGO_PROB_LLUVIA 4
+#define MODELO_RIEGO_HORA 5
+#define MODELO_RIEGO_MES 6
+
+// Feature de cada nodo (-1: hoja)
+static const int8_t modelo_riego_feature[] = {
+  0, 0, -1, 5, 5, 0, -1, -1, 4, -1,
+  -1, -1, 6, -1, -1,
+};
+// Umbral de cada nodo: a la derecha si x > umbral. En las hojas, P(regar)
+static const float modelo_riego_umbral[] = {
+  39.9969368f, 20.0146713f, 1.0f, 9.5f, 4.5f, 20.2217464f,
+  0.808498204f, 0.0f, 49.75f, 0.999533951f, 0.0f, 0.0f,
+  1.5f, 0.0f, 0.0f,
+};
+static const uint16_t modelo_riego_izquierdo[] = {
+  1, 2, 0, 4, 5, 6, 0, 0, 9, 0,
+  0, 0, 13, 0, 0,
+};
+static const uint16_t modelo_riego_derecho[] = {
+  12, 3, 0, 11, 8, 7, 0, 0, 10, 0,
+  0, 0, 14, 0, 0,
+};
+// Nodo raiz de cada arbol
+static const uint16_t modelo_riego_raices[] = {
+  0,
+};
+
+// Probabilidad de regar: promedio de las hojas de todos los arboles
+static inline float modelo_riego_prob(const float x[MODELO_RIEGO_N_FEATURES]) {
+  float suma = 0.0f;
+  for (int a = 0; a < MODELO_RIEGO_N_ARBOLES; a++) {
+    uint16_t nodo = modelo_riego_raices[a];
+    while (modelo_riego_feature[nodo] >= 0) {
+      nodo = x[modelo_riego_feature[nodo]] > modelo_riego_umbral[nodo]
+                 ? modelo_riego_derecho[nodo]
+                 : modelo_riego_izquierdo[nodo];
+    }
+    suma += modelo_riego_umbral[nodo];
+  }
+  return suma / MODELO_RIEGO_N_ARBOLES;
+}
+
+// 1: REGAR, 0: NO_REGAR
+static inline int modelo_riego_regar(const float x[MODELO_RIEGO_N_FEATURES]) {
+  return modelo_riego_prob(x) > 0.5f;
+}
+
+#endif  // MODELO_RIEGO_H